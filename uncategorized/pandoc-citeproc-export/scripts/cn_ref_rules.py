@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""cn_ref_rules: 中文参考文献格式修正规则引擎（只依赖标准库）。
+
+fix_cn_refs.py / postprocess_docx.py 以及 SWUN 版式1 构建器
+（writing/swun-thesis-docx-banshi1/scripts/utils/cn_ref_rules.py，内容保持一致）共用。
+
+中文条目规则（与英文的差异）：
+  - et al. → 等
+  - 作者间逗号后无空格：肖恒辉,李炯城
+  - 标题与类型标识间无空格：研究[J]
+  - 类型标识后句点与期刊名间无空格：[J].电信科学
+  - 卷号与期号间无空格：29(01)
+  - 结尾使用半角句点 .
+
+实现要点：
+  - 全部规则预编译为一个交替正则，每个条目只做一次 finditer（线性时间）；
+    相邻规则的连锁效果（如 et al. 替换后去掉“等.”后的空格）已并入单条规则
+  - 与原先逐条 re.sub 的差异：作者逗号与卷期规则用前后断言，不消耗相邻字符，
+    连续出现时全部修正（“甲, 乙, 丙”→“甲,乙,丙”，原实现得到“甲,乙, 丙”；
+    “1 (2 (3”→“1(2(3”，原实现得到“1(2 (3”）
+  - 修正以 (起点, 终点, 替换文本) 编辑列表表示，逐个 w:t 节点原地拼接：
+    run 结构与格式（粗体、斜体）保持不变，替换文本写入匹配起点所在的节点
+  - 与 python-docx 的 paragraph.runs 一致，只处理段落的直接 w:r；
+    超链接（w:hyperlink）内的文本不参与判断，也不会被修改
+  - 只处理参考文献区域：先按段落样式（pandoc 的 Bibliography）定位，
+    没有样式时回退为首个 [N] 开头的顶层段落，之后只检查连续的条目段落
+  - 元素操作只用 iter / tag / text / get，ElementTree 与 lxml（python-docx）元素均可传入
+"""
+
+from __future__ import annotations
+
+import re
+from typing import Callable, Iterable, Iterator, NamedTuple, Union
+
+WML_NS = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+XML_SPACE = "{http://www.w3.org/XML/1998/namespace}space"
+
+# pandoc citeproc 为参考文献条目写出的段落样式 ID
+BIBLIOGRAPHY_STYLES = frozenset({"Bibliography"})
+
+_CJK = "\u4e00-\u9fff"
+_CJK_RE = re.compile(f"[{_CJK}]")
+REF_ENTRY_RE = re.compile(r"^\[\d+\]")
+_AUTHOR_RE = re.compile(r"\[\d+\]\s*(.+?)(?:\.|\[)")
+_WS_RE = re.compile(r"\s+")
+
+Replacement = Union[str, Callable[[str], str]]
+# 编辑：(起点, 终点, 替换文本)，偏移基于条目全文
+Edit = tuple[int, int, str]
+
+
+class Rule(NamedTuple):
+    """一条修正规则：pattern 不得包含命名分组；replacement 为字符串或 f(匹配文本)。"""
+
+    name: str
+    pattern: str
+    replacement: Replacement
+
+
+def _strip_ws(matched: str) -> str:
+    return _WS_RE.sub("", matched)
+
+
+CN_REF_RULES: tuple[Rule, ...] = (
+    # et al. → 等.，并去掉其后空格（等.标题）
+    Rule("et_al", r",\s*et al\.\s*", ",等."),
+    # 中文作者间逗号后去空格（仅中文字符之间）
+    Rule("cjk_author_comma", rf"(?<=[{_CJK}]),\s+(?=[{_CJK}])", ","),
+    # 等. 后去空格
+    Rule("deng_space", r"等\.\s+", "等."),
+    # 标题与 [J]/[C]/[D] 等之间、[J]. 之后去空格
+    Rule("type_id_space", r"\s*\[[A-Z]+\](?:\.\s+)?", _strip_ws),
+    # 卷号与期号间去空格：29 (01) → 29(01)
+    Rule("volume_issue", r"(?<=\d)\s+\((?=\d)", "("),
+    # 结尾全角句点 → 半角
+    Rule("final_period", r"．\Z", "."),
+)
+
+
+class RuleSet:
+    """预编译的规则集：所有规则合并为一个交替正则，一次扫描得到全部编辑。"""
+
+    def __init__(self, rules: Iterable[Rule]) -> None:
+        self.rules = tuple(rules)
+        self._replacements = {f"r{i}": rule.replacement for i, rule in enumerate(self.rules)}
+        self._regex = re.compile("|".join(
+            f"(?P<r{i}>{rule.pattern})" for i, rule in enumerate(self.rules)))
+
+    def edits(self, text: str) -> list[Edit]:
+        """text 中需要修改的片段（按位置递增，互不重叠）。"""
+        out: list[Edit] = []
+        for m in self._regex.finditer(text):
+            repl = self._replacements[m.lastgroup]
+            new = repl(m.group()) if callable(repl) else repl
+            if new != m.group():
+                out.append((m.start(), m.end(), new))
+        return out
+
+    def apply(self, text: str) -> str:
+        parts: list[str] = []
+        pos = 0
+        for start, end, new in self.edits(text):
+            parts.append(text[pos:start])
+            parts.append(new)
+            pos = end
+        parts.append(text[pos:])
+        return "".join(parts)
+
+
+DEFAULT_RULES = RuleSet(CN_REF_RULES)
+
+
+def has_chinese(text: str) -> bool:
+    """检测文本是否包含中文字符。"""
+    return _CJK_RE.search(text) is not None
+
+
+def is_chinese_ref(para_text: str) -> bool:
+    """判断参考文献条目是否为中文（基于作者区域）。"""
+    # 提取 [N] 之后、第一个 . 之前的作者区域
+    m = _AUTHOR_RE.match(para_text)
+    if m:
+        return has_chinese(m.group(1))
+    return has_chinese(para_text[:40])
+
+
+def fix_chinese_ref(text: str, rules: RuleSet = DEFAULT_RULES) -> str:
+    """对中文参考文献条目文本应用格式修正。"""
+    return rules.apply(text)
+
+
+# ---------------------------------------------------------------------------
+# 跨 run 原地修改
+# ---------------------------------------------------------------------------
+
+def splice_segments(segments: list[str], edits: list[Edit]) -> list[str]:
+    """把基于拼接全文的编辑应用到各片段上，返回新片段（一次线性扫描）。
+
+    跨片段的删除分别从所涉及的片段中删去；替换文本写入编辑起点所在的片段。
+    """
+    out: list[str] = []
+    it = iter(edits)
+    edit = next(it, None)
+    pos = 0
+    for seg in segments:
+        seg_end = pos + len(seg)
+        parts: list[str] = []
+        cur = pos
+        while edit is not None and edit[0] < seg_end:
+            start, end, new = edit
+            if start >= cur:
+                parts.append(seg[cur - pos:start - pos])
+                parts.append(new)
+            if end > seg_end:
+                # 删除延续到下一个片段；替换文本已写出
+                cur = seg_end
+                break
+            cur = max(cur, end)
+            edit = next(it, None)
+        parts.append(seg[cur - pos:])
+        out.append("".join(parts))
+        pos = seg_end
+    return out
+
+
+def _run_text_nodes(p, w_ns: str) -> list:
+    """段落直接 w:r 下的 w:t 节点（不含超链接等容器内的 run）。"""
+    w_r, w_t = f"{{{w_ns}}}r", f"{{{w_ns}}}t"
+    return [t for r in p if r.tag == w_r for t in r if t.tag == w_t]
+
+
+def fix_paragraph(p, w_ns: str = WML_NS, rules: RuleSet = DEFAULT_RULES) -> bool:
+    """原地修正一个参考文献段落（仅 [N] 开头的中文条目），返回是否有改动。"""
+    nodes = _run_text_nodes(p, w_ns)
+    segments = [t.text or "" for t in nodes]
+    full = "".join(segments)
+    if not REF_ENTRY_RE.match(full.strip()) or not is_chinese_ref(full.strip()):
+        return False
+    edits = rules.edits(full)
+    if not edits:
+        return False
+    for t, old, new in zip(nodes, segments, splice_segments(segments, edits)):
+        if new == old:
+            continue
+        t.text = new
+        if new != new.strip():
+            t.set(XML_SPACE, "preserve")
+    return True
+
+
+# ---------------------------------------------------------------------------
+# 参考文献区域
+# ---------------------------------------------------------------------------
+
+def _p_style(p, w_ns: str) -> str | None:
+    ppr = p.find(f"{{{w_ns}}}pPr")
+    if ppr is None:
+        return None
+    ps = ppr.find(f"{{{w_ns}}}pStyle")
+    return None if ps is None else ps.get(f"{{{w_ns}}}val")
+
+
+def _p_text(p, w_ns: str) -> str:
+    return "".join(t.text or "" for t in p.iter(f"{{{w_ns}}}t"))
+
+
+def bibliography_paragraphs(body, w_ns: str = WML_NS) -> Iterator:
+    """参考文献区域的顶层段落。
+
+    有 Bibliography 样式的段落时只返回这些段落（只比较样式 ID，不取文本）；
+    否则从首个 [N] 开头的段落起，返回其后连续的 [N] 条目（允许夹杂空段落）。
+    """
+    w_p = f"{{{w_ns}}}p"
+    paragraphs = [el for el in body if el.tag == w_p]
+    styled = [p for p in paragraphs if _p_style(p, w_ns) in BIBLIOGRAPHY_STYLES]
+    if styled:
+        yield from styled
+        return
+    started = False
+    for p in paragraphs:
+        text = _p_text(p, w_ns).strip()
+        if REF_ENTRY_RE.match(text):
+            started = True
+            yield p
+        elif started and text:
+            return
+
+
+def fix_bibliography(body, w_ns: str = WML_NS, rules: RuleSet = DEFAULT_RULES) -> int:
+    """修正 body 中全部中文参考文献条目，返回修改的条目数。"""
+    return sum(fix_paragraph(p, w_ns, rules) for p in bibliography_paragraphs(body, w_ns))
+
+
+__all__ = [
+    "BIBLIOGRAPHY_STYLES",
+    "CN_REF_RULES",
+    "DEFAULT_RULES",
+    "REF_ENTRY_RE",
+    "Rule",
+    "RuleSet",
+    "WML_NS",
+    "bibliography_paragraphs",
+    "fix_bibliography",
+    "fix_chinese_ref",
+    "fix_paragraph",
+    "has_chinese",
+    "is_chinese_ref",
+    "splice_segments",
+]
@@ -81,7 +81,7 @@ fi
 
 # ==================== 导出 ====================
 echo ""
-echo "[1/4] Pandoc 导出..."
+echo "[1/2] Pandoc 导出..."
 pandoc "${PANDOC_ARGS[@]}" 2>&1 | grep -i "error" && { echo "✗ Pandoc 导出失败"; exit 1; } || true
 
 if [ ! -f "$OUTPUT" ]; then
@@ -89,42 +89,17 @@ if [ ! -f "$OUTPUT" ]; then
   exit 1
 fi
 
-# ==================== 标题样式映射 ====================
-echo "[2/4] 标题样式映射..."
-STYLE_SCRIPT="$SKILL_DIR/scripts/fix_docx_styles.py"
-if [ -f "$STYLE_SCRIPT" ]; then
-  if [ -n "$REF_DOC" ]; then
-    python3 "$STYLE_SCRIPT" "$OUTPUT"
-  else
-    echo "  跳过（未指定 --ref-doc 模板）"
-  fi
-else
-  echo "  跳过（fix_docx_styles.py 不存在）"
-fi
-
-# ==================== 中英文后处理 ====================
-echo "[3/4] 中英文参考文献后处理..."
-CN_REFS_SCRIPT="$SKILL_DIR/scripts/fix_cn_refs.py"
-if [ ! -f "$CN_REFS_SCRIPT" ]; then
-  # fallback: 搜索项目目录下的同名脚本
-  LOCAL_SCRIPT=$(find . -maxdepth 2 -name "fix_cn_refs.py" -type f 2>/dev/null | head -1)
-  if [ -n "$LOCAL_SCRIPT" ]; then
-    CN_REFS_SCRIPT="$LOCAL_SCRIPT"
-    echo "  使用项目本地脚本: $CN_REFS_SCRIPT"
-  else
-    echo "  ⚠ fix_cn_refs.py 未找到，跳过中英文后处理"
-    CN_REFS_SCRIPT=""
-  fi
+# ==================== 后处理 ====================
+# 单遍完成：标题样式映射 + 中英文参考文献修正 + 参考文献条目计数（只读写一次 docx）
+echo "[2/2] 后处理（标题样式映射 / 中英文参考文献 / 条目计数）..."
+POST_ARGS=("$OUTPUT")
+if [ -z "$REF_DOC" ]; then
+  echo "  跳过标题样式映射（未指定 --ref-doc 模板）"
+  POST_ARGS+=(--no-style-map)
 fi
-if [ -n "$CN_REFS_SCRIPT" ]; then
-  python3 "$CN_REFS_SCRIPT" "$OUTPUT" || echo "  ⚠ 中英文后处理执行失败，继续验证"
-fi
-
-# ==================== 验证 ====================
-echo "[4/4] 验证输出..."
+python3 "$SKILL_DIR/scripts/postprocess_docx.py" "${POST_ARGS[@]}" \
+  || echo "  ⚠ 中英文后处理执行失败，继续验证"
 ls -lh "$OUTPUT"
-REF_COUNT=$(pandoc "$OUTPUT" -t plain 2>/dev/null | grep -cE '^\[[0-9]+\]' || true)
-echo "  参考文献条目数: $REF_COUNT"
 
 echo ""
 echo "=========================================="
@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""postprocess_docx: 单遍完成 pandoc 导出 docx 的全部后处理。
+
+合并 fix_docx_styles.py、fix_cn_refs.py 与 export.sh 的条目计数：
+  - 只解析一次 word/document.xml（lxml）
+  - 一次遍历同时完成标题样式 ID 映射、中文参考文献格式修正与参考文献条目计数
+  - 只写一次包：document.xml 重新压缩，其余成员按原始压缩字节直接拷贝（zip_writer.py）
+  - document.xml 无改动时不重写文件
+
+样式映射沿用 fix_docx_styles.DEFAULT_STYLE_MAP，中文修正使用 cn_ref_rules.py 的
+规则引擎（在 w:t 节点上原地修改，run 格式保持不变）；两个脚本仍可单独运行。
+
+用法:
+  python3 postprocess_docx.py <docx_file> [--output FILE] [--style-map JSON | --no-style-map]
+"""
+
+import argparse
+import json
+import re
+import shutil
+import sys
+import tempfile
+import zipfile
+from pathlib import Path
+
+from lxml import etree
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+from cn_ref_rules import fix_paragraph  # noqa: E402
+from zip_writer import write_docx_package  # noqa: E402
+from fix_docx_styles import DEFAULT_STYLE_MAP, WML_NS  # noqa: E402
+
+DOCUMENT_PART = "word/document.xml"
+
+W_P = f"{{{WML_NS}}}p"
+W_R = f"{{{WML_NS}}}r"
+W_T = f"{{{WML_NS}}}t"
+W_TAB = f"{{{WML_NS}}}tab"
+W_BR = f"{{{WML_NS}}}br"
+W_CR = f"{{{WML_NS}}}cr"
+W_BODY = f"{{{WML_NS}}}body"
+W_VAL = f"{{{WML_NS}}}val"
+W_PSTYLE = f"{{{WML_NS}}}pStyle"
+W_HYPERLINK = f"{{{WML_NS}}}hyperlink"
+
+REF_RE = re.compile(r'^\[\d+\]')
+
+
+# ==================== 段落文本（与 pandoc -t plain 的行首一致） ====================
+
+def run_text(run) -> str:
+    parts = []
+    for child in run:
+        if child.tag == W_T:
+            parts.append(child.text or "")
+        elif child.tag == W_TAB:
+            parts.append("\t")
+        elif child.tag in (W_BR, W_CR):
+            parts.append("\n")
+    return "".join(parts)
+
+
+def paragraph_text(p) -> str:
+    """段落文本：直接 run 与超链接内 run 按文档顺序拼接。"""
+    parts = []
+    for child in p:
+        if child.tag == W_R:
+            parts.append(run_text(child))
+        elif child.tag == W_HYPERLINK:
+            parts.extend(run_text(r) for r in child if r.tag == W_R)
+    return "".join(parts)
+
+
+# ==================== 单遍处理 ====================
+
+def process_tree(root, style_map: dict = None) -> dict:
+    """一次遍历 body：映射样式 ID、修正中文参考文献、统计参考文献条目。"""
+    stats = {"styles": 0, "cn_refs": 0, "refs": 0}
+    body = root.find(W_BODY)
+    if body is None:
+        return stats
+
+    cn_refs = []
+    for el in body.iter(W_P, W_PSTYLE):
+        if el.tag == W_PSTYLE:
+            val = el.get(W_VAL)
+            if style_map and val in style_map:
+                el.set(W_VAL, style_map[val])
+                stats["styles"] += 1
+            continue
+
+        full_text = paragraph_text(el).strip()
+        if not REF_RE.match(full_text):
+            continue
+        # 条目计数与 `pandoc -t plain | grep -cE '^\[[0-9]+\]'` 一致（含表格内段落）
+        stats["refs"] += 1
+        # 中文修正只作用于正文顶层段落（python-docx 的 doc.paragraphs）
+        if el.getparent() is body:
+            cn_refs.append(el)
+
+    # 改写 w:t 放在遍历之后，避免边遍历边修改子树
+    stats["cn_refs"] = sum(fix_paragraph(p) for p in cn_refs)
+    return stats
+
+
+# ==================== 写包 ====================
+
+def write_package(input_p: Path, output_path: str, document_xml: bytes):
+    """写出新包：document.xml 替换为 document_xml，其余成员按原始压缩字节拷贝。"""
+    tmp = tempfile.NamedTemporaryFile(delete=False, suffix=".docx", dir=input_p.parent)
+    tmp.close()
+    write_docx_package(input_p, Path(tmp.name), {DOCUMENT_PART: document_xml})
+    shutil.move(tmp.name, output_path)
+
+
+def postprocess(input_path: str, output_path: str = None,
+                style_map: dict = DEFAULT_STYLE_MAP) -> dict:
+    """读取 docx 一次，完成全部后处理并写出，返回统计。style_map=None 跳过样式映射。"""
+    if output_path is None:
+        output_path = input_path
+    input_p = Path(input_path)
+
+    with zipfile.ZipFile(input_p, "r") as zin:
+        with zin.open(DOCUMENT_PART) as fh:
+            tree = etree.parse(fh)
+
+    stats = process_tree(tree.getroot(), style_map)
+    if stats["styles"] or stats["cn_refs"]:
+        document_xml = etree.tostring(tree, xml_declaration=True,
+                                      encoding="UTF-8", standalone=True)
+        write_package(input_p, output_path, document_xml)
+    elif Path(output_path) != input_p:
+        shutil.copyfile(input_p, output_path)
+
+    if style_map is not None:
+        print(f"已映射 {stats['styles']} 个标题样式")
+    print(f"已修正 {stats['cn_refs']} 条中文参考文献")
+    print(f"  参考文献条目数: {stats['refs']}")
+    return stats
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="单遍后处理 pandoc 导出的 docx")
+    parser.add_argument("docx", nargs="?", default="main_pandoc.docx")
+    parser.add_argument("--output", default=None, help="输出路径（默认原地改写）")
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument("--style-map", default=None,
+                       help='样式映射 JSON，如 \'{"Heading1":"af9"}\'（默认内置映射）')
+    group.add_argument("--no-style-map", action="store_true",
+                       help="跳过标题样式映射（未指定模板时）")
+    args = parser.parse_args()
+
+    style_map = DEFAULT_STYLE_MAP
+    if args.no_style_map:
+        style_map = None
+    elif args.style_map:
+        style_map = json.loads(args.style_map)
+    postprocess(args.docx, args.output, style_map)
@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+DOCX 打包写出 — 未修改的成员按原始压缩字节直接拷贝（零重压缩）。
+
+后处理只改动少数 XML 部件（document / styles / numbering / settings / 页眉页脚等），
+图片、嵌入字体等大成员原样保留。zipfile 的 writestr 会先解压再以 DEFLATE
+重新压缩每个成员，对图片密集的论文，写包阶段的大部分时间都耗在重复压缩 PNG 上。
+
+write_docx_package 对未修改成员：
+- 从源文件定位本地文件头，按块（1 MiB）流式拷贝其后 compress_size 字节的压缩数据
+- 以相同的 compress_type / CRC / 大小写入新的本地文件头与中央目录项
+- 不解压、不校验、不重压缩，也不把整个成员读入内存
+只有 replacements 中的部件以 ZIP_DEFLATED（可配置 compresslevel）重新压缩。
+replacements 的值可以是字节，也可以是写出函数 fn(fh)（流式序列化大部件，
+见 PartStore.serialize_dirty(stream=True)）；两者写出的字节完全相同。
+重新压缩的部件沿用源成员的时间戳（新增部件为 1980-01-01），同一输入总是得到相同的包。
+
+加密、Zip64 或非 STORED/DEFLATED 的成员回退为边解压边重新压缩（同样按块流式）。
+重新压缩级别由 SWUN_ZIP_COMPRESSLEVEL（0-9，默认 zlib 级别 6）配置。
+
+只依赖标准库；uncategorized/pandoc-citeproc-export/scripts/zip_writer.py
+（postprocess_docx.py 使用）为同一文件的副本，内容保持一致。
+"""
+
+from __future__ import annotations
+
+import os
+import shutil
+import struct
+import zipfile
+from dataclasses import dataclass
+from pathlib import Path
+from typing import BinaryIO, Callable, Iterable, Mapping, Union
+
+# 本地文件头通用标志位
+_FLAG_ENCRYPTED = 0x01
+_FLAG_DATA_DESCRIPTOR = 0x08
+
+_RAW_COPY_TYPES = frozenset({zipfile.ZIP_STORED, zipfile.ZIP_DEFLATED})
+_ZIP64_LIMIT = (1 << 31) - 1
+
+_LOCAL_HEADER = struct.Struct("<4s2B4HL2L2H")
+_LOCAL_HEADER_MAGIC = b"PK\003\004"
+
+# 流式拷贝块大小；新增部件的固定时间戳（ZIP 可表示的最早时间）
+_CHUNK_SIZE = 1 << 20
+_DEFAULT_DATE_TIME = (1980, 1, 1, 0, 0, 0)
+
+# replacements 的值：字节，或向文件对象写出部件内容的函数
+PartWriter = Callable[[BinaryIO], None]
+PartContent = Union[bytes, PartWriter]
+
+
+COMPRESSLEVEL_ENV = "SWUN_ZIP_COMPRESSLEVEL"
+
+
+def compresslevel_from_env() -> int | None:
+    """解析 SWUN_ZIP_COMPRESSLEVEL：0-9 之外或无法解析时返回 None（zlib 默认）。"""
+    raw = os.environ.get(COMPRESSLEVEL_ENV, "").strip()
+    try:
+        level = int(raw)
+    except ValueError:
+        return None
+    return level if 0 <= level <= 9 else None
+
+
+@dataclass
+class PackageWriteStats:
+    """写包统计：原样拷贝 / 重新压缩的成员数与字节数。"""
+
+    raw_copied: int = 0
+    raw_bytes: int = 0
+    recompressed: int = 0
+    recompressed_bytes: int = 0
+
+
+def _can_copy_raw(info: zipfile.ZipInfo) -> bool:
+    return (
+        info.compress_type in _RAW_COPY_TYPES
+        and not info.flag_bits & _FLAG_ENCRYPTED
+        and info.file_size <= _ZIP64_LIMIT
+        and info.compress_size <= _ZIP64_LIMIT
+        and info.header_offset <= _ZIP64_LIMIT
+    )
+
+
+def _seek_raw_member(src: BinaryIO, info: zipfile.ZipInfo) -> None:
+    """把 src 定位到成员原始压缩字节的起点（跳过本地文件头及其文件名/扩展字段）。"""
+    src.seek(info.header_offset)
+    header = src.read(_LOCAL_HEADER.size)
+    if len(header) != _LOCAL_HEADER.size or header[:4] != _LOCAL_HEADER_MAGIC:
+        raise zipfile.BadZipFile(f"bad local file header: {info.filename}")
+    fields = _LOCAL_HEADER.unpack(header)
+    name_len, extra_len = fields[-2], fields[-1]
+    src.seek(name_len + extra_len, 1)
+
+
+def copy_member_raw(src: BinaryIO, zout: zipfile.ZipFile, info: zipfile.ZipInfo) -> int:
+    """把源 ZIP（以二进制文件对象 src 打开）的成员 info 原样写入 zout，返回压缩字节数。
+
+    新本地文件头直接携带 CRC 与大小，因此清除数据描述符标志位；
+    源扩展字段（时间戳等）不保留。压缩字节按 _CHUNK_SIZE 分块拷贝。
+    """
+    _seek_raw_member(src, info)
+    zinfo = zipfile.ZipInfo(info.filename, info.date_time)
+    zinfo.compress_type = info.compress_type
+    zinfo.flag_bits = info.flag_bits & ~_FLAG_DATA_DESCRIPTOR
+    zinfo.CRC = info.CRC
+    zinfo.compress_size = info.compress_size
+    zinfo.file_size = info.file_size
+    zinfo.external_attr = info.external_attr
+    zinfo.internal_attr = info.internal_attr
+    zinfo.create_system = info.create_system
+    zinfo.comment = info.comment
+
+    # 与 ZipFile.writestr 相同的登记步骤，只是跳过压缩器
+    fp = zout.fp
+    zinfo.header_offset = fp.tell()
+    fp.write(zinfo.FileHeader(zip64=False))
+    remaining = info.compress_size
+    while remaining:
+        chunk = src.read(min(remaining, _CHUNK_SIZE))
+        if not chunk:
+            raise zipfile.BadZipFile(f"truncated member: {info.filename}")
+        fp.write(chunk)
+        remaining -= len(chunk)
+    zout.filelist.append(zinfo)
+    zout.NameToInfo[zinfo.filename] = zinfo
+    zout.start_dir = fp.tell()
+    zout._didModify = True
+    return info.compress_size
+
+
+def _new_member_info(
+    name: str, date_time: tuple[int, ...], compresslevel: int | None
+) -> zipfile.ZipInfo:
+    """重新压缩成员的 ZipInfo（与 writestr(name, ...) 的字段一致，时间戳由调用方给定）。"""
+    zinfo = zipfile.ZipInfo(name, date_time)
+    zinfo.compress_type = zipfile.ZIP_DEFLATED
+    zinfo._compresslevel = compresslevel
+    zinfo.external_attr = 0o600 << 16
+    return zinfo
+
+
+def _write_member(zout: zipfile.ZipFile, zinfo: zipfile.ZipInfo, content: PartContent) -> int:
+    """写出一个重新压缩的成员，返回未压缩字节数。"""
+    if isinstance(content, (bytes, bytearray)):
+        zinfo.file_size = len(content)
+        with zout.open(zinfo, "w") as dest:
+            dest.write(content)
+    else:
+        with zout.open(zinfo, "w") as dest:
+            content(dest)
+    return zinfo.file_size
+
+
+def write_docx_package(
+    src_docx: Path,
+    dst_docx: Path,
+    replacements: Mapping[str, PartContent],
+    *,
+    members: Iterable[str] | None = None,
+    compresslevel: int | None = None,
+) -> PackageWriteStats:
+    """以 src_docx 为底写出 dst_docx。
+
+    members 为写出顺序（默认源包顺序）；其中出现在 replacements 的部件写入新内容，
+    其余原样拷贝压缩字节。replacements 中不在 members 里的部件（新建的页眉页脚等）
+    追加在末尾。compresslevel 仅作用于重新压缩的部件（None 为 zlib 默认级别）。
+    """
+    stats = PackageWriteStats()
+    with zipfile.ZipFile(src_docx, "r") as zin, open(src_docx, "rb") as src, \
+            zipfile.ZipFile(dst_docx, "w", compression=zipfile.ZIP_DEFLATED,
+                            compresslevel=compresslevel) as zout:
+        names = list(members) if members is not None else zin.namelist()
+        source = {info.filename: info for info in zin.infolist()}
+        written: set[str] = set()
+        for name in names:
+            if name in written:
+                continue
+            written.add(name)
+            info = source.get(name)
+            if name in replacements:
+                date_time = info.date_time if info is not None else _DEFAULT_DATE_TIME
+                zinfo = _new_member_info(name, date_time, compresslevel)
+                stats.recompressed_bytes += _write_member(zout, zinfo, replacements[name])
+                stats.recompressed += 1
+                continue
+            if info is None:
+                raise KeyError(f"There is no item named {name!r} in the archive")
+            if _can_copy_raw(info):
+                stats.raw_bytes += copy_member_raw(src, zout, info)
+                stats.raw_copied += 1
+            else:
+                zinfo = _new_member_info(name, info.date_time, compresslevel)
+                zinfo.file_size = info.file_size
+                with zin.open(info) as fin, zout.open(zinfo, "w") as dest:
+                    shutil.copyfileobj(fin, dest, _CHUNK_SIZE)
+                stats.recompressed += 1
+                stats.recompressed_bytes += zinfo.file_size
+        for name, content in replacements.items():
+            if name not in written:
+                zinfo = _new_member_info(name, _DEFAULT_DATE_TIME, compresslevel)
+                stats.recompressed_bytes += _write_member(zout, zinfo, content)
+                stats.recompressed += 1
+    return stats
+
+
+__all__ = [
+    "COMPRESSLEVEL_ENV",
+    "PackageWriteStats",
+    "PartContent",
+    "PartWriter",
+    "compresslevel_from_env",
+    "copy_member_raw",
+    "write_docx_package",
+]
@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+构建管线基准：在多种规模的合成论文上计时 LaTeX 解析、逐 pass 后处理与各 Phase 校验。
+
+使用方法：
+  python3 bench_pipeline.py [--sizes small,medium,large] [--repeat 3]
+                            [--json out.json] [--save-baseline base.json]
+                            [--baseline base.json] [--threshold 0.25] [--min-delta-ms 5]
+
+- 合成论文由 synthetic_thesis.py 生成（含预制 pandoc 中间 DOCX），无需 latexpand / pandoc。
+- 计时项（每项取 repeat 次中的最短耗时，单位 ms）：
+    latex.<阶段>          preprocess_latex / scan_latex_metadata / extract_caption_profiles
+    postprocess.total     关闭剖析时 _postprocess_docx 的总耗时
+    pass.<名称>           PassProfiler 记录的逐 pass / 阶段耗时（含剖析开销，跨次可比）
+    verify.phaseN         Phase 1-5 校验（Phase 6 依赖 LibreOffice 渲染，不计入）
+- 给定 --baseline 时，任一计时项超过基线 (1 + threshold) 倍且差值大于 min-delta-ms
+  即判为回退，打印明细并以退出码 1 结束。
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import importlib
+import io
+import json
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+if str(SCRIPT_DIR) not in sys.path:
+    sys.path.insert(0, str(SCRIPT_DIR))
+
+from synthetic_thesis import ThesisSpec, generate  # noqa: E402
+
+SIZES: dict[str, ThesisSpec] = {
+    "small": ThesisSpec(chapters=3, figures=6, tables=3, equations=12, references=20),
+    "medium": ThesisSpec(),
+    "large": ThesisSpec(chapters=10, figures=80, tables=40, equations=160, references=200,
+                        paragraphs_per_section=8),
+}
+VERIFY_PHASES = ("phase1_structure", "phase2_style", "phase3_caption",
+                 "phase4_crossref", "phase5_content")
+
+
+def _best_ms(fn: Callable[[], object], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return round(best * 1000, 2)
+
+
+def bench_size(spec: ThesisSpec, work_dir: Path, repeat: int = 3) -> dict[str, float]:
+    """在一份合成论文上计时全部阶段，返回 {计时项: 最短耗时 ms}。"""
+    if str(SCRIPT_DIR / "phase_checks") not in sys.path:
+        sys.path.insert(0, str(SCRIPT_DIR / "phase_checks"))
+    from modules import latex_parser, post_processor
+    from modules.caption_profile import extract_caption_profiles
+    from modules.pass_profiler import PassProfiler
+
+    paths = generate(work_dir, spec)
+    latex_parser.ROOT = work_dir
+    post_processor.TEMPLATE_DOCX = paths["template"]
+    flat = paths["flat_tex"].read_text(encoding="utf-8")
+    output = work_dir / "main_版式1.docx"
+    results: dict[str, float] = {}
+
+    # 构建管线大量打印进度行，计时期间静默
+    with contextlib.redirect_stdout(io.StringIO()):
+        pre = latex_parser.preprocess_latex(flat)
+        results["latex.preprocess_latex"] = _best_ms(lambda: latex_parser.preprocess_latex(flat), repeat)
+        meta = latex_parser.scan_latex_metadata(pre)
+        results["latex.scan_latex_metadata"] = _best_ms(lambda: latex_parser.scan_latex_metadata(pre), repeat)
+        profiles = extract_caption_profiles(paths["caption_profile"])
+        results["latex.extract_caption_profiles"] = _best_ms(
+            lambda: extract_caption_profiles(paths["caption_profile"]), repeat)
+
+        def postprocess(profiler: PassProfiler | None = None) -> None:
+            post_processor._postprocess_docx(
+                paths["intermediate"], output, meta.display_math_flags,
+                meta.keywords[0], meta.keywords[1], meta.caption_meta, profiles,
+                meta.table_col_specs, profiler=profiler,
+            )
+
+        results["postprocess.total"] = _best_ms(postprocess, repeat)
+
+        passes: dict[str, float] = {}
+        for _ in range(repeat):
+            profiler = PassProfiler(enabled=True)
+            profiler.start()
+            try:
+                postprocess(profiler)
+            finally:
+                profiler.stop()
+            for rec in profiler.records:
+                key = f"pass.{rec['name']}"
+                passes[key] = min(passes.get(key, float("inf")), rec["wall_ms"])
+        results.update({k: round(v, 2) for k, v in passes.items()})
+
+        for name in VERIFY_PHASES:
+            mod = importlib.import_module(name)
+            label = f"verify.{name.split('_', 1)[0]}"
+            results[label] = _best_ms(lambda mod=mod: mod.run(str(output)), repeat)
+    return results
+
+
+def run_benchmarks(sizes: list[str], repeat: int = 3) -> dict[str, dict[str, float]]:
+    """逐规模生成合成论文并计时，返回 {规模: {计时项: ms}}。"""
+    out: dict[str, dict[str, float]] = {}
+    for size in sizes:
+        with tempfile.TemporaryDirectory(prefix=f"swun-bench-{size}-") as tmp:
+            out[size] = bench_size(SIZES[size], Path(tmp), repeat)
+    return out
+
+
+def find_regressions(
+    current: dict[str, dict[str, float]],
+    baseline: dict[str, dict[str, float]],
+    *,
+    threshold: float = 0.25,
+    min_delta_ms: float = 5.0,
+) -> list[str]:
+    """对比基线，返回回退描述列表；只比较两边都有的 (规模, 计时项)。"""
+    regressions: list[str] = []
+    for size, stages in current.items():
+        base_stages = baseline.get(size, {})
+        for stage, ms in stages.items():
+            base = base_stages.get(stage)
+            if base is None:
+                continue
+            if ms > base * (1 + threshold) and ms - base > min_delta_ms:
+                pct = (ms / base - 1) * 100 if base else float("inf")
+                regressions.append(f"{size} {stage}: {base:.2f} ms -> {ms:.2f} ms (+{pct:.0f}%)")
+    return regressions
+
+
+def _print_table(results: dict[str, dict[str, float]]) -> None:
+    sizes = list(results)
+    stages = sorted({s for r in results.values() for s in r})
+    width = max(len(s) for s in stages)
+    print(f"{'stage':<{width}}  " + "  ".join(f"{s:>10}" for s in sizes))
+    for stage in stages:
+        cells = "  ".join(
+            f"{results[s][stage]:>10.2f}" if stage in results[s] else f"{'-':>10}" for s in sizes)
+        print(f"{stage:<{width}}  {cells}")
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", default="small,medium,large")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--json", type=Path, help="写出本次计时结果")
+    parser.add_argument("--save-baseline", type=Path, help="将本次结果保存为基线")
+    parser.add_argument("--baseline", type=Path, help="与基线对比，回退时退出码为 1")
+    parser.add_argument("--threshold", type=float, default=0.25, help="允许的相对增幅（默认 0.25）")
+    parser.add_argument("--min-delta-ms", type=float, default=5.0, help="低于该绝对差值的波动不计（默认 5ms）")
+    args = parser.parse_args(argv)
+
+    sizes = [s.strip() for s in args.sizes.split(",") if s.strip()]
+    unknown = [s for s in sizes if s not in SIZES]
+    if unknown:
+        parser.error(f"unknown size(s): {', '.join(unknown)} (choose from {', '.join(SIZES)})")
+
+    results = run_benchmarks(sizes, args.repeat)
+    _print_table(results)
+    payload = json.dumps(results, ensure_ascii=False, indent=2)
+    for path in (args.json, args.save_baseline):
+        if path is not None:
+            path.write_text(payload + "\n", encoding="utf-8")
+            print(f"  [bench] wrote {path}")
+
+    if args.baseline is not None:
+        baseline = json.loads(args.baseline.read_text(encoding="utf-8"))
+        regressions = find_regressions(
+            results, baseline, threshold=args.threshold, min_delta_ms=args.min_delta_ms)
+        if regressions:
+            print("BENCH: REGRESSION")
+            for line in regressions:
+                print(f"  [bench] {line}")
+            return 1
+        print("BENCH: OK")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+XML 后端基准：对同一份 DOCX 分别用 etree / lxml 后端计时各校验 handler。
+
+使用方法：
+  python3 bench_xml_backend.py /path/to/main_版式1.docx [--repeat 3]
+
+每个后端在独立子进程中运行（后端在 utils.xml_backend 导入时确定），
+输出每个 handler 的最短耗时（ms）及 lxml 相对 etree 的加速比。
+未安装 lxml 时只输出 etree 一列。
+"""
+
+from __future__ import annotations
+
+import argparse
+import importlib
+import json
+import os
+import subprocess
+import sys
+import time
+import zipfile
+from pathlib import Path
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+W_NS = {"w": "http://schemas.openxmlformats.org/wordprocessingml/2006/main"}
+
+
+def _bench(docx_path: str, repeat: int) -> dict[str, float]:
+    """在当前进程的后端下计时，返回 {handler: 最短耗时 ms}。"""
+    sys.path.insert(0, str(SCRIPT_DIR))
+    sys.path.insert(0, str(SCRIPT_DIR / "phase_checks"))
+    from utils.xml_backend import bookmarks_by_prefix, paragraphs_by_style, parse_xml
+
+    with zipfile.ZipFile(docx_path) as zf:
+        doc_bytes = zf.read("word/document.xml")
+    root = parse_xml(doc_bytes)
+
+    cases = {
+        "parse document.xml": lambda: parse_xml(doc_bytes),
+        "paragraphs_by_style(1/2/3)": lambda: paragraphs_by_style(root, W_NS, {"1", "2", "3"}),
+        "bookmarks_by_prefix(fig/tab)": lambda: bookmarks_by_prefix(root, W_NS, ("fig:", "tab:", "tbl:")),
+    }
+    for phase in ("phase1_structure", "phase2_style", "phase3_caption",
+                  "phase4_crossref", "phase5_content"):
+        mod = importlib.import_module(phase)
+        cases[phase] = lambda mod=mod: mod.run(docx_path)
+
+    results: dict[str, float] = {}
+    for name, fn in cases.items():
+        best = float("inf")
+        for _ in range(repeat):
+            t0 = time.perf_counter()
+            fn()
+            best = min(best, time.perf_counter() - t0)
+        results[name] = round(best * 1000, 2)
+    return results
+
+
+def _run_child(backend: str, docx_path: str, repeat: int) -> dict[str, float] | None:
+    env = dict(os.environ, SWUN_XML_BACKEND=backend)
+    proc = subprocess.run(
+        [sys.executable, __file__, docx_path, "--repeat", str(repeat), "--child"],
+        env=env, capture_output=True, text=True, check=False,
+    )
+    if proc.returncode != 0:
+        print(f"  [bench] {backend}: unavailable ({proc.stderr.strip().splitlines()[-1:]})")
+        return None
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("docx")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        print(json.dumps(_bench(args.docx, args.repeat)))
+        return 0
+
+    etree = _run_child("etree", args.docx, args.repeat)
+    lxml = _run_child("lxml", args.docx, args.repeat)
+    if etree is None:
+        return 1
+    print(f"{'handler':32} {'etree ms':>10} {'lxml ms':>10} {'speedup':>8}")
+    for name, base in etree.items():
+        fast = lxml.get(name) if lxml else None
+        ratio = f"{base / fast:.2f}x" if fast else "-"
+        print(f"{name:32} {base:>10.2f} {fast if fast is not None else '-':>10} {ratio:>8}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
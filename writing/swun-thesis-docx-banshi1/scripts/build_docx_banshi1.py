@@ -9,7 +9,11 @@ Compatibility note:
 
 from __future__ import annotations
 
+import sys
+
+import modules.batch_builder as _batch
 import modules.docx_builder as _core
+import modules.watch_mode as _watch
 
 # Re-export all implementation symbols, including private helpers used by
 # local regression scripts.
@@ -21,7 +25,16 @@ _core_main = _core.main
 
 
 def main(argv: list[str] | None = None) -> None:
-    """委托给核心模块的 main 函数，构建版式1 DOCX 文件。"""
+    """委托给核心模块的 main 函数，构建版式1 DOCX 文件。
+
+    含 --batch 时转交批量构建入口（modules/batch_builder.py），
+    含 --watch 时转交监视模式（modules/watch_mode.py）。
+    """
+    args = sys.argv[1:] if argv is None else argv
+    if _batch.BATCH_FLAG in args:
+        raise SystemExit(_batch.main(list(args)))
+    if _watch.WATCH_FLAG in args:
+        raise SystemExit(_watch.main(list(args)))
     _core_main(argv)
 
 
@@ -9,6 +9,12 @@ Gate-Loop Runner: 驱动 6 Phase DOCX 检测循环。
   --max-retry N   每个 Phase 最大重试次数（默认 2）
   --gate-file     Gate 记录文件路径（默认 thesis_dir/gates.md）
   --skip-build    跳过首次 DOCX 构建（假设已有最新 DOCX）
+  --parallel      DOCX 只解析一次（共享只读快照），各 Phase 首轮检查并发执行，
+                  渲染型 Phase 6 与 XML 检查重叠；结果仍按 Phase 顺序记录与判定
+                  （也可设 SWUN_GATE_PARALLEL=1）
+  --incremental   增量复检：各 Phase 读取的 OOXML 部件自上次 PASS 后未变化时
+                  直接复用 PASS；Phase 5 正文规则按章节分段缓存，只复检变化的章节
+                  （状态存于构建缓存目录；也可设 SWUN_GATE_INCREMENTAL=1）
 """
 from __future__ import annotations
 
@@ -18,6 +24,7 @@ import os
 import subprocess
 import sys
 import zipfile
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from pathlib import Path
 
@@ -39,7 +46,9 @@ PHASES = {
         "fix_target": "builder"},
     4: {"name": "交叉引用", "module": "phase4_crossref",
         "fix_target": "builder"},
-    5: {"name": "内容规范", "module": "phase5_content", "fix_target": "latex"},
+    # segments: 该 Phase 支持按章节分段缓存（verification.incremental.SegmentCache）
+    5: {"name": "内容规范", "module": "phase5_content", "fix_target": "latex",
+        "segments": True},
     6: {"name": "视觉审查", "module": "phase6_visual", "fix_target": "mixed"},
 }
 
@@ -116,11 +125,18 @@ def build_docx(thesis_dir: str) -> bool:
     return True
 
 
-def _run_phase_module(phase_id: int, docx_path: str) -> list[str]:
+def _load_phase_module(phase_id: int):
+    """导入 Phase 模块（phase_checks 目录只加入 sys.path 一次）。"""
+    phase_dir = str(SCRIPT_DIR / "phase_checks")
+    if phase_dir not in sys.path:
+        sys.path.insert(0, phase_dir)
+    return importlib.import_module(PHASES[phase_id]["module"])
+
+
+def _run_phase_module(
+        phase_id: int, docx_path: str, snapshot=None, segment_cache=None) -> list[str]:
     """加载 Phase 模块并执行检查，返回错误列表。"""
-    module_name = PHASES[phase_id]["module"]
-    sys.path.insert(0, str(SCRIPT_DIR / "phase_checks"))
-    mod = importlib.import_module(module_name)
+    mod = _load_phase_module(phase_id)
 
     if phase_id == 6:
         result = mod.run(docx_path)
@@ -128,13 +144,23 @@ def _run_phase_module(phase_id: int, docx_path: str) -> list[str]:
             return ["DOCX→PDF 转换失败，无法进行视觉审查（需要安装 soffice/libreoffice）"]
         return list(result.get("errors", []))
 
+    if segment_cache is not None and PHASES[phase_id].get("segments"):
+        return mod.run(docx_path, snapshot, segment_cache=segment_cache)
+    if snapshot is not None:
+        return mod.run(docx_path, snapshot)
     return mod.run(docx_path)
 
 
-def run_phase_check(phase_id: int, docx_path: str) -> list[str]:
-    """运行指定 Phase 的检查，返回错误列表。"""
+def run_phase_check(
+        phase_id: int, docx_path: str, snapshot=None, segment_cache=None) -> list[str]:
+    """运行指定 Phase 的检查，返回错误列表。
+
+    snapshot 为 verification.docx_snapshot.DocxSnapshot 时，Phase 1-5 复用其中
+    已解码 / 已解析的 document.xml，不再各自打开 ZIP；segment_cache 见
+    run_phase_check_incremental。
+    """
     try:
-        return _run_phase_module(phase_id, docx_path)
+        return _run_phase_module(phase_id, docx_path, snapshot, segment_cache)
     except FileNotFoundError:
         return [f"DOCX file not found: {docx_path}"]
     except zipfile.BadZipFile:
@@ -145,9 +171,111 @@ def run_phase_check(phase_id: int, docx_path: str) -> list[str]:
         return [f"phase {phase_id} runtime error: {exc}"]
 
 
+def _phase_extra_inputs(phase_id: int, docx_path: str) -> list[Path]:
+    """DOCX 之外影响 Phase 结果的输入文件（参与增量复检的键）。"""
+    if phase_id == 3:
+        from verification.report_generator import _resolve_caption_profile_docx
+        return [_resolve_caption_profile_docx(docx_path)]
+    if phase_id == 6:
+        return [Path(docx_path).parent / "main.pdf"]
+    return []
+
+
+def _check_phase_incremental(phase_id: int, docx_path: str, state, snapshot=None):
+    """增量检查但不落盘，返回 (错误列表, 分段缓存视图或 None)。
+
+    视图为本次检查私有（state.segment_cache() 的副本），由调用方在
+    全部检查结束后统一 state.save([...]) 合并，工作线程之间不共享可变状态。
+    """
+    key = state.phase_key(phase_id, docx_path, _phase_extra_inputs(phase_id, docx_path))
+    if state.reusable(phase_id, key):
+        state.set_note(phase_id, "reused last PASS (phase inputs unchanged)")
+        return [], None
+
+    view = state.segment_cache()
+    errors = run_phase_check(phase_id, docx_path, snapshot, segment_cache=view)
+    state.record(phase_id, key, errors)
+    state.set_note(phase_id, view.summary())
+    return errors, view
+
+
+def run_phase_check_incremental(
+        phase_id: int, docx_path: str, state, snapshot=None) -> list[str]:
+    """带增量状态的 run_phase_check（state 为 verification.incremental.IncrementalState）。
+
+    该 Phase 读取的部件与额外输入自上次 PASS 后均未变化时直接复用 PASS；
+    否则完整检查，支持分段缓存的规则只重新检查变化的章节分段。
+    复用情况记入 state.notes[phase_id]，供 Gate 记录引用。
+    """
+    errors, view = _check_phase_incremental(phase_id, docx_path, state, snapshot)
+    if view is not None:
+        state.save([view])
+    return errors
+
+
+def _check_phase(phase_id: int, docx_path: str, state=None, snapshot=None) -> list[str]:
+    if state is None:
+        return run_phase_check(phase_id, docx_path, snapshot)
+    return run_phase_check_incremental(phase_id, docx_path, state, snapshot)
+
+
+def run_phase_checks_parallel(
+        phase_ids: list[int], docx_path: str, state=None) -> dict[int, list[str]]:
+    """并发运行多个 Phase 的检查，返回按 phase_ids 顺序排列的错误表。
+
+    DOCX 只读取、解析一次，作为只读快照共享给 Phase 1-5；Phase 6（DOCX→PDF
+    渲染 + PDF 比对）最先提交，其外部进程等待与 XML 检查重叠。
+    使用线程池：快照中的解析树无需跨进程序列化，且 Phase 6 的主要耗时在子进程中。
+    state 非 None 时各 Phase 走增量复检：各线程使用私有分段缓存视图，
+    全部 Phase 结束后在主线程统一 state.save 一次。
+    """
+    # 在主线程预先导入全部 Phase 模块，避免工作线程并发 import
+    for phase_id in phase_ids:
+        try:
+            _load_phase_module(phase_id)
+        except ImportError:
+            pass  # 由 run_phase_check 记为该 Phase 的运行错误
+    from verification.docx_snapshot import DocxSnapshot
+
+    try:
+        snapshot = DocxSnapshot.load(docx_path)
+    except (FileNotFoundError, zipfile.BadZipFile, KeyError):
+        snapshot = None  # 交由各 Phase 按原有路径报告错误
+
+    submit_order = sorted(phase_ids, key=lambda pid: pid != 6)
+
+    def check(pid: int):
+        if state is None:
+            return run_phase_check(pid, docx_path, snapshot), None
+        return _check_phase_incremental(pid, docx_path, state, snapshot)
+
+    with ThreadPoolExecutor(max_workers=max(1, len(phase_ids))) as pool:
+        futures = {pid: pool.submit(check, pid) for pid in submit_order}
+        outcomes = {pid: futures[pid].result() for pid in phase_ids}
+    if state is not None:
+        state.save([view for _, view in outcomes.values() if view is not None])
+    return {pid: errors for pid, (errors, _) in outcomes.items()}
+
+
+def _build_profile_summary(docx_path: str) -> str | None:
+    """读取构建时 --profile-passes 生成的剖析报告摘要（不存在或与当前 DOCX 不符时返回 None）。"""
+    if str(SCRIPT_DIR) not in sys.path:
+        sys.path.insert(0, str(SCRIPT_DIR))
+    from modules.pass_profiler import load_profile_summary, profile_report_paths
+
+    docx = Path(docx_path)
+    report, _ = profile_report_paths(docx)
+    if not report.is_file():
+        return None
+    summary = load_profile_summary(report, docx=docx)
+    return f"{report.name}（{summary}）" if summary else None
+
+
 def write_gate_record(
-        gate_file: str, phase_id: int, errors: list[str]) -> None:
-    """写入 Gate 记录。"""
+        gate_file: str, phase_id: int, errors: list[str],
+        profile_summary: str | None = None,
+        reuse_note: str | None = None) -> None:
+    """写入 Gate 记录；profile_summary 为构建剖析报告摘要，reuse_note 为增量复检的复用说明（均可选）。"""
     script = GATE_LOOP_SCRIPTS / "write_gate_record.sh"
     if not script.exists():
         with open(gate_file, "a", encoding="utf-8") as f:
@@ -161,6 +289,10 @@ def write_gate_record(
                 f.write("- Must-Fix：\n")
                 for e in errors[:10]:
                     f.write(f"  - {e}\n")
+            if profile_summary:
+                f.write(f"- 构建 Profile：{profile_summary}\n")
+            if reuse_note:
+                f.write(f"- 增量复用：{reuse_note}\n")
             f.write("\n")
         return
 
@@ -171,6 +303,10 @@ def write_gate_record(
     major = str(len(errors) - int(critical))
     must_fix = "; ".join(errors[:5]) if errors else ""
     evidence = f"{len(errors)} errors found" if errors else "all checks passed"
+    if profile_summary:
+        evidence += f"; profile: {profile_summary}"
+    if reuse_note:
+        evidence += f"; reused: {reuse_note}"
 
     subprocess.run(
         [
@@ -205,8 +341,14 @@ def _run_single_phase(
     thesis_dir: str,
     max_retry: int,
     gate_file: str,
+    first_errors: list[str] | None = None,
+    state=None,
 ) -> bool:
-    """运行单个 Phase 的检测与重试，返回是否通过。"""
+    """运行单个 Phase 的检测与重试，返回是否通过。
+
+    first_errors 为并行模式下预先得到的首轮检查结果（None 表示现场检查）；
+    state 为增量复检状态（None 表示每次完整检查）。
+    """
     phase = PHASES[phase_id]
     print(f"\n{'=' * 60}")
     print(f"[PHASE {phase_id}] {phase['name']}")
@@ -214,8 +356,15 @@ def _run_single_phase(
 
     for attempt in range(1, max_retry + 1):
         print(f"  [Attempt {attempt}/{max_retry}]")
-        errors = run_phase_check(phase_id, docx_path)
-        write_gate_record(gate_file, phase_id, errors)
+        if attempt == 1 and first_errors is not None:
+            errors = first_errors
+        else:
+            errors = _check_phase(phase_id, docx_path, state)
+        reuse_note = state.note(phase_id) if state is not None else None
+        write_gate_record(
+            gate_file, phase_id, errors, _build_profile_summary(docx_path), reuse_note)
+        if reuse_note:
+            print(f"  [REUSE] {reuse_note}")
 
         if not errors:
             print(f"  [PHASE {phase_id}] PASS")
@@ -246,8 +395,16 @@ def run_gate_loop(
     max_retry: int,
     gate_file: str,
     skip_build: bool,
+    parallel: bool = False,
+    incremental: bool = False,
 ) -> dict[int, str]:
-    """运行 gate loop，返回每个 Phase 的结果。"""
+    """运行 gate loop，返回每个 Phase 的结果。
+
+    parallel 为 True 时先并发完成全部 Phase 的首轮检查，再按 Phase 顺序判定；
+    某 Phase 经修复重建后通过时，其余预先结果已过期，后续 Phase 改为现场检查。
+    incremental 为 True 时只复检自上次 PASS 以来发生变化的部件 / 章节
+    （构建缓存关闭时自动退化为完整检查）。
+    """
     docx_path = os.path.join(thesis_dir, "main_版式1.docx")
     results: dict[int, str] = {}
 
@@ -256,9 +413,25 @@ def run_gate_loop(
             print("[GATE-LOOP] 首次构建失败，终止。", file=sys.stderr)
             return {p: "SKIP" for p in phase_ids}
 
+    state = None
+    if incremental:
+        from verification.incremental import IncrementalState
+        state = IncrementalState.for_thesis(thesis_dir)
+        if state is None:
+            print("[GATE-LOOP] 构建缓存已关闭，增量复检不可用，改为完整检查")
+
+    precomputed: dict[int, list[str]] = {}
+    if parallel and len(phase_ids) > 1:
+        print(f"[GATE-LOOP] 并行检查 {len(phase_ids)} 个 Phase（共享 DOCX 快照）")
+        precomputed = run_phase_checks_parallel(phase_ids, docx_path, state)
+
     for phase_id in phase_ids:
+        first_errors = precomputed.pop(phase_id, None)
         passed = _run_single_phase(
-            phase_id, docx_path, thesis_dir, max_retry, gate_file)
+            phase_id, docx_path, thesis_dir, max_retry, gate_file, first_errors, state)
+        if passed and first_errors:
+            # 首轮失败后经修复并重新构建才通过：其余预先结果基于旧 DOCX
+            precomputed.clear()
         results[phase_id] = "PASS" if passed else "FAIL"
         if not passed:
             print(f"\n[GATE-LOOP] Phase {phase_id} 未通过，后续 Phase 跳过。")
@@ -280,6 +453,16 @@ def main() -> int:
         help="每个 Phase 最大重试次数（默认 2）")
     parser.add_argument("--gate-file", help="Gate 记录文件路径")
     parser.add_argument("--skip-build", action="store_true", help="跳过 DOCX 构建")
+    parser.add_argument(
+        "--parallel", action="store_true",
+        default=os.environ.get("SWUN_GATE_PARALLEL", "").strip().lower() in {
+            "1", "true", "yes", "on"},
+        help="共享 DOCX 快照并发运行各 Phase 首轮检查（或 SWUN_GATE_PARALLEL=1）")
+    parser.add_argument(
+        "--incremental", action="store_true",
+        default=os.environ.get("SWUN_GATE_INCREMENTAL", "").strip().lower() in {
+            "1", "true", "yes", "on"},
+        help="只复检自上次 PASS 以来变化的部件 / 章节（或 SWUN_GATE_INCREMENTAL=1）")
     args = parser.parse_args()
 
     thesis_dir = args.thesis_dir
@@ -298,7 +481,8 @@ def main() -> int:
         return 2
 
     results = run_gate_loop(
-        thesis_dir, phase_ids, args.max_retry, gate_file, args.skip_build)
+        thesis_dir, phase_ids, args.max_retry, gate_file, args.skip_build,
+        parallel=args.parallel, incremental=args.incremental)
 
     print(f"\n{'=' * 60}")
     print("[GATE-LOOP SUMMARY]")
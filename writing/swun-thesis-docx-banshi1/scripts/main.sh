@@ -34,6 +34,7 @@ MAPPING_JSON="$SCRIPT_DIR/style_id_mapping.json"
 
 if [[ -f "$REFERENCE_DOCX" ]] && [[ -f "$MAPPING_JSON" ]]; then
   echo "[1/6] Normalizing reference template style IDs..."
+  # 模板 / 映射 / 脚本未变化时直接复用缓存的规范化结果（asset-normalized-template）
   python3 "$SCRIPT_DIR/normalize_template.py" \
     --input "$REFERENCE_DOCX" \
     --mapping "$MAPPING_JSON" \
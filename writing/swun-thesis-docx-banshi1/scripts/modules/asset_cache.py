@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+模板资产缓存 — 源文档未变化时跳过模板 DOCX 的解析与规范化。
+
+每次构建原先都要：重新运行 normalize_template.py 生成规范化模板、打开模板
+document.xml 整篇解析以截取封面元素、整篇解析图表标题样例 DOCX 以提取
+CaptionFormatProfile。本模块把这些派生资产存入 BuildCache 的 ``asset-<name>``
+阶段，键为资产名 + 参数 + 各源文件 sha256 + 构建器源码摘要：
+
+- cached_asset   可 JSON 序列化的派生数据（封面元素片段、标题格式配置等），
+                 由调用方提供 dump / load 在对象与 JSON 之间转换
+- cached_file    派生文件（规范化模板 DOCX），输出仍为最新时不做任何操作，
+                 命中缓存时直接复制
+
+源文件摘要按 (size, mtime_ns) 记录在缓存目录的 asset-manifest.json 中：
+文件未被改动时直接复用记录的 sha256，不再读取整个 DOCX。
+同一进程内的重复请求直接命中内存表（调用方不得就地修改返回对象）。
+
+环境变量：SWUN_BUILD_CACHE / SWUN_BUILD_CACHE_DIR 与构建缓存相同。
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import xml.etree.ElementTree as ET
+from pathlib import Path
+from typing import Any, Callable, Iterable
+
+try:
+    from modules.build_cache import BuildCache, builder_source_digest, digest_parts
+except ModuleNotFoundError:  # pragma: no cover - pytest imports via scripts.modules
+    from scripts.modules.build_cache import BuildCache, builder_source_digest, digest_parts
+
+
+# 序列化格式变化时递增，使旧缓存失效
+ASSET_CACHE_VERSION = "1"
+ASSET_STAGE_PREFIX = "asset"
+# 清单放在缓存目录顶层（不在阶段子目录内），不受条目清理影响
+MANIFEST_NAME = "asset-manifest.json"
+
+# (阶段, 键) -> 反序列化后的资产
+_MEMO: dict[tuple[str, str], Any] = {}
+# 缓存目录 -> {绝对路径: [size, mtime_ns, sha256], "@阶段:输出路径": [键, sha256]}
+_MANIFESTS: dict[Path, dict[str, list]] = {}
+_MISSING = object()
+
+
+# ---------------------------------------------------------------------------
+# 源文件摘要
+# ---------------------------------------------------------------------------
+
+def _sha256_file(path: Path) -> str:
+    h = hashlib.sha256()
+    with path.open("rb") as fh:
+        for chunk in iter(lambda: fh.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _manifest(cache: BuildCache) -> dict[str, list]:
+    manifest = _MANIFESTS.get(cache.cache_dir)
+    if manifest is None:
+        try:
+            manifest = json.loads(
+                (cache.cache_dir / MANIFEST_NAME).read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            manifest = {}
+        if not isinstance(manifest, dict):
+            manifest = {}
+        _MANIFESTS[cache.cache_dir] = manifest
+    return manifest
+
+
+def _save_manifest(cache: BuildCache, manifest: dict[str, list]) -> None:
+    path = cache.cache_dir / MANIFEST_NAME
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_text(json.dumps(manifest, ensure_ascii=False, indent=1), encoding="utf-8")
+    tmp.replace(path)
+
+
+def source_digest(path: str | Path, cache: BuildCache | None = None) -> str:
+    """源文件内容 sha256；(size, mtime_ns) 与清单记录一致时直接复用记录值。
+
+    缺失文件返回 ``<missing>``；cache 为 None 或已关闭时每次都读取文件。
+    """
+    path = Path(path).resolve()
+    try:
+        st = path.stat()
+    except OSError:
+        return "<missing>"
+    stamp = [st.st_size, st.st_mtime_ns]
+    if cache is None or not cache.enabled:
+        return _sha256_file(path)
+
+    manifest = _manifest(cache)
+    record = manifest.get(str(path))
+    if isinstance(record, list) and len(record) == 3 and record[:2] == stamp:
+        return record[2]
+    sha = _sha256_file(path)
+    manifest[str(path)] = [*stamp, sha]
+    _save_manifest(cache, manifest)
+    return sha
+
+
+def asset_key(
+    name: str,
+    sources: Iterable[str | Path],
+    params: str = "",
+    cache: BuildCache | None = None,
+) -> str:
+    """资产缓存键：版本 + 资产名 + 参数 + 构建器源码 + 各源文件内容摘要。"""
+    return digest_parts(
+        ASSET_CACHE_VERSION,
+        name,
+        params,
+        builder_source_digest(),
+        *(source_digest(p, cache) for p in sources),
+    )
+
+
+# ---------------------------------------------------------------------------
+# 资产存取
+# ---------------------------------------------------------------------------
+
+def cached_asset(
+    name: str,
+    sources: Iterable[str | Path],
+    build: Callable[[], Any],
+    *,
+    dump: Callable[[Any], Any],
+    load: Callable[[Any], Any],
+    params: str = "",
+    cache: BuildCache | None = None,
+) -> Any:
+    """返回 build() 的结果；源文件未变化时由缓存的 JSON 经 load 还原。
+
+    dump 把 build() 的返回值转为可 JSON 序列化的数据，load 为其逆变换；
+    build 抛出的异常原样传播且不写入缓存。损坏的缓存条目视为未命中。
+    """
+    stage = f"{ASSET_STAGE_PREFIX}-{name}"
+    key = asset_key(name, sources, params, cache)
+    if (stage, key) in _MEMO:
+        return _MEMO[(stage, key)]
+
+    value: Any = _MISSING
+    text = cache.fetch_text(stage, key, suffix=".json") if cache is not None else None
+    if text is not None:
+        try:
+            value = load(json.loads(text))
+        except (ValueError, KeyError, TypeError, ET.ParseError):
+            value = _MISSING
+    if value is _MISSING:
+        value = build()
+        if cache is not None:
+            cache.store_text(
+                stage, key, json.dumps(dump(value), ensure_ascii=False), suffix=".json")
+    _MEMO[(stage, key)] = value
+    return value
+
+
+def cached_file(
+    name: str,
+    sources: Iterable[str | Path],
+    dest: str | Path,
+    build: Callable[[Path], None],
+    *,
+    params: str = "",
+    cache: BuildCache | None = None,
+) -> bool:
+    """确保 dest 为 build(dest) 的产物；无需重建时返回 True。
+
+    dest 仍是上次为同一键产出的文件（清单中 size / mtime / sha256 均一致）时
+    不做任何操作，以免复制刷新 mtime 使下游按 dest 计算的摘要失去快速路径；
+    否则命中缓存则复制，未命中则构建并写入缓存。
+    """
+    dest = Path(dest)
+    stage = f"{ASSET_STAGE_PREFIX}-{name}"
+    key = asset_key(name, sources, params, cache)
+    if cache is None or not cache.enabled:
+        build(dest)
+        return False
+
+    manifest = _manifest(cache)
+    out_id = f"@{stage}:{dest.resolve()}"
+    record = manifest.get(out_id)
+    if (isinstance(record, list) and record[:1] == [key] and dest.is_file()
+            and source_digest(dest, cache) == record[1]):
+        return True
+
+    hit = cache.fetch(stage, key, dest, suffix=dest.suffix)
+    if not hit:
+        build(dest)
+        cache.store(stage, key, dest, suffix=dest.suffix)
+    manifest[out_id] = [key, source_digest(dest, cache)]
+    _save_manifest(cache, manifest)
+    return hit
+
+
+def clear_memo() -> None:
+    """清空进程内资产表与摘要清单（测试用）。"""
+    _MEMO.clear()
+    _MANIFESTS.clear()
+
+
+__all__ = [
+    "ASSET_CACHE_VERSION",
+    "ASSET_STAGE_PREFIX",
+    "MANIFEST_NAME",
+    "source_digest",
+    "asset_key",
+    "cached_asset",
+    "cached_file",
+    "clear_memo",
+]
@@ -0,0 +1,283 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+批量构建 — 常驻预热的工作进程池，并发构建多篇论文的版式1 DOCX。
+
+使用方法：
+  python3 build_docx_banshi1.py --batch dirs.txt [--jobs N] [--memory-mib M]
+                                [--per-build-mib 1024] [--summary out.json]
+
+- dirs.txt 每行一个论文目录（相对路径以 dirs.txt 所在目录为基准），空行与 # 注释忽略
+- 工作进程启动时预先导入构建模块，并预热进程内资产表：构建器源码摘要、模板封面片段、
+  各论文的图表标题格式配置（见 modules/asset_cache.py）；之后每篇论文复用同一进程，
+  不再重复导入与解析模板
+- 并发数 = min(--jobs（默认 CPU 数）, 论文数, --memory-mib // --per-build-mib)；
+  未给出 --memory-mib 时取当前可用物理内存
+- 每篇论文的构建输出（含 pandoc 等子进程）写入 <论文目录>/main_版式1.build.log
+- 结束时打印逐篇状态 / 耗时表，并写出 JSON 汇总（默认 dirs.txt 旁的 batch-summary.json）；
+  有失败时退出码为 1
+
+单篇构建入口 main(argv) 不受影响；pandoc 仍按篇以子进程运行（构建缓存照常生效）。
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import json
+import multiprocessing
+import os
+import sys
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Callable, Iterator
+
+BATCH_FLAG = "--batch"
+DEFAULT_PER_BUILD_MIB = 1024
+SUMMARY_NAME = "batch-summary.json"
+CAPTION_PROFILE_NAME = "网络与信息安全_高春琴.docx"
+
+
+@dataclass
+class BatchResult:
+    """单篇论文的构建结果。"""
+
+    thesis: str
+    status: str  # "ok" | "failed"
+    seconds: float
+    output: str | None = None
+    log: str | None = None
+    error: str | None = None
+    worker: int | None = None
+
+
+# ---------------------------------------------------------------------------
+# 任务清单与并发预算
+# ---------------------------------------------------------------------------
+
+def read_batch_file(path: Path) -> list[Path]:
+    """读取论文目录清单（去重、保持顺序）。"""
+    base = path.resolve().parent
+    seen: dict[Path, None] = {}
+    for line in path.read_text(encoding="utf-8").splitlines():
+        entry = line.split("#", 1)[0].strip()
+        if not entry:
+            continue
+        thesis = Path(entry).expanduser()
+        if not thesis.is_absolute():
+            thesis = base / thesis
+        seen.setdefault(thesis.resolve(), None)
+    return list(seen)
+
+
+def available_memory_mib() -> int | None:
+    """当前可用物理内存（MiB）；平台不支持时返回 None。"""
+    try:
+        pages = os.sysconf("SC_AVPHYS_PAGES")
+        page_size = os.sysconf("SC_PAGE_SIZE")
+    except (AttributeError, ValueError, OSError):
+        return None
+    if pages <= 0 or page_size <= 0:
+        return None
+    return pages * page_size // (1 << 20)
+
+
+def plan_workers(
+    n_theses: int,
+    jobs: int | None = None,
+    memory_mib: int | None = None,
+    per_build_mib: int = DEFAULT_PER_BUILD_MIB,
+) -> int:
+    """按 CPU 与内存预算计算工作进程数（至少 1）。"""
+    workers = jobs if jobs and jobs > 0 else (os.cpu_count() or 1)
+    workers = min(workers, max(n_theses, 1))
+    if memory_mib is None:
+        memory_mib = available_memory_mib()
+    if memory_mib is not None and per_build_mib > 0:
+        workers = min(workers, max(memory_mib // per_build_mib, 1))
+    return max(workers, 1)
+
+
+def _caption_profile_for(thesis: Path) -> Path:
+    override = os.environ.get("SWUN_CAPTION_PROFILE_DOCX")
+    return Path(override).expanduser() if override else thesis / CAPTION_PROFILE_NAME
+
+
+# ---------------------------------------------------------------------------
+# 工作进程
+# ---------------------------------------------------------------------------
+
+def _warm_worker(caption_profiles: list[str]) -> None:
+    """进程池初始化：导入构建模块并预热进程内资产表（失败留给构建时报告）。"""
+    try:
+        from modules import post_processor
+        from modules.build_cache import builder_source_digest
+        from modules.latex_parser import load_caption_profiles
+        from modules.template_loader import load_template_cover_elements
+    except ModuleNotFoundError:  # pragma: no cover - pytest imports via scripts.modules
+        from scripts.modules import post_processor
+        from scripts.modules.build_cache import builder_source_digest
+        from scripts.modules.latex_parser import load_caption_profiles
+        from scripts.modules.template_loader import load_template_cover_elements
+
+    builder_source_digest()
+    with contextlib.suppress(Exception):
+        if post_processor.TEMPLATE_DOCX.exists():
+            load_template_cover_elements(post_processor.TEMPLATE_DOCX)
+    for profile in caption_profiles:
+        with contextlib.suppress(Exception):
+            load_caption_profiles(Path(profile))
+
+
+def _default_build(thesis: Path) -> None:
+    try:
+        from modules import post_processor
+    except ModuleNotFoundError:  # pragma: no cover - pytest imports via scripts.modules
+        from scripts.modules import post_processor
+    post_processor.main([str(thesis)])
+
+
+def build_log_path(thesis: Path) -> Path:
+    return thesis / "main_版式1.build.log"
+
+
+@contextlib.contextmanager
+def _redirect_output(log_path: Path) -> Iterator[None]:
+    """在文件描述符层面把 stdout / stderr 重定向到日志（覆盖 pandoc 等子进程输出）。"""
+    sys.stdout.flush()
+    sys.stderr.flush()
+    saved = (os.dup(1), os.dup(2))
+    with open(log_path, "w", encoding="utf-8") as log:
+        os.dup2(log.fileno(), 1)
+        os.dup2(log.fileno(), 2)
+        try:
+            yield
+        finally:
+            sys.stdout.flush()
+            sys.stderr.flush()
+            os.dup2(saved[0], 1)
+            os.dup2(saved[1], 2)
+            os.close(saved[0])
+            os.close(saved[1])
+
+
+def _run_one(thesis: str, build: Callable[[Path], None] | None) -> BatchResult:
+    path = Path(thesis)
+    log = build_log_path(path) if path.is_dir() else None
+    t0 = time.perf_counter()
+    status, error = "ok", None
+    try:
+        with _redirect_output(log) if log is not None else contextlib.nullcontext():
+            if not path.is_dir():
+                raise FileNotFoundError(f"thesis directory not found: {path}")
+            (build or _default_build)(path)
+    except (Exception, SystemExit) as exc:
+        status = "failed"
+        error = str(exc) or type(exc).__name__
+        if log is not None and not isinstance(exc, SystemExit):
+            with open(log, "a", encoding="utf-8") as fh:
+                fh.write(traceback.format_exc())
+    output = path / "main_版式1.docx"
+    return BatchResult(
+        thesis=str(path),
+        status=status,
+        seconds=round(time.perf_counter() - t0, 2),
+        output=str(output) if status == "ok" and output.exists() else None,
+        log=str(log) if log is not None else None,
+        error=error,
+        worker=os.getpid(),
+    )
+
+
+# ---------------------------------------------------------------------------
+# 批量调度
+# ---------------------------------------------------------------------------
+
+def run_batch(
+    theses: list[Path],
+    *,
+    workers: int = 1,
+    build: Callable[[Path], None] | None = None,
+) -> list[BatchResult]:
+    """在 workers 个预热工作进程中构建各论文，按清单顺序返回结果。
+
+    build 为单篇构建函数（默认 post_processor.main），须可被 pickle（模块级函数）。
+    """
+    profiles = sorted({str(p) for p in map(_caption_profile_for, theses) if p.exists()})
+    # spawn：工作进程不继承父进程的线程 / 锁状态，各平台行为一致
+    ctx = multiprocessing.get_context("spawn")
+    results: dict[str, BatchResult] = {}
+    with ProcessPoolExecutor(max_workers=workers, mp_context=ctx,
+                             initializer=_warm_worker, initargs=(profiles,)) as pool:
+        futures = {pool.submit(_run_one, str(t), build): str(t) for t in theses}
+        for fut in as_completed(futures):
+            res = fut.result()
+            results[futures[fut]] = res
+            print(f"  [batch] {res.status:<6} {res.seconds:>8.2f}s  {res.thesis}", flush=True)
+    return [results[str(t)] for t in theses]
+
+
+def write_summary(results: list[BatchResult], path: Path, wall_seconds: float) -> None:
+    payload = {
+        "total": len(results),
+        "ok": sum(r.status == "ok" for r in results),
+        "failed": sum(r.status != "ok" for r in results),
+        "wall_seconds": round(wall_seconds, 2),
+        "results": [asdict(r) for r in results],
+    }
+    path.write_text(json.dumps(payload, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
+
+
+def _print_summary(results: list[BatchResult]) -> None:
+    width = max((len(r.thesis) for r in results), default=6)
+    print(f"{'thesis':<{width}}  {'status':<6}  {'seconds':>8}  error")
+    for r in results:
+        print(f"{r.thesis:<{width}}  {r.status:<6}  {r.seconds:>8.2f}  {r.error or ''}")
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="build_docx_banshi1.py --batch",
+                                     description=__doc__.splitlines()[1])
+    parser.add_argument(BATCH_FLAG, dest="batch", type=Path, required=True,
+                        help="论文目录清单（每行一个）")
+    parser.add_argument("--jobs", type=int, default=None, help="最大并发数（默认 CPU 数）")
+    parser.add_argument("--memory-mib", type=int, default=None,
+                        help="内存预算（MiB，默认当前可用物理内存）")
+    parser.add_argument("--per-build-mib", type=int, default=DEFAULT_PER_BUILD_MIB,
+                        help=f"单篇构建的内存估计（MiB，默认 {DEFAULT_PER_BUILD_MIB}）")
+    parser.add_argument("--summary", type=Path, default=None,
+                        help=f"JSON 汇总路径（默认清单旁的 {SUMMARY_NAME}）")
+    args = parser.parse_args(argv)
+
+    theses = read_batch_file(args.batch)
+    if not theses:
+        parser.error(f"no thesis directories listed in {args.batch}")
+    workers = plan_workers(len(theses), args.jobs, args.memory_mib, args.per_build_mib)
+    print(f"  [batch] {len(theses)} theses, {workers} worker(s)")
+
+    t0 = time.perf_counter()
+    results = run_batch(theses, workers=workers)
+    wall = time.perf_counter() - t0
+
+    _print_summary(results)
+    summary = args.summary or args.batch.resolve().parent / SUMMARY_NAME
+    write_summary(results, summary, wall)
+    failed = sum(r.status != "ok" for r in results)
+    print(f"BATCH: {len(results) - failed}/{len(results)} ok in {wall:.1f}s ({summary})")
+    return 1 if failed else 0
+
+
+__all__ = [
+    "BATCH_FLAG",
+    "BatchResult",
+    "available_memory_mib",
+    "build_log_path",
+    "main",
+    "plan_workers",
+    "read_batch_file",
+    "run_batch",
+    "write_summary",
+]
@@ -0,0 +1,269 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+body 顶层块索引 — 一次构建、多个 handler 共享的文档结构视图。
+
+摘要分节、关键词、目录、图表锚点定位、后置章节重排等 handler 原先各自
+反复 ``list(body)`` 并对每个段落重新计算 p_text / p_style。BodyIndex 按元素
+缓存这些块属性：
+
+- text / style / heading_level    段落文本、样式 ID、标题级别
+- has_drawing / has_sectPr        是否含图片、是否为分节段落
+- anchors                         块内 fig:/tab:/tbl: 书签名（去重、保序）
+
+并在其上派生正文范围（front / main / back 边界）与块 -> 章号映射。
+
+一致性约定：
+- 通过 insert / remove / append 增删顶层块时索引增量更新
+  （块属性缓存保留，只重算位置与正文边界）
+- 直接修改 body 或块内文本/样式后必须调用 invalidate()；
+  run_pass_pipeline 在每个非 index_safe 步骤之后自动调用
+"""
+
+from __future__ import annotations
+
+import re
+import xml.etree.ElementTree as ET
+from dataclasses import dataclass
+
+try:
+    from utils.ooxml import qn as _qn
+except ModuleNotFoundError:  # pragma: no cover - pytest imports via scripts.modules
+    from scripts.utils.ooxml import qn as _qn
+
+try:
+    from modules.pass_engine import MAIN_BODY_EXCLUDED_H1, MAIN_BODY_STOP_H1
+except ModuleNotFoundError:  # pragma: no cover - pytest imports via scripts.modules
+    from scripts.modules.pass_engine import MAIN_BODY_EXCLUDED_H1, MAIN_BODY_STOP_H1
+
+
+ANCHOR_PREFIXES = ("fig:", "tab:", "tbl:")
+
+_HEADING_STYLE_RE = re.compile(r"^(?:[Hh]eading\s*)?([1-9])$")
+
+
+@dataclass(frozen=True)
+class BlockInfo:
+    """单个顶层块的缓存属性（非段落块的 text 为空串、style 为 None）。"""
+
+    is_p: bool
+    text: str
+    style: str | None
+    heading_level: int | None
+    has_drawing: bool
+    has_sectPr: bool
+    anchors: tuple[str, ...]
+
+
+class BodyIndex:
+    """w:body 顶层块索引。"""
+
+    def __init__(self, ns: dict[str, str], body: ET.Element) -> None:
+        self.ns = ns
+        self.body = body
+        self._w_p = _qn(ns, "w", "p")
+        self._w_t = _qn(ns, "w", "t")
+        self._w_pPr = _qn(ns, "w", "pPr")
+        self._w_pStyle = _qn(ns, "w", "pStyle")
+        self._w_val = _qn(ns, "w", "val")
+        self._w_sectPr = _qn(ns, "w", "sectPr")
+        self._w_name = _qn(ns, "w", "name")
+        self._drawing_tags = {_qn(ns, "w", "drawing"), _qn(ns, "w", "pict")}
+        self._w_bookmarkStart = _qn(ns, "w", "bookmarkStart")
+
+        self._blocks: list[ET.Element] | None = None
+        # id(el) -> (el, info)；持有元素引用，保证 id 在缓存期间不被复用
+        self._info: dict[int, tuple[ET.Element, BlockInfo]] = {}
+        self._positions: dict[int, int] | None = None
+        self._main: tuple[int, int, dict[int, int]] | None = None
+
+    # -- 同步 ---------------------------------------------------------------
+
+    @property
+    def blocks(self) -> list[ET.Element]:
+        if self._blocks is None:
+            self._blocks = list(self.body)
+        return self._blocks
+
+    def invalidate(self) -> None:
+        """丢弃全部缓存（body 被外部直接修改后调用）。"""
+        self._blocks = None
+        self._info.clear()
+        self._structure_changed()
+
+    def _structure_changed(self) -> None:
+        self._positions = None
+        self._main = None
+
+    def __len__(self) -> int:
+        return len(self.blocks)
+
+    def __getitem__(self, i: int) -> ET.Element:
+        return self.blocks[i]
+
+    def index_of(self, el: ET.Element) -> int:
+        if self._positions is None:
+            self._positions = {id(b): i for i, b in enumerate(self.blocks)}
+        return self._positions[id(el)]
+
+    # -- 增删 ---------------------------------------------------------------
+
+    def insert(self, i: int, el: ET.Element) -> None:
+        self.body.insert(i, el)
+        if self._blocks is not None:
+            self._blocks.insert(i, el)  # 与 Element.insert 的越界/负下标语义一致
+        self._structure_changed()
+
+    def append(self, el: ET.Element) -> None:
+        self.insert(len(self), el)
+
+    def remove(self, el: ET.Element) -> None:
+        self.body.remove(el)
+        if self._blocks is not None:
+            self._blocks.pop(self.index_of(el))
+        self._info.pop(id(el), None)
+        self._structure_changed()
+
+    # -- 块属性 -------------------------------------------------------------
+
+    def info(self, i: int) -> BlockInfo:
+        el = self.blocks[i]
+        cached = self._info.get(id(el))
+        if cached is not None and cached[0] is el:
+            return cached[1]
+        info = self._compute(el)
+        self._info[id(el)] = (el, info)
+        return info
+
+    def _compute(self, el: ET.Element) -> BlockInfo:
+        is_p = el.tag == self._w_p
+        style = None
+        has_sectPr = False
+        if is_p:
+            pPr = el.find(self._w_pPr)
+            if pPr is not None:
+                ps = pPr.find(self._w_pStyle)
+                if ps is not None:
+                    style = ps.get(self._w_val)
+                has_sectPr = pPr.find(self._w_sectPr) is not None
+
+        parts: list[str] = []
+        has_drawing = False
+        anchors: list[str] = []
+        names = [el] if el.tag == self._w_bookmarkStart else []
+        # 一次遍历同时收集文本、图片与书签
+        for node in el.iter():
+            tag = node.tag
+            if tag == self._w_t:
+                if is_p and node.text:
+                    parts.append(node.text)
+            elif tag in self._drawing_tags:
+                has_drawing = True
+            elif tag == self._w_bookmarkStart and node is not el:
+                names.append(node)
+        for bm in names:
+            name = (bm.get(self._w_name) or bm.get("name") or "").strip()
+            if name.startswith(ANCHOR_PREFIXES) and name not in anchors:
+                anchors.append(name)
+
+        level = None
+        if style is not None:
+            m = _HEADING_STYLE_RE.match(style)
+            if m:
+                level = int(m.group(1))
+        return BlockInfo(
+            is_p=is_p,
+            text="".join(parts),
+            style=style,
+            heading_level=level,
+            has_drawing=has_drawing,
+            has_sectPr=has_sectPr,
+            anchors=tuple(anchors),
+        )
+
+    def is_p(self, i: int) -> bool:
+        return self.info(i).is_p
+
+    def text(self, i: int) -> str:
+        return self.info(i).text
+
+    def style(self, i: int) -> str | None:
+        return self.info(i).style
+
+    # -- 查询 ---------------------------------------------------------------
+
+    def find_h1(self, title: str, start: int = 0) -> int | None:
+        """返回 start 起首个样式为 ``1`` 且文本为 title 的段落下标。"""
+        for i in range(max(start, 0), len(self)):
+            info = self.info(i)
+            if info.is_p and info.style == "1" and info.text.strip() == title:
+                return i
+        return None
+
+    def first_h1_not_in(
+        self, excluded: set[str] | frozenset[str], start: int = 0
+    ) -> int | None:
+        """返回 start 起首个文本非空且不在 excluded 中的一级标题（样式 ``1``）下标。"""
+        for i in range(max(start, 0), len(self)):
+            info = self.info(i)
+            if not (info.is_p and info.style == "1"):
+                continue
+            txt = info.text.strip()
+            if txt and txt not in excluded:
+                return i
+        return None
+
+    def first_nonempty_para(self, start: int, end: int | None = None) -> int | None:
+        lim = len(self) if end is None else min(end, len(self))
+        for i in range(max(start, 0), lim):
+            info = self.info(i)
+            if info.is_p and info.text.strip():
+                return i
+        return None
+
+    def _main_body(self) -> tuple[int, int, dict[int, int]]:
+        if self._main is not None:
+            return self._main
+        n = len(self)
+        in_main = False
+        chapter_no = 0
+        chapter_by_index: dict[int, int] = {}
+        start = 0
+        end = n
+        started = False
+        for i in range(n):
+            info = self.info(i)
+            if info.is_p and info.style == "1":
+                txt = info.text.strip()
+                if txt in MAIN_BODY_STOP_H1:
+                    if in_main and end == n:
+                        end = i
+                    in_main = False
+                elif txt and txt not in MAIN_BODY_EXCLUDED_H1:
+                    if not started:
+                        start = i
+                        started = True
+                    in_main = True
+                    chapter_no += 1
+            if in_main:
+                chapter_by_index[i] = chapter_no
+        if not started:
+            start = end = 0
+        self._main = (start, end, chapter_by_index)
+        return self._main
+
+    def main_body_range(self) -> tuple[int, int]:
+        """正文 [start, end)；之前为前置部分，之后为后置部分。"""
+        start, end, _ = self._main_body()
+        return start, end
+
+    def chapter_by_index(self) -> dict[int, int]:
+        """正文内块下标 -> 章号（从 1 开始）。"""
+        return self._main_body()[2]
+
+
+__all__ = [
+    "ANCHOR_PREFIXES",
+    "BlockInfo",
+    "BodyIndex",
+]
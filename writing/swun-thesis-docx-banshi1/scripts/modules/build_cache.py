@@ -0,0 +1,309 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+内容寻址构建缓存 — 输入未变化时跳过 latexpand / pandoc / OOXML 后处理。
+
+缓存目录默认位于论文目录下的 .swun_build_cache/，每个阶段一个子目录，
+条目文件名即输入摘要（sha256）：
+
+- latexpand    latexpand 展开后的 TeX 文本（键：全部 .tex/.sty/.cls 源 + 构建器源码）
+- flat         预处理后的 TeX 文本
+               （键：latexpand 键 + PDF 图片当前解析到的 PNG + main.aux 编号 + \\IfFileExists 判定）
+- raster       PDF 图片栅格化得到的 PNG（键：PDF 内容 + DPI + 工具，见 figure_raster.py）
+- pandoc       pandoc --citeproc 产出的中间 DOCX
+               （键：flat 文本 + bib + CSL + 模板 DOCX + flat 引用的图片 + pandoc 参数 + 构建器源码）
+- postprocess  最终版式1 DOCX（键：pandoc 键 + 图表标题样例 DOCX）
+- asset-*      模板派生资产（规范化模板、封面元素片段、标题格式配置，见 asset_cache.py）
+
+环境变量：
+- SWUN_BUILD_CACHE=0          关闭缓存（始终完整构建）
+- SWUN_BUILD_CACHE_DIR=<dir>  覆盖缓存目录
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import re
+import shutil
+from pathlib import Path
+from typing import Iterable
+
+# 构建器源码：modules/ 与 utils/ 下任一文件变化都会使全部缓存失效。
+SCRIPT_DIR = Path(__file__).resolve().parents[1]
+BUILDER_SOURCE_DIRS = (SCRIPT_DIR / "modules", SCRIPT_DIR / "utils")
+
+CACHE_DIR_NAME = ".swun_build_cache"
+# 每个阶段默认保留的最近条目数（按 mtime），避免缓存目录无限增长。
+# 每次构建产生多个条目的阶段（raster、pandoc-shard）以 max_entries=None 写入，
+# 阶段结束后用 prune(keep=本次引用的键) 清理，本次引用的条目不受数量限制。
+MAX_ENTRIES_PER_STAGE = 4
+
+TEX_SOURCE_SUFFIXES = {".tex", ".sty", ".cls"}
+RESOURCE_DIRS = ("media", "figures")
+# pandoc --resource-path 的搜索目录（按顺序）
+PANDOC_RESOURCE_PATH = (".", "./media", "./figures")
+# 无扩展名的 \\includegraphics 目标按 graphicx 的默认扩展名查找
+GRAPHICS_EXTENSIONS = (".pdf", ".png", ".jpg", ".jpeg", ".eps")
+
+_GRAPHICS_RE = re.compile(r"\\includegraphics\*?(?:\[[^\]]*\])?\{([^}]+)\}")
+
+
+# ---------------------------------------------------------------------------
+# 摘要
+# ---------------------------------------------------------------------------
+
+def digest_parts(*parts: bytes | str) -> str:
+    """对若干字节串/字符串按顺序求 sha256（各段以长度前缀分隔）。"""
+    h = hashlib.sha256()
+    for part in parts:
+        data = part.encode("utf-8") if isinstance(part, str) else part
+        h.update(len(data).to_bytes(8, "big"))
+        h.update(data)
+    return h.hexdigest()
+
+
+def digest_files(paths: Iterable[Path], root: Path | None = None) -> str:
+    """对文件集合求 sha256：路径（相对 root）与内容均参与摘要，缺失文件记为占位。"""
+    h = hashlib.sha256()
+    for path in sorted(Path(p) for p in paths):
+        name = str(path.relative_to(root)) if root is not None else str(path)
+        h.update(name.encode("utf-8") + b"\0")
+        if path.is_file():
+            with path.open("rb") as fh:
+                for chunk in iter(lambda: fh.read(1 << 20), b""):
+                    h.update(chunk)
+        else:
+            h.update(b"<missing>")
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+def _iter_tree(root: Path, suffixes: set[str] | None = None) -> Iterable[Path]:
+    if not root.is_dir():
+        return
+    for dirpath, dirnames, filenames in os.walk(root):
+        # 跳过隐藏目录（含缓存目录自身、.git）
+        dirnames[:] = [d for d in dirnames if not d.startswith(".")]
+        for fn in filenames:
+            if fn.startswith("."):
+                continue
+            if suffixes is not None and Path(fn).suffix.lower() not in suffixes:
+                continue
+            yield Path(dirpath) / fn
+
+
+def tex_source_files(thesis_dir: Path) -> list[Path]:
+    """论文目录下全部 TeX 源文件（latexpand 的潜在输入）。"""
+    return list(_iter_tree(thesis_dir, TEX_SOURCE_SUFFIXES))
+
+
+def resource_files(thesis_dir: Path) -> list[Path]:
+    """pandoc --resource-path 下的图片资源文件。"""
+    files: list[Path] = []
+    for name in RESOURCE_DIRS:
+        files.extend(_iter_tree(thesis_dir / name))
+    return files
+
+
+def graphics_candidates(flat: str, thesis_dir: Path) -> list[Path]:
+    """flat 中 \\includegraphics 目标在 pandoc --resource-path 下的全部候选路径。
+
+    包括尚不存在的候选：之后新增文件同样会改变 graphics_digest。
+    """
+    seen: dict[Path, None] = {}
+    for m in _GRAPHICS_RE.finditer(flat):
+        target = m.group(1).strip()
+        names = [target] if Path(target).suffix else [target + ext for ext in GRAPHICS_EXTENSIONS]
+        for d in PANDOC_RESOURCE_PATH:
+            for name in names:
+                seen.setdefault(thesis_dir / d / name, None)
+    return list(seen)
+
+
+def graphics_digest(flat: str, thesis_dir: Path) -> str:
+    """pandoc 实际嵌入的图片摘要：flat 引用的图片（含 ch4 实验结果目录等任意相对路径）。"""
+    h = hashlib.sha256()
+    for path in graphics_candidates(flat, thesis_dir):
+        try:
+            name = path.relative_to(thesis_dir).as_posix()
+        except ValueError:  # 绝对路径
+            name = path.as_posix()
+        h.update(name.encode("utf-8") + b"\0")
+        if path.is_file():
+            with path.open("rb") as fh:
+                for chunk in iter(lambda: fh.read(1 << 20), b""):
+                    h.update(chunk)
+        else:
+            h.update(b"<missing>")
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+def tex_sources_digest(thesis_dir: Path) -> str:
+    """论文目录下全部 TeX 源文件的摘要。"""
+    return digest_files(tex_source_files(thesis_dir), root=thesis_dir)
+
+
+def resource_digest(thesis_dir: Path) -> str:
+    """pandoc --resource-path 下图片资源的摘要。"""
+    return digest_files(resource_files(thesis_dir), root=thesis_dir)
+
+
+_BUILDER_DIGEST: str | None = None
+
+
+def builder_source_digest() -> str:
+    """构建器源码摘要（进程内缓存）。"""
+    global _BUILDER_DIGEST  # noqa: PLW0603
+    if _BUILDER_DIGEST is None:
+        files: list[Path] = []
+        for d in BUILDER_SOURCE_DIRS:
+            files.extend(_iter_tree(d, {".py"}))
+        _BUILDER_DIGEST = digest_files(files, root=SCRIPT_DIR)
+    return _BUILDER_DIGEST
+
+
+# ---------------------------------------------------------------------------
+# 缓存
+# ---------------------------------------------------------------------------
+
+class BuildCache:
+    """按阶段存取的内容寻址文件缓存，并记录每个阶段的命中情况。"""
+
+    def __init__(self, cache_dir: Path, enabled: bool = True) -> None:
+        self.cache_dir = cache_dir
+        self.enabled = enabled
+        self.results: list[tuple[str, bool, str]] = []
+
+    @classmethod
+    def for_thesis(cls, thesis_dir: Path) -> "BuildCache":
+        """按环境变量为论文目录创建缓存实例。"""
+        enabled = os.environ.get("SWUN_BUILD_CACHE", "1").strip().lower() not in {
+            "0", "false", "no", "off"}
+        override = os.environ.get("SWUN_BUILD_CACHE_DIR")
+        cache_dir = (Path(override).expanduser() if override
+                     else thesis_dir / CACHE_DIR_NAME)
+        return cls(cache_dir, enabled=enabled)
+
+    def _entry(self, stage: str, key: str, suffix: str) -> Path:
+        return self.cache_dir / stage / f"{key}{suffix}"
+
+    def fetch(
+        self, stage: str, key: str, dest: Path, suffix: str = "", *, record: bool = True,
+    ) -> bool:
+        """命中时将缓存条目复制到 dest 并返回 True。
+
+        record=True 时记录命中/未命中并打印 [cache] 行；逐条目查询的阶段传 False，
+        由调用方打印阶段汇总。
+        """
+        entry = self._entry(stage, key, suffix)
+        hit = self.enabled and entry.is_file()
+        if hit:
+            dest.parent.mkdir(parents=True, exist_ok=True)
+            shutil.copyfile(entry, dest)
+            os.utime(entry)  # 刷新 mtime，供 LRU 清理参考
+        if record:
+            self._record(stage, hit, key)
+        return hit
+
+    def fetch_text(
+        self, stage: str, key: str, suffix: str = ".txt", *, record: bool = True,
+    ) -> str | None:
+        """命中时返回缓存文本，否则返回 None；record 同 fetch。"""
+        entry = self._entry(stage, key, suffix)
+        hit = self.enabled and entry.is_file()
+        text = None
+        if hit:
+            text = entry.read_text(encoding="utf-8")
+            os.utime(entry)
+        if record:
+            self._record(stage, hit, key)
+        return text
+
+    def store(
+        self, stage: str, key: str, src: Path, suffix: str = "",
+        *, max_entries: int | None = MAX_ENTRIES_PER_STAGE,
+    ) -> None:
+        """将构建产物 src 写入缓存（先写临时文件再原子替换）。
+
+        写入后按 mtime 只保留阶段内最近 max_entries 个条目；None 表示写入时不清理。
+        """
+        if not self.enabled or not src.is_file():
+            return
+        entry = self._entry(stage, key, suffix)
+        entry.parent.mkdir(parents=True, exist_ok=True)
+        tmp = entry.with_name(entry.name + ".tmp")
+        shutil.copyfile(src, tmp)
+        tmp.replace(entry)
+        if max_entries is not None:
+            self.prune(stage, max_entries=max_entries)
+
+    def store_text(
+        self, stage: str, key: str, text: str, suffix: str = ".txt",
+        *, max_entries: int | None = MAX_ENTRIES_PER_STAGE,
+    ) -> None:
+        """将文本产物写入缓存；max_entries 同 store。"""
+        if not self.enabled:
+            return
+        entry = self._entry(stage, key, suffix)
+        entry.parent.mkdir(parents=True, exist_ok=True)
+        tmp = entry.with_name(entry.name + ".tmp")
+        tmp.write_text(text, encoding="utf-8")
+        tmp.replace(entry)
+        if max_entries is not None:
+            self.prune(stage, max_entries=max_entries)
+
+    def prune(
+        self, stage: str, keep: Iterable[str] = (), max_entries: int = MAX_ENTRIES_PER_STAGE,
+    ) -> None:
+        """清理阶段目录：keep 中的键总是保留，其余条目按 mtime 只保留最近 max_entries 个。"""
+        stage_dir = self.cache_dir / stage
+        if not self.enabled or not stage_dir.is_dir():
+            return
+        keep = set(keep)
+        entries = sorted(
+            (p for p in stage_dir.iterdir()
+             if p.is_file() and not p.name.endswith(".tmp")
+             and p.name.split(".", 1)[0] not in keep),
+            key=lambda p: p.stat().st_mtime,
+            reverse=True,
+        )
+        for stale in entries[max_entries:]:
+            stale.unlink(missing_ok=True)
+
+    def summarize(self, stage: str, hits: int, lookups: int) -> None:
+        """逐条目查询（record=False）的阶段结束后打印一行汇总。"""
+        if self.enabled and lookups:
+            print(f"  [cache] {stage}: {hits}/{lookups} hit")
+
+    def _record(self, stage: str, hit: bool, key: str) -> None:
+        self.results.append((stage, hit, key))
+        if self.enabled:
+            state = "hit" if hit else "miss"
+            print(f"  [cache] {stage}: {state} ({key[:12]})")
+
+    def report(self) -> str:
+        """返回单行阶段命中汇总，例如 ``flat=hit pandoc=hit postprocess=miss``。"""
+        if not self.enabled:
+            return "disabled"
+        return " ".join(
+            f"{stage}={'hit' if hit else 'miss'}" for stage, hit, _ in self.results
+        )
+
+
+__all__ = [
+    "BuildCache",
+    "CACHE_DIR_NAME",
+    "MAX_ENTRIES_PER_STAGE",
+    "PANDOC_RESOURCE_PATH",
+    "digest_parts",
+    "digest_files",
+    "graphics_candidates",
+    "graphics_digest",
+    "tex_source_files",
+    "tex_sources_digest",
+    "resource_files",
+    "resource_digest",
+    "builder_source_digest",
+]
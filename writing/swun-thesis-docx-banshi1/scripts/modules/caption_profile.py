@@ -124,6 +124,37 @@ def extract_caption_profiles(
     return profiles
 
 
+def caption_profiles_to_json(
+        profiles: dict[str, CaptionFormatProfile]) -> dict[str, object]:
+    """Serialize caption profiles to JSON-compatible data (props as XML)."""
+    return {
+        kind: {
+            "style": profile.style,
+            "paragraph_props": [
+                ET.tostring(child, encoding="unicode")
+                for child in profile.paragraph_props],
+            "run_props": [
+                ET.tostring(child, encoding="unicode")
+                for child in profile.run_props],
+        }
+        for kind, profile in profiles.items()
+    }
+
+
+def caption_profiles_from_json(
+        data: dict[str, dict]) -> dict[str, CaptionFormatProfile]:
+    """Inverse of caption_profiles_to_json."""
+    return {
+        kind: CaptionFormatProfile(
+            kind=kind,
+            style=item["style"],
+            paragraph_props=[ET.fromstring(x) for x in item["paragraph_props"]],
+            run_props=[ET.fromstring(x) for x in item["run_props"]],
+        )
+        for kind, item in data.items()
+    }
+
+
 def build_caption_paragraph(
     ns: dict[str, str],
     text: str,
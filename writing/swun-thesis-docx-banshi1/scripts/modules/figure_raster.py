@@ -0,0 +1,317 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+PDF 图片栅格化阶段 — 为只有 PDF 的 \\includegraphics 生成 PNG。
+
+preprocess_latex 只会把 PDF 路径换成已存在的 PNG，实验图缺 PNG 时构建直接失败。
+本阶段在预处理之前扫描展开后的源码，为每个 PDF 图片确定目标 PNG
+（与 PDF 同名同目录，即 latex_parser.png_candidates 的首选项），并：
+
+- 跳过已解析的图片：目标 PNG 存在且不旧于 PDF，且不是本阶段以其他参数生成的；
+  或首选 PNG 缺失但存在其他候选（ch4 实验结果目录）
+- 需要（重新）生成时先查 BuildCache 的 ``raster`` 阶段，键为 PDF 内容摘要 + DPI + 工具，
+  命中则直接复制
+- 未命中的图片在进程池中并发栅格化（首页），之后写入缓存
+- raster 阶段不受每阶段条目数上限约束：本次引用的键全部保留，只清理不再引用的旧条目；
+  命中情况汇总为一行 [cache] 输出
+
+栅格化工具按顺序探测：pdftoppm（poppler）→ pdfplumber；都不可用时只打印提示，
+缺失的实验图 PNG 仍由 preprocess_latex 报错。
+本阶段生成的 PNG 记录在缓存目录的 raster-manifest.json 中，DPI 或 PDF 变化时视为过期；
+手工导出的 PNG 只要不旧于 PDF 就不会被覆盖。
+
+环境变量：
+- SWUN_RASTER_DPI=<dpi>        栅格化分辨率（默认 300）
+- SWUN_RASTER_WORKERS=<n>      并发进程数（默认 CPU 数）
+- SWUN_BUILD_CACHE / SWUN_BUILD_CACHE_DIR   与构建缓存相同
+"""
+
+from __future__ import annotations
+
+import json
+import multiprocessing
+import os
+import re
+import shutil
+import subprocess
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable
+
+try:
+    from modules.asset_cache import source_digest
+    from modules.build_cache import BuildCache, digest_parts
+    from modules.latex_parser import png_candidates
+except ModuleNotFoundError:  # pragma: no cover - pytest imports via scripts.modules
+    from scripts.modules.asset_cache import source_digest
+    from scripts.modules.build_cache import BuildCache, digest_parts
+    from scripts.modules.latex_parser import png_candidates
+
+
+# 栅格化方式变化时递增，使旧缓存失效
+RASTER_CACHE_VERSION = "1"
+RASTER_STAGE = "raster"
+MANIFEST_NAME = "raster-manifest.json"
+
+DPI_ENV = "SWUN_RASTER_DPI"
+WORKERS_ENV = "SWUN_RASTER_WORKERS"
+DEFAULT_DPI = 300
+
+_GRAPHICS_RE = re.compile(r"\\includegraphics(?:\[[^\]]*\])?\{([^}]+)\}")
+
+# 栅格化函数：(源 PDF, 目标 PNG, dpi) -> None，须为模块级函数（进程池 pickle）
+Rasterizer = Callable[[Path, Path, int], None]
+
+
+@dataclass
+class RasterReport:
+    """栅格化阶段结果（路径均相对论文目录）。"""
+
+    graphics: list[str] = field(default_factory=list)
+    up_to_date: list[str] = field(default_factory=list)
+    restored: list[str] = field(default_factory=list)
+    rasterized: list[str] = field(default_factory=list)
+    missing_source: list[str] = field(default_factory=list)
+    failed: dict[str, str] = field(default_factory=dict)
+
+    @property
+    def regenerated(self) -> list[str]:
+        return self.restored + self.rasterized
+
+
+# ---------------------------------------------------------------------------
+# 配置与工具探测
+# ---------------------------------------------------------------------------
+
+def dpi_from_env() -> int:
+    try:
+        dpi = int(os.environ.get(DPI_ENV, "").strip())
+    except ValueError:
+        return DEFAULT_DPI
+    return dpi if dpi > 0 else DEFAULT_DPI
+
+
+def workers_from_env() -> int:
+    try:
+        n = int(os.environ.get(WORKERS_ENV, "").strip())
+    except ValueError:
+        n = 0
+    return n if n > 0 else (os.cpu_count() or 1)
+
+
+def rasterize_with_pdftoppm(pdf: Path, target: Path, dpi: int) -> None:
+    # -singlefile 时 pdftoppm 在输出前缀后追加 .png
+    prefix = target.with_name(f".{target.stem}.raster-tmp")
+    subprocess.run(
+        ["pdftoppm", "-png", "-r", str(dpi), "-f", "1", "-l", "1", "-singlefile",
+         str(pdf), str(prefix)],
+        check=True, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+    )
+    os.replace(prefix.with_name(prefix.name + ".png"), target)
+
+
+def rasterize_with_pdfplumber(pdf: Path, target: Path, dpi: int) -> None:
+    import pdfplumber
+
+    tmp = target.with_name(f".{target.stem}.raster-tmp.png")
+    with pdfplumber.open(str(pdf)) as doc:
+        doc.pages[0].to_image(resolution=dpi).save(str(tmp), format="PNG")
+    os.replace(tmp, target)
+
+
+def find_rasterizer() -> tuple[str, Rasterizer] | None:
+    """返回 (工具名, 栅格化函数)；本机没有可用工具时返回 None。"""
+    if shutil.which("pdftoppm"):
+        return "pdftoppm", rasterize_with_pdftoppm
+    try:
+        import pdfplumber  # noqa: F401
+    except ImportError:
+        return None
+    return "pdfplumber", rasterize_with_pdfplumber
+
+
+# ---------------------------------------------------------------------------
+# 扫描与过期判定
+# ---------------------------------------------------------------------------
+
+def pdf_graphics(flat: str) -> list[str]:
+    """展开后源码中全部 PDF 图片路径（去重、保持顺序）。"""
+    seen: dict[str, None] = {}
+    for m in _GRAPHICS_RE.finditer(flat):
+        path = m.group(1).strip()
+        if path.lower().endswith(".pdf"):
+            seen.setdefault(path, None)
+    return list(seen)
+
+
+def png_resolution_digest(flat: str, thesis_dir: Path) -> str:
+    """各 PDF 图片当前解析到的 PNG 候选的摘要（preprocess_latex 的 PNG 替换结果取决于此）。"""
+    rows = []
+    for rel in pdf_graphics(flat):
+        hit = next((c.as_posix() for c in png_candidates(rel) if (thesis_dir / c).exists()), "")
+        rows.append(f"{rel}\t{hit}")
+    return digest_parts(RASTER_CACHE_VERSION, *rows)
+
+
+def _load_manifest(cache: BuildCache | None) -> dict[str, str]:
+    if cache is None or not cache.enabled:
+        return {}
+    try:
+        data = json.loads((cache.cache_dir / MANIFEST_NAME).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+def _save_manifest(cache: BuildCache | None, manifest: dict[str, str]) -> None:
+    if cache is None or not cache.enabled:
+        return
+    path = cache.cache_dir / MANIFEST_NAME
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_text(json.dumps(manifest, ensure_ascii=False, indent=1), encoding="utf-8")
+    tmp.replace(path)
+
+
+def raster_outputs(cache: BuildCache | None) -> set[Path]:
+    """本阶段写出过的 PNG（绝对路径，取自 raster-manifest.json；缓存关闭时为空）。"""
+    return {Path(p) for p in _load_manifest(cache)}
+
+
+def _is_stale(pdf: Path, target: Path, key: str, manifest: dict[str, str]) -> bool:
+    if not target.exists():
+        return True
+    recorded = manifest.get(str(target.resolve()))
+    if recorded is not None:
+        return recorded != key
+    # 手工导出的 PNG：只在比 PDF 旧时重新生成
+    return target.stat().st_mtime_ns < pdf.stat().st_mtime_ns
+
+
+def _run_job(rasterize: Rasterizer, pdf: str, target: str, dpi: int) -> str | None:
+    try:
+        rasterize(Path(pdf), Path(target), dpi)
+    except Exception as exc:  # noqa: BLE001 - 逐图报告
+        detail = getattr(exc, "stderr", None)
+        if isinstance(detail, bytes) and detail.strip():
+            return detail.decode("utf-8", errors="replace").strip()
+        return str(exc) or type(exc).__name__
+    return None
+
+
+# ---------------------------------------------------------------------------
+# 阶段入口
+# ---------------------------------------------------------------------------
+
+def rasterize_pdf_graphics(
+    flat: str,
+    thesis_dir: Path,
+    *,
+    dpi: int | None = None,
+    cache: BuildCache | None = None,
+    workers: int | None = None,
+    rasterizer: tuple[str, Rasterizer] | None = None,
+) -> RasterReport:
+    """为 flat 中只有 PDF（或 PNG 已过期）的图片生成 PNG，返回阶段报告。"""
+    dpi = dpi or dpi_from_env()
+    report = RasterReport(graphics=pdf_graphics(flat))
+    manifest = _load_manifest(cache)
+    tool = rasterizer or find_rasterizer()
+    tool_name = tool[0] if tool is not None else "none"
+
+    pending: list[tuple[str, Path, Path, str]] = []
+    referenced: set[str] = set()
+    hits = lookups = 0
+    for rel in report.graphics:
+        pdf = thesis_dir / rel
+        candidates = [thesis_dir / c for c in png_candidates(rel)]
+        target = candidates[0]
+        if not pdf.is_file():
+            # 源 PDF 不存在：有现成 PNG 就沿用，否则交给 preprocess 报错
+            (report.up_to_date if any(c.exists() for c in candidates)
+             else report.missing_source).append(rel)
+            continue
+        if not target.exists() and any(c.exists() for c in candidates[1:]):
+            report.up_to_date.append(rel)
+            continue
+        key = digest_parts(RASTER_CACHE_VERSION, source_digest(pdf, cache), f"dpi={dpi}", tool_name)
+        referenced.add(key)
+        if not _is_stale(pdf, target, key, manifest):
+            report.up_to_date.append(rel)
+            continue
+        if cache is not None:
+            lookups += 1
+            if cache.fetch(RASTER_STAGE, key, target, suffix=".png", record=False):
+                hits += 1
+                manifest[str(target.resolve())] = key
+                report.restored.append(rel)
+                continue
+        pending.append((rel, pdf, target, key))
+
+    if pending and tool is None:
+        for rel, *_ in pending:
+            report.failed[rel] = "no rasterizer available (install poppler-utils or pdfplumber)"
+        pending = []
+
+    if pending:
+        rasterize = tool[1]
+        n = min(workers or workers_from_env(), len(pending))
+        args = [(rasterize, str(pdf), str(target), dpi) for _, pdf, target, _ in pending]
+        if n <= 1:
+            errors = [_run_job(*a) for a in args]
+        else:
+            # spawn：工作进程不继承父进程的线程 / 锁状态，各平台行为一致
+            ctx = multiprocessing.get_context("spawn")
+            with ProcessPoolExecutor(max_workers=n, mp_context=ctx) as pool:
+                errors = list(pool.map(_run_job, *zip(*args)))
+        for (rel, _pdf, target, key), error in zip(pending, errors):
+            if error is not None:
+                report.failed[rel] = error
+                continue
+            if cache is not None:
+                cache.store(RASTER_STAGE, key, target, suffix=".png", max_entries=None)
+            manifest[str(target.resolve())] = key
+            report.rasterized.append(rel)
+
+    if report.regenerated:
+        _save_manifest(cache, manifest)
+    if cache is not None:
+        cache.summarize(RASTER_STAGE, hits, lookups)
+        cache.prune(RASTER_STAGE, keep=referenced)
+    _print_report(report, tool_name, dpi)
+    return report
+
+
+def _print_report(report: RasterReport, tool_name: str, dpi: int) -> None:
+    if not report.graphics:
+        return
+    print(f"  [raster] {len(report.graphics)} PDF graphics: "
+          f"{len(report.rasterized)} rasterized ({tool_name}, {dpi} dpi), "
+          f"{len(report.restored)} restored from cache, {len(report.up_to_date)} up to date")
+    for rel in report.regenerated:
+        print(f"  [raster] regenerated {rel}")
+    for rel, error in report.failed.items():
+        print(f"  [raster] FAILED {rel}: {error}")
+    for rel in report.missing_source:
+        print(f"  [raster] missing source {rel}")
+
+
+__all__ = [
+    "DEFAULT_DPI",
+    "DPI_ENV",
+    "MANIFEST_NAME",
+    "RASTER_CACHE_VERSION",
+    "RASTER_STAGE",
+    "RasterReport",
+    "WORKERS_ENV",
+    "dpi_from_env",
+    "find_rasterizer",
+    "pdf_graphics",
+    "png_resolution_digest",
+    "raster_outputs",
+    "rasterize_pdf_graphics",
+    "rasterize_with_pdfplumber",
+    "rasterize_with_pdftoppm",
+    "workers_from_env",
+]
@@ -47,6 +47,16 @@ try:
 except ModuleNotFoundError:  # pragma: no cover - pytest imports via scripts.modules
     from scripts.modules.equation_handler import make_equation_number_run, sect_text_width_dxa
 
+try:
+    from modules.pass_engine import VisitorPass, run_visitor_passes
+except ModuleNotFoundError:  # pragma: no cover - pytest imports via scripts.modules
+    from scripts.modules.pass_engine import VisitorPass, run_visitor_passes
+
+try:
+    from modules.body_index import BodyIndex
+except ModuleNotFoundError:  # pragma: no cover - pytest imports via scripts.modules
+    from scripts.modules.body_index import BodyIndex
+
 CAPTION_PROFILE_DOCX = Path(
     os.environ.get(
         "SWUN_CAPTION_PROFILE_DOCX",
@@ -171,8 +181,9 @@ def inject_captions_from_meta(
     body: ET.Element,
     caption_meta: dict[str, Any],
     caption_profiles: dict[str, CaptionFormatProfile],
+    index: BodyIndex | None = None,
 ) -> None:
-    placements, chapter_by_index = collect_anchor_block_positions(ns, body)
+    placements, chapter_by_index = collect_anchor_block_positions(ns, body, index)
     if not placements:
         return
 
@@ -374,42 +385,12 @@ def make_caption_run(
 
 
 def main_body_context(
-    ns: dict[str, str], body: ET.Element
+    ns: dict[str, str], body: ET.Element, index: BodyIndex | None = None
 ) -> tuple[list[ET.Element], int, int, dict[int, int]]:
     """Return body children, main-body [start,end), and block-index -> chapter number."""
-    w_p = qn(ns, "w", "p")
-    excluded_h1 = {"目录", "摘要", "Abstract", "致谢", "参考文献", "攻读硕士学位期间所取得的相关科研成果"}
-    stop_h1 = {"参考文献", "致谢", "攻读硕士学位期间所取得的相关科研成果"}
-
-    children = list(body)
-    in_main_body = False
-    chapter_no = 0
-    chapter_by_index: dict[int, int] = {}
-    start = 0
-    end = len(children)
-    started = False
-
-    for i, el in enumerate(children):
-        if el.tag == w_p and p_style(ns, el) == "1":
-            txt = p_text(ns, el).strip()
-            if txt in stop_h1:
-                if in_main_body and end == len(children):
-                    end = i
-                in_main_body = False
-            elif txt and txt not in excluded_h1:
-                if not started:
-                    start = i
-                    started = True
-                in_main_body = True
-                chapter_no += 1
-
-        if in_main_body:
-            chapter_by_index[i] = chapter_no
-
-    if not started:
-        start = 0
-        end = 0
-    return children, start, end, chapter_by_index
+    idx = index if index is not None else BodyIndex(ns, body)
+    start, end = idx.main_body_range()
+    return list(idx.blocks), start, end, dict(idx.chapter_by_index())
 
 
 def iter_anchor_names_in_element(
@@ -430,15 +411,26 @@ def iter_anchor_names_in_element(
 
 
 def find_next_anchor_target_block(
-    ns: dict[str, str], children: list[ET.Element], start_idx: int, end_idx: int, kind: str
+    ns: dict[str, str],
+    children: list[ET.Element],
+    start_idx: int,
+    end_idx: int,
+    kind: str,
+    index: BodyIndex | None = None,
 ) -> int | None:
     w_p = qn(ns, "w", "p")
     w_tbl = qn(ns, "w", "tbl")
+
+    def has_drawing(j: int) -> bool:
+        if index is not None:
+            return index.info(j).has_drawing
+        return block_has_drawing(ns, children[j])
+
     fallback: int | None = None
     for j in range(start_idx, end_idx):
         el = children[j]
         if el.tag == w_tbl:
-            has_draw = block_has_drawing(ns, el)
+            has_draw = has_drawing(j)
             if kind == "figure":
                 return j
             if kind == "table" and not has_draw:
@@ -446,21 +438,23 @@ def find_next_anchor_target_block(
             if fallback is None:
                 fallback = j
             continue
-        if el.tag == w_p and kind == "figure" and block_has_drawing(ns, el):
+        if el.tag == w_p and kind == "figure" and has_drawing(j):
             return j
     return fallback
 
 
 def collect_anchor_block_positions(
-    ns: dict[str, str], body: ET.Element
+    ns: dict[str, str], body: ET.Element, index: BodyIndex | None = None
 ) -> tuple[list[tuple[str, str, int]], dict[int, int]]:
     """Collect (kind, label, block_idx) for main-body fig/tab/tbl anchors."""
     w_bookmarkStart = qn(ns, "w", "bookmarkStart")
-    w_name = qn(ns, "w", "name")
     w_p = qn(ns, "w", "p")
     w_tbl = qn(ns, "w", "tbl")
 
-    children, start, end, chapter_by_index = main_body_context(ns, body)
+    idx = index if index is not None else BodyIndex(ns, body)
+    children = idx.blocks
+    start, end = idx.main_body_range()
+    chapter_by_index = dict(idx.chapter_by_index())
     if end <= start:
         return [], chapter_by_index
 
@@ -469,9 +463,10 @@ def collect_anchor_block_positions(
     def kind_of(label: str) -> str:
         return "figure" if label.startswith("fig:") else "table"
 
-    def score(kind: str, block: ET.Element, from_inline: bool) -> int:
+    def score(kind: str, i: int, from_inline: bool) -> int:
         s = 2 if from_inline else 1
-        has_draw = block_has_drawing(ns, block)
+        block = children[i]
+        has_draw = idx.info(i).has_drawing
         if kind == "figure":
             if has_draw:
                 s += 4
@@ -488,14 +483,14 @@ def collect_anchor_block_positions(
         el = children[i]
         if el.tag not in {w_p, w_tbl}:
             continue
-        for label in iter_anchor_names_in_element(ns, el):
+        info = idx.info(i)
+        for label in info.anchors:
             k = kind_of(label)
             if k == "table" and el.tag != w_tbl:
                 continue
-            if k == "figure" and not block_has_drawing(
-                ns, el) and el.tag != w_tbl:
+            if k == "figure" and not info.has_drawing and el.tag != w_tbl:
                 continue
-            cand = (score(k, el, True), i)
+            cand = (score(k, i, True), i)
             prev = best.get(label)
             if prev is None or cand[0] > prev[0]:
                 best[label] = cand
@@ -504,15 +499,15 @@ def collect_anchor_block_positions(
         el = children[i]
         if el.tag != w_bookmarkStart:
             continue
-        label = (el.get(w_name) or el.get("name") or "").strip()
-        if not label.startswith(("fig:", "tab:", "tbl:")):
+        anchors = idx.info(i).anchors
+        if not anchors:
             continue
+        label = anchors[0]
         k = kind_of(label)
-        j = find_next_anchor_target_block(ns, children, i + 1, end, k)
+        j = find_next_anchor_target_block(ns, children, i + 1, end, k, index=idx)
         if j is None:
             continue
-        block = children[j]
-        cand = (score(k, block, False), j)
+        cand = (score(k, j, False), j)
         prev = best.get(label)
         if prev is None or cand[0] > prev[0]:
             best[label] = cand
@@ -1257,18 +1252,10 @@ def set_table_full_width_and_columns(
             col += span
 
 
-def fit_figure_images_to_cells(ns: dict[str, str], body: ET.Element) -> int:
-    """缩放 FigureTable 单元格中超宽的 inline 图片，使其适配列宽。
-
-    pandoc 将 LaTeX minipage 并排图转为 FigureTable（两列表格），但图片宽度
-    按全局 textwidth 计算，导致 cx 超出列宽约 4%，Word 会裁剪右边缘。
-    此函数读取每列的 gridCol 宽度（twip），将超宽图片等比缩放至列宽内。
-
-    Returns the number of images scaled.
-    """
+def fit_figure_images_to_cells_pass(ns: dict[str, str]) -> VisitorPass:
+    """构造 FigureTable 图片缩放的访问者 pass（所有表格），结果为缩放数。"""
     TWIP_TO_EMU = 635  # 914400 / 1440
 
-    w_tbl = qn(ns, "w", "tbl")
     w_tblPr = qn(ns, "w", "tblPr")
     w_tblStyle = qn(ns, "w", "tblStyle")
     w_val = qn(ns, "w", "val")
@@ -1295,21 +1282,22 @@ def fit_figure_images_to_cells(ns: dict[str, str], body: ET.Element) -> int:
 
     scaled = 0
 
-    for tbl in body.findall(f".//{w_tbl}"):
+    def visit(tbl: ET.Element) -> None:
+        nonlocal scaled
         # 只处理 FigureTable
         tbl_pr = tbl.find(w_tblPr)
         if tbl_pr is None:
-            continue
+            return
         style_el = tbl_pr.find(w_tblStyle)
         if style_el is None:
-            continue
+            return
         if (style_el.get(w_val) or "").strip() != "FigureTable":
-            continue
+            return
 
         # 获取 gridCol 宽度列表
         grid = tbl.find(w_tblGrid)
         if grid is None:
-            continue
+            return
         grid_cols = grid.findall(w_gridCol)
         col_widths_twip: list[int] = []
         for gc in grid_cols:
@@ -1318,7 +1306,7 @@ def fit_figure_images_to_cells(ns: dict[str, str], body: ET.Element) -> int:
                 col_widths_twip.append(int(w_attr))
 
         if not col_widths_twip:
-            continue
+            return
 
         # 遍历行和单元格
         for tr in tbl.findall(w_tr):
@@ -1355,10 +1343,25 @@ def fit_figure_images_to_cells(ns: dict[str, str], body: ET.Element) -> int:
 
                         scaled += 1
 
-    if scaled:
-        print(f"  [figures] Scaled {scaled} image(s) in FigureTable cells")
+    def finish() -> int:
+        if scaled:
+            print(f"  [figures] Scaled {scaled} image(s) in FigureTable cells")
+        return scaled
+
+    return VisitorPass("fit_figure_images_to_cells", "tbl", visit, finish=finish)
+
+
+def fit_figure_images_to_cells(ns: dict[str, str], body: ET.Element) -> int:
+    """缩放 FigureTable 单元格中超宽的 inline 图片，使其适配列宽。
+
+    pandoc 将 LaTeX minipage 并排图转为 FigureTable（两列表格），但图片宽度
+    按全局 textwidth 计算，导致 cx 超出列宽约 4%，Word 会裁剪右边缘。
+    此函数读取每列的 gridCol 宽度（twip），将超宽图片等比缩放至列宽内。
 
-    return scaled
+    Returns the number of images scaled.
+    """
+    p = fit_figure_images_to_cells_pass(ns)
+    return run_visitor_passes(ns, body, [p])[p.name]
 
 
 def inject_figure_table_style(styles_xml: bytes) -> bytes:
@@ -1640,6 +1643,7 @@ __all__ = [
     "apply_latex_col_ratios",
     "set_table_full_width_and_columns",
     "fit_figure_images_to_cells",
+    "fit_figure_images_to_cells_pass",
     "inject_figure_table_style",
     "build_tbl_label_map",
     "is_figure_table_block",
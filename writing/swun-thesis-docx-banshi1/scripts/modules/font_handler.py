@@ -8,34 +8,59 @@
 - is_ascii_token_char    — 判断字符是否属于 ASCII token 字符
 - split_mixed_script_runs — 拆分中英混排 run
 - normalize_ascii_run_fonts — 英数 run 强制使用 Times New Roman
+- split_script_segments  — 按 ASCII token / 非 ASCII 切分文本
 - normalize_bibliography_run_style — 参考文献 run 字体与字号规范化
+  （SWUN_CN_REFS=1 时同时按 utils/cn_ref_rules.py 修正中文条目格式）
+
+以上三个 run 处理函数均另有 *_pass(ns) 工厂，供 pass_engine 合并遍历；
+split_and_normalize_run_fonts_pass 在一次段落访问中完成拆分与英数字体规范化。
 """
 
 from __future__ import annotations
 
 import copy
+import os
 import re
 import xml.etree.ElementTree as ET
 
 try:
-    from utils.ooxml import qn as _qn, p_text as _p_text, p_style as _p_style
+    from utils.ooxml import qn as _qn, p_text as _p_text
+except ModuleNotFoundError:
+    from scripts.utils.ooxml import qn as _qn, p_text as _p_text
+
+try:
+    from utils.cn_ref_rules import fix_paragraph as _fix_cn_ref_paragraph
 except ModuleNotFoundError:
-    from scripts.utils.ooxml import qn as _qn, p_text as _p_text, p_style as _p_style
+    from scripts.utils.cn_ref_rules import fix_paragraph as _fix_cn_ref_paragraph
+
+try:
+    from modules.pass_engine import REGION_BIBLIOGRAPHY, VisitorPass, run_visitor_passes
+except ModuleNotFoundError:
+    from scripts.modules.pass_engine import REGION_BIBLIOGRAPHY, VisitorPass, run_visitor_passes
 
 
 # ---------------------------------------------------------------------------
 # CJK / ASCII 字符分类
 # ---------------------------------------------------------------------------
 
+_CJK_RE = re.compile("[\u4e00-\u9fff\u3400-\u4dbf\u3040-\u30ff\uac00-\ud7af]")
+_ASCII_TOKEN_CHARS = r"A-Za-z0-9 ./,:;%+\-_()\[\]"
+# 交替匹配 ASCII token 段 / 非 ASCII token 段，一次 finditer 完成分段
+_SCRIPT_SEGMENT_RE = re.compile(f"([{_ASCII_TOKEN_CHARS}]+)|([^{_ASCII_TOKEN_CHARS}]+)")
+_ASCII_ALNUM_RE = re.compile(r"[0-9A-Za-z]")
+_XML_SPACE = "{http://www.w3.org/XML/1998/namespace}space"
+
+CN_REFS_ENV = "SWUN_CN_REFS"
+
+
+def cn_refs_requested() -> bool:
+    """环境变量 SWUN_CN_REFS 开启时返回 True（参考文献中文条目格式修正）。"""
+    return os.environ.get(CN_REFS_ENV, "").strip().lower() in {"1", "true", "yes", "on"}
+
+
 def contains_cjk(text: str) -> bool:
     """判断字符串是否包含 CJK（中日韩）字符。"""
-    return any(
-        "\u4e00" <= ch <= "\u9fff"
-        or "\u3400" <= ch <= "\u4dbf"
-        or "\u3040" <= ch <= "\u30ff"
-        or "\uac00" <= ch <= "\ud7af"
-        for ch in text
-    )
+    return _CJK_RE.search(text) is not None
 
 
 def is_ascii_token_char(ch: str) -> bool:
@@ -43,136 +68,207 @@ def is_ascii_token_char(ch: str) -> bool:
     return ord(ch) < 128 and (ch.isalnum() or ch in " ./,:;%+-_/()[]")
 
 
+def split_script_segments(text: str) -> list[tuple[str, str]]:
+    """将文本切分为 (kind, 片段) 列表，kind 为 ``ascii`` 或 ``cjk``（线性时间）。"""
+    return [
+        ("ascii" if m.group(1) is not None else "cjk", m.group(0))
+        for m in _SCRIPT_SEGMENT_RE.finditer(text)
+    ]
+
+
 # ---------------------------------------------------------------------------
 # Run 拆分与字体规范化
 # ---------------------------------------------------------------------------
 
-def split_mixed_script_runs(ns: dict[str, str], body: ET.Element) -> None:
-    """拆分中英混排的 run，使 Latin token 可以单独设置拉丁字体。"""
+class _RunFontNormalizer:
+    """英数 run 的 Times New Roman 设置逻辑（拆分 pass 与独立 pass 共用）。"""
+
+    def __init__(self, ns: dict[str, str]) -> None:
+        self.w_t = _qn(ns, "w", "t")
+        self.w_rPr = _qn(ns, "w", "rPr")
+        self.w_rFonts = _qn(ns, "w", "rFonts")
+        self.w_ascii = _qn(ns, "w", "ascii")
+        self.w_hAnsi = _qn(ns, "w", "hAnsi")
+        self.strip_attrs = tuple(_qn(ns, "w", a) for a in ("eastAsia", "hint", "cs"))
+        self.changed = 0
+
+    def apply_to_rpr(self, rPr: ET.Element, has_cjk: bool) -> bool:
+        """就地规范化 rPr，返回 ascii 字体是否被改写。"""
+        rFonts = rPr.find(self.w_rFonts)
+        if rFonts is None:
+            rFonts = ET.SubElement(rPr, self.w_rFonts)
+        changed = rFonts.get(self.w_ascii) != "Times New Roman"
+        if changed:
+            rFonts.set(self.w_ascii, "Times New Roman")
+        if rFonts.get(self.w_hAnsi) != "Times New Roman":
+            rFonts.set(self.w_hAnsi, "Times New Roman")
+        if not has_cjk:
+            for attr in self.strip_attrs:
+                if attr in rFonts.attrib:
+                    del rFonts.attrib[attr]
+        return changed
+
+    def normalize_run(self, r: ET.Element) -> None:
+        texts = [t.text or "" for t in r.iter(self.w_t)]
+        if not texts:
+            return
+        joined = "".join(texts)
+        if not _ASCII_ALNUM_RE.search(joined):
+            return
+        rPr = r.find(self.w_rPr)
+        if rPr is None:
+            rPr = ET.Element(self.w_rPr)
+            r.insert(0, rPr)
+        if self.apply_to_rpr(rPr, contains_cjk(joined)):
+            self.changed += 1
+
+    def report(self) -> None:
+        if self.changed:
+            print(
+    f"  [fonts] Normalized {self.changed} ASCII/numeric run(s) to Times New Roman")
+
+
+def _split_runs_visitor(ns: dict[str, str], fonts: _RunFontNormalizer | None):
+    """构造段落级拆分访问函数；fonts 非空时同时完成英数 run 字体规范化。
+
+    段落直接子 run 一次遍历生成新子节点列表，整体替换；每个原 run
+    只为 ascii / cjk 两类片段各准备一份 rPr 模板，片段 run 仅复制该模板。
+    """
     w_p = _qn(ns, "w", "p")
     w_r = _qn(ns, "w", "r")
     w_rPr = _qn(ns, "w", "rPr")
     w_t = _qn(ns, "w", "t")
+    counter = {"split": 0}
+
+    def split_run(r: ET.Element) -> list[ET.Element] | None:
+        rPr = None
+        t_node = None
+        for part in r:
+            if part.tag == w_rPr:
+                rPr = part
+            elif part.tag == w_t and t_node is None:
+                t_node = part
+            else:
+                return None
+        if t_node is None:
+            return None
+        text = t_node.text or ""
+        if not text or not _ASCII_ALNUM_RE.search(text) or not contains_cjk(text):
+            return None
+        segments = split_script_segments(text)
+        if len(segments) <= 1:
+            return None
+
+        # ascii 片段若含字母数字则使用已规范化字体的模板，其余片段沿用原 rPr
+        plain = rPr
+        latin = rPr
+        latin_changed = False
+        if fonts is not None:
+            latin = copy.deepcopy(rPr) if rPr is not None else ET.Element(w_rPr)
+            latin_changed = fonts.apply_to_rpr(latin, has_cjk=False)
+
+        runs: list[ET.Element] = []
+        for kind, seg in segments:
+            use_latin = fonts is not None and kind == "ascii" and _ASCII_ALNUM_RE.search(seg)
+            template = latin if use_latin else plain
+            new_r = ET.Element(r.tag, r.attrib)
+            new_r.text, new_r.tail = r.text, None
+            if template is not None:
+                rpr_copy = copy.deepcopy(template)
+                rpr_copy.tail = None
+                new_r.append(rpr_copy)
+            new_t = ET.SubElement(new_r, w_t)
+            new_t.text = seg
+            if seg[0] == " " or seg[-1] == " ":
+                new_t.set(_XML_SPACE, "preserve")
+            runs.append(new_r)
+            if use_latin and latin_changed:
+                fonts.changed += 1
+        runs[-1].tail = r.tail
+        return runs
+
+    def normalize_own_runs(p: ET.Element) -> None:
+        # 只处理以 p 为最近祖先段落的 run；嵌套段落（文本框等）由其自身访问时处理
+        stack = list(p)
+        while stack:
+            el = stack.pop()
+            if el.tag == w_r:
+                fonts.normalize_run(el)
+            if el.tag != w_p:
+                stack.extend(el)
+
+    def visit(p: ET.Element) -> None:
+        new_children: list[ET.Element] = []
+        split_here = 0
+        for child in p:
+            runs = split_run(child) if child.tag == w_r else None
+            if runs is None:
+                new_children.append(child)
+            else:
+                new_children.extend(runs)
+                split_here += 1
+        if split_here:
+            p[:] = new_children
+            counter["split"] += split_here
+        if fonts is not None:
+            normalize_own_runs(p)
+
+    return visit, counter
+
+
+def split_mixed_script_runs_pass(ns: dict[str, str]) -> VisitorPass:
+    """构造中英混排 run 拆分的访问者 pass（所有段落）。"""
+    visit, counter = _split_runs_visitor(ns, None)
+
+    def finish() -> None:
+        if counter["split"]:
+            print(f"  [fonts] Split {counter['split']} mixed-script run(s)")
+
+    return VisitorPass("split_mixed_script_runs", "p", visit, finish=finish)
+
 
-    split_count = 0
-
-    for p in body.findall(f".//{w_p}"):
-        children = list(p)
-        i = 0
-        while i < len(children):
-            r = children[i]
-            if r.tag != w_r:
-                i += 1
-                continue
-
-            parts = list(r)
-            if any(part.tag not in {w_rPr, w_t} for part in parts):
-                i += 1
-                continue
-            t_nodes = [part for part in parts if part.tag == w_t]
-            if len(t_nodes) != 1:
-                i += 1
-                continue
-
-            text = t_nodes[0].text or ""
-            if not text or not contains_cjk(
-                text) or not re.search(r"[A-Za-z0-9]", text):
-                i += 1
-                continue
-
-            segments: list[tuple[str, str]] = []
-            buf = []
-            kind: str | None = None
-            for ch in text:
-                next_kind = "ascii" if is_ascii_token_char(ch) else "cjk"
-                if kind is None or next_kind == kind:
-                    buf.append(ch)
-                    kind = next_kind
-                    continue
-                segments.append((kind, "".join(buf)))
-                buf = [ch]
-                kind = next_kind
-            if buf:
-                segments.append((kind or "cjk", "".join(buf)))
-
-            if len(segments) <= 1:
-                i += 1
-                continue
-
-            insert_at = i
-            for _, seg in segments:
-                if not seg:
-                    continue
-                new_r = copy.deepcopy(r)
-                for child in list(new_r):
-                    if child.tag == w_t:
-                        new_r.remove(child)
-                new_t = ET.SubElement(new_r, w_t)
-                new_t.text = seg
-                if seg[0] == " " or seg[-1] == " ":
-                    new_t.set(
-    "{http://www.w3.org/XML/1998/namespace}space",
-     "preserve")
-                p.insert(insert_at, new_r)
-                insert_at += 1
-            p.remove(r)
-            split_count += 1
-            children = list(p)
-            i = insert_at
-
-    if split_count:
-        print(f"  [fonts] Split {split_count} mixed-script run(s)")
+def split_mixed_script_runs(ns: dict[str, str], body: ET.Element) -> None:
+    """拆分中英混排的 run，使 Latin token 可以单独设置拉丁字体。"""
+    run_visitor_passes(ns, body, [split_mixed_script_runs_pass(ns)])
+
+
+def normalize_ascii_run_fonts_pass(ns: dict[str, str]) -> VisitorPass:
+    """构造英数 run 字体规范化的访问者 pass（所有 run）。"""
+    fonts = _RunFontNormalizer(ns)
+    return VisitorPass(
+        "normalize_ascii_run_fonts", "r", fonts.normalize_run, finish=fonts.report)
 
 
 def normalize_ascii_run_fonts(ns: dict[str, str], body: ET.Element) -> None:
     """将含英文字母或阿拉伯数字的 run 字体强制设为 Times New Roman。"""
-    w_r = _qn(ns, "w", "r")
-    w_t = _qn(ns, "w", "t")
-    w_rPr = _qn(ns, "w", "rPr")
-    w_rFonts = _qn(ns, "w", "rFonts")
-    w_ascii = _qn(ns, "w", "ascii")
-    w_hAnsi = _qn(ns, "w", "hAnsi")
-    w_eastAsia = _qn(ns, "w", "eastAsia")
-    w_hint = _qn(ns, "w", "hint")
-    w_cs = _qn(ns, "w", "cs")
-    changed = 0
-    ascii_re = re.compile(r"[0-9A-Za-z]")
+    run_visitor_passes(ns, body, [normalize_ascii_run_fonts_pass(ns)])
 
-    for r in body.findall(f".//{w_r}"):
-        texts = [t.text or "" for t in r.findall(f".//{w_t}")]
-        if not texts:
-            continue
-        joined = "".join(texts)
-        if not ascii_re.search(joined):
-            continue
 
-        rPr = r.find(w_rPr)
-        if rPr is None:
-            rPr = ET.Element(w_rPr)
-            r.insert(0, rPr)
+def split_and_normalize_run_fonts_pass(ns: dict[str, str]) -> VisitorPass:
+    """拆分中英混排 run 并在同一次段落访问中完成英数字体规范化。
 
-        rFonts = rPr.find(w_rFonts)
-        if rFonts is None:
-            rFonts = ET.SubElement(rPr, w_rFonts)
+    结果等价于依次执行 split_mixed_script_runs 与 normalize_ascii_run_fonts。
+    """
+    fonts = _RunFontNormalizer(ns)
+    visit, counter = _split_runs_visitor(ns, fonts)
 
-        if rFonts.get(w_ascii) != "Times New Roman":
-            rFonts.set(w_ascii, "Times New Roman")
-            changed += 1
-        if rFonts.get(w_hAnsi) != "Times New Roman":
-            rFonts.set(w_hAnsi, "Times New Roman")
-        if not contains_cjk(joined):
-            for attr in (w_eastAsia, w_hint, w_cs):
-                if attr in rFonts.attrib:
-                    del rFonts.attrib[attr]
+    def finish() -> None:
+        if counter["split"]:
+            print(f"  [fonts] Split {counter['split']} mixed-script run(s)")
+        fonts.report()
 
-    if changed:
-        print(
-    f"  [fonts] Normalized {changed} ASCII/numeric run(s) to Times New Roman")
+    return VisitorPass("split_and_normalize_run_fonts", "p", visit, finish=finish)
 
 
-def normalize_bibliography_run_style(
-    ns: dict[str, str], body: ET.Element) -> None:
-    """将参考文献区域各条目的 run 字体设为 Times New Roman，字号设为五号（21）。"""
+def normalize_bibliography_run_style_pass(
+    ns: dict[str, str], fix_cn_refs: bool | None = None) -> VisitorPass:
+    """构造参考文献 run 字体/字号规范化的访问者 pass（仅参考文献区域的顶层段落）。
+
+    fix_cn_refs 为 True（默认取 SWUN_CN_REFS）时，先在各 w:t 上原地修正中文条目格式
+    （et al. → 等、去除多余空格等），run 结构不变。
+    """
+    if fix_cn_refs is None:
+        fix_cn_refs = cn_refs_requested()
     w_p = _qn(ns, "w", "p")
     w_r = _qn(ns, "w", "r")
     w_rPr = _qn(ns, "w", "rPr")
@@ -184,32 +280,19 @@ def normalize_bibliography_run_style(
     w_hAnsi = _qn(ns, "w", "hAnsi")
     w_cs = _qn(ns, "w", "cs")
 
-    children = list(body)
-    ref_idx = None
-    for i, el in enumerate(children):
-        if el.tag != w_p:
-            continue
-        if _p_text(ns, el).strip() == "参考文献":
-            ref_idx = i
-            break
-    if ref_idx is None:
-        return
-
     bib_entry_re = re.compile(r"^(\[[0-9]{1,4}\]|［[0-9]{1,4}］)")
     changed = 0
-    i = ref_idx + 1
-    while i < len(children):
-        el = children[i]
+    cn_fixed = 0
+
+    def visit(el: ET.Element) -> None:
+        nonlocal changed, cn_fixed
         if el.tag != w_p:
-            i += 1
-            continue
-        style = _p_style(ns, el)
-        if style == "1" and _p_text(ns, el).strip() not in {"参考文献"}:
-            break
+            return
         txt = _p_text(ns, el).strip()
         if not bib_entry_re.match(txt):
-            i += 1
-            continue
+            return
+        if fix_cn_refs and _fix_cn_ref_paragraph(el, ns["w"]):
+            cn_fixed += 1
 
         for r in el.findall(f".//{w_r}"):
             rPr = r.find(w_rPr)
@@ -235,7 +318,23 @@ def normalize_bibliography_run_style(
                 szCs = ET.SubElement(rPr, w_szCs)
             szCs.set(w_val, "21")
             changed += 1
-        i += 1
 
-    if changed:
-        print(f"  [fonts] Normalized {changed} bibliography run(s) to 五号")
+    def finish() -> None:
+        if cn_fixed:
+            print(f"  [fonts] Fixed {cn_fixed} Chinese bibliography entry(s)")
+        if changed:
+            print(f"  [fonts] Normalized {changed} bibliography run(s) to 五号")
+
+    return VisitorPass(
+        "normalize_bibliography_run_style",
+        "block",
+        visit,
+        regions=frozenset({REGION_BIBLIOGRAPHY}),
+        finish=finish,
+    )
+
+
+def normalize_bibliography_run_style(
+    ns: dict[str, str], body: ET.Element, fix_cn_refs: bool | None = None) -> None:
+    """将参考文献区域各条目的 run 字体设为 Times New Roman，字号设为五号（21）。"""
+    run_visitor_passes(ns, body, [normalize_bibliography_run_style_pass(ns, fix_cn_refs)])
@@ -4,7 +4,7 @@
 页脚替换模块：替换 WPS 页脚、修复超链接样式。
 
 公共 API：
-    replace_wps_footers(file_data, doc_xml) -> None
+    replace_wps_footers(parts, doc_xml=None) -> None
     fix_hyperlink_style(styles_xml)         -> bytes
 """
 
@@ -26,6 +26,21 @@ except ModuleNotFoundError:  # pragma: no cover - pytest imports via scripts.mod
         qn as _qn,
     )
 
+try:
+    from modules.part_store import (
+        DOCUMENT_PART,
+        DOCUMENT_RELS_PART,
+        PartStore,
+        coerce_part_store as _coerce_part_store,
+    )
+except ModuleNotFoundError:  # pragma: no cover - pytest imports via scripts.modules
+    from scripts.modules.part_store import (
+        DOCUMENT_PART,
+        DOCUMENT_RELS_PART,
+        PartStore,
+        coerce_part_store as _coerce_part_store,
+    )
+
 
 # ---------------------------------------------------------------------------
 # 页脚 XML 模板
@@ -59,8 +74,8 @@ _FOOTER_EMPTY_XML = (
 # ---------------------------------------------------------------------------
 
 def replace_wps_footers(
-    file_data: dict[str, bytes],
-    doc_xml: bytes,
+    parts: PartStore | dict[str, bytes],
+    doc_xml: bytes | None = None,
 ) -> None:
     """Replace footer*.xml with clean PAGE field footers based on actual sectPr references.
 
@@ -70,18 +85,29 @@ def replace_wps_footers(
 
     若空 footer section 和 PAGE footer section 共享同一 default footer rId，则自动拆分：
     把空 footer section 的 default footerReference 指向一个空闲 footer 文件。
+
+    parts 为共享的 PartStore（直接修改其中的 document 树）；
+    传入旧式 file_data 字典时处理结果写回字典。
     """
+    store, legacy = _coerce_part_store(parts, doc_xml)
+    _replace_wps_footers(store)
+    if legacy is not None:
+        legacy.update(store.serialize_dirty())
+
+
+def _replace_wps_footers(store: PartStore) -> None:
     footer_files: list[str] = []
-    for name in list(file_data):
+    for name in store.names():
         if re.match(r"word/footer\d+\.xml$", name):
             footer_files.append(name)
     if not footer_files:
         return
 
-    # --- 解析 document.xml 获取 sectPr → footerReference 映射 ---
-    dns = _collect_ns(doc_xml)
-    _register_ns(dns)
-    droot = ET.fromstring(doc_xml)
+    # --- 从共享 document 树获取 sectPr → footerReference 映射 ---
+    droot = store.tree(DOCUMENT_PART)
+    if droot is None:
+        return
+    dns = store.ns(DOCUMENT_PART)
     w_sectPr_tag = _qn(dns, "w", "sectPr")
     w_footerRef_tag = _qn(dns, "w", "footerReference")
     w_type_attr = _qn(dns, "w", "type")
@@ -94,12 +120,9 @@ def replace_wps_footers(
     all_sectPr = droot.findall(f".//{w_sectPr_tag}")
 
     # 解析 rels 映射 rId → footer 文件名
-    rels_bytes = file_data.get("word/_rels/document.xml.rels", b"")
+    rroot = store.tree(DOCUMENT_RELS_PART)
     rid_to_footer: dict[str, str] = {}  # rId6 -> footer1.xml
-    if rels_bytes:
-        rns = _collect_ns(rels_bytes)
-        _register_ns(rns)
-        rroot = ET.fromstring(rels_bytes)
+    if rroot is not None:
         for rel in rroot:
             target = rel.get("Target", "")
             rid = rel.get("Id", "")
@@ -170,10 +193,7 @@ def replace_wps_footers(
                 empty_footer_files.add(free_footer)
                 page_footer_files.discard(free_footer)
 
-                # 序列化修改后的 document.xml 回 file_data
-                file_data["word/document.xml"] = ET.tostring(
-                    droot, encoding="utf-8", xml_declaration=True
-                )
+                store.mark_dirty(DOCUMENT_PART)
                 print(
     f"  [footer] Sections {empty_sect_indices} default footer reassigned to {free_base} ({free_rid})")
 
@@ -181,10 +201,10 @@ def replace_wps_footers(
     replaced = 0
     for fname in footer_files:
         if fname in page_footer_files:
-            file_data[fname] = _FOOTER_PAGE_XML.encode("utf-8")
+            store.set_bytes(fname, _FOOTER_PAGE_XML.encode("utf-8"))
         else:
             # 所有非 PAGE 的 footer 文件都写空（包括 first/even 类型、封面 default、未使用的）
-            file_data[fname] = _FOOTER_EMPTY_XML.encode("utf-8")
+            store.set_bytes(fname, _FOOTER_EMPTY_XML.encode("utf-8"))
         replaced += 1
 
     print(f"  [footer] Replaced {replaced} footer file(s) with clean XML")
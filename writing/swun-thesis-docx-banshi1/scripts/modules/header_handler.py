@@ -11,25 +11,35 @@
   Section 4  正文 + 参考文献 + 致谢 → 中文题目
 
 公共 API：
-    add_thesis_headers(file_data, doc_xml, cn_title, en_title) -> None
+    add_thesis_headers(parts, doc_xml=None, cn_title, en_title) -> None
 """
 
 from __future__ import annotations
 
 import re
 import xml.etree.ElementTree as ET
+from typing import Iterable
 
 try:
-    from utils.ooxml import (
-        collect_ns as _collect_ns,
-        register_ns as _register_ns,
-        qn as _qn,
+    from utils.ooxml import qn as _qn
+except ModuleNotFoundError:  # pragma: no cover
+    from scripts.utils.ooxml import qn as _qn
+
+try:
+    from modules.part_store import (
+        CONTENT_TYPES_PART,
+        DOCUMENT_PART,
+        DOCUMENT_RELS_PART,
+        PartStore,
+        coerce_part_store as _coerce_part_store,
     )
 except ModuleNotFoundError:  # pragma: no cover
-    from scripts.utils.ooxml import (
-        collect_ns as _collect_ns,
-        register_ns as _register_ns,
-        qn as _qn,
+    from scripts.modules.part_store import (
+        CONTENT_TYPES_PART,
+        DOCUMENT_PART,
+        DOCUMENT_RELS_PART,
+        PartStore,
+        coerce_part_store as _coerce_part_store,
     )
 
 
@@ -118,20 +128,24 @@ def _make_empty_header_xml() -> bytes:
     return xml_str.encode("utf-8")
 
 
-def _find_max_rid(rels_bytes: bytes) -> int:
-    """从 rels XML 中找到最大的 rIdN 数字，用于分配新的 rId。"""
+def _find_max_rid(rels_root: ET.Element | None) -> int:
+    """从 rels 元素树中找到最大的 rIdN 数字，用于分配新的 rId。"""
     max_n = 0
-    for m in re.finditer(r'\bId="rId(\d+)"', rels_bytes.decode("utf-8", errors="ignore")):
-        n = int(m.group(1))
-        if n > max_n:
-            max_n = n
+    if rels_root is None:
+        return max_n
+    for rel in rels_root:
+        m = re.fullmatch(r"rId(\d+)", rel.get("Id", ""))
+        if m:
+            n = int(m.group(1))
+            if n > max_n:
+                max_n = n
     return max_n
 
 
-def _find_max_header_index(file_data: dict[str, bytes]) -> int:
-    """找到 file_data 中最大的 header{N}.xml 编号。"""
+def _find_max_header_index(names: Iterable[str]) -> int:
+    """找到部件名中最大的 header{N}.xml 编号。"""
     max_n = 0
-    for name in file_data:
+    for name in names:
         m = re.match(r"word/header(\d+)\.xml$", name)
         if m:
             n = int(m.group(1))
@@ -141,12 +155,12 @@ def _find_max_header_index(file_data: dict[str, bytes]) -> int:
 
 
 def add_thesis_headers(
-    file_data: dict[str, bytes],
-    doc_xml: bytes,
+    parts: PartStore | dict[str, bytes],
+    doc_xml: bytes | None = None,
     cn_title: str = CN_TITLE,
     en_title: str = EN_TITLE,
 ) -> None:
-    """为论文各 section 写入页眉，就地修改 file_data。
+    """为论文各 section 写入页眉，就地修改共享的 PartStore。
 
     Section 布局（按插入顺序，0-based）：
       0  封面               → 空页眉
@@ -157,16 +171,26 @@ def add_thesis_headers(
       （若未分 CN/EN 节，section 2 = 摘要全部内容 → cn_title）
 
     实现策略：
-    1. 解析 document.xml 中所有 sectPr 的 headerReference
+    1. 读取共享 document 树中所有 sectPr 的 headerReference
     2. 按 section 索引决定页眉内容（空 / CN / EN）
-    3. 直接覆写 file_data 中对应的 header*.xml 内容
+    3. 直接覆写对应的 header*.xml 部件
     4. 若存在共享冲突（多 section 共用同一 header 文件），拆分为独立文件
     5. 若 sectPr 缺少 headerReference，新建 header 文件并注册到 rels/Content_Types
+       （document / rels / Content_Types 均就地修改活动树，写包时统一序列化）
+
+    传入旧式 file_data 字典时处理结果写回字典。
     """
-    # --- 解析 document.xml ---
-    dns = _collect_ns(doc_xml)
-    _register_ns(dns)
-    droot = ET.fromstring(doc_xml)
+    store, legacy = _coerce_part_store(parts, doc_xml)
+    _add_thesis_headers(store, cn_title, en_title)
+    if legacy is not None:
+        legacy.update(store.serialize_dirty())
+
+
+def _add_thesis_headers(store: PartStore, cn_title: str, en_title: str) -> None:
+    droot = store.tree(DOCUMENT_PART)
+    if droot is None:
+        return
+    dns = store.ns(DOCUMENT_PART)
 
     w_sectPr_tag = _qn(dns, "w", "sectPr")
     w_hdrRef_tag = _qn(dns, "w", "headerReference")
@@ -178,14 +202,11 @@ def add_thesis_headers(
     all_sectPr = droot.findall(f".//{w_sectPr_tag}")
     n_sects = len(all_sectPr)
 
-    # --- 解析 rels 映射 rId → header 文件名 ---
-    rels_bytes = file_data.get("word/_rels/document.xml.rels", b"")
+    # --- rels 映射 rId → header 文件名 ---
+    rels_root = store.tree(DOCUMENT_RELS_PART)
     rid_to_hdr: dict[str, str] = {}   # rId → "header1.xml"
-    if rels_bytes:
-        rns = _collect_ns(rels_bytes)
-        _register_ns(rns)
-        rroot = ET.fromstring(rels_bytes)
-        for rel in rroot:
+    if rels_root is not None:
+        for rel in rels_root:
             target = rel.get("Target", "")
             rid = rel.get("Id", "")
             typ = rel.get("Type", "")
@@ -240,21 +261,20 @@ def add_thesis_headers(
 
     # --- 处理冲突/缺失：新建 header 文件并更新 sectPr ---
     if split_needed:
-        max_rid_n = _find_max_rid(rels_bytes)
-        max_hdr_n = _find_max_header_index(file_data)
+        max_rid_n = _find_max_rid(rels_root)
+        max_hdr_n = _find_max_header_index(store.names())
 
-        # 重新解析 rels 为可写 Element
-        rels_root = ET.fromstring(rels_bytes) if rels_bytes else ET.Element(
-            "Relationships",
-            {"xmlns": "http://schemas.openxmlformats.org/package/2006/relationships"},
-        )
         rels_ns_uri = (
             "http://schemas.openxmlformats.org/package/2006/relationships"
         )
+        if rels_root is None:
+            rels_root = ET.Element(
+                "Relationships",
+                {"xmlns": rels_ns_uri},
+            )
+            store.adopt(DOCUMENT_RELS_PART, rels_root)
 
-        # 解析 Content_Types.xml 为可写 Element
-        ct_bytes = file_data.get("[Content_Types].xml", b"")
-        ct_root = ET.fromstring(ct_bytes) if ct_bytes else None
+        ct_root = store.tree(CONTENT_TYPES_PART)
         ct_ns_uri = "http://schemas.openxmlformats.org/package/2006/content-types"
 
         modified_doc = False
@@ -266,15 +286,15 @@ def add_thesis_headers(
             new_fname = f"header{max_hdr_n}.xml"
             new_fpath = f"word/{new_fname}"
 
-            # 写 header XML 到 file_data
+            # 写 header XML 部件
             if desired_text is None:
-                file_data[new_fpath] = _make_empty_header_xml()
+                store.set_bytes(new_fpath, _make_empty_header_xml())
             else:
-                file_data[new_fpath] = _make_header_xml(
+                store.set_bytes(new_fpath, _make_header_xml(
                     desired_text,
                     24,
                     _header_char_spacing(desired_text),
-                )
+                ))
 
             # 更新 fname_to_text
             fname_to_text[new_fname] = desired_text
@@ -315,30 +335,23 @@ def add_thesis_headers(
             sect_default_rid[sect_idx] = new_rid
             modified_doc = True
 
-        # 序列化修改后的 rels 和 Content_Types 回 file_data
-        file_data["word/_rels/document.xml.rels"] = ET.tostring(
-            rels_root, encoding="utf-8", xml_declaration=True
-        )
+        store.mark_dirty(DOCUMENT_RELS_PART)
         if ct_root is not None:
-            file_data["[Content_Types].xml"] = ET.tostring(
-                ct_root, encoding="utf-8", xml_declaration=True
-            )
+            store.mark_dirty(CONTENT_TYPES_PART)
         if modified_doc:
-            file_data["word/document.xml"] = ET.tostring(
-                droot, encoding="utf-8", xml_declaration=True
-            )
+            store.mark_dirty(DOCUMENT_PART)
 
     # --- 覆写已映射的 header 文件 ---
     for fname, text in fname_to_text.items():
         fpath = f"word/{fname}"
         if text is None:
-            file_data[fpath] = _make_empty_header_xml()
+            store.set_bytes(fpath, _make_empty_header_xml())
         else:
-            file_data[fpath] = _make_header_xml(
+            store.set_bytes(fpath, _make_header_xml(
                 text,
                 24,
                 _header_char_spacing(text),
-            )
+            ))
 
     # --- 确保 first 和 even 类型的 headerReference 也有对应文件（空页眉） ---
     # Word 若找不到 first/even 引用的文件会报错，确保所有 referenced header 文件存在
@@ -349,8 +362,8 @@ def add_thesis_headers(
             if rid and rid in rid_to_hdr:
                 all_hdr_fnames.add(f"word/{rid_to_hdr[rid]}")
     for fpath in all_hdr_fnames:
-        if fpath not in file_data:
-            file_data[fpath] = _make_empty_header_xml()
+        if fpath not in store:
+            store.set_bytes(fpath, _make_empty_header_xml())
 
     # 统计并打印
     non_empty = sum(1 for t in fname_to_text.values() if t is not None)
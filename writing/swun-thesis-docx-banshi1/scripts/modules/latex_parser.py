@@ -4,27 +4,51 @@
 LaTeX 预处理与元数据提取模块。
 
 从 docx_builder.py 提取，供 DOCX 构建管线和其他工具复用。
+
+preprocess_latex 与 scan_latex_metadata 各自只对 flattened 源码做一次
+记号扫描（modules/latex_tokenizer.py）。预处理子函数（resolve_latex_refs、
+flatten_subfigures 等）保留原有的整串实现，供单独调用与等价性对照；
+extract_caption_meta 等提取函数是 scan_latex_metadata 的包装。
 """
 
 from __future__ import annotations
 
 import copy  # noqa: F401  保留供外部可能的 import
+import hashlib
 import os
 import re
 from dataclasses import dataclass
+from functools import lru_cache
 from pathlib import Path
+from typing import Callable, NamedTuple
 
 try:
     from modules.caption_profile import (
         CaptionFormatProfile,
+        caption_profiles_from_json,
+        caption_profiles_to_json,
         extract_caption_profiles,
     )
 except ModuleNotFoundError:  # pragma: no cover
     from scripts.modules.caption_profile import (
         CaptionFormatProfile,
+        caption_profiles_from_json,
+        caption_profiles_to_json,
         extract_caption_profiles,
     )
 
+try:
+    from modules.asset_cache import cached_asset
+    from modules.build_cache import BuildCache
+except ModuleNotFoundError:  # pragma: no cover
+    from scripts.modules.asset_cache import cached_asset
+    from scripts.modules.build_cache import BuildCache
+
+try:
+    from modules.latex_tokenizer import LatexScanner, Token
+except ModuleNotFoundError:  # pragma: no cover
+    from scripts.modules.latex_tokenizer import LatexScanner, Token
+
 try:
     from utils.text_utils import normalize_chinese_double_quotes
 except ModuleNotFoundError:  # pragma: no cover
@@ -64,9 +88,19 @@ class CaptionMeta:
 # ---------------------------------------------------------------------------
 
 def load_caption_profiles(
-    profile_docx: Path) -> dict[str, CaptionFormatProfile]:
+    profile_docx: Path,
+    cache: BuildCache | None = None,
+) -> dict[str, CaptionFormatProfile]:
+    """提取图/表标题格式配置；传入 cache 时按样例 DOCX 内容缓存（资产名 ``caption-profiles``）。"""
     try:
-        return extract_caption_profiles(profile_docx)
+        return cached_asset(
+            "caption-profiles",
+            [profile_docx],
+            lambda: extract_caption_profiles(profile_docx),
+            dump=caption_profiles_to_json,
+            load=caption_profiles_from_json,
+            cache=cache,
+        )
     except FileNotFoundError as exc:
         raise RuntimeError(
             f"missing caption profile source: {profile_docx} "
@@ -154,182 +188,160 @@ def resolve_latex_refs(s: str, labels: dict[str, str]) -> str:
 # Algorithm 环境转换为 pandoc 友好的纯文本
 # ---------------------------------------------------------------------------
 
-def convert_algorithms_to_plain_text(s: str) -> str:
-    """将 \\begin{algorithm}...\\end{algorithm} 转换为 pandoc 可识别的纯文本段落。"""
-    alg_re = re.compile(
-        r"\\begin\{algorithm\}[^\n]*\n(.*?)\\end\{algorithm\}",
-        re.DOTALL,
-    )
-    alg_counter = 0
+_ALGORITHM_RE = re.compile(
+    r"\\begin\{algorithm\}[^\n]*\n(.*?)\\end\{algorithm\}",
+    re.DOTALL,
+)
 
-    def _parse_algorithmic_body(body: str) -> list[tuple[int, int, str]]:
-        """返回 (line_number, indent_level, text) 列表。"""
-        lines: list[tuple[int, int, str]] = []
-        indent = 0
-        num = 0
 
-        def _strip_comment(t: str) -> str:
-            return re.sub(r"\\COMMENT\{([^}]*)\}", r"  ▷ \1", t)
+def _parse_algorithmic_body(body: str) -> list[tuple[int, int, str]]:
+    """返回 (line_number, indent_level, text) 列表。"""
+    lines: list[tuple[int, int, str]] = []
+    indent = 0
+    num = 0
 
-        for raw in body.strip().splitlines():
-            raw = raw.strip()
-            if not raw:
-                continue
+    def _strip_comment(t: str) -> str:
+        return re.sub(r"\\COMMENT\{([^}]*)\}", r"  ▷ \1", t)
 
-            m = re.match(r"\\REQUIRE\s+(.*)", raw)
-            if m:
-                lines.append(
-    (0,
-    0,
-    "\\textbf{输入：}" +
-    _strip_comment(
-        m.group(1).strip())))
-                continue
-            m = re.match(r"\\ENSURE\s+(.*)", raw)
-            if m:
-                lines.append(
-    (0,
-    0,
-    "\\textbf{输出：}" +
-    _strip_comment(
-        m.group(1).strip())))
-                continue
+    for raw in body.strip().splitlines():
+        raw = raw.strip()
+        if not raw:
+            continue
 
-            if re.match(r"\\ENDIF\b", raw):
-                indent = max(0, indent - 1)
-                num += 1
-                lines.append((num, indent, "\\textbf{end if}"))
-                continue
-            if re.match(r"\\ENDFOR\b", raw):
-                indent = max(0, indent - 1)
-                num += 1
-                lines.append((num, indent, "\\textbf{end for}"))
-                continue
-            if re.match(r"\\ENDWHILE\b", raw):
-                indent = max(0, indent - 1)
-                num += 1
-                lines.append((num, indent, "\\textbf{end while}"))
-                continue
+        m = re.match(r"\\REQUIRE\s+(.*)", raw)
+        if m:
+            lines.append(
+                (0, 0, "\\textbf{输入：}" + _strip_comment(m.group(1).strip())))
+            continue
+        m = re.match(r"\\ENSURE\s+(.*)", raw)
+        if m:
+            lines.append(
+                (0, 0, "\\textbf{输出：}" + _strip_comment(m.group(1).strip())))
+            continue
 
-            m = re.match(r"\\ELSIF\{(.*)\}", raw)
-            if m:
-                indent = max(0, indent - 1)
-                num += 1
-                lines.append(
-    (num,
-    indent,
-    "\\textbf{else if} " +
-    m.group(1).strip() +
-     " \\textbf{then}"))
-                indent += 1
-                continue
+        if re.match(r"\\ENDIF\b", raw):
+            indent = max(0, indent - 1)
+            num += 1
+            lines.append((num, indent, "\\textbf{end if}"))
+            continue
+        if re.match(r"\\ENDFOR\b", raw):
+            indent = max(0, indent - 1)
+            num += 1
+            lines.append((num, indent, "\\textbf{end for}"))
+            continue
+        if re.match(r"\\ENDWHILE\b", raw):
+            indent = max(0, indent - 1)
+            num += 1
+            lines.append((num, indent, "\\textbf{end while}"))
+            continue
 
-            if re.match(r"\\ELSE\b", raw):
-                indent = max(0, indent - 1)
-                num += 1
-                lines.append((num, indent, "\\textbf{else}"))
-                indent += 1
-                continue
+        m = re.match(r"\\ELSIF\{(.*)\}", raw)
+        if m:
+            indent = max(0, indent - 1)
+            num += 1
+            lines.append(
+                (num, indent, "\\textbf{else if} " + m.group(1).strip() + " \\textbf{then}"))
+            indent += 1
+            continue
 
-            m = re.match(r"\\IF\{(.*)\}", raw)
-            if m:
-                num += 1
-                lines.append(
-    (num,
-    indent,
-    "\\textbf{if} " +
-    m.group(1).strip() +
-     " \\textbf{then}"))
-                indent += 1
-                continue
+        if re.match(r"\\ELSE\b", raw):
+            indent = max(0, indent - 1)
+            num += 1
+            lines.append((num, indent, "\\textbf{else}"))
+            indent += 1
+            continue
 
-            m = re.match(r"\\FOR\{(.*)\}", raw)
-            if m:
-                num += 1
-                lines.append(
-    (num,
-    indent,
-    "\\textbf{for} " +
-    m.group(1).strip() +
-     " \\textbf{do}"))
-                indent += 1
-                continue
+        m = re.match(r"\\IF\{(.*)\}", raw)
+        if m:
+            num += 1
+            lines.append(
+                (num, indent, "\\textbf{if} " + m.group(1).strip() + " \\textbf{then}"))
+            indent += 1
+            continue
 
-            m = re.match(r"\\WHILE\{(.*)\}", raw)
-            if m:
-                num += 1
-                lines.append(
-    (num,
-    indent,
-    "\\textbf{while} " +
-    m.group(1).strip() +
-     " \\textbf{do}"))
-                indent += 1
-                continue
+        m = re.match(r"\\FOR\{(.*)\}", raw)
+        if m:
+            num += 1
+            lines.append(
+                (num, indent, "\\textbf{for} " + m.group(1).strip() + " \\textbf{do}"))
+            indent += 1
+            continue
 
-            m = re.match(r"\\RETURN\s+(.*)", raw)
-            if m:
-                num += 1
-                lines.append(
-    (num,
-    indent,
-    "\\textbf{return} " +
-    _strip_comment(
-        m.group(1).strip())))
-                continue
+        m = re.match(r"\\WHILE\{(.*)\}", raw)
+        if m:
+            num += 1
+            lines.append(
+                (num, indent, "\\textbf{while} " + m.group(1).strip() + " \\textbf{do}"))
+            indent += 1
+            continue
 
-            m = re.match(r"\\STATE\s+(.*)", raw)
-            if m:
-                num += 1
-                lines.append((num, indent, _strip_comment(m.group(1).strip())))
-                continue
+        m = re.match(r"\\RETURN\s+(.*)", raw)
+        if m:
+            num += 1
+            lines.append(
+                (num, indent, "\\textbf{return} " + _strip_comment(m.group(1).strip())))
+            continue
 
-        return lines
+        m = re.match(r"\\STATE\s+(.*)", raw)
+        if m:
+            num += 1
+            lines.append((num, indent, _strip_comment(m.group(1).strip())))
+            continue
 
-    def _repl_algorithm(m: re.Match) -> str:
-        nonlocal alg_counter
-        alg_counter += 1
-        block = m.group(1)
+    return lines
 
-        cap_m = re.search(r"\\caption\{([^}]*)\}", block)
-        caption = cap_m.group(1) if cap_m else f"算法 {alg_counter}"
 
-        lab_m = re.search(r"\\label\{([^}]*)\}", block)
-        label_str = f"\\label{{{lab_m.group(1)}}}" if lab_m else ""
+def _render_algorithm(block: str, alg_number: int) -> str | None:
+    """将 algorithm 环境内容渲染为纯文本段落；不含 algorithmic 时返回 None。"""
+    cap_m = re.search(r"\\caption\{([^}]*)\}", block)
+    caption = cap_m.group(1) if cap_m else f"算法 {alg_number}"
 
-        alg_m = re.search(
-            r"\\begin\{algorithmic\}[^\n]*\n(.*?)\\end\{algorithmic\}",
-            block, re.DOTALL
-        )
-        if not alg_m:
-            return m.group(0)
+    lab_m = re.search(r"\\label\{([^}]*)\}", block)
+    label_str = f"\\label{{{lab_m.group(1)}}}" if lab_m else ""
 
-        parsed = _parse_algorithmic_body(alg_m.group(1))
+    alg_m = re.search(
+        r"\\begin\{algorithmic\}[^\n]*\n(.*?)\\end\{algorithmic\}",
+        block, re.DOTALL
+    )
+    if not alg_m:
+        return None
 
-        out = []
-        out.append("")
-        out.append(f"\\textbf{{算法 {alg_counter}}} {caption}{label_str}")
-        out.append("")
-        out.append("\\noindent\\rule{\\textwidth}{0.4pt}")
-        out.append("")
+    parsed = _parse_algorithmic_body(alg_m.group(1))
 
-        for num, indent, text in parsed:
-            indent_marker = "\u230AN\u230B".replace("N", str(indent))
-            if num == 0:
-                out.append(f"\\noindent {indent_marker}{text}")
-                out.append("")
-            else:
-                out.append(
-    f"\\noindent {indent_marker}\\textrm{{{num}:}} {text}")
-                out.append("")
+    out = []
+    out.append("")
+    out.append(f"\\textbf{{算法 {alg_number}}} {caption}{label_str}")
+    out.append("")
+    out.append("\\noindent\\rule{\\textwidth}{0.4pt}")
+    out.append("")
+
+    for num, indent, text in parsed:
+        indent_marker = "\u230AN\u230B".replace("N", str(indent))
+        if num == 0:
+            out.append(f"\\noindent {indent_marker}{text}")
+            out.append("")
+        else:
+            out.append(f"\\noindent {indent_marker}\\textrm{{{num}:}} {text}")
+            out.append("")
 
-        out.append("")
-        out.append("\\noindent\\rule{\\textwidth}{0.4pt}")
-        out.append("")
+    out.append("")
+    out.append("\\noindent\\rule{\\textwidth}{0.4pt}")
+    out.append("")
 
-        return "\n".join(out)
+    return "\n".join(out)
 
-    return alg_re.sub(_repl_algorithm, s)
+
+def convert_algorithms_to_plain_text(s: str) -> str:
+    """将 \\begin{algorithm}...\\end{algorithm} 转换为 pandoc 可识别的纯文本段落。"""
+    alg_counter = 0
+
+    def _repl_algorithm(m: re.Match) -> str:
+        nonlocal alg_counter
+        alg_counter += 1
+        out = _render_algorithm(m.group(1), alg_counter)
+        return m.group(0) if out is None else out
+
+    return _ALGORITHM_RE.sub(_repl_algorithm, s)
 
 
 # ---------------------------------------------------------------------------
@@ -417,41 +429,19 @@ def expand_custom_column_types(s: str) -> str:
 # ---------------------------------------------------------------------------
 
 def preprocess_latex(s: str) -> str:
-    """对 flattened LaTeX 源码进行 DOCX 构建前预处理。"""
-    s = s.replace("\\<", "<")
+    """对 flattened LaTeX 源码进行 DOCX 构建前预处理。
 
-    s = re.sub(
-        r"\\printbibliography\s*(\[[^\]]*\])?",
-        "",
-        s,
-        flags=re.MULTILINE,
-    )
-
-    s = s.replace("\\begin{titlepage}", "")
-    s = s.replace("\\end{titlepage}", "")
-
-    s = re.sub(r"\\ul\\{[^}]*\\}", "__________", s)
-
-    s = re.sub(
-        r"(\\[bp]?mod)\s+([A-Za-z])\s*\n",
-        r"\1{\2}\n",
-        s,
-    )
+    除 ``\\<`` 替换与中文引号规范化两处纯文本替换外，全部改写规则在一次
+    记号扫描中完成（见 _RewritePass）；结果与依次调用各子函数一致。
+    """
+    s = s.replace("\\<", "<")
 
     aux_path = ROOT / "main.aux"
     labels = parse_aux_labels(aux_path)
-    if labels:
-        s = resolve_latex_refs(s, labels)
-
-    s = convert_algorithms_to_plain_text(s)
-
-    s = expand_custom_column_types(s)
+    rewrite = _RewritePass(s, labels)
+    s = rewrite.run()
 
-    s = expand_if_file_exists(s)
-
-    s = flatten_subfigures(s)
-    s = prefer_png_for_docx_images(s)
-    unresolved = find_unresolved_pdf_experiment_refs(s)
+    unresolved = list(rewrite.unresolved_pdf)
     if unresolved:
         lines = "\n".join(f"  - {p}" for p in unresolved)
         raise RuntimeError(
@@ -500,25 +490,70 @@ def find_unresolved_pdf_experiment_refs(s: str) -> list[str]:
 # \IfFileExists 展开
 # ---------------------------------------------------------------------------
 
-def expand_if_file_exists(s: str) -> str:
-    """展开 \\IfFileExists{path}{true-branch}{false-branch}，使 pandoc 能识别其中的图片。"""
+def _read_brace_group(text: str, start: int) -> tuple[str, int] | None:
+    """读取从 start 开始的 {…} 括号组，返回 (内容, 结束位置后一位)。
 
-    def _read_brace_group(text: str, start: int) -> tuple[str, int] | None:
-        """读取从 start 开始的 {…} 括号组，返回 (内容, 结束位置后一位)。"""
-        if start >= len(text) or text[start] != "{":
-            return None
-        depth = 0
-        i = start
-        while i < len(text):
-            ch = text[i]
-            if ch == "{":
-                depth += 1
-            elif ch == "}":
-                depth -= 1
-                if depth == 0:
-                    return text[start + 1: i], i + 1
-            i += 1
+    与 read_balanced 不同，不跳过反斜杠转义（\\IfFileExists / tabularx 展开沿用此语义）。
+    """
+    if start >= len(text) or text[start] != "{":
         return None
+    depth = 0
+    i = start
+    while i < len(text):
+        ch = text[i]
+        if ch == "{":
+            depth += 1
+        elif ch == "}":
+            depth -= 1
+            if depth == 0:
+                return text[start + 1: i], i + 1
+        i += 1
+    return None
+
+
+def _skip_ws_and_comments(s: str, pos: int) -> int:
+    """跳过空白与 % 注释（\\IfFileExists 两个分支之间）。"""
+    while pos < len(s) and s[pos] in (" ", "\t", "\n", "%"):
+        if s[pos] == "%":
+            while pos < len(s) and s[pos] != "\n":
+                pos += 1
+        else:
+            pos += 1
+    return pos
+
+
+def _if_file_exists(file_path_arg: str, root: Path | None = None) -> bool:
+    """\\IfFileExists 的判定：路径本身或其 PNG 版本存在于论文目录。"""
+    root = ROOT if root is None else root
+    fp = file_path_arg.strip()
+    png_fp = str(Path(fp).with_suffix(".png"))
+    return (root / png_fp).exists() or (root / fp).exists()
+
+
+_IF_FILE_EXISTS_RE = re.compile(r"\\IfFileExists\s*")
+
+
+def preprocess_inputs_digest(s: str, root: Path | None = None) -> str:
+    """preprocess_latex 从文件系统读取的输入摘要（源码之外）。
+
+    包括 main.aux 中的交叉引用编号（\\ref / \\eqref 的解析结果）与每个
+    \\IfFileExists 的判定；LaTeX 重新编译改变编号或图片文件增删时摘要随之变化。
+    PNG 候选解析见 figure_raster.png_resolution_digest。
+    """
+    root = ROOT if root is None else root
+    h = hashlib.sha256()
+    for label, number in sorted(parse_aux_labels(root / "main.aux").items()):
+        h.update(f"label\t{label}\t{number}\n".encode("utf-8"))
+    for m in _IF_FILE_EXISTS_RE.finditer(s):
+        group = _read_brace_group(s, m.end())
+        if group is not None:
+            hit = _if_file_exists(group[0], root)
+            h.update(f"iffe\t{group[0].strip()}\t{int(hit)}\n".encode("utf-8"))
+    return h.hexdigest()
+
+
+def expand_if_file_exists(s: str) -> str:
+    """展开 \\IfFileExists{path}{true-branch}{false-branch}，使 pandoc 能识别其中的图片。"""
 
     result = []
     i = 0
@@ -548,12 +583,7 @@ def expand_if_file_exists(s: str) -> str:
             continue
         true_branch, pos = r2
 
-        while pos < len(s) and s[pos] in (" ", "\t", "\n", "%"):
-            if s[pos] == "%":
-                while pos < len(s) and s[pos] != "\n":
-                    pos += 1
-            else:
-                pos += 1
+        pos = _skip_ws_and_comments(s, pos)
 
         r3 = _read_brace_group(s, pos)
         if r3 is not None:
@@ -561,9 +591,7 @@ def expand_if_file_exists(s: str) -> str:
         else:
             false_branch = ""
 
-        fp = file_path_arg.strip()
-        png_fp = str(Path(fp).with_suffix(".png"))
-        if (ROOT / png_fp).exists() or (ROOT / fp).exists():
+        if _if_file_exists(file_path_arg):
             result.append(true_branch)
         else:
             result.append(false_branch)
@@ -577,24 +605,28 @@ def expand_if_file_exists(s: str) -> str:
 # PNG 优先替换
 # ---------------------------------------------------------------------------
 
-def prefer_png_for_docx_images(s: str) -> str:
-    """在 DOCX 构建阶段优先将 includegraphics 的 PDF 路径替换为 PNG。"""
+def png_candidates(raw_path: str) -> list[Path]:
+    """PDF 图片路径对应的 PNG 候选（相对论文目录，按优先级）；非 PDF 返回空表。"""
+    p = Path(raw_path.strip())
+    if p.suffix.lower() != ".pdf":
+        return []
 
-    def _pick_png_path(raw_path: str) -> str | None:
-        p = Path(raw_path.strip())
-        if p.suffix.lower() != ".pdf":
-            return None
+    candidates = [p.with_suffix(".png")]
+    if p.as_posix().startswith("figures/ch4/"):
+        candidates.append(
+            Path("experiments/ch4_v2/results/figures") / p.with_suffix(".png").name)
+    return candidates
 
-        candidates = [p.with_suffix(".png")]
-        if p.as_posix().startswith("figures/ch4/"):
-            candidates.append(
-    Path("experiments/ch4_v2/results/figures") /
-     p.with_suffix(".png").name)
 
-        for cand in candidates:
-            if (ROOT / cand).exists():
-                return cand.as_posix()
-        return None
+def _pick_png_path(raw_path: str) -> str | None:
+    for cand in png_candidates(raw_path):
+        if (ROOT / cand).exists():
+            return cand.as_posix()
+    return None
+
+
+def prefer_png_for_docx_images(s: str) -> str:
+    """在 DOCX 构建阶段优先将 includegraphics 的 PDF 路径替换为 PNG。"""
 
     def _repl(m: re.Match) -> str:
         prefix, path_str, suffix = m.group(1), m.group(2), m.group(3)
@@ -659,31 +691,45 @@ def read_balanced(s: str, i: int, open_ch: str,
     return None
 
 
-def extract_command_args(text: str, cmd: str, nargs: int) -> list[str] | None:
-    pat = re.compile(rf"\\{re.escape(cmd)}(?![A-Za-z])")
-    for m in pat.finditer(text):
-        i = m.end()
-        while True:
-            i = skip_ws(text, i)
-            if i < len(text) and text[i] == "[":
-                got = read_balanced(text, i, "[", "]")
-                if got is None:
-                    break
-                _, i = got
-                continue
-            break
+def _read_command_args(
+    text: str, i: int, nargs: int, *, strip_comments: bool = False
+) -> list[str] | None:
+    """从命令名之后的位置 i 读取 nargs 个必选参数（跳过可选参数 [..]）。
 
-        args: list[str] = []
-        ok = True
-        for _ in range(nargs):
-            i = skip_ws(text, i)
-            got = read_balanced(text, i, "{", "}")
+    strip_comments 为 True 时剥除参数内的 % 注释（记号扫描在未剥注释的原文上进行）。
+    """
+    while True:
+        i = skip_ws(text, i)
+        if i < len(text) and text[i] == "[":
+            got = read_balanced(text, i, "[", "]")
             if got is None:
-                ok = False
                 break
-            val, i = got
-            args.append(re.sub(r"\s+", " ", val).strip())
-        if ok:
+            _, i = got
+            continue
+        break
+
+    args: list[str] = []
+    for _ in range(nargs):
+        i = skip_ws(text, i)
+        got = read_balanced(text, i, "{", "}")
+        if got is None:
+            return None
+        val, i = got
+        if strip_comments and "%" in val:
+            val = strip_latex_comments(val)
+        args.append(re.sub(r"\s+", " ", val).strip())
+    return args
+
+
+@lru_cache(maxsize=None)
+def _command_re(cmd: str) -> re.Pattern[str]:
+    return re.compile(rf"\\{re.escape(cmd)}(?![A-Za-z])")
+
+
+def extract_command_args(text: str, cmd: str, nargs: int) -> list[str] | None:
+    for m in _command_re(cmd).finditer(text):
+        args = _read_command_args(text, m.end(), nargs)
+        if args is not None:
             return args
     return None
 
@@ -692,78 +738,279 @@ def extract_command_args(text: str, cmd: str, nargs: int) -> list[str] | None:
 # 元数据提取
 # ---------------------------------------------------------------------------
 
-def extract_caption_meta(flat_tex: str) -> dict[str, CaptionMeta]:
-    """从 flattened LaTeX 提取图/表 caption 元数据，键为 label。"""
-    s = strip_latex_comments(flat_tex)
-    begin_re = re.compile(r"\\begin\{(figure|table)\*?\}")
-    out: dict[str, CaptionMeta] = {}
-    errs: list[str] = []
-    pos = 0
+@dataclass
+class LatexMetadata:
+    """scan_latex_metadata 的结果：DOCX 后处理所需的全部 LaTeX 元数据。"""
 
-    while True:
-        m = begin_re.search(s, pos)
-        if m is None:
-            break
-        env = m.group(1)
-        start = m.start()
-        line_no = s.count("\n", 0, start) + 1
-        end_re = re.compile(rf"\\end\{{{env}\*?\}}")
-        m_end = end_re.search(s, m.end())
-        if m_end is None:
-            errs.append(
-    f"{env} block at line {line_no}: missing \\end{{{env}}}")
-            pos = m.end()
-            continue
-        block = s[m.start(): m_end.end()]
+    caption_meta: dict[str, CaptionMeta]
+    caption_errors: list[str]
+    display_math_flags: list[bool]
+    keywords: tuple[str | None, str | None]
+    table_col_specs: dict[str, list[float]]
+    subfigure_parents: dict[str, str]
 
-        label_args = extract_command_args(block, "label", 1)
-        label = label_args[0].strip() if label_args else ""
-        bi = extract_command_args(block, "bilingualcaption", 2)
-        cap = extract_command_args(block, "caption", 1) if bi is None else None
 
-        if not label:
-            errs.append(
-    f"{env} block at line {line_no}: missing \\label{{...}}")
-        if bi is None and cap is None:
-            errs.append(
-     f"{env} block at line {line_no}: missing \\bilingualcaption{ ...} { ...}  or \\caption{ ...} " )
-        if bi is not None and not (bi[1] or "").strip():
-            errs.append(
-    f"{env} block at line {line_no}: bilingualcaption English title is empty for label '{
+@dataclass
+class _FloatBlock:
+    """扫描中的 figure / table 块（从 \\begin 到第一个同名 \\end）。"""
+
+    env: str  # "figure" | "table"
+    line_no: int
+    label: str | None = None
+    bi: list[str] | None = None
+    cap: list[str] | None = None
+    tab_label: str | None = None
+    tabularx_seen: bool = False
+    tabularx_spec: str | None = None
+    tabular_seen: bool = False
+    tabular_spec: str | None = None
+
+
+_METADATA_COMMANDS = ("label", "caption", "bilingualcaption", "cnkeywords", "enkeywords")
+_FLOAT_ENVS = {"figure": "figure", "figure*": "figure", "table": "table", "table*": "table"}
+# 显示公式环境 -> 是否编号
+_MATH_ENVS = {
+    "equation": True, "equation*": False,
+    "align": True, "align*": False,
+    "gather": True, "gather*": False,
+    "multline": True, "multline*": False,
+}
+_KEYWORD_ARG_RE = re.compile(r"\{([^}]*)\}")
+_TAB_LABEL_ARG_RE = re.compile(r"\{(tab:[^}]+)\}")
+
+_LINEWIDTH_CM = 15.0
+
+
+def _parse_colspec(spec: str, is_tabularx: bool) -> list[float] | None:
+    cols: list[float] = []
+    i = 0
+    while i < len(spec):
+        ch = spec[i]
+        if ch in "lcr":
+            cols.append(0.0)
+            i += 1
+        elif ch in "XY" and is_tabularx:
+            cols.append(-1.0)
+            i += 1
+        elif ch == "p" and i + 1 < len(spec) and spec[i + 1] == "{":
+            got = read_balanced(spec, i + 1, "{", "}")
+            if got is None:
+                i += 1
+                continue
+            width_str, i = got
+            ratio = parse_width_to_ratio(width_str, _LINEWIDTH_CM)
+            cols.append(ratio if ratio is not None else 0.0)
+        elif ch in "|@!>< {}":
+            i += 1
+        else:
+            i += 1
+    if not cols:
+        return None
+    if all(c == 0.0 for c in cols):
+        return None
+    return cols
+
+
+def _read_tabular_colspec(src: str, pos: int, is_tabularx: bool) -> str | None:
+    """读取 \\begin{tabular}{spec} / \\begin{tabularx}{width}{spec} 的列规格。"""
+    if is_tabularx:
+        got = read_balanced(src, pos, "{", "}")
+        if got is None:
+            return None
+        _, pos = got
+    got = read_balanced(src, pos, "{", "}")
+    if got is None:
+        return None
+    spec = got[0]
+    return strip_latex_comments(spec) if "%" in spec else spec
+
+
+def _finish_float_block(
+    block: _FloatBlock,
+    captions: dict[str, CaptionMeta],
+    col_specs: dict[str, list[float]],
+    errs: list[str],
+) -> None:
+    env, line_no = block.env, block.line_no
+    label = (block.label or "").strip()
+    bi = block.bi
+    cap = block.cap if bi is None else None
+
+    if not label:
+        errs.append(
+        f"{env} block at line {line_no}: missing \\label{{...}}")
+    if bi is None and cap is None:
+        errs.append(
+         f"{env} block at line {line_no}: missing \\bilingualcaption{ ...} { ...}  or \\caption{ ...} " )
+    if bi is not None and not (bi[1] or "").strip():
+        errs.append(
+        f"{env} block at line {line_no}: bilingualcaption English title is empty for label '{
         label or '<MISSING_LABEL>'}'" )
 
-        if label and (bi is not None or cap is not None):
-            kind = "figure" if env == "figure" else "table"
-            if bi is not None:
-                meta = CaptionMeta(
-                    kind=kind,
-                    label=label,
-                    cn_title=bi[0],
-                    en_title=bi[1].strip(),
-                    source="bilingualcaption",
-                )
-            else:
-                meta = CaptionMeta(
-                    kind=kind,
-                    label=label,
-                    cn_title=(cap[0] if cap else "").strip(),
-                    en_title=None,
-                    source="caption",
-                )
-            if label in out:
-                errs.append(
+    if label and (bi is not None or cap is not None):
+        kind = "figure" if env == "figure" else "table"
+        if bi is not None:
+            meta = CaptionMeta(
+                kind=kind,
+                label=label,
+                cn_title=bi[0],
+                en_title=bi[1].strip(),
+                source="bilingualcaption",
+            )
+        else:
+            meta = CaptionMeta(
+                kind=kind,
+                label=label,
+                cn_title=(cap[0] if cap else "").strip(),
+                en_title=None,
+                source="caption",
+            )
+        if label in captions:
+            errs.append(
     f"duplicate label in figure/table environments: {label}")
-            else:
-                out[label] = meta
+        else:
+            captions[label] = meta
+
+    # 列宽：优先 tabularx（即使 tabular 先出现），解析失败则跳过该表
+    if block.tab_label is None:
+        return
+    if block.tabularx_seen:
+        spec, is_tabularx = block.tabularx_spec, True
+    elif block.tabular_seen:
+        spec, is_tabularx = block.tabular_spec, False
+    else:
+        return
+    if spec is None:
+        return
+    cols = _parse_colspec(spec, is_tabularx=is_tabularx)
+    if cols is not None:
+        col_specs[block.tab_label] = cols
 
-        pos = m_end.end()
 
-    if errs:
-        msg = "\n".join(f"  - {e}" for e in errs)
-        raise RuntimeError(
-    "DOCX build blocked: failed to extract figure/table captions from LaTeX:\n" +
-     msg)
-    return out
+def scan_latex_metadata(flat_tex: str, *, strict: bool = True) -> LatexMetadata:
+    """单遍扫描 flattened LaTeX，同时提取 caption、公式编号标志、关键词、
+    表格列宽与子图 → 父图 label 映射。
+
+    各提取器作为同一记号流的消费者（见 modules/latex_tokenizer.py），
+    结果与逐项提取函数一致；注释中的命令一律忽略。
+    strict 为 True 时，caption 提取错误以 RuntimeError 报告（同 extract_caption_meta）。
+    """
+    src = flat_tex
+    scanner = LatexScanner(src, _METADATA_COMMANDS)
+    captions: dict[str, CaptionMeta] = {}
+    col_specs: dict[str, list[float]] = {}
+    errs: list[str] = []
+    flags: list[bool] = []
+    cn_raw: str | None = None
+    en_raw: str | None = None
+
+    subfigures = _SubfigureCollector(src)
+    block: _FloatBlock | None = None
+    math_env: str | None = None
+    math_idx = -1
+    bracket_idx = -1
+
+    for tok in scanner:
+        kind, name = tok.kind, tok.name
+        if kind == "cmd":
+            if name == "cnkeywords" or name == "enkeywords":
+                m = _KEYWORD_ARG_RE.match(src, tok.end)
+                if m is not None:
+                    if name == "cnkeywords":
+                        cn_raw = m.group(1)
+                    else:
+                        en_raw = m.group(1)
+            elif name == "label":
+                subfigures.label(tok)
+                if block is None:
+                    continue
+                if block.label is None:
+                    args = _read_command_args(src, tok.end, 1, strip_comments=True)
+                    if args is not None:
+                        block.label = args[0]
+                if block.tab_label is None:
+                    m = _TAB_LABEL_ARG_RE.match(src, tok.end)
+                    if m is not None:
+                        block.tab_label = m.group(1)
+            elif block is None:
+                continue
+            elif name == "bilingualcaption":
+                if block.bi is None:
+                    block.bi = _read_command_args(src, tok.end, 2, strip_comments=True)
+            elif block.cap is None:  # caption
+                block.cap = _read_command_args(src, tok.end, 1, strip_comments=True)
+        elif kind == "begin":
+            if name == "figure":
+                subfigures.begin_figure()
+            elif name == "subfigure":
+                subfigures.begin_subfigure()
+            if name in _MATH_ENVS:
+                if math_env is None:
+                    math_env, math_idx = name, len(flags)
+                    flags.append(_MATH_ENVS[name])
+            elif block is None:
+                if name in _FLOAT_ENVS:
+                    block = _FloatBlock(_FLOAT_ENVS[name], scanner.line_at(tok.start))
+            elif name == "tabularx":
+                if not block.tabularx_seen:
+                    block.tabularx_seen = True
+                    block.tabularx_spec = _read_tabular_colspec(src, tok.end, True)
+            elif name == "tabular":
+                if not block.tabular_seen:
+                    block.tabular_seen = True
+                    block.tabular_spec = _read_tabular_colspec(src, tok.end, False)
+        elif kind == "end":
+            if name == "figure":
+                subfigures.end_figure()
+            if name == math_env:
+                math_env, math_idx = None, -1
+            elif block is not None and _FLOAT_ENVS.get(name) == block.env:
+                _finish_float_block(block, captions, col_specs, errs)
+                block = None
+        elif kind == "sym":
+            if name == "[":
+                if bracket_idx < 0:
+                    bracket_idx = len(flags)
+                    flags.append(False)
+            elif name == "]":
+                bracket_idx = -1
+
+    # 未闭合的显示公式不计入
+    for idx in sorted((i for i in (math_idx, bracket_idx) if i >= 0), reverse=True):
+        del flags[idx]
+    if block is not None:
+        env, line_no = block.env, block.line_no
+        errs.append(
+        f"{env} block at line {line_no}: missing \\end{{{env}}}")
+
+    if strict and errs:
+        raise RuntimeError(_caption_errors_message(errs))
+
+    def _keyword(raw: str | None) -> str | None:
+        if raw is None:
+            return None
+        return re.sub(r"\s+", " ", raw).strip() or None
+
+    return LatexMetadata(
+        caption_meta=captions,
+        caption_errors=errs,
+        display_math_flags=flags,
+        keywords=(_keyword(cn_raw), _keyword(en_raw)),
+        table_col_specs=col_specs,
+        subfigure_parents=subfigures.parents,
+    )
+
+
+def _caption_errors_message(errs: list[str]) -> str:
+    msg = "\n".join(f"  - {e}" for e in errs)
+    return (
+        "DOCX build blocked: failed to extract figure/table captions from LaTeX:\n" +
+        msg)
+
+
+def extract_caption_meta(flat_tex: str) -> dict[str, CaptionMeta]:
+    """从 flattened LaTeX 提取图/表 caption 元数据，键为 label。"""
+    return scan_latex_metadata(flat_tex).caption_meta
 
 
 def parse_latex_table_col_specs(latex_src: str) -> dict[str, list[float]]:
@@ -776,86 +1023,7 @@ def parse_latex_table_col_specs(latex_src: str) -> dict[str, list[float]]:
     - ``-1.0``：tabularX 的 ``X`` 列
     - ``0.0``：自动列（``l/c/r``）
     """
-    LINEWIDTH_CM = 15.0
-
-    src = strip_latex_comments(latex_src)
-    result: dict[str, list[float]] = {}
-
-    table_env_re = re.compile(
-        r"\\begin\{table\*?\}.*?\\end\{table\*?\}", re.DOTALL
-    )
-    tabular_begin_re = re.compile(r"\\begin\{tabular\}")
-    tabularx_begin_re = re.compile(r"\\begin\{tabularx\}")
-    label_re = re.compile(r"\\label\{(tab:[^}]+)\}")
-
-    def _parse_colspec(spec: str, is_tabularx: bool) -> list[float] | None:
-        cols: list[float] = []
-        i = 0
-        while i < len(spec):
-            ch = spec[i]
-            if ch in "lcr":
-                cols.append(0.0)
-                i += 1
-            elif ch in "XY" and is_tabularx:
-                cols.append(-1.0)
-                i += 1
-            elif ch == "p" and i + 1 < len(spec) and spec[i + 1] == "{":
-                got = read_balanced(spec, i + 1, "{", "}")
-                if got is None:
-                    i += 1
-                    continue
-                width_str, i = got
-                ratio = parse_width_to_ratio(width_str, LINEWIDTH_CM)
-                cols.append(ratio if ratio is not None else 0.0)
-            elif ch in "|@!>< {}":
-                i += 1
-            else:
-                i += 1
-        if not cols:
-            return None
-        if all(c == 0.0 for c in cols):
-            return None
-        return cols
-
-    for m in table_env_re.finditer(src):
-        block = m.group(0)
-        label_m = label_re.search(block)
-        if label_m is None:
-            continue
-        label = label_m.group(1)
-
-        colspec_str: str | None = None
-        is_tabularx = False
-        tx_m = tabularx_begin_re.search(block)
-        t_m = tabular_begin_re.search(block)
-        if tx_m is not None:
-            is_tabularx = True
-            pos = tx_m.end()
-            got = read_balanced(block, pos, "{", "}")
-            if got is None:
-                continue
-            _, pos = got
-            got = read_balanced(block, pos, "{", "}")
-            if got is None:
-                continue
-            colspec_str, _ = got
-        elif t_m is not None:
-            pos = t_m.end()
-            got = read_balanced(block, pos, "{", "}")
-            if got is None:
-                continue
-            colspec_str, _ = got
-        else:
-            continue
-
-        if colspec_str is None:
-            continue
-        cols = _parse_colspec(colspec_str, is_tabularx=is_tabularx)
-
-        if cols is not None:
-            result[label] = cols
-
-    return result
+    return scan_latex_metadata(latex_src, strict=False).table_col_specs
 
 
 def parse_width_to_ratio(width_str: str, linewidth_cm: float) -> float | None:
@@ -882,34 +1050,7 @@ def parse_width_to_ratio(width_str: str, linewidth_cm: float) -> float | None:
 
 def flatten_subfigures(s: str) -> str:
     """将 subfigure \\ref 替换为父图 \\ref，并剥除 subfigure 内部的 caption/label。"""
-    subfig_to_parent: dict[str, str] = {}
-
-    fig_re = re.compile(
-        r"\\begin\{figure\}.*?\\end\{figure\}", re.DOTALL
-    )
-    subfig_label_re = re.compile(
-    r"\\begin\{subfigure\}.*?\\label\{([^}]+)\}.*?\\end\{subfigure\}",
-     re.DOTALL )
-    parent_label_re = re.compile(r"\\label\{([^}]+)\}")
-
-    for fig_m in fig_re.finditer(s):
-        fig_block = fig_m.group(0)
-        sub_labels = [m.group(1) for m in subfig_label_re.finditer(fig_block)]
-        if not sub_labels:
-            continue
-
-        stripped = re.sub(
-    r"\\begin\{subfigure\}.*?\\end\{subfigure\}",
-    "",
-    fig_block,
-     flags=re.DOTALL )
-        parent_m = parent_label_re.search(stripped)
-        if not parent_m:
-            continue
-        parent_label = parent_m.group(1)
-
-        for sl in sub_labels:
-            subfig_to_parent[sl] = parent_label
+    subfig_to_parent = scan_latex_metadata(s, strict=False).subfigure_parents
 
     if not subfig_to_parent:
         return s
@@ -942,6 +1083,361 @@ def flatten_subfigures(s: str) -> str:
     return s
 
 
+# ---------------------------------------------------------------------------
+# 单遍改写：preprocess_latex 的各改写规则作为同一记号流的消费者
+# ---------------------------------------------------------------------------
+
+_REWRITE_COMMANDS = (
+    "printbibliography", "ul", "mod", "bmod", "pmod", "ref", "eqref",
+    "newcolumntype", "IfFileExists", "includegraphics", "caption", "label",
+)
+_PRINTBIB_TAIL_RE = re.compile(r"\s*(?:\[[^\]]*\])?")
+_UL_ARG_RE = re.compile(r"\\\{[^}]*\\\}")
+_MOD_ARG_RE = re.compile(r"\s+([A-Za-z])\s*\n")
+_REF_ARG_RE = re.compile(r"\{([^}]*)\}")
+_REF_LABEL_RE = re.compile(r"(?:alg|eq|tab|fig|sec):.", re.DOTALL)
+_LABEL_ARG_RE = re.compile(r"\{([^}]+)\}")
+_SUBFIG_INTERNAL_ARG_RE = re.compile(r"\{[^}]*\}\s*")
+_SUBFIG_BEGIN_ARGS_RE = re.compile(r"(?:\[[^\]]*\])?\{[^}]*\}")
+_GRAPHICS_ARG_RE = re.compile(r"(?:\[[^\]]*\])?\{([^}]+)\}")
+_SUBFIG_REF_PAIR_RE = re.compile(
+    r"(图[~\s]*)\\ref\{([^}]+)\}\s*[与和及]\s*图[~\s]*\\ref\{\2\}")
+_WS_RE = re.compile(r"\s*")
+_END_ALGORITHM = "\\end{algorithm}"
+
+
+class _Edit(NamedTuple):
+    """源码区间 [start, end) 的改写。
+
+    wrap 为 None 时以 text 整体替换（区间内的其他改写随之丢弃）；
+    否则先应用区间内的嵌套改写，再以结果调用 wrap。
+    """
+
+    start: int
+    end: int
+    text: str = ""
+    wrap: Callable[[str], str] | None = None
+
+
+def _splice_edits(
+    src: str, edits: list[_Edit], i: int, lo: int, hi: int, out: list[str]
+) -> int:
+    pos = lo
+    n = len(edits)
+    while i < n and edits[i].start < hi:
+        e = edits[i]
+        i += 1
+        if e.start < pos:  # 与已应用的改写重叠
+            continue
+        out.append(src[pos:e.start])
+        if e.wrap is None:
+            out.append(e.text)
+            while i < n and edits[i].start < e.end:
+                i += 1
+        else:
+            inner: list[str] = []
+            i = _splice_edits(src, edits, i, e.start, e.end, inner)
+            out.append(e.wrap("".join(inner)))
+        pos = e.end
+    out.append(src[pos:hi])
+    return i
+
+
+def _apply_edits(src: str, edits: list[_Edit]) -> str:
+    if not edits:
+        return src
+    edits.sort(key=lambda e: (e.start, -e.end))
+    out: list[str] = []
+    _splice_edits(src, edits, 0, 0, len(src), out)
+    return "".join(out)
+
+
+def _rewrite_algorithm(text: str, alg_number: int) -> str:
+    m = _ALGORITHM_RE.match(text)
+    out = _render_algorithm(m.group(1), alg_number) if m else None
+    return text if out is None else out
+
+
+def _newcolumntype_end(s: str, end: int) -> int:
+    """\\newcolumntype{Y} 之后定义体的结束位置（与 expand_custom_column_types 一致）。"""
+    depth = 0
+    while end < len(s):
+        if s[end] == "{":
+            depth += 1
+        elif s[end] == "}":
+            depth -= 1
+            if depth == 0:
+                return end + 1
+        end += 1
+    return end
+
+
+class _SubfigureCollector:
+    """按记号收集子图 label → 父图 label（判定与 flatten_subfigures 一致）。
+
+    只统计 figure 环境（不含 figure*）：子图 label 为各 subfigure 内第一个
+    \\label，父图 label 为 subfigure 之外的第一个 \\label；没有父图 label
+    的 figure 不登记。
+    """
+
+    def __init__(self, src: str) -> None:
+        self.src = src
+        self.parents: dict[str, str] = {}
+        self._sub_labels: list[str] | None = None
+        self._parent: str | None = None
+        self._labeled = False
+
+    def begin_figure(self) -> None:
+        if self._sub_labels is None:
+            self._sub_labels, self._parent = [], None
+
+    def end_figure(self) -> None:
+        if self._sub_labels is None:
+            return
+        if self._sub_labels and self._parent:
+            for sub_label in self._sub_labels:
+                self.parents[sub_label] = self._parent
+        self._sub_labels = None
+
+    def begin_subfigure(self) -> None:
+        self._labeled = False
+
+    def label(self, tok: Token) -> None:
+        if self._sub_labels is None:
+            return
+        m = _LABEL_ARG_RE.match(self.src, tok.end)
+        if m is None:
+            return
+        if "subfigure" in tok.envs:
+            if not self._labeled:
+                self._sub_labels.append(m.group(1))
+                self._labeled = True
+        elif self._parent is None:
+            self._parent = m.group(1)
+
+
+class _RewritePass:
+    """preprocess_latex 的单遍改写。
+
+    规则与原先逐个整串替换的函数一一对应，按记号登记区间改写，最后一次拼接：
+    - 删除 \\printbibliography、titlepage 环境标记；\\ul\\{..\\} 换为下划线
+    - \\bmod / \\pmod 参数补花括号；按 main.aux 解析 \\ref / \\eqref
+    - algorithm 环境转纯文本（包裹式改写，内部先应用其他规则）
+    - 删除 \\newcolumntype{Y}，tabularx 列规格 Y → X
+    - 展开 \\IfFileExists（未选分支不再扫描）
+    - subfigure 展平（父图映射在扫描结束后才完整，相关改写暂存）
+    - includegraphics 优先 PNG，并收集仍指向 PDF 的实验图
+    """
+
+    def __init__(self, src: str, labels: dict[str, str]) -> None:
+        self.src = src
+        self.labels = labels
+        self.scanner = LatexScanner(src, _REWRITE_COMMANDS)
+        self.edits: list[_Edit] = []
+        self.unresolved_pdf: dict[str, None] = {}
+        self.alg_counter = 0
+        self.alg_until = -1
+        self.iffe_until = -1
+        self.newcolumntype_done = False
+        self.subfigures = _SubfigureCollector(src)
+        self.subfig_edits: list[_Edit] = []
+        self.subfig_refs: list[tuple[int, int, str]] = []
+
+    def run(self) -> str:
+        handlers: dict[tuple[str, str], Callable] = {
+            ("cmd", "printbibliography"): self._printbibliography,
+            ("cmd", "ul"): self._ul,
+            ("cmd", "mod"): self._mod,
+            ("cmd", "bmod"): self._mod,
+            ("cmd", "pmod"): self._mod,
+            ("cmd", "ref"): self._ref,
+            ("cmd", "eqref"): self._ref,
+            ("cmd", "newcolumntype"): self._newcolumntype,
+            ("cmd", "IfFileExists"): self._if_file_exists,
+            ("cmd", "includegraphics"): self._includegraphics,
+            ("cmd", "caption"): self._subfigure_internal,
+            ("cmd", "label"): self._label,
+            ("begin", "titlepage"): self._drop_token,
+            ("end", "titlepage"): self._drop_token,
+            ("begin", "algorithm"): self._algorithm,
+            ("begin", "tabularx"): self._tabularx,
+            ("begin", "figure"): self._begin_figure,
+            ("end", "figure"): self._end_figure,
+            ("begin", "subfigure"): self._begin_subfigure,
+            ("end", "subfigure"): self._end_subfigure,
+        }
+        for tok in self.scanner:
+            handler = handlers.get((tok.kind, tok.name))
+            if handler is not None:
+                handler(tok)
+
+        subfig_to_parent = self.subfigures.parents
+        if subfig_to_parent:
+            self.edits.extend(self.subfig_edits)
+            for start, end, label in self.subfig_refs:
+                parent = subfig_to_parent.get(label)
+                if parent is not None:
+                    self.edits.append(_Edit(start, end, f"\\ref{{{parent}}}"))
+        out = _apply_edits(self.src, self.edits)
+        if subfig_to_parent:
+            out = _SUBFIG_REF_PAIR_RE.sub(r"\1\\ref{\2}", out)
+        return out
+
+    # -- 单记号规则 ---------------------------------------------------------
+
+    def _drop_token(self, tok: Token) -> None:
+        self.edits.append(_Edit(tok.start, tok.end))
+
+    def _printbibliography(self, tok: Token) -> None:
+        end = _PRINTBIB_TAIL_RE.match(self.src, tok.end).end()
+        self.edits.append(_Edit(tok.start, end))
+
+    def _ul(self, tok: Token) -> None:
+        m = _UL_ARG_RE.match(self.src, tok.end)
+        if m is not None:
+            self.edits.append(_Edit(tok.start, m.end(), "__________"))
+
+    def _mod(self, tok: Token) -> None:
+        m = _MOD_ARG_RE.match(self.src, tok.end)
+        if m is not None:
+            self.edits.append(
+                _Edit(tok.start, m.end(), f"\\{tok.name}{{{m.group(1)}}}\n"))
+
+    def _ref(self, tok: Token) -> None:
+        src = self.src
+        m = _REF_ARG_RE.match(src, tok.end)
+        if m is None:
+            return
+        label = m.group(1)
+        if self.labels:
+            if tok.name == "eqref":
+                resolvable = label.startswith("eq:") and len(label) > 3
+            else:
+                resolvable = _REF_LABEL_RE.match(label) is not None
+            num = self.labels.get(label) if resolvable else None
+            if num is not None:
+                if label.startswith("eq:"):
+                    num = f"({num.replace('.', '-')})"
+                start = tok.start - 1 if tok.start > 0 and src[tok.start - 1] == "~" else tok.start
+                self.edits.append(_Edit(start, m.end(), num))
+                return
+        if tok.name == "ref":
+            self.subfig_refs.append((tok.start, m.end(), label))
+
+    def _newcolumntype(self, tok: Token) -> None:
+        # 与旧实现一致：只删除第一处 \newcolumntype{Y}
+        if self.newcolumntype_done or not self.src.startswith("{Y}", tok.end):
+            return
+        self.newcolumntype_done = True
+        end = _newcolumntype_end(self.src, tok.end + 3)
+        self.edits.append(_Edit(tok.start, end))
+
+    def _tabularx(self, tok: Token) -> None:
+        src = self.src
+        width = _read_brace_group(src, tok.end)
+        if width is None:
+            return
+        col_start = width[1]
+        colspec = _read_brace_group(src, col_start)
+        if colspec is None or "Y" not in colspec[0]:
+            return
+        self.edits.append(
+            _Edit(col_start + 1, colspec[1] - 1, colspec[0].replace("Y", "X")))
+
+    def _includegraphics(self, tok: Token) -> None:
+        m = _GRAPHICS_ARG_RE.match(self.src, tok.end)
+        if m is None:
+            return
+        path = m.group(1)
+        new_path = _pick_png_path(path)
+        if new_path:
+            self.edits.append(_Edit(m.start(1), m.end(1), new_path))
+        final = (new_path or path).strip()
+        if is_experiment_figure_path(final) and final.lower().endswith(".pdf"):
+            self.unresolved_pdf[final] = None
+
+    # -- 区间规则 -----------------------------------------------------------
+
+    def _algorithm(self, tok: Token) -> None:
+        src = self.src
+        if tok.start < self.alg_until:
+            return
+        nl = src.find("\n", tok.end)
+        if nl < 0:
+            return
+        close = src.find(_END_ALGORITHM, nl + 1)
+        if close < 0:
+            return
+        self.alg_counter += 1
+        number = self.alg_counter
+        self.alg_until = close + len(_END_ALGORITHM)
+        self.edits.append(_Edit(
+            tok.start, self.alg_until,
+            wrap=lambda text: _rewrite_algorithm(text, number)))
+
+    def _if_file_exists(self, tok: Token) -> None:
+        # 已选分支按原样保留，其中嵌套的 \IfFileExists 不再展开（同旧实现）
+        if tok.start < self.iffe_until:
+            return
+        src = self.src
+        path_group = _read_brace_group(src, _WS_RE.match(src, tok.end).end())
+        if path_group is None:
+            return
+        true_start = path_group[1]
+        true_group = _read_brace_group(src, true_start)
+        if true_group is None:
+            return
+        true_end = true_group[1]
+        false_start = _skip_ws_and_comments(src, true_end)
+        false_group = _read_brace_group(src, false_start)
+        end = false_group[1] if false_group is not None else true_end
+
+        if _if_file_exists(path_group[0]):
+            keep: tuple[int, int] | None = (true_start + 1, true_end - 1)
+        elif false_group is not None:
+            keep = (false_start + 1, end - 1)
+        else:
+            keep = None
+
+        self.iffe_until = end
+        if keep is None:
+            self.edits.append(_Edit(tok.start, end))
+            self.scanner.skip(tok.end, end)
+            return
+        self.edits.append(_Edit(tok.start, keep[0]))
+        self.edits.append(_Edit(keep[1], end))
+        self.scanner.skip(tok.end, keep[0])
+        self.scanner.skip(keep[1], end)
+
+    # -- subfigure 展平 -----------------------------------------------------
+
+    def _begin_figure(self, tok: Token) -> None:
+        self.subfigures.begin_figure()
+
+    def _end_figure(self, tok: Token) -> None:
+        self.subfigures.end_figure()
+
+    def _begin_subfigure(self, tok: Token) -> None:
+        self.subfigures.begin_subfigure()
+        m = _SUBFIG_BEGIN_ARGS_RE.match(self.src, tok.end)
+        if m is not None:
+            self.subfig_edits.append(_Edit(tok.start, m.end()))
+
+    def _end_subfigure(self, tok: Token) -> None:
+        self.subfig_edits.append(_Edit(tok.start, tok.end))
+
+    def _label(self, tok: Token) -> None:
+        self.subfigures.label(tok)
+        self._subfigure_internal(tok)
+
+    def _subfigure_internal(self, tok: Token) -> None:
+        if "subfigure" not in tok.envs:
+            return
+        m = _SUBFIG_INTERNAL_ARG_RE.match(self.src, tok.end)
+        if m is not None:
+            self.subfig_edits.append(_Edit(tok.start, m.end()))
+
+
 # ---------------------------------------------------------------------------
 # 数学公式编号标志提取
 # ---------------------------------------------------------------------------
@@ -953,21 +1449,7 @@ def extract_display_math_number_flags(latex: str) -> list[bool]:
     - 有编号：equation/align/gather/multline（无 * 后缀）
     - 无编号：星号变体和 \\[ ... \\] 块
     """
-    blocks: list[tuple[int, bool]] = []
-
-    env_re = re.compile(
-        r"\\begin\{(equation\*?|align\*?|gather\*?|multline\*?)\}[\s\S]*?\\end\{\1\}"
-    )
-    for m in env_re.finditer(latex):
-        env = m.group(1)
-        blocks.append((m.start(), not env.endswith("*")))
-
-    br_re = re.compile(r"(?<!\\)\\\[[\s\S]*?\\\]")
-    for m in br_re.finditer(latex):
-        blocks.append((m.start(), False))
-
-    blocks.sort(key=lambda x: x[0])
-    return [b for _, b in blocks]
+    return scan_latex_metadata(latex, strict=False).display_math_flags
 
 
 # ---------------------------------------------------------------------------
@@ -975,17 +1457,8 @@ def extract_display_math_number_flags(latex: str) -> list[bool]:
 # ---------------------------------------------------------------------------
 
 def extract_keywords(latex: str) -> tuple[str | None, str | None]:
-    def last_group(pattern: str) -> str | None:
-        ms = list(re.finditer(pattern, latex, flags=re.DOTALL))
-        if not ms:
-            return None
-        val = ms[-1].group(1)
-        val = re.sub(r"\s+", " ", val).strip()
-        return val or None
-
-    cn = last_group(r"\\cnkeywords\{([^}]*)\}")
-    en = last_group(r"\\enkeywords\{([^}]*)\}")
-    return cn, en
+    """返回最后一处 \\cnkeywords{...} / \\enkeywords{...} 的内容（空白折叠）。"""
+    return scan_latex_metadata(latex, strict=False).keywords
 
 
 def split_keywords(raw: str, max_groups: int = 4, lang: str = "cn") -> str:
@@ -1079,12 +1552,14 @@ _parse_width_to_ratio = parse_width_to_ratio
 _flatten_subfigures = flatten_subfigures
 _extract_display_math_number_flags = extract_display_math_number_flags
 _extract_keywords = extract_keywords
+_scan_latex_metadata = scan_latex_metadata
 _split_keywords = split_keywords
 
 
 __all__ = [
     # 数据类
     "CaptionMeta",
+    "LatexMetadata",
     # caption profile
     "load_caption_profiles",
     "default_caption_profiles",
@@ -1098,12 +1573,15 @@ __all__ = [
     "expand_if_file_exists",
     "flatten_subfigures",
     "prefer_png_for_docx_images",
+    "png_candidates",
+    "preprocess_inputs_digest",
     "strip_latex_comments",
     # 底层解析
     "skip_ws",
     "read_balanced",
     "extract_command_args",
     # 元数据提取
+    "scan_latex_metadata",
     "extract_caption_meta",
     "parse_latex_table_col_specs",
     "parse_width_to_ratio",
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+LaTeX 词法扫描 — 单遍产生带环境栈的记号流。
+
+latex_parser 的预处理改写与元数据提取原先各自对整篇 flattened 源码跑一遍
+正则；本模块把源码切分为一个记号流，各消费者在同一遍扫描中按记号位置
+读取所需参数（见 latex_parser.read_balanced）。记号类型：
+
+- begin / end   ``\\begin{name}`` / ``\\end{name}``（name 为花括号内原文）
+- cmd           控制词 ``\\name``（不含其后的 ``*``）
+- sym           控制符 ``\\X``（``\\[`` ``\\]`` ``\\\\`` ``\\%`` ``\\{`` 等，name 为该字符）
+- comment       ``%`` 至行尾（不含换行）
+
+普通文本与花括号不产生记号。``envs`` 为记号所在位置外层的环境栈
+（begin / end 记号均不含该环境自身）。
+
+转义先于注释匹配：``\\%`` 是控制符而非注释，``\\\\[2pt]`` 是换行加可选参数
+而非 ``\\[`` 显示公式。
+"""
+
+from __future__ import annotations
+
+import heapq
+import re
+from bisect import bisect_right
+from typing import Iterable, Iterator, NamedTuple
+
+
+class Token(NamedTuple):
+    kind: str  # "begin" | "end" | "cmd" | "sym" | "comment"
+    name: str
+    start: int
+    end: int
+    envs: tuple[str, ...]
+
+
+def _token_re(commands: Iterable[str] | None) -> re.Pattern[str]:
+    if commands is None:
+        word = r"[A-Za-z@]+"
+    else:
+        # 只关心少数控制词时，其余控制词由正则引擎直接跳过，不进入 Python 循环
+        names = sorted(set(commands), key=len, reverse=True)
+        word = "(?:" + "|".join(re.escape(n) for n in names) + r")(?![A-Za-z@])"
+    return re.compile(
+        r"\\(begin|end)\{([^{}]*)\}"
+        rf"|\\({word})"
+        r"|\\([^A-Za-z@])"
+        r"|(%)[^\n]*",
+        re.DOTALL,
+    )
+
+
+_ALL_TOKENS_RE = _token_re(None)
+
+
+class LineIndex:
+    """行首偏移表：一次预计算后以二分查找把字符位置换算为行号（1 起）。"""
+
+    def __init__(self, src: str) -> None:
+        self.offsets = [0]
+        self.offsets.extend(m.end() for m in re.finditer("\n", src))
+
+    def line_at(self, pos: int) -> int:
+        return bisect_right(self.offsets, pos)
+
+
+class LatexScanner:
+    """对 src 的单遍记号扫描器。
+
+    commands 限定输出的控制词集合（None 表示全部）；begin / end、控制符与
+    注释总是输出，以保证转义与环境栈正确。
+
+    消费者可在迭代过程中调用 skip(lo, hi) 声明一段尚未扫描到的区间不再
+    产生记号（例如将被整体删除的分支）；line_at(pos) 返回 pos 所在行号
+    （首次调用时建立 LineIndex）。
+    """
+
+    def __init__(self, src: str, commands: Iterable[str] | None = None) -> None:
+        self.src = src
+        self._re = _ALL_TOKENS_RE if commands is None else _token_re(commands)
+        self._skips: list[tuple[int, int]] = []
+        self._lines: LineIndex | None = None
+
+    def skip(self, lo: int, hi: int) -> None:
+        if hi > lo:
+            heapq.heappush(self._skips, (lo, hi))
+
+    def line_at(self, pos: int) -> int:
+        if self._lines is None:
+            self._lines = LineIndex(self.src)
+        return self._lines.line_at(pos)
+
+    def __iter__(self) -> Iterator[Token]:
+        src = self.src
+        search = self._re.search
+        skips = self._skips
+        stack: list[str] = []
+        envs: tuple[str, ...] = ()
+        pos = 0
+        while True:
+            m = search(src, pos)
+            if m is None:
+                return
+            start = m.start()
+            while skips and skips[0][1] <= start:
+                heapq.heappop(skips)
+            if skips and start >= skips[0][0]:
+                pos = max(pos, heapq.heappop(skips)[1])
+                continue
+            pos = m.end()
+            kind = m.lastindex
+            if kind == 2:
+                name = m.group(2)
+                if m.group(1) == "begin":
+                    yield Token("begin", name, start, pos, envs)
+                    stack.append(name)
+                else:
+                    if name in stack:
+                        while stack.pop() != name:
+                            pass
+                    envs = tuple(stack)
+                    yield Token("end", name, start, pos, envs)
+                    continue
+                envs = tuple(stack)
+            elif kind == 3:
+                yield Token("cmd", m.group(3), start, pos, envs)
+            elif kind == 4:
+                yield Token("sym", m.group(4), start, pos, envs)
+            else:
+                yield Token("comment", "%", start, pos, envs)
+
+
+def tokenize(src: str, commands: Iterable[str] | None = None) -> Iterator[Token]:
+    """便捷入口：``iter(LatexScanner(src, commands))``。"""
+    return iter(LatexScanner(src, commands))
+
+
+__all__ = [
+    "Token",
+    "LineIndex",
+    "LatexScanner",
+    "tokenize",
+]
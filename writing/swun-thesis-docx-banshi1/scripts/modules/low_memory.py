@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+OOXML 后处理低内存模式（按需启用）。
+
+启用方式：
+- 环境变量 SWUN_LOW_MEMORY=1
+- build_docx_banshi1.py 命令行参数 --low-memory
+
+低内存模式下 _postprocess_docx：
+- document.xml 从 ZIP 流直接解析，不先读出整份字节
+- 写包时 document.xml 等脏树直接序列化进压缩流，不拼出完整字节
+- 各阶段结束后释放 BodyIndex、管线闭包与已交给 PartStore 的中间字节，并执行 gc
+- 结束时打印进程峰值 RSS（[memory] 行）
+
+图片等媒体成员在两种模式下都按块原样拷贝压缩字节（见 utils/zip_writer.py），
+XML 部件之外的成员从不读入内存。输出 DOCX 与普通模式逐字节相同。
+"""
+
+from __future__ import annotations
+
+import gc
+import os
+import sys
+
+try:
+    import resource
+except ImportError:  # pragma: no cover - Windows
+    resource = None  # type: ignore[assignment]
+
+LOW_MEMORY_ENV = "SWUN_LOW_MEMORY"
+LOW_MEMORY_FLAG = "--low-memory"
+
+
+def low_memory_requested(argv: list[str] | None = None) -> bool:
+    """命令行含 --low-memory 或环境变量开启时返回 True。"""
+    if argv is not None and LOW_MEMORY_FLAG in argv:
+        return True
+    return os.environ.get(LOW_MEMORY_ENV, "").strip().lower() in {"1", "true", "yes", "on"}
+
+
+def peak_rss_mib() -> float | None:
+    """进程峰值常驻内存（MiB）；平台不支持时返回 None。"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux 以 KiB 计，macOS 以字节计
+    if sys.platform == "darwin":
+        peak /= 1024
+    return round(peak / 1024, 1)
+
+
+def release_memory() -> int:
+    """回收已释放的循环引用（元素树、闭包），返回回收的对象数。"""
+    return gc.collect()
+
+
+def report_peak_memory(label: str = "postprocess") -> None:
+    peak = peak_rss_mib()
+    if peak is not None:
+        print(f"  [memory] {label} peak RSS {peak:.1f} MiB")
+
+
+__all__ = [
+    "LOW_MEMORY_ENV",
+    "LOW_MEMORY_FLAG",
+    "low_memory_requested",
+    "peak_rss_mib",
+    "release_memory",
+    "report_peak_memory",
+]
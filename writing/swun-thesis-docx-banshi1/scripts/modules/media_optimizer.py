@@ -0,0 +1,426 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+最终 DOCX 媒体优化（按需启用）— 去重、按显示尺寸降采样、无损重压缩。
+
+pandoc 按源分辨率嵌入图片，fit_figure_images_to_cells 只改显示尺寸（wp:extent），
+像素不变；图片密集的论文 DOCX 可达数百 MB。本阶段在后处理之后：
+
+1) 去重：word/media/ 下内容（sha256）与扩展名相同的成员只保留第一个，
+   各 .rels 中指向重复成员的 Target 改写为保留成员，[Content_Types].xml 中
+   对应的 Override 一并删除
+2) 降采样：PNG 的像素尺寸超过其最大显示尺寸（各处 wp:extent 取最大值）在目标 DPI
+   下所需像素 5% 以上时，等比缩小（需要 Pillow；未安装时跳过并在报告中注明）
+3) 无损重压缩：PNG 的 IDAT 数据以 zlib 级别 9 重新压缩（像素与滤波方式不变）
+   只在结果更小时替换
+
+有无法确定显示尺寸的引用（VML、无 extent 的形状等）的图片只做无损重压缩；
+JPEG 等其他格式只参与去重。各图片在进程池中并行处理，未改动的成员原样拷贝压缩字节。
+
+启用方式：
+- SWUN_MEDIA_OPTIMIZE=1          构建时对最终 DOCX 执行本阶段
+- SWUN_MEDIA_DPI=<dpi>           降采样目标分辨率（默认 300）
+- SWUN_MEDIA_WORKERS=<n>         并发进程数（默认 CPU 数）
+"""
+
+from __future__ import annotations
+
+import hashlib
+import io
+import math
+import multiprocessing
+import os
+import posixpath
+import re
+import struct
+import xml.etree.ElementTree as ET
+import zipfile
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+
+try:
+    from utils.zip_writer import compresslevel_from_env, write_docx_package
+except ModuleNotFoundError:  # pragma: no cover - pytest imports via scripts.modules
+    from scripts.utils.zip_writer import compresslevel_from_env, write_docx_package
+
+
+MEDIA_ENV = "SWUN_MEDIA_OPTIMIZE"
+DPI_ENV = "SWUN_MEDIA_DPI"
+WORKERS_ENV = "SWUN_MEDIA_WORKERS"
+DEFAULT_DPI = 300
+
+MEDIA_PREFIX = "word/media/"
+CONTENT_TYPES_PART = "[Content_Types].xml"
+EMU_PER_INCH = 914400
+# 像素超出所需 5% 以上才降采样，避免为微小差异重编码
+RESAMPLE_SLACK = 1.05
+
+WP_NS = "http://schemas.openxmlformats.org/drawingml/2006/wordprocessingDrawing"
+A_NS = "http://schemas.openxmlformats.org/drawingml/2006/main"
+R_NS = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+_WP_CONTAINERS = (f"{{{WP_NS}}}inline", f"{{{WP_NS}}}anchor")
+_WP_EXTENT = f"{{{WP_NS}}}extent"
+_A_BLIP = f"{{{A_NS}}}blip"
+_R_EMBED = f"{{{R_NS}}}embed"
+
+_PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+_RELATIONSHIP_RE = re.compile(rb"<Relationship\b[^>]*>")
+_TARGET_RE = re.compile(rb'(\bTarget=")([^"]*)(")')
+
+
+@dataclass
+class MediaReport:
+    """媒体优化结果（字节数为未压缩大小）。"""
+
+    media_before: int = 0
+    media_after: int = 0
+    bytes_before: int = 0
+    bytes_after: int = 0
+    deduplicated: dict[str, str] = field(default_factory=dict)
+    resampled: list[str] = field(default_factory=list)
+    recompressed: list[str] = field(default_factory=list)
+    resample_skipped: str | None = None
+
+    @property
+    def saved_bytes(self) -> int:
+        return self.bytes_before - self.bytes_after
+
+
+def media_optimize_requested() -> bool:
+    return os.environ.get(MEDIA_ENV, "").strip().lower() in {"1", "true", "yes", "on"}
+
+
+def dpi_from_env() -> int:
+    try:
+        dpi = int(os.environ.get(DPI_ENV, "").strip())
+    except ValueError:
+        return DEFAULT_DPI
+    return dpi if dpi > 0 else DEFAULT_DPI
+
+
+def workers_from_env() -> int:
+    try:
+        n = int(os.environ.get(WORKERS_ENV, "").strip())
+    except ValueError:
+        n = 0
+    return n if n > 0 else (os.cpu_count() or 1)
+
+
+def _pillow_available() -> bool:
+    try:
+        from PIL import Image  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+# ---------------------------------------------------------------------------
+# PNG 处理（工作进程内执行）
+# ---------------------------------------------------------------------------
+
+def _png_chunk(kind: bytes, body: bytes) -> bytes:
+    return (struct.pack(">I", len(body)) + kind + body
+            + struct.pack(">I", zlib.crc32(kind + body) & 0xFFFFFFFF))
+
+
+def recompress_png(data: bytes, level: int = 9) -> bytes | None:
+    """以 zlib 级别 level 重新压缩 PNG 的 IDAT（合并为单个块）；无收益或非 PNG 时返回 None。"""
+    if not data.startswith(_PNG_SIGNATURE):
+        return None
+    chunks: list[tuple[bytes, bytes]] = []
+    pos = len(_PNG_SIGNATURE)
+    try:
+        while pos < len(data):
+            (length,) = struct.unpack(">I", data[pos:pos + 4])
+            kind = data[pos + 4:pos + 8]
+            chunks.append((kind, data[pos + 8:pos + 8 + length]))
+            pos += 12 + length
+            if kind == b"IEND":
+                break
+        idat = b"".join(body for kind, body in chunks if kind == b"IDAT")
+        packed = zlib.compress(zlib.decompress(idat), level)
+    except (struct.error, zlib.error):
+        return None
+    if not idat or len(packed) >= len(idat):
+        return None
+    out = [_PNG_SIGNATURE]
+    wrote_idat = False
+    for kind, body in chunks:
+        if kind == b"IDAT":
+            if not wrote_idat:
+                out.append(_png_chunk(b"IDAT", packed))
+                wrote_idat = True
+            continue
+        out.append(_png_chunk(kind, body))
+    return b"".join(out)
+
+
+def resample_png(data: bytes, target_px: tuple[int, int]) -> bytes | None:
+    """把 PNG 等比缩小到恰好覆盖 target_px（宽, 高）；不需要缩小或未安装 Pillow 时返回 None。"""
+    try:
+        from PIL import Image
+    except ImportError:
+        return None
+    with Image.open(io.BytesIO(data)) as img:
+        w, h = img.size
+        tw, th = target_px
+        if w <= tw * RESAMPLE_SLACK or h <= th * RESAMPLE_SLACK:
+            return None
+        scale = max(tw / w, th / h)
+        size = (max(1, math.ceil(w * scale)), max(1, math.ceil(h * scale)))
+        out = io.BytesIO()
+        params = {"optimize": True}
+        if "dpi" in img.info:
+            params["dpi"] = img.info["dpi"]
+        img.resize(size, Image.LANCZOS).save(out, format="PNG", **params)
+    return out.getvalue()
+
+
+def _optimize_member(
+    docx: str, name: str, target_px: tuple[int, int] | None
+) -> tuple[str, bytes | None, str]:
+    """返回 (成员名, 新字节或 None, 动作)；动作为 resampled / recompressed / 空串。"""
+    with zipfile.ZipFile(docx) as zf:
+        data = zf.read(name)
+    if not data.startswith(_PNG_SIGNATURE):
+        return name, None, ""
+    best, action = data, ""
+    if target_px is not None:
+        resized = resample_png(data, target_px)
+        if resized is not None and len(resized) < len(best):
+            best, action = resized, "resampled"
+    packed = recompress_png(best)
+    if packed is not None and len(packed) < len(best):
+        best, action = packed, action or "recompressed"
+    return name, (best if action else None), action
+
+
+# ---------------------------------------------------------------------------
+# 包结构分析
+# ---------------------------------------------------------------------------
+
+def _rels_source(rels_name: str) -> str:
+    """word/_rels/document.xml.rels -> word/document.xml。"""
+    folder, base = posixpath.split(rels_name)
+    return posixpath.join(posixpath.dirname(folder), base[: -len(".rels")])
+
+
+def _resolve_target(rels_name: str, target: str) -> str:
+    if target.startswith("/"):
+        return target.lstrip("/")
+    return posixpath.normpath(posixpath.join(posixpath.dirname(_rels_source(rels_name)), target))
+
+
+def _relative_target(rels_name: str, part: str) -> str:
+    return posixpath.relpath(part, posixpath.dirname(_rels_source(rels_name)) or ".")
+
+
+def _media_relationships(zin: zipfile.ZipFile, rels_name: str) -> dict[str, str]:
+    """rels 部件中指向 word/media/ 的内部关系：{rId: 媒体部件名}。"""
+    out: dict[str, str] = {}
+    root = ET.fromstring(zin.read(rels_name))
+    for rel in root:
+        if rel.get("TargetMode") == "External":
+            continue
+        rid, target = rel.get("Id"), rel.get("Target")
+        if rid and target:
+            part = _resolve_target(rels_name, target)
+            if part.startswith(MEDIA_PREFIX):
+                out[rid] = part
+    return out
+
+
+def _display_extents(
+    zin: zipfile.ZipFile, rels_name: str, rel_map: dict[str, str]
+) -> tuple[dict[str, tuple[int, int]], set[str]]:
+    """统计源部件中各媒体的最大显示尺寸（EMU）与无法确定尺寸的媒体。"""
+    extents: dict[str, tuple[int, int]] = {}
+    unknown: set[str] = set(rel_map.values())
+    source = _rels_source(rels_name)
+    if source not in zin.namelist():
+        return extents, unknown
+    root = ET.fromstring(zin.read(source))
+    sized: set[int] = set()
+    for container in root.iter():
+        if container.tag not in _WP_CONTAINERS:
+            continue
+        ext = container.find(_WP_EXTENT)
+        try:
+            cx, cy = int(ext.get("cx")), int(ext.get("cy"))
+        except (AttributeError, TypeError, ValueError):
+            cx = cy = 0
+        for blip in container.iter(_A_BLIP):
+            name = rel_map.get(blip.get(_R_EMBED, ""))
+            if name is None or cx <= 0 or cy <= 0:
+                continue
+            sized.add(id(blip))
+            old = extents.get(name, (0, 0))
+            extents[name] = (max(old[0], cx), max(old[1], cy))
+    # 只有全部引用都有尺寸的媒体才可降采样
+    referenced_unsized = {
+        rel_map[b.get(_R_EMBED, "")] for b in root.iter(_A_BLIP)
+        if id(b) not in sized and b.get(_R_EMBED, "") in rel_map
+    }
+    unknown = (unknown - set(extents)) | referenced_unsized
+    return extents, unknown
+
+
+def _rewrite_rels(data: bytes, rels_name: str, remap: dict[str, str]) -> bytes:
+    def fix_rel(m: re.Match) -> bytes:
+        rel = m.group(0)
+        if b'TargetMode="External"' in rel:
+            return rel
+
+        def fix_target(t: re.Match) -> bytes:
+            part = _resolve_target(rels_name, t.group(2).decode("utf-8"))
+            if part not in remap:
+                return t.group(0)
+            new = _relative_target(rels_name, remap[part]).encode("utf-8")
+            return t.group(1) + new + t.group(3)
+
+        return _TARGET_RE.sub(fix_target, rel)
+
+    return _RELATIONSHIP_RE.sub(fix_rel, data)
+
+
+def _drop_overrides(data: bytes, removed: set[str]) -> bytes:
+    pattern = re.compile(rb'<Override\b[^>]*\bPartName="/([^"]+)"[^>]*/>')
+    return pattern.sub(lambda m: b"" if m.group(1).decode("utf-8") in removed else m.group(0), data)
+
+
+def _sha256_member(zin: zipfile.ZipFile, name: str) -> str:
+    h = hashlib.sha256()
+    with zin.open(name) as fh:
+        for chunk in iter(lambda: fh.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+# ---------------------------------------------------------------------------
+# 阶段入口
+# ---------------------------------------------------------------------------
+
+def optimize_docx_media(
+    docx: Path,
+    out: Path | None = None,
+    *,
+    dpi: int | None = None,
+    workers: int | None = None,
+) -> MediaReport:
+    """优化 docx 的媒体成员并写出到 out（默认原地替换），返回报告。"""
+    dpi = dpi or dpi_from_env()
+    out = out or docx
+    report = MediaReport()
+    if not _pillow_available():
+        report.resample_skipped = "Pillow not installed"
+
+    with zipfile.ZipFile(docx) as zin:
+        names = zin.namelist()
+        media = [n for n in names if n.startswith(MEDIA_PREFIX) and not n.endswith("/")]
+        sizes = {info.filename: info.file_size for info in zin.infolist()}
+        report.media_before = len(media)
+        report.bytes_before = sum(sizes[n] for n in media)
+
+        # 1) 去重：同内容同扩展名的成员合并到首个
+        first: dict[tuple[str, str], str] = {}
+        for name in media:
+            key = (_sha256_member(zin, name), posixpath.splitext(name)[1].lower())
+            kept = first.setdefault(key, name)
+            if kept != name:
+                report.deduplicated[name] = kept
+
+        # 2) 显示尺寸：各源部件按 rels 汇总，重复成员并入保留成员
+        rels_parts = [n for n in names if n.endswith(".rels")]
+        extents: dict[str, tuple[int, int]] = {}
+        unknown: set[str] = set()
+        replacements: dict[str, bytes] = {}
+        for rels_name in rels_parts:
+            rel_map = _media_relationships(zin, rels_name)
+            if not rel_map:
+                continue
+            rel_map = {rid: report.deduplicated.get(p, p) for rid, p in rel_map.items()}
+            part_extents, part_unknown = _display_extents(zin, rels_name, rel_map)
+            for name, (cx, cy) in part_extents.items():
+                old = extents.get(name, (0, 0))
+                extents[name] = (max(old[0], cx), max(old[1], cy))
+            unknown |= part_unknown
+            if report.deduplicated:
+                data = zin.read(rels_name)
+                new = _rewrite_rels(data, rels_name, report.deduplicated)
+                if new != data:
+                    replacements[rels_name] = new
+
+    if report.deduplicated and CONTENT_TYPES_PART in names:
+        with zipfile.ZipFile(docx) as zin:
+            data = zin.read(CONTENT_TYPES_PART)
+        new = _drop_overrides(data, set(report.deduplicated))
+        if new != data:
+            replacements[CONTENT_TYPES_PART] = new
+
+    # 3) 逐图降采样 / 无损重压缩（进程池）
+    jobs: list[tuple[str, str, tuple[int, int] | None]] = []
+    for name in media:
+        if name in report.deduplicated:
+            continue
+        target = None
+        if report.resample_skipped is None and name in extents and name not in unknown:
+            cx, cy = extents[name]
+            target = (math.ceil(cx / EMU_PER_INCH * dpi), math.ceil(cy / EMU_PER_INCH * dpi))
+        jobs.append((str(docx), name, target))
+    n = min(workers or workers_from_env(), len(jobs))
+    if n > 1:
+        # spawn：工作进程不继承父进程的线程 / 锁状态，各平台行为一致
+        ctx = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=n, mp_context=ctx) as pool:
+            results = list(pool.map(_optimize_member, *zip(*jobs)))
+    else:
+        results = [_optimize_member(*job) for job in jobs]
+    for name, data, action in results:
+        if data is None:
+            continue
+        replacements[name] = data
+        (report.resampled if action == "resampled" else report.recompressed).append(name)
+
+    kept = [n for n in media if n not in report.deduplicated]
+    report.media_after = len(kept)
+    report.bytes_after = sum(
+        len(replacements[n]) if n in replacements else sizes[n] for n in kept)
+
+    if replacements or report.deduplicated:
+        members = [n for n in names if n not in report.deduplicated]
+        tmp = out.with_suffix(".docx.media-tmp")
+        write_docx_package(docx, tmp, replacements, members=members,
+                           compresslevel=compresslevel_from_env())
+        tmp.replace(out)
+    elif out != docx:
+        out.write_bytes(docx.read_bytes())
+    _print_report(report, dpi)
+    return report
+
+
+def _print_report(report: MediaReport, dpi: int) -> None:
+    mib = 1 << 20
+    pct = report.saved_bytes / report.bytes_before * 100 if report.bytes_before else 0.0
+    print(f"  [media] {report.media_before} media parts: "
+          f"{len(report.deduplicated)} duplicates removed, {len(report.resampled)} resampled "
+          f"({dpi} dpi), {len(report.recompressed)} recompressed; "
+          f"{report.bytes_before / mib:.1f} MiB -> {report.bytes_after / mib:.1f} MiB (-{pct:.0f}%)")
+    if report.resample_skipped:
+        print(f"  [media] resampling skipped: {report.resample_skipped}")
+
+
+__all__ = [
+    "DEFAULT_DPI",
+    "DPI_ENV",
+    "MEDIA_ENV",
+    "MediaReport",
+    "WORKERS_ENV",
+    "dpi_from_env",
+    "media_optimize_requested",
+    "optimize_docx_media",
+    "recompress_png",
+    "resample_png",
+    "workers_from_env",
+]
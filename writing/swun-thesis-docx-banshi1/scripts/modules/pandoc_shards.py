@@ -0,0 +1,372 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+按章分片的并行 pandoc 转换。
+
+整篇 .main.flat.tex 单进程跑 pandoc 是 main.sh 中最慢的阶段。分片模式：
+
+1) 在 \\chapter 边界切分 flattened 源码：导言区 + 前置部分 + 各章
+2) 每个分片独立运行 ``pandoc --from=latex --to=json``（线程池并发调度子进程）
+   - 分片 = 导言区 + 其余各章“骨架”（章节标题、浮动体、公式环境及其 \\label）
+     + 本章全文，保证章节/图表计数与跨章引用的解析和整篇转换一致
+   - 正文中的宏定义（\\newcommand、\\def、\\DeclareMathOperator 等）按原位置
+     并入骨架；前置部分的宏定义放在每个章节分片之前。宏定义无法完整解析时不分片
+   - 本章正文前后插入标记段落，转换后只截取标记之间的 block
+3) 按顺序拼接各分片 AST 的 block，再统一运行一次
+   ``pandoc --from=json --to=docx --citeproc``：参考文献只处理一次，
+   引文编号保持全局连续；关系、媒体、书签均由这一次 docx 写出生成，无需合并 OOXML
+
+分片 AST 按分片源码摘要缓存（BuildCache 的 pandoc-shard 阶段），
+只改动某一章正文时仅该章重新解析。本次用到的分片条目全部保留，不受每阶段条目数上限约束。
+
+通过 SWUN_PANDOC_SHARDS 启用：``1``/``auto`` 使用 CPU 核数个并发，整数 N 指定并发数。
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import re
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+try:
+    from modules.latex_parser import read_balanced as _read_balanced, skip_ws as _skip_ws
+except ModuleNotFoundError:  # pragma: no cover - pytest imports via scripts.modules
+    from scripts.modules.latex_parser import read_balanced as _read_balanced, skip_ws as _skip_ws
+
+try:
+    from modules.build_cache import BuildCache, digest_parts as _digest_parts
+except ModuleNotFoundError:  # pragma: no cover - pytest imports via scripts.modules
+    from scripts.modules.build_cache import BuildCache, digest_parts as _digest_parts
+
+
+SHARD_BEGIN_MARK = "SWUNSHARDBEGINMARK"
+SHARD_END_MARK = "SWUNSHARDENDMARK"
+
+_BEGIN_DOCUMENT_RE = re.compile(r"\\begin\{document\}")
+_END_DOCUMENT_RE = re.compile(r"\\end\{document\}")
+# 行首的 \chapter / \chapter*（被 % 注释的行不匹配）
+_CHAPTER_RE = re.compile(r"^[ \t]*\\chapter\*?(?![A-Za-z])", re.MULTILINE)
+_HEADING_RE = re.compile(
+    r"^[ \t]*\\(?:chapter|section|subsection|subsubsection|paragraph)\*?(?![A-Za-z])",
+    re.MULTILINE,
+)
+_COUNTER_SWITCH_RE = re.compile(
+    r"^[ \t]*\\(?:appendix|frontmatter|mainmatter|backmatter)(?![A-Za-z])",
+    re.MULTILINE,
+)
+_NUMBERED_ENV_RE = re.compile(
+    r"\\begin\{(figure|table|equation|align|gather|multline|eqnarray|algorithm)(\*?)\}"
+    r".*?\\end\{\1\2\}",
+    re.DOTALL,
+)
+_LABEL_RE = re.compile(r"\\label\{[^}]*\}")
+_MACRO_DEF_RE = re.compile(
+    r"\\(?P<cmd>(?:re)?newcommand|providecommand|DeclareMathOperator|(?:re)?newenvironment"
+    r"|[gex]?def|let)(?![A-Za-z])\*?"
+)
+_CS_RE = re.compile(r"\\(?:[A-Za-z@]+|.)")
+
+SHARD_STAGE = "pandoc-shard"
+
+
+# ---------------------------------------------------------------------------
+# 切分
+# ---------------------------------------------------------------------------
+
+def split_flat_tex(flat: str) -> tuple[str, str, list[str], str] | None:
+    """切分为 (导言区含 \\begin{document}, 前置部分, 各章, \\end{document} 及之后)。
+
+    没有 document 环境或没有 \\chapter 时返回 None（不适合分片）。
+    """
+    begin = _BEGIN_DOCUMENT_RE.search(flat)
+    if begin is None:
+        return None
+    end = _END_DOCUMENT_RE.search(flat, begin.end())
+    body_end = end.start() if end is not None else len(flat)
+    head = flat[:begin.end()]
+    body = flat[begin.end():body_end]
+    tail = flat[body_end:]
+
+    starts = [m.start() for m in _CHAPTER_RE.finditer(body)]
+    if not starts:
+        return None
+    front = body[:starts[0]]
+    chapters = [
+        body[s:e] for s, e in zip(starts, starts[1:] + [len(body)])
+    ]
+    return head, front, chapters, tail
+
+
+def _heading_span(text: str, start: int) -> int:
+    """返回标题命令（含可选参数、必选参数与紧随的 \\label）结束位置。"""
+    m = _HEADING_RE.match(text, start)
+    assert m is not None
+    i = m.end()
+    j = _skip_ws(text, i)
+    if j < len(text) and text[j] == "[":
+        got = _read_balanced(text, j, "[", "]")
+        if got is not None:
+            i = got[1]
+    j = _skip_ws(text, i)
+    got = _read_balanced(text, j, "{", "}")
+    if got is not None:
+        i = got[1]
+    while True:
+        j = _skip_ws(text, i)
+        lm = _LABEL_RE.match(text, j)
+        if lm is None:
+            return i
+        i = lm.end()
+
+
+def _is_commented(text: str, pos: int) -> bool:
+    line = text[text.rfind("\n", 0, pos) + 1:pos]
+    return re.search(r"(?<!\\)%", line) is not None
+
+
+def _macro_def_end(text: str, m: re.Match) -> int | None:
+    """宏定义命令的结束位置；参数形式无法识别时返回 None。"""
+    cmd = m.group("cmd")
+    i = _skip_ws(text, m.end())
+    if cmd == "let":
+        name = _CS_RE.match(text, i)
+        if name is None:
+            return None
+        i = _skip_ws(text, name.end())
+        if text.startswith("=", i):
+            i = _skip_ws(text, i + 1)
+        target = _CS_RE.match(text, i)
+        return target.end() if target is not None else (i + 1 if i < len(text) else None)
+    if cmd.endswith("def"):
+        name = _CS_RE.match(text, i)
+        if name is None:
+            return None
+        # 参数文本（#1#2 等）直到定义体的 {
+        i = text.find("{", name.end())
+        if i < 0:
+            return None
+        got = _read_balanced(text, i, "{", "}")
+        return got[1] if got is not None else None
+
+    # \newcommand 系列：名称（{\foo} 或 \foo），可选 [n][默认值]，随后为定义体
+    got = _read_balanced(text, i, "{", "}")
+    if got is not None:
+        i = got[1]
+    else:
+        name = _CS_RE.match(text, i)
+        if name is None:
+            return None
+        i = name.end()
+    for _ in range(2):
+        j = _skip_ws(text, i)
+        opt = _read_balanced(text, j, "[", "]")
+        if opt is None:
+            break
+        i = opt[1]
+    bodies = 2 if cmd.endswith("environment") else 1
+    for _ in range(bodies):
+        got = _read_balanced(text, _skip_ws(text, i), "{", "}")
+        if got is None:
+            return None
+        i = got[1]
+    return i
+
+
+def macro_definitions(text: str) -> list[tuple[int, int]] | None:
+    """text 中未被注释的宏定义区间；有无法解析的定义时返回 None。"""
+    spans: list[tuple[int, int]] = []
+    for m in _MACRO_DEF_RE.finditer(text):
+        if _is_commented(text, m.start()):
+            continue
+        end = _macro_def_end(text, m)
+        if end is None:
+            return None
+        spans.append((m.start(), end))
+    return spans
+
+
+def chapter_skeleton(text: str) -> str | None:
+    """提取一章中影响编号/引用/宏展开的骨架：标题、编号环境、计数切换命令与宏定义。
+
+    宏定义无法解析时返回 None（调用方回退整篇转换）。
+    """
+    macros = macro_definitions(text)
+    if macros is None:
+        return None
+    spans: list[tuple[int, int]] = []
+    for m in _NUMBERED_ENV_RE.finditer(text):
+        spans.append((m.start(), m.end()))
+    env_spans = list(spans)
+
+    def in_env(pos: int) -> bool:
+        return any(s <= pos < e for s, e in env_spans)
+
+    for m in _HEADING_RE.finditer(text):
+        if not in_env(m.start()):
+            spans.append((m.start(), _heading_span(text, m.start())))
+    for m in _COUNTER_SWITCH_RE.finditer(text):
+        if not in_env(m.start()):
+            spans.append((m.start(), m.end()))
+    spans.extend((s, e) for s, e in macros if not in_env(s))
+
+    spans.sort()
+    return "\n\n".join(text[s:e].strip() for s, e in spans) + "\n\n"
+
+
+def build_shard_sources(flat: str) -> list[str] | None:
+    """为前置部分与每一章生成独立可转换的 LaTeX 分片源码。"""
+    parts = split_flat_tex(flat)
+    if parts is None:
+        return None
+    head, front, chapters, tail = parts
+    skeletons = [chapter_skeleton(ch) for ch in chapters]
+    front_macros = macro_definitions(front)
+    if front_macros is None or any(sk is None for sk in skeletons):
+        return None
+    front_defs = "".join(front[s:e].strip() + "\n\n" for s, e in front_macros)
+    units = [front] + chapters
+    sources: list[str] = []
+    for idx, unit in enumerate(units):
+        # idx=0 为前置部分；idx=k 为第 k 章（对应 skeletons[k-1]）
+        before = (front_defs if idx else "") + "".join(skeletons[: max(idx - 1, 0)])
+        after = "".join(skeletons[idx:])
+        sources.append(
+            f"{head}\n{before}\n{SHARD_BEGIN_MARK}\n\n{unit}\n\n"
+            f"{SHARD_END_MARK}\n\n{after}{tail}"
+        )
+    return sources
+
+
+# ---------------------------------------------------------------------------
+# AST 截取与合并
+# ---------------------------------------------------------------------------
+
+def _is_mark_para(block: dict, mark: str) -> bool:
+    if block.get("t") != "Para":
+        return False
+    inlines = block.get("c") or []
+    return len(inlines) == 1 and inlines[0].get("t") == "Str" and inlines[0].get("c") == mark
+
+
+def select_shard_blocks(ast: dict) -> list:
+    """返回标记段落之间的 block（即分片自身内容）。"""
+    blocks = ast.get("blocks", [])
+    begin = end = None
+    for i, block in enumerate(blocks):
+        if begin is None and _is_mark_para(block, SHARD_BEGIN_MARK):
+            begin = i
+        elif begin is not None and _is_mark_para(block, SHARD_END_MARK):
+            end = i
+            break
+    if begin is None or end is None:
+        raise RuntimeError("pandoc shard markers not found in converted AST")
+    return blocks[begin + 1:end]
+
+
+def merge_shard_asts(asts: list[dict]) -> dict:
+    """按顺序拼接分片内容；API 版本与文档元数据取自前置部分分片。"""
+    merged_blocks: list = []
+    for ast in asts:
+        merged_blocks.extend(select_shard_blocks(ast))
+    first = asts[0]
+    return {
+        "pandoc-api-version": first.get("pandoc-api-version"),
+        "meta": first.get("meta", {}),
+        "blocks": merged_blocks,
+    }
+
+
+# ---------------------------------------------------------------------------
+# 转换
+# ---------------------------------------------------------------------------
+
+def shard_workers_from_env() -> int:
+    """解析 SWUN_PANDOC_SHARDS：0 表示关闭分片模式。"""
+    raw = os.environ.get("SWUN_PANDOC_SHARDS", "").strip().lower()
+    if raw in {"", "0", "false", "no", "off"}:
+        return 0
+    if raw in {"1", "true", "yes", "on", "auto"}:
+        return os.cpu_count() or 1
+    try:
+        return max(int(raw), 1)
+    except ValueError:
+        return 0
+
+
+def _latex_to_json(source: str, cwd: Path) -> str:
+    result = subprocess.run(
+        ["pandoc", "--from=latex", "--to=json"],
+        cwd=str(cwd),
+        input=source.encode("utf-8"),
+        stdout=subprocess.PIPE,
+        check=True,
+    )
+    return result.stdout.decode("utf-8")
+
+
+def convert_sharded(
+    flat: str,
+    output_docx: Path,
+    writer_args: list[str],
+    cwd: Path,
+    workers: int,
+    cache: BuildCache | None = None,
+) -> bool:
+    """分片并行转换；源码不含可切分的章节时返回 False（调用方回退整篇转换）。
+
+    writer_args 为整篇转换使用的 pandoc 参数（--from=latex 会被替换为 --from=json）。
+    """
+    sources = build_shard_sources(flat)
+    if sources is None:
+        return False
+
+    keys = [_digest_parts("latex->json", src) for src in sources]
+    asts: list[str | None] = [
+        cache.fetch_text(SHARD_STAGE, key, suffix=".json", record=False) if cache else None
+        for key in keys
+    ]
+    todo = [i for i, ast in enumerate(asts) if ast is None]
+    if cache is not None:
+        cache.summarize(SHARD_STAGE, len(sources) - len(todo), len(sources))
+    print(
+        f"  [shards] {len(sources)} shard(s), converting {len(todo)} "
+        f"with {min(workers, max(len(todo), 1))} worker(s)"
+    )
+    if todo:
+        with ThreadPoolExecutor(max_workers=min(workers, len(todo))) as pool:
+            converted = list(pool.map(lambda i: _latex_to_json(sources[i], cwd), todo))
+        for i, ast in zip(todo, converted):
+            asts[i] = ast
+            if cache is not None:
+                cache.store_text(SHARD_STAGE, keys[i], ast, suffix=".json", max_entries=None)
+    if cache is not None:
+        # 只清理本次未引用的旧分片，章节数超过默认上限时也不会逐出本次分片
+        cache.prune(SHARD_STAGE, keep=keys)
+
+    merged = merge_shard_asts([json.loads(a) for a in asts if a is not None])
+    args = ["--from=json" if a == "--from=latex" else a for a in writer_args]
+    subprocess.run(
+        ["pandoc", *args, "-o", str(output_docx)],
+        cwd=str(cwd),
+        input=json.dumps(merged, ensure_ascii=False).encode("utf-8"),
+        check=True,
+    )
+    return True
+
+
+__all__ = [
+    "SHARD_BEGIN_MARK",
+    "SHARD_END_MARK",
+    "SHARD_STAGE",
+    "split_flat_tex",
+    "macro_definitions",
+    "chapter_skeleton",
+    "build_shard_sources",
+    "select_shard_blocks",
+    "merge_shard_asts",
+    "shard_workers_from_env",
+    "convert_sharded",
+]
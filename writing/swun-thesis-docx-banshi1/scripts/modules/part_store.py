@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+OOXML 部件存储 — 写包前各阶段共享的已解析部件树。
+
+页脚、页眉、settings 等阶段原先各自把 document.xml（以及 rels、
+[Content_Types].xml）从字节重新解析、修改后再序列化回字节；对大论文，
+最大的部件 document.xml 要往返三次。PartStore 持有：
+
+- raw     未解析部件的原始字节（或整体替换后的新字节）
+- tree    按需解析一次、之后各阶段共享的活动元素树（连同其命名空间）
+- dirty   被修改或新增的部件名
+
+write 阶段调用 serialize_dirty()，每个脏部件恰好序列化一次；未改动的部件
+不出现在结果中，由 zip_writer 原样拷贝。serialize_dirty(stream=True) 把树部件
+换成写出函数，由 zip_writer 直接序列化进压缩流，不在内存中拼出整份字节。
+
+约定：修改 tree(name) 返回的元素后必须调用 mark_dirty(name)；
+整体替换部件内容用 set_bytes()，新增已构造好的元素树用 adopt()。
+"""
+
+from __future__ import annotations
+
+import xml.etree.ElementTree as ET
+import zipfile
+from typing import BinaryIO, Callable, Iterable, Mapping, Union
+
+try:
+    from utils.ooxml import collect_ns as _collect_ns, register_ns as _register_ns
+except ModuleNotFoundError:  # pragma: no cover - pytest imports via scripts.modules
+    from scripts.utils.ooxml import collect_ns as _collect_ns, register_ns as _register_ns
+
+
+DOCUMENT_PART = "word/document.xml"
+DOCUMENT_RELS_PART = "word/_rels/document.xml.rels"
+CONTENT_TYPES_PART = "[Content_Types].xml"
+SETTINGS_PART = "word/settings.xml"
+
+XML_PART_SUFFIXES = (".xml", ".rels")
+
+
+class PartStore:
+    """DOCX 包内 XML 部件的共享存储（惰性解析、脏部件一次序列化）。"""
+
+    def __init__(self, raw: Mapping[str, bytes] | None = None) -> None:
+        self._raw: dict[str, bytes] = dict(raw or {})
+        self._trees: dict[str, tuple[ET.Element, dict[str, str]]] = {}
+        self._dirty: set[str] = set()
+        # 统计：解析 / 序列化次数（剖析与测试用）
+        self.parses = 0
+        self.serializations = 0
+
+    @classmethod
+    def from_zip(
+        cls,
+        zin: zipfile.ZipFile,
+        names: Iterable[str] | None = None,
+        skip: Iterable[str] = (),
+    ) -> "PartStore":
+        """读取 zin 中的 XML / rels 部件（图片等二进制成员不读入）。
+
+        skip 中的部件不读取（例如随后以 adopt() 登记的 document.xml）。
+        """
+        members = names if names is not None else zin.namelist()
+        skipped = set(skip)
+        return cls({
+            name: zin.read(name) for name in members
+            if name.endswith(XML_PART_SUFFIXES) and name not in skipped
+        })
+
+    # -- 查询 ---------------------------------------------------------------
+
+    def names(self) -> list[str]:
+        seen = dict.fromkeys(self._raw)
+        seen.update(dict.fromkeys(self._trees))
+        return list(seen)
+
+    def __contains__(self, name: object) -> bool:
+        return name in self._raw or name in self._trees
+
+    def is_dirty(self, name: str) -> bool:
+        return name in self._dirty
+
+    def tree(self, name: str) -> ET.Element | None:
+        """返回部件的活动元素树（首次访问时解析）；部件不存在时返回 None。"""
+        entry = self._trees.get(name)
+        if entry is not None:
+            return entry[0]
+        data = self._raw.get(name)
+        if not data:
+            return None
+        ns = _collect_ns(data)
+        _register_ns(ns)
+        root = ET.fromstring(data)
+        self.parses += 1
+        self._trees[name] = (root, ns)
+        return root
+
+    def ns(self, name: str) -> dict[str, str]:
+        """部件的命名空间映射（未解析时触发解析）。"""
+        if name not in self._trees and self.tree(name) is None:
+            return {}
+        return self._trees[name][1]
+
+    # -- 修改 ---------------------------------------------------------------
+
+    def mark_dirty(self, name: str) -> None:
+        if name not in self:
+            raise KeyError(name)
+        self._dirty.add(name)
+
+    def adopt(self, name: str, root: ET.Element, ns: dict[str, str] | None = None) -> None:
+        """登记一个已在内存中的元素树（例如后处理管线的 document 根）为脏部件。"""
+        self._trees[name] = (root, dict(ns or {}))
+        self._raw.pop(name, None)
+        self._dirty.add(name)
+
+    def set_bytes(self, name: str, data: bytes) -> None:
+        """整体替换部件内容（丢弃已解析的树）。"""
+        self._trees.pop(name, None)
+        self._raw[name] = data
+        self._dirty.add(name)
+
+    # -- 写出 ---------------------------------------------------------------
+
+    def serialize_dirty(
+        self, stream: bool = False
+    ) -> dict[str, Union[bytes, Callable[[BinaryIO], None]]]:
+        """返回 {部件名: 字节}，仅含脏部件；每个脏树序列化一次。
+
+        stream=True 时树部件的值为写出函数 fn(fh)，调用时才序列化（写出的字节
+        与 stream=False 完全相同），供 zip_writer 直接写入压缩流。
+        """
+        out: dict[str, Union[bytes, Callable[[BinaryIO], None]]] = {}
+        for name in self.names():
+            if name not in self._dirty:
+                continue
+            entry = self._trees.get(name)
+            if entry is None:
+                out[name] = self._raw[name]
+                continue
+            root, ns = entry
+            if stream:
+                out[name] = self._tree_writer(root, ns)
+                continue
+            # 命名空间注册是全局的，序列化前按本部件重新注册以保留其前缀
+            _register_ns(ns)
+            out[name] = ET.tostring(root, encoding="utf-8", xml_declaration=True)
+            self.serializations += 1
+        return out
+
+    def _tree_writer(
+        self, root: ET.Element, ns: dict[str, str]
+    ) -> Callable[[BinaryIO], None]:
+        def write(fh: BinaryIO) -> None:
+            _register_ns(ns)
+            ET.ElementTree(root).write(fh, encoding="utf-8", xml_declaration=True)
+            self.serializations += 1
+        return write
+
+
+def coerce_part_store(
+    parts: "PartStore | dict[str, bytes]", doc_xml: bytes | None = None
+) -> tuple["PartStore", dict[str, bytes] | None]:
+    """兼容旧的 ``file_data`` 字典 API：字典包装为临时 PartStore。
+
+    返回 (store, legacy)；legacy 非 None 时调用方处理完毕后应执行
+    ``legacy.update(store.serialize_dirty())`` 写回字典。
+    """
+    # 按字段而非 isinstance 判断：双路径导入下 PartStore 可能存在两份
+    if hasattr(parts, "serialize_dirty"):
+        return parts, None  # type: ignore[return-value]
+    store = PartStore(parts)
+    if doc_xml is not None and parts.get(DOCUMENT_PART) is not doc_xml:
+        store.set_bytes(DOCUMENT_PART, doc_xml)
+    return store, parts
+
+
+__all__ = [
+    "DOCUMENT_PART",
+    "DOCUMENT_RELS_PART",
+    "CONTENT_TYPES_PART",
+    "SETTINGS_PART",
+    "XML_PART_SUFFIXES",
+    "PartStore",
+    "coerce_part_store",
+]
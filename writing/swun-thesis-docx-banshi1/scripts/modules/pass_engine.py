@@ -0,0 +1,329 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+单遍访问者引擎 — 将多个 OOXML 后处理 pass 合并到同一次 body 遍历中。
+
+每个可合并的 pass 声明：
+- kind     关心的元素类型（block / p / r / tbl / sectPr）
+- regions  关心的正文区域（front / main / back / bibliography，None 表示全部）
+
+相邻的 VisitorPass 组成一组，由 run_pass_pipeline 共享一次遍历：
+逐个顶层块计算区域，再按注册顺序把该块内的目标元素交给各 pass。
+需要全局视图或会插入/删除顶层块的 pass 以 Barrier 形式保留在序列中，
+作为分组边界按原顺序执行。
+
+合并等价性约定（VisitorPass 必须满足）：
+- 只修改当前访问的顶层块内部，不增删 body 的顶层子元素
+- 跨块状态只能来自先前已访问的块（按文档顺序累积）
+- 不修改一级标题的样式/文本，也不修改“参考文献”标记段落文本
+"""
+
+from __future__ import annotations
+
+import time
+import xml.etree.ElementTree as ET
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Callable, Iterable
+
+try:
+    from utils.ooxml import qn as _qn, p_text as _p_text, p_style as _p_style
+except ModuleNotFoundError:  # pragma: no cover - pytest imports via scripts.modules
+    from scripts.utils.ooxml import qn as _qn, p_text as _p_text, p_style as _p_style
+
+if TYPE_CHECKING:  # pragma: no cover
+    from modules.body_index import BodyIndex
+    from modules.pass_profiler import PassProfiler
+
+
+# ---------------------------------------------------------------------------
+# 区域定义
+# ---------------------------------------------------------------------------
+
+REGION_FRONT = "front"
+REGION_MAIN = "main"
+REGION_BACK = "back"
+REGION_BIBLIOGRAPHY = "bibliography"
+
+MAIN_BODY_EXCLUDED_H1 = frozenset(
+    {"目录", "摘要", "Abstract", "致谢", "参考文献", "攻读硕士学位期间所取得的相关科研成果"}
+)
+MAIN_BODY_STOP_H1 = frozenset({"参考文献", "致谢", "攻读硕士学位期间所取得的相关科研成果"})
+BIBLIOGRAPHY_TITLE = "参考文献"
+
+BLOCK_KINDS = ("block", "p", "r", "tbl", "sectPr")
+
+
+class RegionTracker:
+    """按文档顺序喂入顶层块，返回每个块所属的区域集合。
+
+    - main：与 number_paragraph_headings_in_main_body 等 pass 相同的正文判定
+      （遇到非排除的一级标题进入，遇到后置章节标题退出；标题块自身按更新后状态归属）
+    - front / back：正文开始之前 / 正文结束之后
+    - bibliography：首个文本为“参考文献”的段落之后，直到下一个非“参考文献”
+      的一级标题为止（标记段落与结束标题均不属于该区域）
+    """
+
+    def __init__(self, ns: dict[str, str]) -> None:
+        self._ns = ns
+        self._w_p = _qn(ns, "w", "p")
+        self._in_main = False
+        self._main_seen = False
+        self._bib_state = "before"
+
+    def feed(self, el: ET.Element) -> frozenset[str]:
+        in_bib = False
+        if el.tag == self._w_p:
+            style = _p_style(self._ns, el)
+            txt: str | None = None
+            if style == "1" or self._bib_state == "before":
+                txt = _p_text(self._ns, el).strip()
+
+            if style == "1":
+                if txt in MAIN_BODY_STOP_H1:
+                    self._in_main = False
+                elif txt and txt not in MAIN_BODY_EXCLUDED_H1:
+                    self._in_main = True
+                    self._main_seen = True
+
+            if self._bib_state == "before":
+                if txt == BIBLIOGRAPHY_TITLE:
+                    self._bib_state = "in"
+            elif self._bib_state == "in":
+                if style == "1" and txt != BIBLIOGRAPHY_TITLE:
+                    self._bib_state = "after"
+                else:
+                    in_bib = True
+        elif self._bib_state == "in":
+            in_bib = True
+
+        if self._in_main:
+            region = REGION_MAIN
+        elif self._main_seen:
+            region = REGION_BACK
+        else:
+            region = REGION_FRONT
+        if in_bib:
+            return frozenset((region, REGION_BIBLIOGRAPHY))
+        return frozenset((region,))
+
+
+# ---------------------------------------------------------------------------
+# Pass 描述
+# ---------------------------------------------------------------------------
+
+@dataclass
+class VisitorPass:
+    """可与相邻 pass 共享遍历的后处理 pass。
+
+    visit 对每个匹配元素调用一次；finish 在整组遍历结束后调用，
+    其返回值作为该 pass 的结果（例如修改计数）。
+    """
+
+    name: str
+    kind: str
+    visit: Callable[[ET.Element], None]
+    regions: frozenset[str] | None = None
+    finish: Callable[[], object] | None = None
+
+    def __post_init__(self) -> None:
+        if self.kind not in BLOCK_KINDS:
+            raise ValueError(f"unknown visitor kind for {self.name}: {self.kind}")
+
+
+@dataclass
+class Barrier:
+    """必须独占顺序执行的 pass（插入/删除/移动顶层块或依赖全局视图）。
+
+    index_safe=True 表示该步骤对 body 的修改全部经由共享的 BodyIndex 完成，
+    执行后无需使索引失效。
+    """
+
+    name: str
+    run: Callable[[], object]
+    index_safe: bool = False
+
+
+PipelineStep = VisitorPass | Barrier
+
+
+# ---------------------------------------------------------------------------
+# 执行
+# ---------------------------------------------------------------------------
+
+def _kind_tags(ns: dict[str, str]) -> dict[str, str]:
+    return {
+        "p": _qn(ns, "w", "p"),
+        "r": _qn(ns, "w", "r"),
+        "tbl": _qn(ns, "w", "tbl"),
+        "sectPr": _qn(ns, "w", "sectPr"),
+    }
+
+
+def run_visitor_passes(
+    ns: dict[str, str],
+    body: ET.Element,
+    passes: Iterable[VisitorPass],
+    profiler: "PassProfiler | None" = None,
+    group: str | None = None,
+) -> dict[str, object]:
+    """在一次顶层遍历中依次执行一组 VisitorPass，返回 {pass 名: finish 结果}。"""
+    passes = list(passes)
+    if not passes:
+        return {}
+    if profiler is not None and profiler.enabled:
+        return _run_visitor_passes_profiled(ns, body, passes, profiler, group)
+    tags = _kind_tags(ns)
+    tracker = RegionTracker(ns)
+    need_regions = any(vp.regions is not None for vp in passes)
+    all_regions = frozenset()
+
+    for block in list(body):
+        regions = tracker.feed(block) if need_regions else all_regions
+        for vp in passes:
+            if vp.regions is not None and not (vp.regions & regions):
+                continue
+            if vp.kind == "block":
+                vp.visit(block)
+                continue
+            # 目标元素列表在轮到该 pass 时才收集，保证看到前序 pass 的修改。
+            for el in list(block.iter(tags[vp.kind])):
+                vp.visit(el)
+
+    results: dict[str, object] = {}
+    for vp in passes:
+        results[vp.name] = vp.finish() if vp.finish is not None else None
+    return results
+
+
+def _run_visitor_passes_profiled(
+    ns: dict[str, str],
+    body: ET.Element,
+    passes: list[VisitorPass],
+    profiler: "PassProfiler",
+    group: str | None,
+) -> dict[str, object]:
+    """run_visitor_passes 的剖析版本：逐 pass 累计耗时、访问数与变更数。
+
+    变更数通过访问前后序列化比较得出，序列化本身不计入耗时。
+    """
+    tags = _kind_tags(ns)
+    tracker = RegionTracker(ns)
+    need_regions = any(vp.regions is not None for vp in passes)
+    all_regions = frozenset()
+    wall = {vp.name: 0.0 for vp in passes}
+    visited = {vp.name: 0 for vp in passes}
+    mutated = {vp.name: 0 for vp in passes}
+    perf = time.perf_counter
+
+    profiler.reset_peak()
+    for block in list(body):
+        regions = tracker.feed(block) if need_regions else all_regions
+        for vp in passes:
+            if vp.regions is not None and not (vp.regions & regions):
+                continue
+            targets = [block] if vp.kind == "block" else list(block.iter(tags[vp.kind]))
+            for el in targets:
+                before = ET.tostring(el)
+                t0 = perf()
+                vp.visit(el)
+                wall[vp.name] += perf() - t0
+                visited[vp.name] += 1
+                if ET.tostring(el) != before:
+                    mutated[vp.name] += 1
+
+    results: dict[str, object] = {}
+    for vp in passes:
+        t0 = perf()
+        results[vp.name] = vp.finish() if vp.finish is not None else None
+        wall[vp.name] += perf() - t0
+    peak = profiler.peak_kib()
+    for vp in passes:
+        profiler.record(vp.name, "visitor", wall[vp.name] * 1000,
+                        visited=visited[vp.name], mutated=mutated[vp.name],
+                        peak_kib=peak, group=group)
+    return results
+
+
+def _run_barrier_profiled(
+    body: ET.Element, step: Barrier, profiler: "PassProfiler"
+) -> object:
+    """剖析 Barrier：visited 为执行前顶层块数，mutated 为新增/删除/改动的顶层块数。"""
+    before = {id(el): (el, ET.tostring(el)) for el in body}
+    visited = len(before)
+    profiler.reset_peak()
+    t0 = time.perf_counter()
+    result = step.run()
+    wall_ms = (time.perf_counter() - t0) * 1000
+    peak = profiler.peak_kib()
+    mutated = 0
+    seen: set[int] = set()
+    for el in body:
+        seen.add(id(el))
+        prev = before.get(id(el))
+        if prev is None or ET.tostring(el) != prev[1]:
+            mutated += 1
+    mutated += sum(1 for key in before if key not in seen)
+    profiler.record(step.name, "barrier", wall_ms, visited=visited,
+                    mutated=mutated, peak_kib=peak)
+    return result
+
+
+def run_pass_pipeline(
+    ns: dict[str, str],
+    body: ET.Element,
+    steps: Iterable[PipelineStep],
+    profiler: "PassProfiler | None" = None,
+    index: "BodyIndex | None" = None,
+) -> dict[str, object]:
+    """执行 pass 序列：相邻 VisitorPass 合并为一次遍历，Barrier 按原位置执行。
+
+    index 为各 Barrier 共享的 BodyIndex；每个遍历组及非 index_safe 的
+    Barrier 执行后使其失效，下一次查询时惰性重建。
+    """
+    results: dict[str, object] = {}
+    group: list[VisitorPass] = []
+    profiling = profiler is not None and profiler.enabled
+    group_no = 0
+
+    def flush() -> None:
+        nonlocal group_no
+        if group:
+            group_no += 1
+            results.update(run_visitor_passes(
+                ns, body, group, profiler=profiler, group=f"visitor-group-{group_no}"))
+            group.clear()
+            if index is not None:
+                index.invalidate()
+
+    for step in steps:
+        # 按字段而非 isinstance 区分：双路径导入（modules. / scripts.modules.）
+        # 下同一个类可能存在两份。
+        if hasattr(step, "visit"):
+            group.append(step)
+            continue
+        flush()
+        if profiling:
+            results[step.name] = _run_barrier_profiled(body, step, profiler)
+        else:
+            results[step.name] = step.run()
+        if index is not None and not getattr(step, "index_safe", False):
+            index.invalidate()
+    flush()
+    return results
+
+
+__all__ = [
+    "REGION_FRONT",
+    "REGION_MAIN",
+    "REGION_BACK",
+    "REGION_BIBLIOGRAPHY",
+    "MAIN_BODY_EXCLUDED_H1",
+    "MAIN_BODY_STOP_H1",
+    "BIBLIOGRAPHY_TITLE",
+    "RegionTracker",
+    "VisitorPass",
+    "Barrier",
+    "PipelineStep",
+    "run_visitor_passes",
+    "run_pass_pipeline",
+]
@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+OOXML 后处理逐 pass 性能剖析（按需启用）。
+
+启用方式：
+- 环境变量 SWUN_PROFILE_PASSES=1
+- build_docx_banshi1.py 命令行参数 --profile-passes
+
+每个 pass / 阶段记录：
+- wall_ms       墙钟耗时
+- visited       访问的元素数（VisitorPass 为匹配元素数，Barrier 为顶层块数）
+- mutated       发生变化的元素数（按序列化前后比较；仅剖析模式下计算）
+- peak_kib      tracemalloc 峰值（合并遍历组内各 pass 共享该组峰值）
+
+报告写在输出 DOCX 旁：
+- <stem>.profile.json    结构化记录
+- <stem>.profile.folded  flamegraph.pl / speedscope 可读的折叠栈（单位：微秒）
+
+JSON 报告记录输出 DOCX 的 sha256；之后未剖析的构建覆盖了 DOCX 时，
+load_profile_summary(..., docx=...) 据此识别出过期报告。
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import time
+import tracemalloc
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator
+
+PROFILE_ENV = "SWUN_PROFILE_PASSES"
+PROFILE_FLAG = "--profile-passes"
+
+
+def profiling_requested(argv: list[str] | None = None) -> bool:
+    """命令行含 --profile-passes 或环境变量开启时返回 True。"""
+    if argv is not None and PROFILE_FLAG in argv:
+        return True
+    return os.environ.get(PROFILE_ENV, "").strip().lower() in {"1", "true", "yes", "on"}
+
+
+def profile_report_paths(output_docx: Path) -> tuple[Path, Path]:
+    """返回 (json 报告, 折叠栈) 路径。"""
+    stem = output_docx.with_suffix("")
+    return (
+        stem.with_name(stem.name + ".profile.json"),
+        stem.with_name(stem.name + ".profile.folded"),
+    )
+
+
+def docx_sha256(path: Path) -> str | None:
+    """DOCX 文件的 sha256（不存在时返回 None）。"""
+    h = hashlib.sha256()
+    try:
+        with Path(path).open("rb") as fh:
+            for chunk in iter(lambda: fh.read(1 << 20), b""):
+                h.update(chunk)
+    except OSError:
+        return None
+    return h.hexdigest()
+
+
+class PassProfiler:
+    """收集逐 pass 计时/计数/内存峰值；disabled 时所有方法均为空操作。"""
+
+    def __init__(self, enabled: bool = False) -> None:
+        self.enabled = enabled
+        self.records: list[dict] = []
+        self._started_tracemalloc = False
+
+    # -- 生命周期 ---------------------------------------------------------
+
+    def start(self) -> None:
+        if self.enabled and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracemalloc = True
+
+    def stop(self) -> None:
+        if self._started_tracemalloc:
+            tracemalloc.stop()
+            self._started_tracemalloc = False
+
+    # -- 记录 ---------------------------------------------------------------
+
+    def reset_peak(self) -> None:
+        if self.enabled and tracemalloc.is_tracing():
+            tracemalloc.reset_peak()
+
+    def peak_kib(self) -> float | None:
+        if not (self.enabled and tracemalloc.is_tracing()):
+            return None
+        return round(tracemalloc.get_traced_memory()[1] / 1024, 1)
+
+    def record(
+        self,
+        name: str,
+        category: str,
+        wall_ms: float,
+        visited: int | None = None,
+        mutated: int | None = None,
+        peak_kib: float | None = None,
+        group: str | None = None,
+    ) -> None:
+        if not self.enabled:
+            return
+        self.records.append({
+            "name": name,
+            "category": category,
+            "group": group,
+            "wall_ms": round(wall_ms, 3),
+            "visited": visited,
+            "mutated": mutated,
+            "peak_kib": peak_kib,
+        })
+
+    @contextmanager
+    def stage(self, name: str, category: str = "stage") -> Iterator[None]:
+        """计时一个非 body 阶段（解析、序列化、页眉页脚、写 ZIP 等）。"""
+        if not self.enabled:
+            yield
+            return
+        self.reset_peak()
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, category, (time.perf_counter() - t0) * 1000,
+                        peak_kib=self.peak_kib())
+
+    # -- 输出 ---------------------------------------------------------------
+
+    def total_ms(self) -> float:
+        return round(sum(r["wall_ms"] for r in self.records), 3)
+
+    def summary_lines(self, top: int = 10) -> list[str]:
+        ranked = sorted(self.records, key=lambda r: r["wall_ms"], reverse=True)
+        return [
+            f"{r['name']}: {r['wall_ms']:.1f} ms"
+            + (f", visited={r['visited']}" if r["visited"] is not None else "")
+            + (f", mutated={r['mutated']}" if r["mutated"] is not None else "")
+            for r in ranked[:top]
+        ]
+
+    def folded_lines(self) -> list[str]:
+        lines = []
+        for r in self.records:
+            frames = ["postprocess", r["category"]]
+            if r["group"]:
+                frames.append(r["group"])
+            frames.append(r["name"])
+            lines.append(f"{';'.join(frames)} {max(int(r['wall_ms'] * 1000), 1)}")
+        return lines
+
+    def write_report(self, output_docx: Path) -> Path | None:
+        """将报告写到输出 DOCX 旁，返回 JSON 报告路径（须在 DOCX 最终写出之后调用）。"""
+        if not self.enabled:
+            return None
+        json_path, folded_path = profile_report_paths(output_docx)
+        payload = {
+            "output": str(output_docx),
+            "docx_sha256": docx_sha256(output_docx),
+            "total_ms": self.total_ms(),
+            "passes": self.records,
+        }
+        json_path.write_text(
+            json.dumps(payload, ensure_ascii=False, indent=2), encoding="utf-8")
+        folded_path.write_text("\n".join(self.folded_lines()) + "\n", encoding="utf-8")
+        print(f"  [profile] {len(self.records)} pass(es), {self.total_ms():.1f} ms -> {json_path}")
+        for line in self.summary_lines(top=5):
+            print(f"  [profile]   {line}")
+        return json_path
+
+
+def load_profile_summary(
+        report_path: Path, top: int = 5, docx: Path | None = None) -> str | None:
+    """读取 JSON 报告并生成单行摘要（供 gate 记录引用）；报告不存在时返回 None。
+
+    给定 docx 时，报告记录的 sha256 与该文件不一致（报告来自更早的构建）也返回 None。
+    """
+    try:
+        payload = json.loads(Path(report_path).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+    if docx is not None and payload.get("docx_sha256") != docx_sha256(docx):
+        return None
+    passes = sorted(payload.get("passes", []), key=lambda r: r.get("wall_ms", 0), reverse=True)
+    top_items = ", ".join(f"{r['name']} {r['wall_ms']:.1f}ms" for r in passes[:top])
+    return f"total {payload.get('total_ms', 0):.1f}ms; top: {top_items}"
+
+
+__all__ = [
+    "PROFILE_ENV",
+    "PROFILE_FLAG",
+    "PassProfiler",
+    "docx_sha256",
+    "profiling_requested",
+    "profile_report_paths",
+    "load_profile_summary",
+]
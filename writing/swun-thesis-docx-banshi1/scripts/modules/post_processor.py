@@ -8,6 +8,9 @@ Pipeline:
 2) preprocess LaTeX 源文本（规范化特殊符号、算法块等）
 3) pandoc -> 中间 DOCX（带 citeproc + GB/T CSL）
 4) OOXML 后处理 -> 最终 DOCX（封面、样式、字体、标题编号、公式、图表等）
+
+各阶段产物按输入摘要缓存于 <thesis>/.swun_build_cache/（见 modules/build_cache.py），
+输入未变化时跳过对应阶段；SWUN_BUILD_CACHE=0 可关闭。
 """
 
 from __future__ import annotations
@@ -27,6 +30,7 @@ from pathlib import Path
 try:
     from utils.ooxml import (
         collect_ns as _collect_ns,
+        parse_with_ns as _parse_with_ns,
         register_ns as _register_ns,
         qn as _qn,
         get_body_sectPr as _get_body_sectPr,
@@ -36,6 +40,7 @@ try:
 except ModuleNotFoundError:
     from scripts.utils.ooxml import (
         collect_ns as _collect_ns,
+        parse_with_ns as _parse_with_ns,
         register_ns as _register_ns,
         qn as _qn,
         get_body_sectPr as _get_body_sectPr,
@@ -58,9 +63,9 @@ try:
         strip_template_body_leak_after_front_matter as _strip_template_body_leak_after_front_matter,
         insert_abstract_chapters_and_sections as _insert_abstract_chapters_and_sections,
         insert_abstract_keywords as _insert_abstract_keywords,
-        ensure_update_fields_in_settings as _ensure_update_fields_in_settings,
+        ensure_update_fields_in_settings_root as _ensure_update_fields_in_settings_root,
         insert_toc_before_first_chapter as _insert_toc_before_first_chapter,
-        add_page_breaks_before_h1 as _add_page_breaks_before_h1,
+        add_page_breaks_before_h1_pass as _add_page_breaks_before_h1_pass,
     )
 except ModuleNotFoundError:
     from scripts.modules.template_loader import (
@@ -68,89 +73,89 @@ except ModuleNotFoundError:
         strip_template_body_leak_after_front_matter as _strip_template_body_leak_after_front_matter,
         insert_abstract_chapters_and_sections as _insert_abstract_chapters_and_sections,
         insert_abstract_keywords as _insert_abstract_keywords,
-        ensure_update_fields_in_settings as _ensure_update_fields_in_settings,
+        ensure_update_fields_in_settings_root as _ensure_update_fields_in_settings_root,
         insert_toc_before_first_chapter as _insert_toc_before_first_chapter,
-        add_page_breaks_before_h1 as _add_page_breaks_before_h1,
+        add_page_breaks_before_h1_pass as _add_page_breaks_before_h1_pass,
     )
 
 try:
     from modules.style_processor import (
         align_styles_to_reference as _align_styles_to_reference,
         collect_style_ids as _collect_style_ids,
-        normalize_unknown_pstyles as _normalize_unknown_pstyles,
         fix_numbering_isLgl as _fix_numbering_isLgl,
         normalize_list_indents as _normalize_list_indents,
         inject_heading_numbering as _inject_heading_numbering,
         bind_heading_styles_to_numbering as _bind_heading_styles_to_numbering,
-        number_paragraph_headings_in_main_body as _number_paragraph_headings_in_main_body,
-        strip_numbering_from_backmatter_headings as _strip_numbering_from_backmatter_headings,
-        ensure_indent_for_body_paragraphs as _ensure_indent_for_body_paragraphs,
-        ensure_hanging_indent_for_bibliography as _ensure_hanging_indent_for_bibliography,
-        remove_docgrid_lines_type as _remove_docgrid_lines_type,
+        normalize_unknown_pstyles_pass as _normalize_unknown_pstyles_pass,
+        number_paragraph_headings_in_main_body_pass as _number_paragraph_headings_in_main_body_pass,
+        strip_numbering_from_backmatter_headings_pass as _strip_numbering_from_backmatter_headings_pass,
+        ensure_indent_for_body_paragraphs_pass as _ensure_indent_for_body_paragraphs_pass,
+        ensure_hanging_indent_for_bibliography_pass as _ensure_hanging_indent_for_bibliography_pass,
+        remove_docgrid_lines_type_pass as _remove_docgrid_lines_type_pass,
     )
 except ModuleNotFoundError:
     from scripts.modules.style_processor import (
         align_styles_to_reference as _align_styles_to_reference,
         collect_style_ids as _collect_style_ids,
-        normalize_unknown_pstyles as _normalize_unknown_pstyles,
         fix_numbering_isLgl as _fix_numbering_isLgl,
         normalize_list_indents as _normalize_list_indents,
         inject_heading_numbering as _inject_heading_numbering,
         bind_heading_styles_to_numbering as _bind_heading_styles_to_numbering,
-        number_paragraph_headings_in_main_body as _number_paragraph_headings_in_main_body,
-        strip_numbering_from_backmatter_headings as _strip_numbering_from_backmatter_headings,
-        ensure_indent_for_body_paragraphs as _ensure_indent_for_body_paragraphs,
-        ensure_hanging_indent_for_bibliography as _ensure_hanging_indent_for_bibliography,
-        remove_docgrid_lines_type as _remove_docgrid_lines_type,
+        normalize_unknown_pstyles_pass as _normalize_unknown_pstyles_pass,
+        number_paragraph_headings_in_main_body_pass as _number_paragraph_headings_in_main_body_pass,
+        strip_numbering_from_backmatter_headings_pass as _strip_numbering_from_backmatter_headings_pass,
+        ensure_indent_for_body_paragraphs_pass as _ensure_indent_for_body_paragraphs_pass,
+        ensure_hanging_indent_for_bibliography_pass as _ensure_hanging_indent_for_bibliography_pass,
+        remove_docgrid_lines_type_pass as _remove_docgrid_lines_type_pass,
     )
 
 try:
     from modules.font_handler import (
-        split_mixed_script_runs as _split_mixed_script_runs,
-        normalize_ascii_run_fonts as _normalize_ascii_run_fonts,
-        normalize_bibliography_run_style as _normalize_bibliography_run_style,
+        cn_refs_requested as _cn_refs_requested,
+        split_and_normalize_run_fonts_pass as _split_and_normalize_run_fonts_pass,
+        normalize_bibliography_run_style_pass as _normalize_bibliography_run_style_pass,
     )
 except ModuleNotFoundError:
     from scripts.modules.font_handler import (
-        split_mixed_script_runs as _split_mixed_script_runs,
-        normalize_ascii_run_fonts as _normalize_ascii_run_fonts,
-        normalize_bibliography_run_style as _normalize_bibliography_run_style,
+        cn_refs_requested as _cn_refs_requested,
+        split_and_normalize_run_fonts_pass as _split_and_normalize_run_fonts_pass,
+        normalize_bibliography_run_style_pass as _normalize_bibliography_run_style_pass,
     )
 
 try:
     from modules.reference_handler import (
-        fix_ref_dot_to_hyphen as _fix_ref_dot_to_hyphen,
         collect_hyperlink_char_style_ids as _collect_hyperlink_char_style_ids,
-        strip_anchor_hyperlinks_in_main_body as _strip_anchor_hyperlinks_in_main_body,
         strip_doi_hyperlinks_in_bibliography as _strip_doi_hyperlinks_in_bibliography,
+        fix_ref_dot_to_hyphen_pass as _fix_ref_dot_to_hyphen_pass,
+        strip_anchor_hyperlinks_in_main_body_pass as _strip_anchor_hyperlinks_in_main_body_pass,
     )
 except ModuleNotFoundError:
     from scripts.modules.reference_handler import (
-        fix_ref_dot_to_hyphen as _fix_ref_dot_to_hyphen,
         collect_hyperlink_char_style_ids as _collect_hyperlink_char_style_ids,
-        strip_anchor_hyperlinks_in_main_body as _strip_anchor_hyperlinks_in_main_body,
         strip_doi_hyperlinks_in_bibliography as _strip_doi_hyperlinks_in_bibliography,
+        fix_ref_dot_to_hyphen_pass as _fix_ref_dot_to_hyphen_pass,
+        strip_anchor_hyperlinks_in_main_body_pass as _strip_anchor_hyperlinks_in_main_body_pass,
     )
 
 try:
     from modules.figure_table_handler import (
         inject_captions_from_meta as _inject_captions_from_meta,
         apply_three_line_tables as _apply_three_line_tables,
-        fit_figure_images_to_cells as _fit_figure_images_to_cells,
         dedupe_body_level_anchor_bookmarks as _dedupe_body_level_anchor_bookmarks,
         first_table_style_id as _first_table_style_id,
         inject_figure_table_style as _inject_figure_table_style,
         remove_empty_para_before_table_captions as _remove_empty_para_before_table_captions,
+        fit_figure_images_to_cells_pass as _fit_figure_images_to_cells_pass,
     )
 except ModuleNotFoundError:
     from scripts.modules.figure_table_handler import (
         inject_captions_from_meta as _inject_captions_from_meta,
         apply_three_line_tables as _apply_three_line_tables,
-        fit_figure_images_to_cells as _fit_figure_images_to_cells,
         dedupe_body_level_anchor_bookmarks as _dedupe_body_level_anchor_bookmarks,
         first_table_style_id as _first_table_style_id,
         inject_figure_table_style as _inject_figure_table_style,
         remove_empty_para_before_table_captions as _remove_empty_para_before_table_captions,
+        fit_figure_images_to_cells_pass as _fit_figure_images_to_cells_pass,
     )
 
 try:
@@ -196,29 +201,158 @@ try:
         CaptionMeta as CaptionMeta,
         load_caption_profiles as _load_caption_profiles,
         preprocess_latex as _preprocess_latex,
+        preprocess_inputs_digest as _preprocess_inputs_digest,
         is_experiment_figure_path as _is_experiment_figure_path,
-        extract_caption_meta as _extract_caption_meta,
-        parse_latex_table_col_specs as _parse_latex_table_col_specs,
-        extract_display_math_number_flags as _extract_display_math_number_flags,
-        extract_keywords as _extract_keywords,
+        scan_latex_metadata as _scan_latex_metadata,
     )
 except ModuleNotFoundError:
     from scripts.modules.latex_parser import (
         CaptionMeta as CaptionMeta,
         load_caption_profiles as _load_caption_profiles,
         preprocess_latex as _preprocess_latex,
+        preprocess_inputs_digest as _preprocess_inputs_digest,
         is_experiment_figure_path as _is_experiment_figure_path,
-        extract_caption_meta as _extract_caption_meta,
-        parse_latex_table_col_specs as _parse_latex_table_col_specs,
-        extract_display_math_number_flags as _extract_display_math_number_flags,
-        extract_keywords as _extract_keywords,
+        scan_latex_metadata as _scan_latex_metadata,
+    )
+
+try:
+    from modules.pass_engine import (
+        Barrier,
+        VisitorPass,
+        run_pass_pipeline as _run_pass_pipeline,
+        run_visitor_passes as _run_visitor_passes,
+    )
+except ModuleNotFoundError:
+    from scripts.modules.pass_engine import (
+        Barrier,
+        VisitorPass,
+        run_pass_pipeline as _run_pass_pipeline,
+        run_visitor_passes as _run_visitor_passes,
+    )
+
+try:
+    from modules.build_cache import (
+        BuildCache,
+        builder_source_digest as _builder_source_digest,
+        digest_files as _digest_files,
+        digest_parts as _digest_parts,
+        graphics_digest as _graphics_digest,
+        tex_sources_digest as _tex_sources_digest,
+    )
+except ModuleNotFoundError:
+    from scripts.modules.build_cache import (
+        BuildCache,
+        builder_source_digest as _builder_source_digest,
+        digest_files as _digest_files,
+        digest_parts as _digest_parts,
+        graphics_digest as _graphics_digest,
+        tex_sources_digest as _tex_sources_digest,
+    )
+
+try:
+    from modules.part_store import (
+        DOCUMENT_PART as _DOCUMENT_PART,
+        SETTINGS_PART as _SETTINGS_PART,
+        PartStore as _PartStore,
+    )
+except ModuleNotFoundError:
+    from scripts.modules.part_store import (
+        DOCUMENT_PART as _DOCUMENT_PART,
+        SETTINGS_PART as _SETTINGS_PART,
+        PartStore as _PartStore,
     )
 
+try:
+    from modules.body_index import BodyIndex as _BodyIndex
+except ModuleNotFoundError:
+    from scripts.modules.body_index import BodyIndex as _BodyIndex
+
+try:
+    from modules.pass_profiler import (
+        PassProfiler,
+        PROFILE_FLAG as _PROFILE_FLAG,
+        profiling_requested as _profiling_requested,
+    )
+except ModuleNotFoundError:
+    from scripts.modules.pass_profiler import (
+        PassProfiler,
+        PROFILE_FLAG as _PROFILE_FLAG,
+        profiling_requested as _profiling_requested,
+    )
+
+try:
+    import modules.latex_parser as _latex_parser
+    from modules.figure_raster import (
+        png_resolution_digest as _png_resolution_digest,
+        rasterize_pdf_graphics as _rasterize_pdf_graphics,
+    )
+except ModuleNotFoundError:
+    import scripts.modules.latex_parser as _latex_parser
+    from scripts.modules.figure_raster import (
+        png_resolution_digest as _png_resolution_digest,
+        rasterize_pdf_graphics as _rasterize_pdf_graphics,
+    )
+
+try:
+    from modules.media_optimizer import (
+        dpi_from_env as _media_dpi_from_env,
+        media_optimize_requested as _media_optimize_requested,
+        optimize_docx_media as _optimize_docx_media,
+    )
+except ModuleNotFoundError:
+    from scripts.modules.media_optimizer import (
+        dpi_from_env as _media_dpi_from_env,
+        media_optimize_requested as _media_optimize_requested,
+        optimize_docx_media as _optimize_docx_media,
+    )
+
+try:
+    from modules.low_memory import (
+        LOW_MEMORY_FLAG as _LOW_MEMORY_FLAG,
+        low_memory_requested as _low_memory_requested,
+        release_memory as _release_memory,
+        report_peak_memory as _report_peak_memory,
+    )
+except ModuleNotFoundError:
+    from scripts.modules.low_memory import (
+        LOW_MEMORY_FLAG as _LOW_MEMORY_FLAG,
+        low_memory_requested as _low_memory_requested,
+        release_memory as _release_memory,
+        report_peak_memory as _report_peak_memory,
+    )
+
+try:
+    from modules.pandoc_shards import (
+        convert_sharded as _convert_sharded,
+        shard_workers_from_env as _shard_workers_from_env,
+    )
+except ModuleNotFoundError:
+    from scripts.modules.pandoc_shards import (
+        convert_sharded as _convert_sharded,
+        shard_workers_from_env as _shard_workers_from_env,
+    )
+
+try:
+    from utils.stage_timer import BUILD_TIMINGS as _BUILD_TIMINGS
+except ModuleNotFoundError:
+    from scripts.utils.stage_timer import BUILD_TIMINGS as _BUILD_TIMINGS
+
 try:
     from utils.text_utils import normalize_chinese_spaces as _normalize_chinese_spaces
 except ModuleNotFoundError:
     from scripts.utils.text_utils import normalize_chinese_spaces as _normalize_chinese_spaces
 
+try:
+    from utils.zip_writer import (
+        compresslevel_from_env as _compresslevel_from_env,
+        write_docx_package as _write_docx_package,
+    )
+except ModuleNotFoundError:
+    from scripts.utils.zip_writer import (
+        compresslevel_from_env as _compresslevel_from_env,
+        write_docx_package as _write_docx_package,
+    )
+
 # ==================== 全局路径变量 ====================
 
 ROOT = Path("/Users/bit/LaTeX/SWUN_Thesis")
@@ -305,16 +439,8 @@ def _verify_docx_experiment_images_are_png(
     return total, bad
 
 
-def _normalize_body_chinese_spaces(doc_ns: dict, body) -> None:
-    """遍历正文段落的 <w:t> 元素，规范化中文排版空格。
-
-    处理三种情况：
-    1. 单个 <w:t> 内部的空格
-    2. 跨 <w:r> 的边界空格（前 run 尾随空格 / 后 run 前导空格）
-    3. 段首/段尾冗余空格
-    """
-    w_p = _qn(doc_ns, "w", "p")
-    _qn(doc_ns, "w", "r")
+def _normalize_body_chinese_spaces_pass(doc_ns: dict) -> VisitorPass:
+    """构造中文排版空格规范化的访问者 pass（所有段落）。"""
     w_t = _qn(doc_ns, "w", "t")
     w_pPr = _qn(doc_ns, "w", "pPr")
     w_pStyle = _qn(doc_ns, "w", "pStyle")
@@ -324,18 +450,18 @@ def _normalize_body_chinese_spaces(doc_ns: dict, body) -> None:
     skip_styles = {"Heading1", "Heading2", "Heading3", "Heading4", "Heading5",
                    "TOC1", "TOC2", "TOC3", "TOCHeading", "Title", "Subtitle"}
 
-    for para in body.iter(w_p):
+    def visit(para) -> None:
         # 检查段落样式，跳过标题和目录
         pPr = para.find(w_pPr)
         if pPr is not None:
             pStyle = pPr.find(w_pStyle)
             if pStyle is not None and pStyle.get(w_val, "") in skip_styles:
-                continue
+                return
 
         # 收集段落中所有 <w:t> 元素
         t_elems = list(para.iter(w_t))
         if not t_elems:
-            continue
+            return
 
         # 处理单个 <w:t> 内部的空格
         for t_elem in t_elems:
@@ -410,65 +536,64 @@ def _normalize_body_chinese_spaces(doc_ns: dict, body) -> None:
                     if "{http://www.w3.org/XML/1998/namespace}space" in last_t.attrib:
                         del last_t.attrib["{http://www.w3.org/XML/1998/namespace}space"]
 
+    return VisitorPass("normalize_body_chinese_spaces", "p", visit)
+
+
+def _normalize_body_chinese_spaces(doc_ns: dict, body) -> None:
+    """遍历正文段落的 <w:t> 元素，规范化中文排版空格。
 
+    处理三种情况：
+    1. 单个 <w:t> 内部的空格
+    2. 跨 <w:r> 的边界空格（前 run 尾随空格 / 后 run 前导空格）
+    3. 段首/段尾冗余空格
+    """
+    _run_visitor_passes(doc_ns, body, [_normalize_body_chinese_spaces_pass(doc_ns)])
 
-def _reorder_backmatter(doc_ns, body):
+
+def _reorder_backmatter(doc_ns, body, index=None):
     """将参考文献 section 移到致谢之前（修复 pandoc citeproc 的末尾放置）。"""
-    W = doc_ns["w"]
-
-    def _is_h1(elem):
-        if elem.tag != f"{{{W}}}p":
-            return False
-        pPr = elem.find(f"{{{W}}}pPr")
-        if pPr is None:
-            return False
-        pStyle = pPr.find(f"{{{W}}}pStyle")
-        if pStyle is None:
-            return False
-        val = pStyle.get(f"{{{W}}}val", "")
-        return val in ("Heading1", "heading 1", "Heading 1", "1")
-
-    def _txt(elem):
-        return "".join(t.text or "" for t in elem.iter(f"{{{W}}}t"))
-
-    children = list(body)
+    idx = index if index is not None else _BodyIndex(doc_ns, body)
+    h1_styles = ("Heading1", "heading 1", "Heading 1", "1")
+
+    def _is_h1(i):
+        return idx.is_p(i) and idx.style(i) in h1_styles
+
     ref_pos = ack_pos = None
-    for idx, child in enumerate(children):
-        if _is_h1(child):
-            text = _txt(child).strip()
+    for i in range(len(idx)):
+        if _is_h1(i):
+            text = idx.text(i).strip()
             if "参考文献" in text:
-                ref_pos = idx
+                ref_pos = i
             elif "致谢" in text:
-                ack_pos = idx
+                ack_pos = i
 
     if ref_pos is None or ack_pos is None or ref_pos <= ack_pos:
         return
 
-    ref_end = len(children)
-    for idx, child in enumerate(children):
-        if idx > ref_pos and _is_h1(child):
-            ref_end = idx
+    ref_end = len(idx)
+    for i in range(ref_pos + 1, len(idx)):
+        if _is_h1(i):
+            ref_end = i
             break
 
-    ref_elems = children[ref_pos:ref_end]
+    ref_elems = idx.blocks[ref_pos:ref_end]
     for elem in ref_elems:
-        body.remove(elem)
+        idx.remove(elem)
 
-    ack_elem = None
-    for child in body:
-        if _is_h1(child) and "致谢" in _txt(child).strip():
-            ack_elem = child
+    ack_pos = None
+    for i in range(len(idx)):
+        if _is_h1(i) and "致谢" in idx.text(i).strip():
+            ack_pos = i
             break
 
-    if ack_elem is None:
+    if ack_pos is None:
         for elem in ref_elems:
-            body.append(elem)
+            idx.append(elem)
         return
 
-    # 用 list(body).index 找致谢位置，然后逐个 insert（ElementTree 不支持 addprevious）
-    insert_pos = list(body).index(ack_elem)
+    insert_pos = ack_pos
     for elem in ref_elems:
-        body.insert(insert_pos, elem)
+        idx.insert(insert_pos, elem)
         insert_pos += 1
 
     print(f"  [reorder] 参考文献 section ({len(ref_elems)} elements) moved before 致谢")
@@ -483,26 +608,46 @@ def _postprocess_docx(
     caption_meta: dict[str, CaptionMeta],
     caption_profiles: dict[str, CaptionFormatProfile],
     latex_col_ratios: dict[str, list[float]] | None = None,
+    profiler: PassProfiler | None = None,
+    cache: BuildCache | None = None,
+    low_memory: bool | None = None,
 ) -> None:
-    """OOXML 后处理编排：从中间 DOCX 生成最终版式1 DOCX。"""
+    """OOXML 后处理编排：从中间 DOCX 生成最终版式1 DOCX。
+
+    profiler 启用时记录各 pass / 阶段的耗时、访问数、变更数与内存峰值；
+    cache 用于缓存模板封面元素片段（见 template_loader.load_template_cover_elements）；
+    low_memory 为 None 时按 SWUN_LOW_MEMORY 决定（见 modules/low_memory.py），
+    输出与普通模式逐字节相同。
+    """
+    prof = profiler if profiler is not None else PassProfiler(enabled=False)
+    if low_memory is None:
+        low_memory = _low_memory_requested()
     with zipfile.ZipFile(input_docx, "r") as zin:
         files = zin.namelist()
 
-        doc_xml = zin.read("word/document.xml")
-        doc_ns = _collect_ns(doc_xml)
-        if "w" not in doc_ns:
-            raise RuntimeError("word/document.xml missing w namespace")
-        _register_ns(doc_ns)
-
-        root = ET.fromstring(doc_xml)
-        w_body = _qn(doc_ns, "w", "body")
-        body = root.find(w_body)
-        if body is None:
-            raise RuntimeError("word/document.xml missing w:body")
+        with prof.stage("parse_document_xml"):
+            if low_memory:
+                # 边解压边解析：document.xml 的完整字节与元素树不同时驻留
+                with zin.open(_DOCUMENT_PART) as fh:
+                    root, doc_ns = _parse_with_ns(fh)
+            else:
+                doc_xml = zin.read(_DOCUMENT_PART)
+                doc_ns = _collect_ns(doc_xml)
+                root = ET.fromstring(doc_xml)
+                del doc_xml
+            if "w" not in doc_ns:
+                raise RuntimeError("word/document.xml missing w namespace")
+            _register_ns(doc_ns)
+
+            w_body = _qn(doc_ns, "w", "body")
+            body = root.find(w_body)
+            if body is None:
+                raise RuntimeError("word/document.xml missing w:body")
 
         # 插入封面页（来自模板）
-        _prepend_template_cover_pages(doc_ns, body, TEMPLATE_DOCX)
-        _strip_template_body_leak_after_front_matter(doc_ns, body)
+        with prof.stage("prepend_template_cover_pages", "barrier"):
+            _prepend_template_cover_pages(doc_ns, body, TEMPLATE_DOCX, cache=cache)
+            _strip_template_body_leak_after_front_matter(doc_ns, body)
 
         styles_xml = zin.read(
             "word/styles.xml") if "word/styles.xml" in files else b""
@@ -518,140 +663,149 @@ def _postprocess_docx(
         else:
             sectPr_proto = None
 
+        def _set_final_sect_pgnum() -> None:
+            sectPr2 = _get_body_sectPr(doc_ns, body)
+            if sectPr2 is not None:
+                _set_sect_pgnum(doc_ns, sectPr2, fmt="decimal", start=1)
+
+        # 相邻的 VisitorPass 合并为一次 body 遍历；Barrier 会增删/移动顶层块或
+        # 依赖全局视图，按原顺序独占执行。各 Barrier 共享同一个 BodyIndex。
+        body_index = _BodyIndex(doc_ns, body)
+        steps: list[Barrier | VisitorPass] = []
+
         # 插入中英文摘要章节与关键词
         if sectPr_proto is not None:
-            _insert_abstract_chapters_and_sections(doc_ns, body, sectPr_proto)
-
-        _insert_abstract_keywords(doc_ns, body, cn_keywords, en_keywords)
+            steps.append(Barrier("insert_abstract_chapters_and_sections", lambda: _insert_abstract_chapters_and_sections(
+                doc_ns, body, sectPr_proto, index=body_index), index_safe=True))
+        steps.append(Barrier("insert_abstract_keywords", lambda: _insert_abstract_keywords(
+            doc_ns, body, cn_keywords, en_keywords, index=body_index), index_safe=True))
 
         # 目录、分页、标题编号
-        _insert_toc_before_first_chapter(doc_ns, body, sectPr_proto)
-        _add_page_breaks_before_h1(doc_ns, body)
-        _number_paragraph_headings_in_main_body(doc_ns, body)
+        steps.append(Barrier("insert_toc_before_first_chapter", lambda: _insert_toc_before_first_chapter(
+            doc_ns, body, sectPr_proto, index=body_index), index_safe=True))
+        steps.append(_add_page_breaks_before_h1_pass(doc_ns))
+        steps.append(_number_paragraph_headings_in_main_body_pass(doc_ns))
 
         # 算法块格式化
-        _format_algorithm_blocks(doc_ns, root, body)
+        steps.append(Barrier("format_algorithm_blocks", lambda: _format_algorithm_blocks(doc_ns, root, body)))
 
         # 正文段落缩进 & 参考文献悬挂缩进
-        _ensure_indent_for_body_paragraphs(doc_ns, body)
-        _ensure_hanging_indent_for_bibliography(doc_ns, body)
+        steps.append(_ensure_indent_for_body_paragraphs_pass(doc_ns))
+        steps.append(_ensure_hanging_indent_for_bibliography_pass(doc_ns))
 
-        # 字体处理：中英文分割 -> ASCII 字体规范化 -> 参考文献字体
-        _split_mixed_script_runs(doc_ns, body)
-        _normalize_ascii_run_fonts(doc_ns, body)
-        _normalize_bibliography_run_style(doc_ns, body)
+        # 字体处理：中英文分割（同时完成 ASCII 字体规范化）-> 参考文献字体
+        steps.append(_split_and_normalize_run_fonts_pass(doc_ns))
+        steps.append(_normalize_bibliography_run_style_pass(doc_ns))
 
         # 三线表 & 图表标题注入（表格字体必须在 normalize 之后）
-        _apply_three_line_tables(
-    doc_ns,
-    root,
-    body,
-    table_style_id,
-     latex_col_ratios=latex_col_ratios )
-        _inject_captions_from_meta(
-    doc_ns, body, caption_meta, caption_profiles)
+        steps.append(Barrier("apply_three_line_tables", lambda: _apply_three_line_tables(
+            doc_ns, root, body, table_style_id, latex_col_ratios=latex_col_ratios)))
+        steps.append(Barrier("inject_captions_from_meta", lambda: _inject_captions_from_meta(
+            doc_ns, body, caption_meta, caption_profiles, index=body_index)))
         # 清理表格标题前的多余空段落
-        _remove_empty_para_before_table_captions(doc_ns, body)
-        _fit_figure_images_to_cells(doc_ns, body)
+        steps.append(Barrier("remove_empty_para_before_table_captions", lambda: _remove_empty_para_before_table_captions(doc_ns, body)))
 
-        # 书签去重 & 超链接清理
-        _dedupe_body_level_anchor_bookmarks(doc_ns, body)
-        _fix_ref_dot_to_hyphen(doc_ns, body)
-        _strip_anchor_hyperlinks_in_main_body(
-            doc_ns, body, hyperlink_style_ids)
-        _strip_doi_hyperlinks_in_bibliography(doc_ns, body)
+        # 书签去重 & 超链接清理（FigureTable 图片缩放与书签无关，并入同一遍历）
+        steps.append(Barrier("dedupe_body_level_anchor_bookmarks", lambda: _dedupe_body_level_anchor_bookmarks(doc_ns, body)))
+        steps.append(_fit_figure_images_to_cells_pass(doc_ns))
+        steps.append(_fix_ref_dot_to_hyphen_pass(doc_ns))
+        steps.append(_strip_anchor_hyperlinks_in_main_body_pass(doc_ns, hyperlink_style_ids))
+        steps.append(Barrier("strip_doi_hyperlinks_in_bibliography", lambda: _strip_doi_hyperlinks_in_bibliography(doc_ns, body)))
 
         # 公式编号
-        _number_display_equations(doc_ns, root, body, display_math_flags)
-
-        # 未知段落样式规范化
-        if known_styles:
-            _normalize_unknown_pstyles(doc_ns, body, known_styles)
+        steps.append(Barrier("number_display_equations", lambda: _number_display_equations(doc_ns, root, body, display_math_flags)))
 
         # 后附章节顺序修正：将参考文献移到致谢之前
-        _reorder_backmatter(doc_ns, body)
-
-        # 后附章节（参考文献/致谢）去除编号
-        _strip_numbering_from_backmatter_headings(doc_ns, body)
+        steps.append(Barrier("reorder_backmatter", lambda: _reorder_backmatter(
+            doc_ns, body, index=body_index), index_safe=True))
 
         # 最终/主节：页码从 1 开始（阿拉伯数字）
-        sectPr2 = _get_body_sectPr(doc_ns, body)
-        if sectPr2 is not None:
-            _set_sect_pgnum(doc_ns, sectPr2, fmt="decimal", start=1)
+        steps.append(Barrier("set_final_sect_pgnum", _set_final_sect_pgnum))
+
+        # 未知段落样式规范化（只改写候选正文样式，不影响后附章节重排所依据的一级标题）
+        if known_styles:
+            steps.append(_normalize_unknown_pstyles_pass(doc_ns, known_styles))
+
+        # 后附章节（参考文献/致谢）去除编号
+        steps.append(_strip_numbering_from_backmatter_headings_pass(doc_ns))
 
         # 中文排版空格规范化（移除标点后空格、中英文间空格）
-        _normalize_body_chinese_spaces(doc_ns, body)
+        steps.append(_normalize_body_chinese_spaces_pass(doc_ns))
 
         # 移除 docGrid type="lines" 防止行间距膨胀
-        _remove_docgrid_lines_type(doc_ns, body)
+        steps.append(_remove_docgrid_lines_type_pass(doc_ns))
 
-        new_doc_xml = ET.tostring(root, encoding="utf-8", xml_declaration=True)
+        _run_pass_pipeline(doc_ns, body, steps, profiler=prof, index=body_index)
+        if low_memory:
+            # BodyIndex 的块列表 / 文本缓存与各 Barrier 闭包在管线之后不再使用
+            del steps, body_index
+            _release_memory()
 
         # 编号 XML 处理
-        numbering_xml = ( zin.read("word/numbering.xml")
-                         if "word/numbering.xml" in files else None )
-        new_numbering_xml = numbering_xml
-        if new_numbering_xml:
-            new_numbering_xml = _inject_heading_numbering(new_numbering_xml)
-            new_numbering_xml = _fix_numbering_isLgl(doc_ns, new_numbering_xml)
-            new_numbering_xml = _normalize_list_indents(new_numbering_xml)
+        with prof.stage("numbering_xml"):
+            numbering_xml = ( zin.read("word/numbering.xml")
+                             if "word/numbering.xml" in files else None )
+            new_numbering_xml = numbering_xml
+            if new_numbering_xml:
+                new_numbering_xml = _inject_heading_numbering(new_numbering_xml)
+                new_numbering_xml = _fix_numbering_isLgl(doc_ns, new_numbering_xml)
+                new_numbering_xml = _normalize_list_indents(new_numbering_xml)
 
         # 样式 XML 处理：标题编号绑定 + 样式对齐 + Hyperlink 样式修复 + 图表样式注入
-        new_styles_xml = styles_xml
-        if new_styles_xml:
-            new_styles_xml = _bind_heading_styles_to_numbering(new_styles_xml)
-            new_styles_xml = _align_styles_to_reference(new_styles_xml)
-            new_styles_xml = _fix_hyperlink_style(new_styles_xml)
-            new_styles_xml = _inject_figure_table_style(new_styles_xml)
-
-        # 读取所有文件数据供 footer 替换使用
-        file_data: dict[str, bytes] = {}
-        for name in files:
-            file_data[name] = zin.read(name)
+        with prof.stage("styles_xml"):
+            new_styles_xml = styles_xml
+            if new_styles_xml:
+                new_styles_xml = _bind_heading_styles_to_numbering(new_styles_xml)
+                new_styles_xml = _align_styles_to_reference(new_styles_xml)
+                new_styles_xml = _fix_hyperlink_style(new_styles_xml)
+                new_styles_xml = _inject_figure_table_style(new_styles_xml)
+
+        # XML 部件进入共享 PartStore：document 直接登记管线中的活动树，
+        # 其余部件（rels / Content_Types / settings / 页眉页脚）按需解析一次
+        with prof.stage("read_package_members"):
+            parts = _PartStore.from_zip(zin, files, skip=(_DOCUMENT_PART,))
+            parts.adopt(_DOCUMENT_PART, root, doc_ns)
+            if new_numbering_xml is not None and new_numbering_xml != numbering_xml:
+                parts.set_bytes("word/numbering.xml", new_numbering_xml)
+            if new_styles_xml and new_styles_xml != styles_xml:
+                parts.set_bytes("word/styles.xml", new_styles_xml)
+            if low_memory:
+                # 新旧样式 / 编号字节已由 PartStore 持有，释放本地副本
+                del numbering_xml, new_numbering_xml, styles_xml, new_styles_xml
+                _release_memory()
 
         # 替换 WPS 遗留页脚为干净的 PAGE 域页脚
-        file_data["word/document.xml"] = new_doc_xml
-        _replace_wps_footers(file_data, new_doc_xml)
-        # 从 footer 重新分配后获取可能更新的 document.xml
-        new_doc_xml = file_data["word/document.xml"]
+        with prof.stage("replace_wps_footers"):
+            _replace_wps_footers(parts)
 
         # 写入各 section 页眉（论文题目）
-        _add_thesis_headers(file_data, new_doc_xml)
-        # 从 header 注册后获取可能更新的 document.xml / rels / content types
-        new_doc_xml = file_data["word/document.xml"]
+        with prof.stage("add_thesis_headers"):
+            _add_thesis_headers(parts)
 
         # settings.xml：添加 updateFields 支持打开时自动更新目录
-        if "word/settings.xml" in file_data:
-            new_settings_xml = _ensure_update_fields_in_settings(
-                doc_ns, file_data["word/settings.xml"]
+        with prof.stage("settings_xml"):
+            settings_root = parts.tree(_SETTINGS_PART)
+            if settings_root is not None and _ensure_update_fields_in_settings_root(
+                doc_ns, settings_root
+            ):
+                parts.mark_dirty(_SETTINGS_PART)
+
+        # 写入新 DOCX：脏部件各序列化一次并重新压缩，其余成员原样拷贝压缩字节
+        with prof.stage("write_package"):
+            # 低内存模式下脏树在写包时直接序列化进压缩流
+            replacements = parts.serialize_dirty(stream=low_memory)
+            tmp_out = output_docx.with_suffix(".docx.tmp")
+            if tmp_out.exists():
+                tmp_out.unlink()
+            stats = _write_docx_package(
+                input_docx, tmp_out, replacements,
+                members=files, compresslevel=_compresslevel_from_env(),
             )
-        else:
-            new_settings_xml = None
-
-        # 写入新 DOCX（其余文件原样复制，新增文件额外追加）
-        tmp_out = output_docx.with_suffix(".docx.tmp")
-        if tmp_out.exists():
-            tmp_out.unlink()
-        written: set[str] = set()
-        with zipfile.ZipFile(tmp_out, "w", compression=zipfile.ZIP_DEFLATED) as zout:
-            for name in files:
-                if name == "word/document.xml":
-                    data = new_doc_xml
-                elif name == "word/numbering.xml" and new_numbering_xml is not None:
-                    data = new_numbering_xml
-                elif name == "word/styles.xml" and new_styles_xml is not None:
-                    data = new_styles_xml
-                elif name == "word/settings.xml" and new_settings_xml is not None:
-                    data = new_settings_xml
-                else:
-                    data = file_data[name]
-                zout.writestr(name, data)
-                written.add(name)
-            # 写入 header/footer 处理中新建的文件（不在原始 zip 中）
-            for name, data in file_data.items():
-                if name not in written:
-                    zout.writestr(name, data)
-        tmp_out.replace(output_docx)
+            print(f"  [package] {stats.raw_copied} parts copied raw, "
+                  f"{stats.recompressed} recompressed")
+            tmp_out.replace(output_docx)
+    if low_memory:
+        _report_peak_memory()
 
 
 def _resolve_paths(thesis_dir: Path) -> None:
@@ -661,6 +815,8 @@ def _resolve_paths(thesis_dir: Path) -> None:
 
     ROOT = thesis_dir
     MAIN_TEX = ROOT / "main.tex"
+    # preprocess_latex 按 latex_parser.ROOT 查找 main.aux 与 PNG 图片
+    _latex_parser.ROOT = ROOT
 
     # 优先使用项目本地 CSL，回退到 skill 内置副本
     default_csl = ROOT / "china-national-standard-gb-t-7714-2015-numeric.csl"
@@ -685,9 +841,29 @@ def _resolve_paths(thesis_dir: Path) -> None:
     OUTPUT_DOCX = ROOT / "main_版式1.docx"
 
 
+def _flat_cache_key(expand_key: str, expanded: str) -> str:
+    """flat 阶段缓存键：展开源码之外，preprocess_latex 的输出还取决于
+    PNG 候选解析、main.aux 的交叉引用编号与 \\IfFileExists 判定。"""
+    return _digest_parts(
+        expand_key,
+        _png_resolution_digest(expanded, ROOT),
+        _preprocess_inputs_digest(expanded, ROOT),
+    )
+
+
+# 不备份旧输出（监视模式首轮之后的各轮传入）
+NO_BACKUP_FLAG = "--no-backup"
+
+
 def main(argv: list[str] | None = None) -> None:
     """主入口：解析参数、运行完整构建管线。"""
     argv = list(sys.argv[1:] if argv is None else argv)
+    profiler = PassProfiler(enabled=_profiling_requested(argv))
+    low_memory = _low_memory_requested(argv)
+    backup = NO_BACKUP_FLAG not in argv
+    argv = [a for a in argv if a not in (_PROFILE_FLAG, _LOW_MEMORY_FLAG, NO_BACKUP_FLAG)]
+    # 各阶段耗时（监视模式每轮打印，见 modules/watch_mode.py）
+    _BUILD_TIMINGS.reset()
 
     # 默认：使用当前工作目录（若包含 main.tex），否则使用硬编码回退路径
     if argv:
@@ -715,61 +891,121 @@ def main(argv: list[str] | None = None) -> None:
                 )
             raise SystemExit(f"missing required file: {p}")
 
-    # 备份现有输出
-    if OUTPUT_DOCX.exists():
+    # 备份现有输出（监视模式的增量重建传入 --no-backup）
+    if backup and OUTPUT_DOCX.exists():
         ts = _dt.datetime.now().strftime("%Y%m%d_%H%M%S")
         bak = OUTPUT_DOCX.with_suffix(f".docx.bak_{ts}")
         shutil.copy2(OUTPUT_DOCX, bak)
 
+    # 内容寻址缓存：输入摘要未变化的阶段直接复用上次产物
+    cache = BuildCache.for_thesis(ROOT)
+    builder_digest = _builder_source_digest()
+
     # 1) latexpand -> flat tex
-    flat = subprocess.run(
-        ["latexpand", str(MAIN_TEX)],
-        cwd=str(ROOT),
-        check=True,
-        stdout=subprocess.PIPE,
-    ).stdout.decode("utf-8", errors="ignore")
-
-    flat = _preprocess_latex(flat)
-    FLAT_TEX.write_text(flat, encoding="utf-8")
-    caption_meta = _extract_caption_meta(flat)
-    caption_profiles = _load_caption_profiles(CAPTION_PROFILE_DOCX)
-    display_math_flags = _extract_display_math_number_flags(flat)
-    cn_kw, en_kw = _extract_keywords(flat)
-    latex_col_ratios = _parse_latex_table_col_specs(flat)
+    with _BUILD_TIMINGS.stage("latexpand"):
+        expand_key = _digest_parts(
+            _tex_sources_digest(ROOT), MAIN_TEX.name, builder_digest)
+        expanded = cache.fetch_text("latexpand", expand_key, suffix=".tex")
+        if expanded is None:
+            expanded = subprocess.run(
+                ["latexpand", str(MAIN_TEX)],
+                cwd=str(ROOT),
+                check=True,
+                stdout=subprocess.PIPE,
+            ).stdout.decode("utf-8", errors="ignore")
+            cache.store_text("latexpand", expand_key, expanded, suffix=".tex")
+
+    # 只有 PDF（或 PNG 已过期）的图片先栅格化为 PNG；每次构建都检查，PDF 更新即重新生成
+    with _BUILD_TIMINGS.stage("raster"):
+        _rasterize_pdf_graphics(expanded, ROOT, cache=cache)
+
+    with _BUILD_TIMINGS.stage("preprocess"):
+        flat_key = _flat_cache_key(expand_key, expanded)
+        flat = cache.fetch_text("flat", flat_key, suffix=".tex")
+        if flat is None:
+            flat = _preprocess_latex(expanded)
+            cache.store_text("flat", flat_key, flat, suffix=".tex")
+        FLAT_TEX.write_text(flat, encoding="utf-8")
+        # caption / 公式编号 / 关键词 / 表格列宽在同一次记号扫描中提取
+        latex_meta = _scan_latex_metadata(flat)
+        caption_profiles = _load_caption_profiles(CAPTION_PROFILE_DOCX, cache=cache)
+    caption_meta = latex_meta.caption_meta
+    display_math_flags = latex_meta.display_math_flags
+    cn_kw, en_kw = latex_meta.keywords
+    latex_col_ratios = latex_meta.table_col_specs
 
     # 2) pandoc -> 中间 DOCX
+    pandoc_args = [
+        "--from=latex",
+        "--to=docx",
+        f"--reference-doc={TEMPLATE_DOCX}",
+        f"--csl={CSL}",
+        f"--bibliography={BIB}",
+        "--citeproc",
+        "--metadata=reference-section-title:参考文献",
+        "--resource-path=.:./media:./figures",
+    ]
+    # SWUN_PANDOC_SHARDS 启用按章分片并行转换（modules/pandoc_shards.py）
+    shard_workers = _shard_workers_from_env()
+    pandoc_key = _digest_parts(
+        flat,
+        _digest_files([BIB, CSL, TEMPLATE_DOCX]),
+        _graphics_digest(flat, ROOT),
+        "\n".join(pandoc_args),
+        "sharded" if shard_workers else "whole",
+        builder_digest,
+    )
     if INTERMEDIATE_DOCX.exists():
         INTERMEDIATE_DOCX.unlink()
-    _run(
-        [
-            "pandoc",
-            str(FLAT_TEX),
-            "--from=latex",
-            "--to=docx",
-            f"--reference-doc={TEMPLATE_DOCX}",
-            f"--csl={CSL}",
-            f"--bibliography={BIB}",
-            "--citeproc",
-            "--metadata=reference-section-title:参考文献",
-            "--resource-path=.:./media:./figures",
-            "-o",
-            str(INTERMEDIATE_DOCX),
-        ],
-        cwd=ROOT,
-    )
+    with _BUILD_TIMINGS.stage("pandoc"):
+        if not cache.fetch("pandoc", pandoc_key, INTERMEDIATE_DOCX, suffix=".docx"):
+            sharded = shard_workers > 0 and _convert_sharded(
+                flat, INTERMEDIATE_DOCX, pandoc_args, ROOT, shard_workers, cache=cache)
+            if not sharded:
+                _run(
+                    ["pandoc", str(FLAT_TEX), *pandoc_args, "-o", str(INTERMEDIATE_DOCX)],
+                    cwd=ROOT,
+                )
+            cache.store("pandoc", pandoc_key, INTERMEDIATE_DOCX, suffix=".docx")
 
     # 3) OOXML 后处理 -> 最终 DOCX
-    _postprocess_docx(
-        INTERMEDIATE_DOCX,
-        OUTPUT_DOCX,
-        display_math_flags,
-        cn_kw,
-        en_kw,
-        caption_meta,
-        caption_profiles,
-        latex_col_ratios=latex_col_ratios,
-    )
-    exp_total, exp_bad = _verify_docx_experiment_images_are_png(OUTPUT_DOCX)
+    # 改写部件的压缩级别决定输出字节，计入键
+    post_key = _digest_parts(
+        pandoc_key,
+        _digest_files([CAPTION_PROFILE_DOCX]),
+        f"compresslevel={_compresslevel_from_env()}",
+    )
+    # SWUN_MEDIA_OPTIMIZE：最终 DOCX 媒体去重 / 降采样 / 无损重压缩（modules/media_optimizer.py）
+    optimize_media = _media_optimize_requested()
+    if optimize_media:
+        post_key = _digest_parts(post_key, f"media dpi={_media_dpi_from_env()}")
+    # SWUN_CN_REFS：参考文献中文条目格式修正（utils/cn_ref_rules.py）改变后处理产物
+    if _cn_refs_requested():
+        post_key = _digest_parts(post_key, "cn-refs")
+    # 剖析模式需要真实执行后处理，跳过 postprocess 缓存
+    with _BUILD_TIMINGS.stage("postprocess"):
+        if profiler.enabled or not cache.fetch("postprocess", post_key, OUTPUT_DOCX, suffix=".docx"):
+            profiler.start()
+            _postprocess_docx(
+                INTERMEDIATE_DOCX,
+                OUTPUT_DOCX,
+                display_math_flags,
+                cn_kw,
+                en_kw,
+                caption_meta,
+                caption_profiles,
+                latex_col_ratios=latex_col_ratios,
+                profiler=profiler,
+                cache=cache,
+                low_memory=low_memory,
+            )
+            profiler.stop()
+            if optimize_media:
+                _optimize_docx_media(OUTPUT_DOCX)
+            profiler.write_report(OUTPUT_DOCX)
+            cache.store("postprocess", post_key, OUTPUT_DOCX, suffix=".docx")
+    with _BUILD_TIMINGS.stage("verify"):
+        exp_total, exp_bad = _verify_docx_experiment_images_are_png(OUTPUT_DOCX)
     if exp_bad:
         details = "\n".join(f"  - {d} => {t}" for d, t in exp_bad)
         raise RuntimeError(
@@ -784,9 +1020,15 @@ def main(argv: list[str] | None = None) -> None:
     if FLAT_TEX.exists():
         FLAT_TEX.unlink()
 
+    print(f"BUILD CACHE: {cache.report()}")
     print(f"OK: {OUTPUT_DOCX}")
 
 
+def last_build_timings() -> dict[str, float]:
+    """最近一次 main() 各阶段耗时（秒，按执行顺序）。"""
+    return dict(_BUILD_TIMINGS.seconds)
+
+
 # 向后兼容：保留 postprocess_docx 公共别名
 postprocess_docx = _postprocess_docx
 
@@ -795,7 +1037,9 @@ __all__ = [
     "_postprocess_docx",
     "_resolve_paths",
     "_verify_docx_experiment_images_are_png",
+    "last_build_timings",
     "main",
+    "NO_BACKUP_FLAG",
     "ROOT",
     "SCRIPT_DIR",
     "TEMPLATE_DOCX",
@@ -10,10 +10,14 @@ try:
 except ModuleNotFoundError:  # pragma: no cover - pytest imports via scripts.modules
     from scripts.utils.ooxml import collect_ns, qn, p_text, p_style
 
+try:
+    from modules.pass_engine import REGION_MAIN, VisitorPass, run_visitor_passes
+except ModuleNotFoundError:  # pragma: no cover - pytest imports via scripts.modules
+    from scripts.modules.pass_engine import REGION_MAIN, VisitorPass, run_visitor_passes
 
-def fix_ref_dot_to_hyphen(ns: dict[str, str], body: ET.Element) -> None:
-    """Replace dot-format figure/table refs (图3.1, 表4.2) with hyphen format (图3-1, 表4-2)."""
-    w_p = qn(ns, "w", "p")
+
+def fix_ref_dot_to_hyphen_pass(ns: dict[str, str]) -> VisitorPass:
+    """Build the visitor pass behind fix_ref_dot_to_hyphen (all paragraphs)."""
     w_r = qn(ns, "w", "r")
     w_t = qn(ns, "w", "t")
     w_hyperlink = qn(ns, "w", "hyperlink")
@@ -23,7 +27,7 @@ def fix_ref_dot_to_hyphen(ns: dict[str, str], body: ET.Element) -> None:
     compact_re = re.compile(r"((?:图|表))[\s\u00a0]+(\d+-\d+)")
     num_re = re.compile(r"^(\s*)(\d+)[\.\-．](\d+)")
 
-    for p in body.iter(w_p):
+    def visit(p: ET.Element) -> None:
         for t in p.iter(w_t):
             if not t.text:
                 continue
@@ -69,6 +73,13 @@ def fix_ref_dot_to_hyphen(ns: dict[str, str], body: ET.Element) -> None:
             for t in t_nodes[1:]:
                 t.text = ""
 
+    return VisitorPass("fix_ref_dot_to_hyphen", "p", visit)
+
+
+def fix_ref_dot_to_hyphen(ns: dict[str, str], body: ET.Element) -> None:
+    """Replace dot-format figure/table refs (图3.1, 表4.2) with hyphen format (图3-1, 表4-2)."""
+    run_visitor_passes(ns, body, [fix_ref_dot_to_hyphen_pass(ns)])
+
 
 def collect_hyperlink_char_style_ids(styles_xml: bytes) -> set[str]:
     """Return style IDs whose name contains 'hyperlink' (case-insensitive)."""
@@ -235,39 +246,40 @@ def strip_fig_table_ref_link_style_in_node(
     return touched
 
 
-def strip_anchor_hyperlinks_in_main_body(
+def strip_anchor_hyperlinks_in_main_body_pass(
     ns: dict[str, str],
-    body: ET.Element,
     hyperlink_style_ids: set[str] | None = None,
-) -> int:
-    """Remove internal anchor hyperlinks from thesis main-body section (正文)."""
+) -> VisitorPass:
+    """Build the visitor pass behind strip_anchor_hyperlinks_in_main_body."""
     w_p = qn(ns, "w", "p")
     w_tbl = qn(ns, "w", "tbl")
-    excluded_h1 = {"目录", "摘要", "Abstract", "致谢", "参考文献", "攻读硕士学位期间所取得的相关科研成果"}
-    stop_h1 = {"参考文献", "致谢", "攻读硕士学位期间所取得的相关科研成果"}
-
-    in_main_body = False
     removed = 0
 
-    for el in list(body):
-        if el.tag == w_p:
-            style = p_style(ns, el)
-            txt = p_text(ns, el).strip()
-            if style == "1":
-                if txt in stop_h1:
-                    in_main_body = False
-                elif txt and txt not in excluded_h1:
-                    in_main_body = True
-
-        if not in_main_body:
-            continue
+    def visit(el: ET.Element) -> None:
+        nonlocal removed
         if el.tag not in {w_p, w_tbl}:
-            continue
+            return
         removed += unwrap_selected_hyperlinks_in_node(
     ns, el, hyperlink_style_ids=hyperlink_style_ids)
         strip_hyperlink_run_style(ns, el, hyperlink_style_ids)
 
-    return removed
+    return VisitorPass(
+        "strip_anchor_hyperlinks_in_main_body",
+        "block",
+        visit,
+        regions=frozenset({REGION_MAIN}),
+        finish=lambda: removed,
+    )
+
+
+def strip_anchor_hyperlinks_in_main_body(
+    ns: dict[str, str],
+    body: ET.Element,
+    hyperlink_style_ids: set[str] | None = None,
+) -> int:
+    """Remove internal anchor hyperlinks from thesis main-body section (正文)."""
+    p = strip_anchor_hyperlinks_in_main_body_pass(ns, hyperlink_style_ids)
+    return run_visitor_passes(ns, body, [p])[p.name]
 
 
 def strip_doi_hyperlinks_in_bibliography(
@@ -350,6 +362,7 @@ def strip_doi_hyperlinks_in_bibliography(
 
 __all__ = [
     "fix_ref_dot_to_hyphen",
+    "fix_ref_dot_to_hyphen_pass",
     "collect_hyperlink_char_style_ids",
     "strip_hyperlink_run_style",
     "unwrap_selected_hyperlinks_in_node",
@@ -357,5 +370,6 @@ __all__ = [
     "collect_fig_table_ref_run_indexes",
     "strip_fig_table_ref_link_style_in_node",
     "strip_anchor_hyperlinks_in_main_body",
+    "strip_anchor_hyperlinks_in_main_body_pass",
     "strip_doi_hyperlinks_in_bibliography",
 ]
@@ -0,0 +1,316 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+DOCX → PDF 渲染服务 — 按内容摘要缓存渲染结果，供各校验阶段共享。
+
+空白页检测（verification/report_generator）与视觉审查（phase6_visual）原先各自
+启动一次 headless LibreOffice 转换同一份 DOCX，gate loop 每次重试又全部重来。
+本模块：
+
+- render_pdf       以 DOCX 内容 sha256 为键缓存 PDF（BuildCache 的 ``render`` 阶段）
+- pdf_artifact     以 PDF 内容 sha256 为键缓存由 PDF 派生的 JSON 数据
+                   （逐页文本、pdfplumber 行/词等，阶段名 ``render-<name>``）
+- 常驻监听进程     检测到 unoserver / unoconvert 时复用常驻 soffice 实例，
+                   避免每次转换的数秒启动开销；否则回退为一次性 soffice 调用。
+                   本进程启动的 unoserver 在进程退出时（atexit）终止；端口已被占用时
+                   先以 XML-RPC 探测确认对方是 unoserver，否则不使用监听进程
+
+同一进程内的重复请求直接命中内存表，不再读盘。
+
+环境变量：
+- SWUN_BUILD_CACHE / SWUN_BUILD_CACHE_DIR   与构建缓存相同（关闭 / 覆盖目录）
+- SWUN_RENDER_LISTENER=0                    不使用常驻监听进程
+- SWUN_RENDER_LISTENER_PORT=<port>          监听端口（默认 2003；被其他服务占用时改用空闲端口）
+"""
+
+from __future__ import annotations
+
+import atexit
+import json
+import os
+import shutil
+import socket
+import subprocess
+import time
+import xmlrpc.client
+from pathlib import Path
+from typing import Any, Callable
+
+try:
+    from modules.build_cache import BuildCache, digest_parts
+except ModuleNotFoundError:  # pragma: no cover - pytest imports via scripts.modules
+    from scripts.modules.build_cache import BuildCache, digest_parts
+
+
+# 渲染方式或派生数据格式变化时递增，使旧缓存失效
+RENDER_CACHE_VERSION = "1"
+RENDER_STAGE = "render"
+
+LISTENER_ENV = "SWUN_RENDER_LISTENER"
+LISTENER_PORT_ENV = "SWUN_RENDER_LISTENER_PORT"
+DEFAULT_LISTENER_PORT = 2003
+LISTENER_START_TIMEOUT = 30.0
+LISTENER_STOP_TIMEOUT = 10.0
+LISTENER_PROBE_TIMEOUT = 2.0
+
+# (阶段, 键) -> PDF 路径 / 派生数据
+_MEMO: dict[tuple[str, str], Any] = {}
+
+# 本进程启动的监听进程；已确认不是 unoserver 的端口
+_LISTENER: subprocess.Popen | None = None
+_FOREIGN_PORTS: set[int] = set()
+
+
+def file_digest(path: str | Path) -> str:
+    """文件内容摘要（含缓存版本号）。"""
+    return digest_parts(RENDER_CACHE_VERSION, Path(path).read_bytes())
+
+
+# ---------------------------------------------------------------------------
+# 转换后端
+# ---------------------------------------------------------------------------
+
+def _listener_port() -> int:
+    try:
+        return int(os.environ.get(LISTENER_PORT_ENV, DEFAULT_LISTENER_PORT))
+    except ValueError:
+        return DEFAULT_LISTENER_PORT
+
+
+def _port_open(port: int) -> bool:
+    try:
+        with socket.create_connection(("127.0.0.1", port), timeout=0.5):
+            return True
+    except OSError:
+        return False
+
+
+class _ProbeTransport(xmlrpc.client.Transport):
+    def make_connection(self, host):
+        conn = super().make_connection(host)
+        conn.timeout = LISTENER_PROBE_TIMEOUT
+        return conn
+
+
+def _is_unoserver(port: int) -> bool:
+    """端口上是否为 unoserver（XML-RPC 服务；Fault 说明服务存在但不支持 info）。"""
+    proxy = xmlrpc.client.ServerProxy(
+        f"http://127.0.0.1:{port}", transport=_ProbeTransport())
+    try:
+        proxy.info()
+    except xmlrpc.client.Fault:
+        return True
+    except (OSError, xmlrpc.client.Error, ValueError):
+        return False
+    return True
+
+
+def stop_listener() -> None:
+    """终止本进程启动的监听进程（已注册为 atexit）；其他进程启动的实例不受影响。"""
+    global _LISTENER  # noqa: PLW0603
+    proc, _LISTENER = _LISTENER, None
+    if proc is None or proc.poll() is not None:
+        return
+    proc.terminate()
+    try:
+        proc.wait(timeout=LISTENER_STOP_TIMEOUT)
+    except subprocess.TimeoutExpired:
+        proc.kill()
+        proc.wait()
+
+
+def ensure_listener() -> int | None:
+    """确保常驻 unoserver 监听进程可用，返回端口；不可用时返回 None。
+
+    端口上已有 unoserver 时直接复用（不负责其生命周期）；端口被其他服务占用时
+    返回 None 并提示改用 SWUN_RENDER_LISTENER_PORT。否则启动一个监听进程，
+    由本进程在退出时终止：gate loop 的多次重试共享同一实例。
+    """
+    global _LISTENER  # noqa: PLW0603
+    if os.environ.get(LISTENER_ENV, "1").strip().lower() in {"0", "false", "no", "off"}:
+        return None
+    server_bin = shutil.which("unoserver")
+    if not server_bin or not shutil.which("unoconvert"):
+        return None
+    port = _listener_port()
+    if port in _FOREIGN_PORTS:
+        return None
+    if _port_open(port):
+        if (_LISTENER is not None and _LISTENER.poll() is None) or _is_unoserver(port):
+            return port
+        _FOREIGN_PORTS.add(port)
+        print(f"  [render] port {port} is used by another service; "
+              f"set {LISTENER_PORT_ENV} to a free port (using one-shot soffice)")
+        return None
+    try:
+        # 独立会话：终端的 Ctrl-C 不会在转换中途打断监听进程，退出时由 stop_listener 终止
+        proc = subprocess.Popen(
+            [server_bin, "--interface", "127.0.0.1", "--port", str(port)],
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            start_new_session=True,
+        )
+    except OSError:
+        return None
+    stop_listener()
+    _LISTENER = proc
+    atexit.unregister(stop_listener)
+    atexit.register(stop_listener)
+    deadline = time.monotonic() + LISTENER_START_TIMEOUT
+    while time.monotonic() < deadline and proc.poll() is None:
+        if _port_open(port):
+            print(f"  [render] started soffice listener on port {port}")
+            return port
+        time.sleep(0.25)
+    stop_listener()
+    return None
+
+
+def _convert_via_listener(docx_path: Path, pdf_path: Path, port: int) -> bool:
+    try:
+        result = subprocess.run(
+            [
+                shutil.which("unoconvert") or "unoconvert",
+                "--host", "127.0.0.1",
+                "--port", str(port),
+                "--convert-to", "pdf",
+                str(docx_path),
+                str(pdf_path),
+            ],
+            capture_output=True,
+            text=True,
+            timeout=120,
+            check=False,
+        )
+    except (subprocess.TimeoutExpired, FileNotFoundError):
+        return False
+    return result.returncode == 0 and pdf_path.is_file()
+
+
+def _convert_via_soffice(docx_path: Path, pdf_path: Path) -> bool:
+    office_bin = shutil.which("soffice") or shutil.which("libreoffice")
+    if not office_bin:
+        return False
+    try:
+        result = subprocess.run(
+            [
+                office_bin,
+                "--headless",
+                "--convert-to",
+                "pdf",
+                "--outdir",
+                str(pdf_path.parent),
+                str(docx_path),
+            ],
+            capture_output=True,
+            text=True,
+            timeout=120,
+            check=False,
+        )
+    except (subprocess.TimeoutExpired, FileNotFoundError):
+        return False
+    produced = pdf_path.parent / f"{docx_path.stem}.pdf"
+    if result.returncode != 0 or not produced.is_file():
+        return False
+    if produced != pdf_path:
+        produced.replace(pdf_path)
+    return True
+
+
+def convert_docx(docx_path: str | Path, pdf_path: str | Path) -> bool:
+    """不经缓存转换 DOCX 为 pdf_path；优先常驻监听进程，失败时回退 soffice。"""
+    docx_path, pdf_path = Path(docx_path), Path(pdf_path)
+    pdf_path.parent.mkdir(parents=True, exist_ok=True)
+    port = ensure_listener()
+    if port is not None and _convert_via_listener(docx_path, pdf_path, port):
+        return True
+    return _convert_via_soffice(docx_path, pdf_path)
+
+
+# ---------------------------------------------------------------------------
+# 缓存
+# ---------------------------------------------------------------------------
+
+def _cache_for(anchor: Path, cache: BuildCache | None) -> BuildCache:
+    return cache if cache is not None else BuildCache.for_thesis(anchor)
+
+
+def render_pdf(
+    docx_path: str | Path, output_dir: str | Path, cache: BuildCache | None = None
+) -> str | None:
+    """返回 output_dir/<docx 名>.pdf；DOCX 内容未变时直接复用缓存的 PDF。
+
+    cache 默认为 DOCX 所在目录（论文目录）的 BuildCache。
+    """
+    docx_path = Path(docx_path)
+    if not docx_path.is_file():
+        return None
+    dest = Path(output_dir) / f"{docx_path.stem}.pdf"
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    key = file_digest(docx_path)
+
+    memo = _MEMO.get((RENDER_STAGE, key))
+    if memo is not None and Path(memo).is_file():
+        if Path(memo) != dest:
+            shutil.copyfile(memo, dest)
+        return str(dest)
+
+    build_cache = _cache_for(docx_path.parent, cache)
+    if not build_cache.fetch(RENDER_STAGE, key, dest, suffix=".pdf"):
+        if not convert_docx(docx_path, dest):
+            return None
+        build_cache.store(RENDER_STAGE, key, dest, suffix=".pdf")
+    _MEMO[(RENDER_STAGE, key)] = str(dest)
+    return str(dest)
+
+
+def pdf_artifact(
+    pdf_path: str | Path,
+    name: str,
+    compute: Callable[[str], Any],
+    cache_anchor: str | Path,
+    cache: BuildCache | None = None,
+) -> Any:
+    """返回 compute(pdf_path) 的结果，按 PDF 内容缓存为 JSON。
+
+    cache_anchor 为缓存所在的论文目录（PDF 可能位于临时目录）；
+    compute 的返回值必须可 JSON 序列化，缓存命中时返回反序列化结果；
+    返回 None 表示提取失败（外部工具缺失/超时），不写入缓存。
+    """
+    stage = f"{RENDER_STAGE}-{name}"
+    key = file_digest(pdf_path)
+    if (stage, key) in _MEMO:
+        return _MEMO[(stage, key)]
+
+    build_cache = _cache_for(Path(cache_anchor), cache)
+    text = build_cache.fetch_text(stage, key, suffix=".json")
+    if text is not None:
+        value = json.loads(text)
+    else:
+        value = compute(str(pdf_path))
+        if value is None:
+            return None
+        build_cache.store_text(stage, key, json.dumps(value, ensure_ascii=False), suffix=".json")
+    _MEMO[(stage, key)] = value
+    return value
+
+
+def clear_memo() -> None:
+    """清空进程内缓存表（测试用）。"""
+    _MEMO.clear()
+
+
+__all__ = [
+    "RENDER_CACHE_VERSION",
+    "RENDER_STAGE",
+    "LISTENER_ENV",
+    "LISTENER_PORT_ENV",
+    "file_digest",
+    "ensure_listener",
+    "stop_listener",
+    "convert_docx",
+    "render_pdf",
+    "pdf_artifact",
+    "clear_memo",
+]
@@ -34,6 +34,23 @@ except ModuleNotFoundError:  # pragma: no cover - pytest imports via scripts.mod
         set_paragraph_text as _set_paragraph_text,
     )
 
+try:
+    from modules.pass_engine import (
+        REGION_MAIN,
+        REGION_BIBLIOGRAPHY,
+        MAIN_BODY_EXCLUDED_H1,
+        VisitorPass,
+        run_visitor_passes,
+    )
+except ModuleNotFoundError:  # pragma: no cover - pytest imports via scripts.modules
+    from scripts.modules.pass_engine import (
+        REGION_MAIN,
+        REGION_BIBLIOGRAPHY,
+        MAIN_BODY_EXCLUDED_H1,
+        VisitorPass,
+        run_visitor_passes,
+    )
+
 # ---------------------------------------------------------------------------
 # 标题多级编号常量
 # ---------------------------------------------------------------------------
@@ -82,9 +99,8 @@ _HEADING_ABSTRACT_NUM_ID = "88880"
 # 缩进
 # ---------------------------------------------------------------------------
 
-def ensure_indent_for_body_paragraphs(
-    ns: dict[str, str], body: ET.Element) -> None:
-    """为正文段落添加首行缩进，为二三级标题设置左对齐（清除编号缩进）。"""
+def ensure_indent_for_body_paragraphs_pass(ns: dict[str, str]) -> VisitorPass:
+    """构造正文首行缩进 / 二三级标题左对齐的访问者 pass（顶层段落）。"""
     w_p = _qn(ns, "w", "p")
     w_ind = _qn(ns, "w", "ind")
     w_firstLineChars = _qn(ns, "w", "firstLineChars")
@@ -114,9 +130,10 @@ def ensure_indent_for_body_paragraphs(
 
     prev_sig: ET.Element | None = None
 
-    for child in list(body):
+    def visit(child: ET.Element) -> None:
+        nonlocal prev_sig
         if child.tag != w_p:
-            continue
+            return
         style = _p_style(ns, child)
         if style in body_styles:
             pPr = _ensure_ppr(ns, child)
@@ -125,11 +142,11 @@ def ensure_indent_for_body_paragraphs(
             # (they have explicit firstLine="0")
             if ind is not None and ind.get(w_firstLine) == "0":
                 prev_sig = child
-                continue
+                return
             if prev_sig is not None and is_display_math_para(prev_sig):
                 _clear_para_first_indent(ns, child)
                 prev_sig = child
-                continue
+                return
             if ind is None:
                 ind = ET.SubElement(pPr, w_ind)
             # Keep other indentation attributes intact; only enforce first-line
@@ -148,37 +165,29 @@ def ensure_indent_for_body_paragraphs(
 
         prev_sig = child
 
+    return VisitorPass("ensure_indent_for_body_paragraphs", "block", visit)
 
-def ensure_hanging_indent_for_bibliography(
+
+def ensure_indent_for_body_paragraphs(
     ns: dict[str, str], body: ET.Element) -> None:
-    """为参考文献条目添加悬挂缩进（GB/T 数字序号格式）。"""
+    """为正文段落添加首行缩进，为二三级标题设置左对齐（清除编号缩进）。"""
+    run_visitor_passes(ns, body, [ensure_indent_for_body_paragraphs_pass(ns)])
+
+
+def ensure_hanging_indent_for_bibliography_pass(
+    ns: dict[str, str]) -> VisitorPass:
+    """构造参考文献条目悬挂缩进的访问者 pass（仅参考文献区域的顶层段落）。"""
     w_p = _qn(ns, "w", "p")
     w_ind = _qn(ns, "w", "ind")
     w_hangingChars = _qn(ns, "w", "hangingChars")
 
-    children = list(body)
-    ref_idx = None
-    for i, el in enumerate(children):
-        if el.tag != w_p:
-            continue
-        if _p_text(ns, el).strip() == "参考文献":
-            ref_idx = i
-            break
-    if ref_idx is None:
-        return
-
     # Typical GB/T numeric entries start with "[1]" (ASCII) or "［1］"
     # (fullwidth).
     bib_entry_re = re.compile(r"^(\[[0-9]{1,4}\]|［[0-9]{1,4}］)")
-    i = ref_idx + 1
-    while i < len(children):
-        el = children[i]
+
+    def visit(el: ET.Element) -> None:
         if el.tag != w_p:
-            i += 1
-            continue
-        style = _p_style(ns, el)
-        if style == "1" and _p_text(ns, el).strip() not in {"参考文献"}:
-            break
+            return
         txt = _p_text(ns, el).strip()
         if bib_entry_re.match(txt):
             pPr = _ensure_ppr(ns, el)
@@ -186,7 +195,19 @@ def ensure_hanging_indent_for_bibliography(
             if ind is None:
                 ind = ET.SubElement(pPr, w_ind)
             ind.set(w_hangingChars, "200")
-        i += 1
+
+    return VisitorPass(
+        "ensure_hanging_indent_for_bibliography",
+        "block",
+        visit,
+        regions=frozenset({REGION_BIBLIOGRAPHY}),
+    )
+
+
+def ensure_hanging_indent_for_bibliography(
+    ns: dict[str, str], body: ET.Element) -> None:
+    """为参考文献条目添加悬挂缩进（GB/T 数字序号格式）。"""
+    run_visitor_passes(ns, body, [ensure_hanging_indent_for_bibliography_pass(ns)])
 
 
 # ---------------------------------------------------------------------------
@@ -345,11 +366,11 @@ def collect_style_ids(styles_xml: bytes) -> set[str]:
     return out
 
 
-def normalize_unknown_pstyles(
-    ns: dict[str, str], body: ET.Element, known_styles: set[str]
-) -> None:
-    """将引用了不存在样式的段落映射回 Normal ('a')。"""
-    w_p = _qn(ns, "w", "p")
+def normalize_unknown_pstyles_pass(
+    ns: dict[str, str], known_styles: set[str]
+) -> VisitorPass:
+    """构造未知段落样式回退到 Normal ('a') 的访问者 pass。"""
+    w_pPr = _qn(ns, "w", "pPr")
     w_pStyle = _qn(ns, "w", "pStyle")
     w_val = _qn(ns, "w", "val")
 
@@ -367,21 +388,30 @@ def normalize_unknown_pstyles(
         "Caption",
     }
 
-    for p in body.iter(w_p):
-        pPr = p.find(_qn(ns, "w", "pPr"))
+    def visit(p: ET.Element) -> None:
+        pPr = p.find(w_pPr)
         if pPr is None:
-            continue
+            return
         ps = pPr.find(w_pStyle)
         if ps is None:
-            continue
+            return
         val = ps.get(w_val)
         if not val:
-            continue
+            return
         if val in known_styles:
-            continue
+            return
         if val in candidates:
             ps.set(w_val, "a")
 
+    return VisitorPass("normalize_unknown_pstyles", "p", visit)
+
+
+def normalize_unknown_pstyles(
+    ns: dict[str, str], body: ET.Element, known_styles: set[str]
+) -> None:
+    """将引用了不存在样式的段落映射回 Normal ('a')。"""
+    run_visitor_passes(ns, body, [normalize_unknown_pstyles_pass(ns, known_styles)])
+
 
 # ---------------------------------------------------------------------------
 # 编号
@@ -633,50 +663,42 @@ def bind_heading_styles_to_numbering(styles_xml: bytes) -> bytes:
     return ET.tostring(sroot, encoding="utf-8", xml_declaration=True)
 
 
-def number_paragraph_headings_in_main_body(
-    ns: dict[str, str], body: ET.Element) -> int:
-    """为正文中的 Heading5 标题写入显式 (n) 前缀，并降级为正文样式。"""
+def number_paragraph_headings_in_main_body_pass(
+    ns: dict[str, str]) -> VisitorPass:
+    """构造正文 Heading5 编号的访问者 pass（仅正文区域的顶层段落），结果为改写数。"""
     w_p = _qn(ns, "w", "p")
-    excluded_h1 = {"目录", "摘要", "Abstract", "致谢", "参考文献", "攻读硕士学位期间所取得的相关科研成果"}
-    stop_h1 = {"参考文献", "致谢", "攻读硕士学位期间所取得的相关科研成果"}
 
     prefix_re = re.compile(r"^\s*[（(]\d+[)）]\s*")
 
-    in_main_body = False
     seq = 0
     touched = 0
 
-    for el in list(body):
+    def visit(el: ET.Element) -> None:
+        nonlocal seq, touched
         if el.tag != w_p:
-            continue
+            return
 
         style = _p_style(ns, el)
         txt = _p_text(ns, el).strip()
 
         if style == "1":
-            if txt in stop_h1:
-                in_main_body = False
-                seq = 0
-            elif txt and txt not in excluded_h1:
-                in_main_body = True
+            # 区域划分由引擎完成；正文内的章标题只负责重置序号。
+            if txt and txt not in MAIN_BODY_EXCLUDED_H1:
                 seq = 0
-            continue
-
-        if not in_main_body:
-            continue
+            return
 
         if style in {"Heading2", "2", "Heading3", "3"}:
             seq = 0
-            continue
+            return
 
         if style not in {"Heading5", "5"}:
-            continue
+            return
         if not txt:
-            continue
+            return
 
         base = prefix_re.sub("", txt).strip()
         if not base:
-            continue
+            return
         seq += 1
         _set_paragraph_text(ns, el, f"({seq}) {base}")
         # Demote from Heading5 to Normal body text style so the paragraph
@@ -688,24 +710,35 @@ def number_paragraph_headings_in_main_body(
                 ps.set(_qn(ns, "w", "val"), "a")
         touched += 1
 
-    return touched
+    return VisitorPass(
+        "number_paragraph_headings_in_main_body",
+        "block",
+        visit,
+        regions=frozenset({REGION_MAIN}),
+        finish=lambda: touched,
+    )
+
+
+def number_paragraph_headings_in_main_body(
+    ns: dict[str, str], body: ET.Element) -> int:
+    """为正文中的 Heading5 标题写入显式 (n) 前缀，并降级为正文样式。"""
+    p = number_paragraph_headings_in_main_body_pass(ns)
+    return run_visitor_passes(ns, body, [p])[p.name]
 
 
 # ---------------------------------------------------------------------------
 # 后处理
 # ---------------------------------------------------------------------------
 
-def strip_numbering_from_backmatter_headings(
-    ns: dict[str, str], body: ET.Element
-) -> None:
-    """为后置章节（致谢、参考文献等）的 Heading1 添加 numId=0，抑制章节编号。"""
+def strip_numbering_from_backmatter_headings_pass(
+    ns: dict[str, str]) -> VisitorPass:
+    """构造后置章节 Heading1 禁用编号的访问者 pass。"""
     excluded_titles: set[str] = {
         "致谢",
         "参考文献",
         "攻读硕士学位期间所取得的相关科研成果",
     }
 
-    w_p = _qn(ns, "w", "p")
     w_pPr = _qn(ns, "w", "pPr")
     w_pStyle = _qn(ns, "w", "pStyle")
     w_val = _qn(ns, "w", "val")
@@ -713,19 +746,20 @@ def strip_numbering_from_backmatter_headings(
     w_numId = _qn(ns, "w", "numId")
 
     fixed: list[str] = []
-    for p in body.iter(w_p):
+
+    def visit(p: ET.Element) -> None:
         pPr = p.find(w_pPr)
         if pPr is None:
-            continue
+            return
         ps = pPr.find(w_pStyle)
         if ps is None:
-            continue
+            return
         if ps.get(w_val) != "1":  # Heading 1 styleId is "1"
-            continue
+            return
 
         text = _p_text(ns, p).strip()
         if text not in excluded_titles:
-            continue
+            return
 
         # Ensure numPr exists with numId=0 to override style-level numbering
         numPr = pPr.find(w_numPr)
@@ -738,26 +772,47 @@ def strip_numbering_from_backmatter_headings(
             numId.set(w_val, "0")
             fixed.append(text)
 
-    if fixed:
-        for title in fixed:
-            print(f"  [backmatter] Disabled numbering for: {title!r}")
-    else:
-        print("  [backmatter] Backmatter headings already have numbering disabled")
+    def finish() -> None:
+        if fixed:
+            for title in fixed:
+                print(f"  [backmatter] Disabled numbering for: {title!r}")
+        else:
+            print("  [backmatter] Backmatter headings already have numbering disabled")
 
+    return VisitorPass(
+        "strip_numbering_from_backmatter_headings", "p", visit, finish=finish)
 
-def remove_docgrid_lines_type(ns: dict[str, str], body: ET.Element) -> None:
-    """删除所有 sectPr 中 docGrid 的 type='lines'，防止行间距膨胀。"""
-    w_sectPr = _qn(ns, "w", "sectPr")
+
+def strip_numbering_from_backmatter_headings(
+    ns: dict[str, str], body: ET.Element
+) -> None:
+    """为后置章节（致谢、参考文献等）的 Heading1 添加 numId=0，抑制章节编号。"""
+    run_visitor_passes(ns, body, [strip_numbering_from_backmatter_headings_pass(ns)])
+
+
+def remove_docgrid_lines_type_pass(ns: dict[str, str]) -> VisitorPass:
+    """构造删除 docGrid type='lines' 的访问者 pass（所有 sectPr）。"""
     w_docGrid = _qn(ns, "w", "docGrid")
     w_type = _qn(ns, "w", "type")
     count = 0
-    for sp in body.iter(w_sectPr):
+
+    def visit(sp: ET.Element) -> None:
+        nonlocal count
         grid = sp.find(w_docGrid)
         if grid is not None and w_type in grid.attrib:
             del grid.attrib[w_type]
             count += 1
-    if count:
-        print(f"  [docGrid] Removed type='lines' from {count} section(s)")
+
+    def finish() -> None:
+        if count:
+            print(f"  [docGrid] Removed type='lines' from {count} section(s)")
+
+    return VisitorPass("remove_docgrid_lines_type", "sectPr", visit, finish=finish)
+
+
+def remove_docgrid_lines_type(ns: dict[str, str], body: ET.Element) -> None:
+    """删除所有 sectPr 中 docGrid 的 type='lines'，防止行间距膨胀。"""
+    run_visitor_passes(ns, body, [remove_docgrid_lines_type_pass(ns)])
 
 
 # ---------------------------------------------------------------------------
@@ -775,6 +830,12 @@ _bind_heading_styles_to_numbering = bind_heading_styles_to_numbering
 _number_paragraph_headings_in_main_body = number_paragraph_headings_in_main_body
 _strip_numbering_from_backmatter_headings = strip_numbering_from_backmatter_headings
 _remove_docgrid_lines_type = remove_docgrid_lines_type
+_ensure_indent_for_body_paragraphs_pass = ensure_indent_for_body_paragraphs_pass
+_ensure_hanging_indent_for_bibliography_pass = ensure_hanging_indent_for_bibliography_pass
+_normalize_unknown_pstyles_pass = normalize_unknown_pstyles_pass
+_number_paragraph_headings_in_main_body_pass = number_paragraph_headings_in_main_body_pass
+_strip_numbering_from_backmatter_headings_pass = strip_numbering_from_backmatter_headings_pass
+_remove_docgrid_lines_type_pass = remove_docgrid_lines_type_pass
 
 
 __all__ = [
@@ -791,6 +852,13 @@ __all__ = [
     "number_paragraph_headings_in_main_body",
     "strip_numbering_from_backmatter_headings",
     "remove_docgrid_lines_type",
+    # 单遍访问者 pass 工厂
+    "ensure_indent_for_body_paragraphs_pass",
+    "ensure_hanging_indent_for_bibliography_pass",
+    "normalize_unknown_pstyles_pass",
+    "number_paragraph_headings_in_main_body_pass",
+    "strip_numbering_from_backmatter_headings_pass",
+    "remove_docgrid_lines_type_pass",
     # 常量（供外部模块引用）
     "_HEADING_NUM_ID",
     "_HEADING_ABSTRACT_NUM_ID",
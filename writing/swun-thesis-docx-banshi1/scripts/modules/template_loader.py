@@ -5,11 +5,12 @@
 
 从 docx_builder.py 提取的公共 API：
 - prepend_template_cover_pages      封面页插入
+- load_template_cover_elements      模板封面元素片段（按模板内容缓存）
 - insert_abstract_chapters_and_sections  摘要章节与分节符
 - insert_abstract_keywords          关键词行插入
 - insert_toc_before_first_chapter   目录字段插入
 - add_page_breaks_before_h1         各章节前分页
-- ensure_update_fields_in_settings  settings.xml 自动更新 TOC
+- ensure_update_fields_in_settings  settings.xml 自动更新 TOC（_root 版本就地修改已解析树）
 - split_keywords                    关键词切分辅助
 """
 
@@ -64,6 +65,23 @@ except ModuleNotFoundError:  # pragma: no cover
         register_ns,
     )
 
+try:
+    from modules.pass_engine import VisitorPass, run_visitor_passes
+except ModuleNotFoundError:  # pragma: no cover
+    from scripts.modules.pass_engine import VisitorPass, run_visitor_passes
+
+try:
+    from modules.body_index import BodyIndex
+except ModuleNotFoundError:  # pragma: no cover
+    from scripts.modules.body_index import BodyIndex
+
+try:
+    from modules.asset_cache import cached_asset
+    from modules.build_cache import BuildCache
+except ModuleNotFoundError:  # pragma: no cover
+    from scripts.modules.asset_cache import cached_asset
+    from scripts.modules.build_cache import BuildCache
+
 
 # ====================  关键词切分  ====================
 
@@ -135,6 +153,91 @@ def split_keywords(raw: str, max_groups: int = 4, lang: str = "cn") -> str:
 
 # ====================  封面  ====================
 
+# 模板封面截止行："日期：  年  月  日"（SWUN 模板第三页起始行）
+_COVER_DATE_LINE_RE = re.compile(r"^日期：[\s\u3000]*年[\s\u3000]*月[\s\u3000]*日$")
+
+
+def extract_template_cover_elements(
+    template_docx: Path,
+    *,
+    end_before_text: str = "学位论文版权使用授权书",
+) -> tuple[dict[str, str], list[ET.Element]] | None:
+    """
+    解析模板 docx，返回 (模板命名空间, 封面元素列表)；找不到截止行时返回 None。
+
+    截止策略：找到"日期：…年…月…日"行或 end_before_text 行为止。
+    """
+    with zipfile.ZipFile(template_docx, "r") as zt:
+        t_doc_xml = zt.read("word/document.xml")
+    t_ns = collect_ns(t_doc_xml)
+    if "w" not in t_ns:
+        return None
+    register_ns(t_ns)
+
+    t_root = ET.fromstring(t_doc_xml)
+    t_body = t_root.find(qn(t_ns, "w", "body"))
+    if t_body is None:
+        return None
+
+    t_children = list(t_body)
+    cutoff = None
+    w_p = qn(t_ns, "w", "p")
+    for i, el in enumerate(t_children):
+        if el.tag != w_p:
+            continue
+        txt = p_text(t_ns, el).strip()
+        # 优先按日期行截断
+        if _COVER_DATE_LINE_RE.match(txt):
+            cutoff = i
+            break
+        if end_before_text in txt:
+            cutoff = i
+            break
+    if cutoff is None or cutoff <= 0:
+        return None
+    return t_ns, t_children[:cutoff]
+
+
+def _dump_cover(cover: tuple[dict[str, str], list[ET.Element]] | None) -> dict | None:
+    if cover is None:
+        return None
+    t_ns, elements = cover
+    return {
+        "ns": t_ns,
+        "elements": [ET.tostring(el, encoding="unicode") for el in elements],
+    }
+
+
+def _load_cover(data: dict | None) -> tuple[dict[str, str], list[ET.Element]] | None:
+    if data is None:
+        return None
+    return dict(data["ns"]), [ET.fromstring(x) for x in data["elements"]]
+
+
+def load_template_cover_elements(
+    template_docx: Path,
+    *,
+    end_before_text: str = "学位论文版权使用授权书",
+    cache: BuildCache | None = None,
+) -> tuple[dict[str, str], list[ET.Element]] | None:
+    """
+    extract_template_cover_elements 的缓存版本（资产名 ``cover``）。
+
+    模板未变化时由缓存的元素 XML 片段还原，不再解析整篇模板 document.xml；
+    返回的元素为共享对象，插入前须 deepcopy。
+    """
+    return cached_asset(
+        "cover",
+        [template_docx],
+        lambda: extract_template_cover_elements(
+            template_docx, end_before_text=end_before_text),
+        dump=_dump_cover,
+        load=_load_cover,
+        params=end_before_text,
+        cache=cache,
+    )
+
+
 def prepend_template_cover_pages(
     ns: dict[str, str],
     body: ET.Element,
@@ -142,12 +245,14 @@ def prepend_template_cover_pages(
     *,
     marker_text: str = "研究生学位论文排版格式（版式1）",
     end_before_text: str = "学位论文版权使用授权书",
+    cache: BuildCache | None = None,
 ) -> None:
     """
     从官方模板 docx 中将封面页（前两页）原样插入到正文开头。
 
     幂等性：若前 80 个元素中已出现 marker_text，则跳过。
-    截止策略：找到"日期：…年…月…日"行或 end_before_text 行为止。
+    截止策略见 extract_template_cover_elements；传入 cache 时封面元素片段
+    按模板内容缓存（见 load_template_cover_elements）。
     """
     w_p = qn(ns, "w", "p")
 
@@ -164,38 +269,17 @@ def prepend_template_cover_pages(
     if not template_docx.exists():
         return
 
-    with zipfile.ZipFile(template_docx, "r") as zt:
-        t_doc_xml = zt.read("word/document.xml")
-    t_ns = collect_ns(t_doc_xml)
-    if "w" not in t_ns:
+    cover = load_template_cover_elements(
+        template_docx, end_before_text=end_before_text, cache=cache)
+    if cover is None:
         return
+    t_ns, t_elements = cover
+    # 缓存命中时未经过模板解析，仍需登记模板命名空间前缀
     register_ns(t_ns)
 
-    t_root = ET.fromstring(t_doc_xml)
-    t_body = t_root.find(qn(t_ns, "w", "body"))
-    if t_body is None:
-        return
-
-    t_children = list(t_body)
-    cutoff = None
-    # 优先按"日期：  年  月  日"行截断（SWUN 模板第三页起始行）
-    date_line_re = re.compile(r"^日期：[\s\u3000]*年[\s\u3000]*月[\s\u3000]*日$")
-    for i, el in enumerate(t_children):
-        if el.tag != qn(t_ns, "w", "p"):
-            continue
-        txt = p_text(t_ns, el).strip()
-        if date_line_re.match(txt):
-            cutoff = i
-            break
-        if end_before_text in txt:
-            cutoff = i
-            break
-    if cutoff is None or cutoff <= 0:
-        return
-
     # 将模板封面元素插入到正文开头
     insert_at = 0
-    for el in t_children[:cutoff]:
+    for el in t_elements:
         body.insert(insert_at, copy.deepcopy(el))
         insert_at += 1
 
@@ -265,7 +349,10 @@ def strip_template_body_leak_after_front_matter(
 # ====================  摘要章节与分节符  ====================
 
 def insert_abstract_chapters_and_sections(
-    ns: dict[str, str], body: ET.Element, sectPr_proto: ET.Element
+    ns: dict[str, str],
+    body: ET.Element,
+    sectPr_proto: ET.Element,
+    index: BodyIndex | None = None,
 ) -> None:
     """
     要求：
@@ -277,8 +364,10 @@ def insert_abstract_chapters_and_sections(
     - 将"摘要"和"Abstract"作为无编号 Heading 1 插入。
     - 在英文摘要后插入分节符，结束第 2 节，pgNumType=lowerRoman start=1。
     - 最终节（正文）使用 decimal start=1。
+
+    index 为共享的 BodyIndex（省略时临时构建）；所有插入都经由索引完成。
     """
-    w_p = qn(ns, "w", "p")
+    idx = index if index is not None else BodyIndex(ns, body)
 
     cn_anchors = (
         "在车联网（V2X）环境中",
@@ -298,51 +387,21 @@ def insert_abstract_chapters_and_sections(
     )
     front_h1 = {"摘要", "Abstract", "目录"}
 
-    def find_heading_idx(title: str, start: int = 0) -> int | None:
-        children = list(body)
-        for i in range(start, len(children)):
-            el = children[i]
-            if el.tag != w_p:
-                continue
-            if p_style(ns, el) == "1" and p_text(ns, el).strip() == title:
-                return i
-        return None
+    find_heading_idx = idx.find_h1
+    first_nonempty_para = idx.first_nonempty_para
 
     def find_first_main_h1(start: int = 0) -> int | None:
-        children = list(body)
-        for i in range(start, len(children)):
-            el = children[i]
-            if el.tag != w_p:
-                continue
-            if p_style(ns, el) != "1":
-                continue
-            txt = p_text(ns, el).strip()
-            if txt and txt not in front_h1:
-                return i
-        return None
-
-    def first_nonempty_para(start: int, end: int | None = None) -> int | None:
-        children = list(body)
-        lim = len(children) if end is None else min(end, len(children))
-        for i in range(start, lim):
-            el = children[i]
-            if el.tag != w_p:
-                continue
-            if p_text(ns, el).strip():
-                return i
-        return None
+        return idx.first_h1_not_in(front_h1, start)
 
     def find_anchor_para(
         anchors: tuple[str, ...], start: int = 0, end: int | None = None
     ) -> int | None:
-        children = list(body)
-        lim = len(children) if end is None else min(end, len(children))
+        lim = len(idx) if end is None else min(end, len(idx))
         anchors_l = tuple(a.lower() for a in anchors)
         for i in range(start, lim):
-            el = children[i]
-            if el.tag != w_p:
+            if not idx.is_p(i):
                 continue
-            txt = p_text(ns, el)
+            txt = idx.text(i)
             if not txt:
                 continue
             txt_l = txt.lower()
@@ -354,29 +413,25 @@ def insert_abstract_chapters_and_sections(
         # 模板封面页（专业学位硕士学位论文封面 + 原创性声明）使用的段落样式集合
         # 这些样式不属于摘要正文，必须跳过，否则回退逻辑会错误定位到封面文字
         _cover_styles = {"12"}
-        children = list(body)
-        for i in range(start, min(end, len(children))):
-            el = children[i]
-            if el.tag != w_p:
+        for i in range(start, min(end, len(idx))):
+            if not idx.is_p(i):
                 continue
-            if p_style(ns, el) == "1":
+            if idx.style(i) == "1":
                 continue
-            if p_style(ns, el) in _cover_styles:
+            if idx.style(i) in _cover_styles:
                 continue
-            txt = p_text(ns, el).strip()
+            txt = idx.text(i).strip()
             if len(txt) >= 8 and re.search(r"[\u4e00-\u9fff]", txt):
                 return i
         return None
 
     def fallback_en_para(start: int, end: int) -> int | None:
-        children = list(body)
-        for i in range(start, min(end, len(children))):
-            el = children[i]
-            if el.tag != w_p:
+        for i in range(start, min(end, len(idx))):
+            if not idx.is_p(i):
                 continue
-            if p_style(ns, el) == "1":
+            if idx.style(i) == "1":
                 continue
-            txt = p_text(ns, el).strip()
+            txt = idx.text(i).strip()
             if not txt:
                 continue
             letters = len(re.findall(r"[A-Za-z]", txt))
@@ -384,10 +439,9 @@ def insert_abstract_chapters_and_sections(
                 return i
         return None
 
-    children = list(body)
     scan_end = find_first_main_h1(0)
     if scan_end is None:
-        scan_end = len(children)
+        scan_end = len(idx)
 
     # 定位中文摘要段落
     cn_idx = find_anchor_para(cn_anchors, 0, scan_end)
@@ -399,8 +453,7 @@ def insert_abstract_chapters_and_sections(
         # 回退：最后一个封面分节符后的第一段中文段落
         scan_start = 0
         for i in range(0, scan_end):
-            el = children[i]
-            if el.tag == w_p and p_has_sectPr(ns, el):
+            if idx.is_p(i) and idx.info(i).has_sectPr:
                 scan_start = i + 1
         cn_idx = fallback_cn_para(scan_start, scan_end)
     if cn_idx is None:
@@ -410,20 +463,18 @@ def insert_abstract_chapters_and_sections(
     if cn_idx > 0:
         j = cn_idx - 1
         while j >= 0:
-            prev = children[j]
-            if prev.tag != w_p:
+            if not idx.is_p(j):
                 j -= 1
                 continue
-            prev_txt = p_text(ns, prev).strip()
+            prev_txt = idx.text(j).strip()
             if not prev_txt:
                 j -= 1
                 continue
-            if p_style(ns, prev) == "1" and prev_txt == "摘要":
+            if idx.style(j) == "1" and prev_txt == "摘要":
                 cn_idx = j
             break
 
-    children = list(body)
-    remove_page_break_before(ns, children[cn_idx])
+    remove_page_break_before(ns, idx[cn_idx])
 
     # 定位英文摘要段落（在中文摘要之后查找）
     en_idx = find_anchor_para(en_anchors, cn_idx, scan_end)
@@ -435,8 +486,7 @@ def insert_abstract_chapters_and_sections(
         en_idx = fallback_en_para(cn_idx + 1, scan_end)
     if en_idx is None:
         return
-    children = list(body)
-    remove_page_break_before(ns, children[en_idx])
+    remove_page_break_before(ns, idx[en_idx])
 
     # 在中文摘要前插入分节符（结束封面节）
     sect1 = copy.deepcopy(sectPr_proto)
@@ -444,24 +494,22 @@ def insert_abstract_chapters_and_sections(
     set_sect_pgnum(ns, sect1, fmt="decimal", start=None)
     sb_before = make_section_break_paragraph(ns, sect1)
 
-    body.insert(cn_idx, sb_before)
-    children = list(body)
+    idx.insert(cn_idx, sb_before)
     has_cn_h_after = False
     j = cn_idx + 1
-    while j < len(children):
-        el = children[j]
-        if el.tag != w_p:
+    while j < len(idx):
+        if not idx.is_p(j):
             j += 1
             continue
-        txt = p_text(ns, el).strip()
+        txt = idx.text(j).strip()
         if not txt:
             j += 1
             continue
-        if p_style(ns, el) == "1" and txt == "摘要":
+        if idx.style(j) == "1" and txt == "摘要":
             has_cn_h_after = True
         break
     if not has_cn_h_after:
-        body.insert(cn_idx + 1, make_unnumbered_heading1(ns, "摘要"))
+        idx.insert(cn_idx + 1, make_unnumbered_heading1(ns, "摘要"))
 
     # 重新计算索引（插入后偏移已变）
     en_h2 = find_heading_idx("Abstract", cn_idx + 1)
@@ -471,7 +519,7 @@ def insert_abstract_chapters_and_sections(
             en_idx2 = fallback_en_para(cn_idx + 1, scan_end)
         if en_idx2 is None:
             return
-        body.insert(en_idx2, make_unnumbered_heading1(ns, "Abstract"))
+        idx.insert(en_idx2, make_unnumbered_heading1(ns, "Abstract"))
         en_h2 = en_idx2
 
     # 在英文摘要标题前插入分节符（结束中文摘要节 → lowerRoman 继续计数）
@@ -481,10 +529,10 @@ def insert_abstract_chapters_and_sections(
     set_sect_break_next_page(ns, sect_cn_end)
     set_sect_pgnum(ns, sect_cn_end, fmt="lowerRoman", start=None)
     sb_cn_end = make_section_break_paragraph(ns, sect_cn_end)
-    body.insert(en_h2, sb_cn_end)
+    idx.insert(en_h2, sb_cn_end)
 
     # 移除英文摘要标题上残留的 pageBreakBefore（已由分节符替代）
-    en_h2_el = list(body)[en_h2 + 1]  # +1：刚插入了分节符，索引偏移
+    en_h2_el = idx[en_h2 + 1]  # +1：刚插入了分节符，索引偏移
     w_pageBreakBefore = qn(ns, "w", "pageBreakBefore")
     pPr_en = ensure_ppr(ns, en_h2_el)
     pbf = pPr_en.find(w_pageBreakBefore)
@@ -506,7 +554,7 @@ def insert_abstract_chapters_and_sections(
     set_sect_break_next_page(ns, sect2)
     set_sect_pgnum(ns, sect2, fmt="lowerRoman", start=None)
     sb_after = make_section_break_paragraph(ns, sect2)
-    body.insert(break_idx, sb_after)
+    idx.insert(break_idx, sb_after)
 
 
 # ====================  关键词  ====================
@@ -516,29 +564,21 @@ def insert_abstract_keywords(
     body: ET.Element,
     cn_keywords: str | None,
     en_keywords: str | None,
+    index: BodyIndex | None = None,
 ) -> None:
     """
     在中英文摘要末尾各插入关键词行：
     - 空一行后插入关键词段落
     - 默认最多 4 组关键词
     """
-    w_p = qn(ns, "w", "p")
+    idx = index if index is not None else BodyIndex(ns, body)
 
     def _find_heading_idx(title: str) -> int | None:
-        for i, el in enumerate(list(body)):
-            if el.tag != w_p:
-                continue
-            if p_style(ns, el) == "1" and p_text(ns, el).strip() == title:
-                return i
-        return None
+        return idx.find_h1(title)
 
     def _already_has_kw(start: int, end: int, marker: str) -> bool:
-        children = list(body)
-        for i in range(start, min(end, len(children))):
-            el = children[i]
-            if el.tag != w_p:
-                continue
-            if marker in p_text(ns, el):
+        for i in range(start, min(end, len(idx))):
+            if idx.is_p(i) and marker in idx.text(i):
                 return True
         return False
 
@@ -551,10 +591,9 @@ def insert_abstract_keywords(
         blank = make_empty_para(ns, "a")
         if keep_with_prev:
             set_para_keep_next(ns, blank)
-        body.insert(after_idx + 1, blank)
-        body.insert(after_idx + 2, p)
+        idx.insert(after_idx + 1, blank)
+        idx.insert(after_idx + 2, p)
 
-    children = list(body)
     cn_h = _find_heading_idx("摘要")
     en_h = _find_heading_idx("Abstract")
     if cn_h is None or en_h is None or cn_h >= en_h:
@@ -565,12 +604,10 @@ def insert_abstract_keywords(
         if not _already_has_kw(cn_h, en_h, "关键词"):
             cn_kw = split_keywords(cn_keywords, max_groups=4, lang="cn")
             last = None
-            children = list(body)
             for i in range(en_h - 1, cn_h, -1):
-                el = children[i]
-                if el.tag != w_p:
+                if not idx.is_p(i):
                     continue
-                if p_text(ns, el).strip():
+                if idx.text(i).strip():
                     last = i
                     break
             if last is not None:
@@ -579,31 +616,27 @@ def insert_abstract_keywords(
     # 英文关键词：插入在英文摘要节尾分节符之前，或下一个 Heading 1 之前
     if en_keywords:
         # 可能已有插入偏移，重新定位
-        children = list(body)
         en_h = _find_heading_idx("Abstract")
         if en_h is None:
             return
-        end = len(children)
-        for i in range(en_h + 1, len(children)):
-            el = children[i]
-            if el.tag != w_p:
+        end = len(idx)
+        for i in range(en_h + 1, len(idx)):
+            if not idx.is_p(i):
                 continue
-            if p_has_sectPr(ns, el):
+            if idx.info(i).has_sectPr:
                 end = i
                 break
-            if p_style(ns, el) == "1":
+            if idx.style(i) == "1":
                 end = i
                 break
 
         if not _already_has_kw(en_h, end, "Keywords"):
             en_kw = split_keywords(en_keywords, max_groups=4, lang="en")
             last = None
-            children = list(body)
             for i in range(end - 1, en_h, -1):
-                el = children[i]
-                if el.tag != w_p:
+                if not idx.is_p(i):
                     continue
-                if p_text(ns, el).strip():
+                if idx.text(i).strip():
                     last = i
                     break
             if last is not None:
@@ -613,11 +646,8 @@ def insert_abstract_keywords(
                     keep_with_prev=True,
                 )
                 # 让英文摘要最后一段尽量与关键词同行，避免“关键词尾部独占新页”。
-                children2 = list(body)
-                if 0 <= last < len(children2):
-                    prev_p = children2[last]
-                    if prev_p.tag == w_p:
-                        set_para_keep_next(ns, prev_p)
+                if 0 <= last < len(idx) and idx.is_p(last):
+                    set_para_keep_next(ns, idx[last])
 
 
 # ====================  settings.xml 自动更新 TOC  ====================
@@ -626,12 +656,20 @@ def ensure_update_fields_in_settings(
     ns: dict[str, str], settings_xml: bytes) -> bytes:
     """在 settings.xml 中添加 updateFields 以支持打开时自动更新 TOC。"""
     settings_root = ET.fromstring(settings_xml)
+    if not ensure_update_fields_in_settings_root(ns, settings_root):
+        return settings_xml
+    return ET.tostring(settings_root, encoding="utf-8", xml_declaration=True)
+
+
+def ensure_update_fields_in_settings_root(
+    ns: dict[str, str], settings_root: ET.Element) -> bool:
+    """在已解析的 w:settings 树中就地添加 updateFields，返回是否有修改。"""
     w_updateFields = qn(ns, "w", "updateFields")
     w_val = qn(ns, "w", "val")
 
-    # 已存在则直接返回
+    # 已存在则不修改
     if settings_root.find(w_updateFields) is not None:
-        return settings_xml
+        return False
 
     # 在 w:compat 后插入，否则追加到末尾
     w_compat = qn(ns, "w", "compat")
@@ -645,16 +683,19 @@ def ensure_update_fields_in_settings(
         settings_root.insert(idx + 1, update_el)
     else:
         settings_root.append(update_el)
-
-    return ET.tostring(settings_root, encoding="utf-8", xml_declaration=True)
+    return True
 
 
 # ====================  目录  ====================
 
 def insert_toc_before_first_chapter(
-    ns: dict[str, str], body: ET.Element, sectPr_proto: ET.Element | None = None
+    ns: dict[str, str],
+    body: ET.Element,
+    sectPr_proto: ET.Element | None = None,
+    index: BodyIndex | None = None,
 ) -> None:
     """在第一章（或"摘要"标题）前插入目录字段段落。"""
+    idx = index if index is not None else BodyIndex(ns, body)
     w_p = qn(ns, "w", "p")
     w_pPr = qn(ns, "w", "pPr")
     w_pStyle = qn(ns, "w", "pStyle")
@@ -668,15 +709,14 @@ def insert_toc_before_first_chapter(
     w_fldCharType = qn(ns, "w", "fldCharType")
     w_instrText = qn(ns, "w", "instrText")
 
-    children = list(body)
     first_h1_idx = None
     unnumbered = {"目录", "摘要", "Abstract"}
     # 优先将目录插入到"摘要"标题之前，保证目录在罗马数字节内（目录在前，摘要在后）
-    for i, el in enumerate(children):
-        if el.tag != w_p:
+    for i in range(len(idx)):
+        if not idx.is_p(i):
             continue
-        if p_style(ns, el) == "1":
-            txt = p_text(ns, el).strip()
+        if idx.style(i) == "1":
+            txt = idx.text(i).strip()
             if txt == "摘要":
                 first_h1_idx = i
                 break
@@ -730,54 +770,51 @@ def insert_toc_before_first_chapter(
         set_sect_break_next_page(ns, sect_toc)
         set_sect_pgnum(ns, sect_toc, fmt="lowerRoman", start=1)
         sb = make_section_break_paragraph(ns, sect_toc)
-        body.insert(first_h1_idx, toc_title_p)
-        body.insert(first_h1_idx + 1, toc_field_p)
-        body.insert(first_h1_idx + 2, sb)
+        idx.insert(first_h1_idx, toc_title_p)
+        idx.insert(first_h1_idx + 1, toc_field_p)
+        idx.insert(first_h1_idx + 2, sb)
     else:
         pb = make_page_break_p(ns)
-        body.insert(first_h1_idx, toc_title_p)
-        body.insert(first_h1_idx + 1, toc_field_p)
-        body.insert(first_h1_idx + 2, pb)
+        idx.insert(first_h1_idx, toc_title_p)
+        idx.insert(first_h1_idx + 1, toc_field_p)
+        idx.insert(first_h1_idx + 2, pb)
 
 
 # ====================  章节前分页  ====================
 
-def add_page_breaks_before_h1(ns: dict[str, str], body: ET.Element) -> None:
-    """为每个一级标题（Heading 1）添加 pageBreakBefore 属性，确保每章另起新页。
+def add_page_breaks_before_h1_pass(ns: dict[str, str]) -> VisitorPass:
+    """构造一级标题分页的访问者 pass（顶层段落）。
 
-    直接在标题段落上设置属性，而非插入独立分页段落，避免
-    LibreOffice 在前页未满时产生空白页。
+    “前一段是否为分节符”按文档顺序增量维护，等价于从标题向前回溯：
+    最近的非空段落决定结果；其间的空段落若带 sectPr 则直接判定为分节符。
     """
     w_p = qn(ns, "w", "p")
     w_pPr = qn(ns, "w", "pPr")
     w_pageBreakBefore = qn(ns, "w", "pageBreakBefore")
 
-    children = list(body)
     front_h1 = {"目录", "摘要", "Abstract"}
-    for idx, el in enumerate(children):
-        if el.tag != w_p or p_style(ns, el) != "1":
-            continue
-        title = p_text(ns, el).strip()
-        if title in front_h1:
-            continue
+    prev_is_sect_break = False
+
+    def visit(el: ET.Element) -> None:
+        nonlocal prev_is_sect_break
+        if el.tag != w_p:
+            return
         # 若紧邻前一段就是 section-break（nextPage），则不再叠加 pageBreakBefore，
         # 否则易产生“空白页只有页码”的问题。
-        prev_is_sect_break = False
-        j = idx - 1
-        while j >= 0:
-            prev = children[j]
-            if prev.tag != w_p:
-                j -= 1
-                continue
-            if p_text(ns, prev).strip():
-                prev_is_sect_break = p_has_sectPr(ns, prev)
-                break
-            if p_has_sectPr(ns, prev):
-                prev_is_sect_break = True
-                break
-            j -= 1
-        if prev_is_sect_break:
-            continue
+        is_sect_break_before = prev_is_sect_break
+        has_text = bool(p_text(ns, el).strip())
+        if has_text:
+            prev_is_sect_break = p_has_sectPr(ns, el)
+        elif p_has_sectPr(ns, el):
+            prev_is_sect_break = True
+
+        if p_style(ns, el) != "1":
+            return
+        title = p_text(ns, el).strip()
+        if title in front_h1:
+            return
+        if is_sect_break_before:
+            return
         pPr = el.find(w_pPr)
         if pPr is None:
             pPr = ET.SubElement(el, w_pPr)
@@ -785,16 +822,31 @@ def add_page_breaks_before_h1(ns: dict[str, str], body: ET.Element) -> None:
         if pPr.find(w_pageBreakBefore) is None:
             ET.SubElement(pPr, w_pageBreakBefore)
 
+    return VisitorPass("add_page_breaks_before_h1", "block", visit)
+
+
+def add_page_breaks_before_h1(ns: dict[str, str], body: ET.Element) -> None:
+    """为每个一级标题（Heading 1）添加 pageBreakBefore 属性，确保每章另起新页。
+
+    直接在标题段落上设置属性，而非插入独立分页段落，避免
+    LibreOffice 在前页未满时产生空白页。
+    """
+    run_visitor_passes(ns, body, [add_page_breaks_before_h1_pass(ns)])
+
 
 # ====================  公共 __all__  ====================
 
 __all__ = [
     "split_keywords",
     "prepend_template_cover_pages",
+    "extract_template_cover_elements",
+    "load_template_cover_elements",
     "strip_template_body_leak_after_front_matter",
     "insert_abstract_chapters_and_sections",
     "insert_abstract_keywords",
     "ensure_update_fields_in_settings",
+    "ensure_update_fields_in_settings_root",
     "insert_toc_before_first_chapter",
     "add_page_breaks_before_h1",
+    "add_page_breaks_before_h1_pass",
 ]
@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+监视模式 — 源文件变化时在常驻进程内增量重建版式1 DOCX。
+
+使用方法：
+  python3 build_docx_banshi1.py <thesis_dir> --watch [--interval 0.3] [--debounce 0.5]
+                                [--profile-passes] [--low-memory]
+
+- 轮询监视论文目录下全部 .tex/.sty/.cls（main.tex、chapters/*.tex 等）、参考文献 bib、
+  CSL、图表标题样例 DOCX，以及 figures/、media/ 与 ch4 实验结果图目录
+- 检测到变化后等待 --debounce 秒内不再有新变化（编辑器连续保存只触发一次构建）
+- 每轮在同一进程内调用 post_processor.main：构建器模块、构建器源码摘要、模板封面片段
+  与标题格式配置常驻内存；各阶段按输入摘要命中 BuildCache，只重跑受影响的阶段
+- 未设置 SWUN_PANDOC_SHARDS 时默认按章分片（auto）：只改动某一章时只重新解析该章，
+  其余章节复用缓存的 pandoc AST
+- 首轮照常备份旧输出，之后各轮不再生成 .docx.bak_* 备份
+- 每轮结束打印各阶段耗时（[watch] 行）；构建失败只报告，继续监视；Ctrl-C 退出
+
+变化检测基于构建开始前的快照：构建期间保存的源文件会触发下一轮。
+构建自身写出的文件不参与快照：栅格化阶段记录在 raster-manifest.json 中的 PNG；
+构建缓存关闭（没有清单）时，与同目录同名 PDF 并存的 PNG 一律视为栅格化产物。
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import time
+import traceback
+from pathlib import Path
+from typing import Callable
+
+try:
+    from modules import post_processor
+    from modules.build_cache import BuildCache, resource_files, tex_source_files
+    from modules.figure_raster import raster_outputs
+except ModuleNotFoundError:  # pragma: no cover - pytest imports via scripts.modules
+    from scripts.modules import post_processor
+    from scripts.modules.build_cache import BuildCache, resource_files, tex_source_files
+    from scripts.modules.figure_raster import raster_outputs
+
+WATCH_FLAG = "--watch"
+DEFAULT_INTERVAL = 0.3
+DEFAULT_DEBOUNCE = 0.5
+
+CSL_NAME = "china-national-standard-gb-t-7714-2015-numeric.csl"
+CAPTION_PROFILE_NAME = "网络与信息安全_高春琴.docx"
+# preprocess_latex 的 PNG 候选目录（见 latex_parser.png_candidates）
+EXTRA_FIGURE_DIRS = ("experiments/ch4_v2/results/figures",)
+
+# 文件快照：路径 -> (mtime_ns, size)
+Snapshot = dict[Path, tuple[int, int]]
+# 构建函数：(论文目录, 附加参数) -> 各阶段耗时（秒）
+Build = Callable[[Path, list[str]], "dict[str, float] | None"]
+
+
+# ---------------------------------------------------------------------------
+# 快照与变化检测
+# ---------------------------------------------------------------------------
+
+def generated_files(thesis_dir: Path, files: list[Path]) -> set[Path]:
+    """files 中由构建自身写出的文件（栅格化 PNG）。"""
+    cache = BuildCache.for_thesis(thesis_dir)
+    if cache.enabled:
+        outputs = {p.resolve() for p in raster_outputs(cache)}
+        return {p for p in files if p.suffix.lower() == ".png" and p.resolve() in outputs}
+    return {p for p in files
+            if p.suffix.lower() == ".png" and p.with_suffix(".pdf").is_file()}
+
+
+def watched_files(thesis_dir: Path) -> list[Path]:
+    """构建的全部输入文件（与构建缓存键覆盖的输入一致，不含构建产物）。"""
+    files = tex_source_files(thesis_dir) + resource_files(thesis_dir)
+    for rel in EXTRA_FIGURE_DIRS:
+        d = thesis_dir / rel
+        if d.is_dir():
+            files.extend(p for p in d.iterdir() if p.is_file() and not p.name.startswith("."))
+    generated = generated_files(thesis_dir, files)
+    files = [p for p in files if p not in generated]
+    bib = os.environ.get("SWUN_BIB")
+    files.append(Path(bib).expanduser() if bib else thesis_dir / "backmatter" / "references.bib")
+    csl = os.environ.get("SWUN_CSL")
+    files.append(Path(csl).expanduser() if csl else thesis_dir / CSL_NAME)
+    profile = os.environ.get("SWUN_CAPTION_PROFILE_DOCX")
+    files.append(Path(profile).expanduser() if profile else thesis_dir / CAPTION_PROFILE_NAME)
+    return sorted(set(files))
+
+
+def take_snapshot(thesis_dir: Path) -> Snapshot:
+    snapshot: Snapshot = {}
+    for path in watched_files(thesis_dir):
+        try:
+            st = path.stat()
+        except OSError:
+            continue
+        snapshot[path] = (st.st_mtime_ns, st.st_size)
+    return snapshot
+
+
+def diff_snapshots(old: Snapshot, new: Snapshot) -> list[Path]:
+    """新增、删除或修改过的文件（排序）。"""
+    return sorted(p for p in old.keys() | new.keys() if old.get(p) != new.get(p))
+
+
+def wait_for_changes(
+    thesis_dir: Path,
+    snapshot: Snapshot,
+    *,
+    interval: float = DEFAULT_INTERVAL,
+    debounce: float = DEFAULT_DEBOUNCE,
+    sleep: Callable[[float], None] = time.sleep,
+) -> tuple[Snapshot, list[Path]]:
+    """阻塞到输入文件变化且连续 debounce 秒无新变化，返回 (新快照, 变化文件)。"""
+    current = snapshot
+    while True:
+        sleep(interval)
+        current = take_snapshot(thesis_dir)
+        if current != snapshot:
+            break
+    # 防抖：连续 quiet_polls 次轮询无新变化才开始构建
+    quiet_polls = max(int(round(debounce / interval)) if interval > 0 else 1, 1)
+    quiet = 0
+    while quiet < quiet_polls:
+        sleep(interval)
+        latest = take_snapshot(thesis_dir)
+        quiet = quiet + 1 if latest == current else 0
+        current = latest
+    return current, diff_snapshots(snapshot, current)
+
+
+# ---------------------------------------------------------------------------
+# 构建循环
+# ---------------------------------------------------------------------------
+
+def _default_build(thesis: Path, args: list[str]) -> dict[str, float]:
+    try:
+        post_processor.main([str(thesis), *args])
+    finally:
+        timings = post_processor.last_build_timings()
+    return timings
+
+
+def format_timings(timings: dict[str, float], total: float) -> str:
+    stages = "  ".join(f"{name} {sec:.2f}s" for name, sec in timings.items())
+    return f"{stages}  total {total:.2f}s" if stages else f"total {total:.2f}s"
+
+
+def _run_cycle(cycle: int, thesis: Path, args: list[str], build: Build) -> bool:
+    t0 = time.perf_counter()
+    timings: dict[str, float] | None = None
+    ok = True
+    try:
+        timings = build(thesis, args)
+    except (Exception, SystemExit) as exc:
+        ok = False
+        if not isinstance(exc, SystemExit):
+            traceback.print_exc()
+        print(f"  [watch] cycle {cycle} FAILED: {exc or type(exc).__name__}")
+    total = time.perf_counter() - t0
+    print(f"  [watch] cycle {cycle}: {format_timings(timings or {}, total)}", flush=True)
+    return ok
+
+
+def _print_changes(thesis: Path, changed: list[Path], limit: int = 8) -> None:
+    for path in changed[:limit]:
+        try:
+            rel = path.relative_to(thesis)
+        except ValueError:
+            rel = path
+        print(f"  [watch] changed {rel}")
+    if len(changed) > limit:
+        print(f"  [watch] … and {len(changed) - limit} more")
+
+
+def watch(
+    thesis: Path,
+    *,
+    args: list[str] | None = None,
+    interval: float = DEFAULT_INTERVAL,
+    debounce: float = DEFAULT_DEBOUNCE,
+    build: Build | None = None,
+    max_cycles: int | None = None,
+    sleep: Callable[[float], None] = time.sleep,
+) -> int:
+    """首轮完整构建后持续监视；max_cycles 限制增量重建轮数（None 表示直到 Ctrl-C）。
+
+    返回成功的构建轮数。
+    """
+    build = build or _default_build
+    args = list(args or [])
+    cycle = 1
+    # 快照取在构建开始之前：构建期间的编辑在下一次轮询即被发现
+    snapshot = take_snapshot(thesis)
+    succeeded = int(_run_cycle(cycle, thesis, args, build))
+    print(f"  [watch] watching {len(snapshot)} files in {thesis} (Ctrl-C to stop)", flush=True)
+    rebuild_args = [*args, post_processor.NO_BACKUP_FLAG]
+    try:
+        while max_cycles is None or cycle <= max_cycles:
+            snapshot, changed = wait_for_changes(
+                thesis, snapshot, interval=interval, debounce=debounce, sleep=sleep)
+            cycle += 1
+            _print_changes(thesis, changed)
+            succeeded += _run_cycle(cycle, thesis, rebuild_args, build)
+    except KeyboardInterrupt:
+        print()
+    return succeeded
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="build_docx_banshi1.py --watch",
+                                     description=__doc__.splitlines()[1])
+    parser.add_argument("thesis_dir", nargs="?", type=Path, default=None,
+                        help="论文目录（默认当前目录）")
+    parser.add_argument(WATCH_FLAG, dest="watch", action="store_true")
+    parser.add_argument("--interval", type=float, default=DEFAULT_INTERVAL,
+                        help=f"轮询间隔（秒，默认 {DEFAULT_INTERVAL}）")
+    parser.add_argument("--debounce", type=float, default=DEFAULT_DEBOUNCE,
+                        help=f"防抖时长（秒，默认 {DEFAULT_DEBOUNCE}）")
+    # 其余参数（--profile-passes、--low-memory 等）原样传给每轮构建
+    args, passthrough = parser.parse_known_args(argv)
+
+    thesis = (args.thesis_dir or Path.cwd()).expanduser().resolve()
+    if not (thesis / "main.tex").exists():
+        parser.error(f"main.tex not found in {thesis}")
+    # 按章分片：未改动的章节复用缓存的 pandoc AST
+    os.environ.setdefault("SWUN_PANDOC_SHARDS", "auto")
+    watch(thesis, args=passthrough, interval=args.interval, debounce=args.debounce)
+    return 0
+
+
+__all__ = [
+    "WATCH_FLAG",
+    "diff_snapshots",
+    "format_timings",
+    "generated_files",
+    "main",
+    "take_snapshot",
+    "wait_for_changes",
+    "watch",
+    "watched_files",
+]
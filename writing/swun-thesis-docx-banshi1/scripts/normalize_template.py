@@ -17,6 +17,13 @@ import zipfile
 import xml.etree.ElementTree as ET
 from pathlib import Path
 
+try:
+    from modules.asset_cache import cached_file
+    from modules.build_cache import BuildCache
+except ModuleNotFoundError:  # pragma: no cover - pytest imports via scripts.*
+    from scripts.modules.asset_cache import cached_file
+    from scripts.modules.build_cache import BuildCache
+
 W_NS = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
 
 
@@ -99,6 +106,24 @@ def _load_mapping(mapping_path: Path) -> dict[str, str] | None:
     return {k: v for k, v in raw.items() if not k.startswith("_")}
 
 
+def _normalize_docx(src: Path, dst: Path, mapping: dict[str, str]) -> None:
+    """重写 styles / numbering / document 部件中的样式 ID，写出 dst。"""
+    style_parts = {
+        "word/styles.xml", "word/numbering.xml", "word/document.xml"}
+
+    buf = io.BytesIO()
+    with (zipfile.ZipFile(src, "r") as zin,
+          zipfile.ZipFile(buf, "w", zipfile.ZIP_DEFLATED) as zout):
+        for item in zin.infolist():
+            data = zin.read(item.filename)
+            if item.filename in style_parts:
+                data = _replace_style_ids(data, mapping)
+            zout.writestr(item, data)
+
+    dst.parent.mkdir(parents=True, exist_ok=True)
+    dst.write_bytes(buf.getvalue())
+
+
 def main() -> int:
     """解析参数并对 DOCX 模板的样式 ID 执行两阶段重命名规范化。"""
     parser = argparse.ArgumentParser(
@@ -125,20 +150,18 @@ def main() -> int:
 
     mapping = _load_mapping(mapping_path)
 
-    style_parts = {
-        "word/styles.xml", "word/numbering.xml", "word/document.xml"}
-
-    buf = io.BytesIO()
-    with (zipfile.ZipFile(src, "r") as zin,
-          zipfile.ZipFile(buf, "w", zipfile.ZIP_DEFLATED) as zout):
-        for item in zin.infolist():
-            data = zin.read(item.filename)
-            if item.filename in style_parts:
-                data = _replace_style_ids(data, mapping)
-            zout.writestr(item, data)
-
-    dst.parent.mkdir(parents=True, exist_ok=True)
-    dst.write_bytes(buf.getvalue())
+    # 输出位于论文目录：以 (模板, 映射, 本脚本) 内容为键缓存规范化结果
+    cache = BuildCache.for_thesis(dst.parent)
+    hit = cached_file(
+        "normalized-template",
+        [src, mapping_path, Path(__file__)],
+        dst,
+        lambda out: _normalize_docx(src, out, mapping),
+        cache=cache,
+    )
+    if hit:
+        print(f"OK: normalized template unchanged (cached) -> {dst}")
+        return 0
     _verify_output(dst, mapping)
 
     print(f"OK: normalized {len(mapping)} style IDs -> {dst}")
@@ -2,6 +2,8 @@
 """Phase 1: 结构/分页检查。"""
 from __future__ import annotations
 from verification.report_generator import check_phase1_structure
+from verification.docx_snapshot import DocxSnapshot
+from verification.stream_core import stream_enabled, verify_stream
 
 import sys
 import zipfile
@@ -10,9 +12,15 @@ from pathlib import Path
 sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
 
 
-def run(docx_path: str) -> list[str]:
-    """运行 Phase 1 检查，返回错误列表。"""
+def run(docx_path: str, snapshot: DocxSnapshot | None = None) -> list[str]:
+    """运行 Phase 1 检查，返回错误列表（传入 snapshot 时复用已解析的 DOCX，否则流式单遍校验）。"""
     try:
+        if snapshot is not None:
+            if snapshot.numbering_xml is None:
+                raise KeyError("There is no item named 'word/numbering.xml' in the archive")
+            return check_phase1_structure(snapshot.doc_xml, snapshot.numbering_xml)
+        if stream_enabled():
+            return verify_stream(docx_path, (1,))[1]
         with zipfile.ZipFile(docx_path, "r") as zf:
             doc = zf.read("word/document.xml").decode("utf-8", errors="ignore")
             num = zf.read("word/numbering.xml").decode("utf-8",
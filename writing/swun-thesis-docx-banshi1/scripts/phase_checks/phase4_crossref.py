@@ -2,6 +2,8 @@
 """Phase 4: 交叉引用检查。"""
 from __future__ import annotations
 from verification.report_generator import check_phase4_crossref
+from verification.docx_snapshot import DocxSnapshot
+from verification.stream_core import stream_enabled, verify_stream
 
 import sys
 import zipfile
@@ -10,9 +12,13 @@ from pathlib import Path
 sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
 
 
-def run(docx_path: str) -> list[str]:
-    """运行 Phase 4 检查，返回错误列表。"""
+def run(docx_path: str, snapshot: DocxSnapshot | None = None) -> list[str]:
+    """运行 Phase 4 检查，返回错误列表（传入 snapshot 时复用已解析的 DOCX，否则流式单遍校验）。"""
     try:
+        if snapshot is not None:
+            return check_phase4_crossref(snapshot.doc_xml)
+        if stream_enabled():
+            return verify_stream(docx_path, (4,))[4]
         with zipfile.ZipFile(docx_path, "r") as zf:
             doc = zf.read("word/document.xml").decode("utf-8", errors="ignore")
         return check_phase4_crossref(doc)
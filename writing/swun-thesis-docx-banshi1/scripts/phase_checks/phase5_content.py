@@ -11,7 +11,21 @@ from __future__ import annotations
 import re
 import sys
 import zipfile
-import xml.etree.ElementTree as ET
+
+try:
+    from utils.xml_backend import XML_PARSE_ERRORS as _XML_PARSE_ERRORS
+except ModuleNotFoundError:
+    from scripts.utils.xml_backend import XML_PARSE_ERRORS as _XML_PARSE_ERRORS
+
+try:
+    from verification.docx_snapshot import DocxSnapshot, snapshot_root as _snapshot_root
+except ModuleNotFoundError:
+    from scripts.verification.docx_snapshot import DocxSnapshot, snapshot_root as _snapshot_root
+
+try:
+    from verification.incremental import SegmentCache, body_segments as _body_segments
+except ModuleNotFoundError:
+    from scripts.verification.incremental import SegmentCache, body_segments as _body_segments
 
 
 _HALFWIDTH_SKIP_PATTERNS = [
@@ -40,48 +54,52 @@ _HALFWIDTH_PUNCTS = {
 }
 
 
-def _iter_main_body_text(doc_xml: str) -> list[str]:
-    """提取正文段落的纯文本列表。"""
-    ns = {"w": "http://schemas.openxmlformats.org/wordprocessingml/2006/main"}
-    root = ET.fromstring(doc_xml)
-    body = root.find("w:body", ns)
-    if body is None:
-        return []
+_W_NS = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+_EXCLUDED_H1 = {"目录", "摘要", "Abstract", "致谢", "参考文献", "攻读硕士学位期间所取得的相关科研成果"}
+_STOP_H1 = {"参考文献", "致谢", "攻读硕士学位期间所取得的相关科研成果"}
+_HEADING_STYLES = {
+    "1", "2", "3", "4", "5",
+    "Heading1", "Heading2", "Heading3", "Heading4", "Heading5",
+}
+# 各章正文文本规则的增量缓存名（规则或输出格式变化时改名）
+_BODY_TEXT_RULE = "phase5-body-text-v1"
 
-    excluded_h1 = {"目录", "摘要", "Abstract", "致谢", "参考文献", "攻读硕士学位期间所取得的相关科研成果"}
-    stop_h1 = {"参考文献", "致谢", "攻读硕士学位期间所取得的相关科研成果"}
-    heading_styles = {
-    "1",
-    "2",
-    "3",
-    "4",
-    "5",
-    "Heading1",
-    "Heading2",
-    "Heading3",
-    "Heading4",
-     "Heading5"}
+
+def _para_style_text(el) -> tuple[str | None, str]:
+    ns = {"w": _W_NS}
+    p_style = el.find("w:pPr/w:pStyle", ns)
+    style_val = p_style.get(f"{{{_W_NS}}}val") if p_style is not None else None
+    p_txt = "".join((t.text or "") for t in el.findall(".//w:t", ns)).strip()
+    return style_val, p_txt
+
+
+def _sets_main_body_state(el) -> bool:
+    """该一级标题是否决定“是否处于正文”（目录/摘要等排除标题与空标题不改变状态）。"""
+    if el.tag != f"{{{_W_NS}}}p":
+        return False
+    style_val, p_txt = _para_style_text(el)
+    return style_val == "1" and (p_txt in _STOP_H1 or (bool(p_txt) and p_txt not in _EXCLUDED_H1))
+
+
+def _main_body_texts(elements) -> list[str]:
+    """从一段 body 子元素中提取正文段落纯文本（起始状态为“不在正文”）。"""
     in_main = False
     texts: list[str] = []
 
-    for el in list(body):
-        if el.tag != f"{{{ns['w']}}}p":
+    for el in elements:
+        if el.tag != f"{{{_W_NS}}}p":
             continue
-        p_style = el.find("w:pPr/w:pStyle", ns)
-        style_val = p_style.get(
-            f"{{{ns['w']}}}val") if p_style is not None else None
-        p_txt = "".join((t.text or "")
-                        for t in el.findall(".//w:t", ns)).strip()
+        style_val, p_txt = _para_style_text(el)
 
         if style_val == "1":
-            if p_txt in stop_h1:
+            if p_txt in _STOP_H1:
                 in_main = False
-            elif p_txt and p_txt not in excluded_h1:
+            elif p_txt and p_txt not in _EXCLUDED_H1:
                 in_main = True
 
         if not in_main:
             continue
-        if style_val in heading_styles:
+        if style_val in _HEADING_STYLES:
             continue
         if p_txt:
             texts.append(p_txt)
@@ -89,6 +107,19 @@ def _iter_main_body_text(doc_xml: str) -> list[str]:
     return texts
 
 
+def _iter_main_body_text(doc_xml: str) -> list[str]:
+    """提取正文段落的纯文本列表。"""
+    body = _snapshot_root(doc_xml).find(f"{{{_W_NS}}}body")
+    if body is None:
+        return []
+    return _main_body_texts(list(body))
+
+
+def _main_body_segments(doc_xml: str):
+    """按决定正文状态的一级标题切分 body；各段的正文判定互不依赖，可按段缓存。"""
+    return _body_segments(_snapshot_root(doc_xml), starts=_sets_main_body_state)
+
+
 def _is_in_skip_context(text: str, pos: int, char: str) -> bool:
     """判断半角标点是否在可豁免的上下文中。"""
     window = text[max(0, pos - 10):pos + 11]
@@ -103,27 +134,33 @@ def _is_in_skip_context(text: str, pos: int, char: str) -> bool:
     return False
 
 
-def _check_halfwidth_punctuation(texts: list[str]) -> list[str]:
-    """检测正文中的半角标点。"""
-    errors: list[str] = []
-    found_count = 0
+def _halfwidth_findings(texts: list[str]) -> list[str]:
+    """逐处列出正文中的半角标点。"""
+    findings: list[str] = []
     for text in texts:
         for i, c in enumerate(text):
             if c not in _HALFWIDTH_PUNCTS:
                 continue
             if _is_in_skip_context(text, i, c):
                 continue
-            found_count += 1
-            if found_count <= 3:
-                snippet = text[max(0, i - 15):i + 16]
-                errors.append(
-    f"半角标点 '{c}' (应为 '{
-        _HALFWIDTH_PUNCTS[c]}') in: ...{snippet}...")
-    if found_count > 3:
-        errors.append(f"（共发现 {found_count} 处半角标点，仅展示前 3 处）")
+            snippet = text[max(0, i - 15):i + 16]
+            findings.append(
+                f"半角标点 '{c}' (应为 '{_HALFWIDTH_PUNCTS[c]}') in: ...{snippet}...")
+    return findings
+
+
+def _format_halfwidth_findings(findings: list[str]) -> list[str]:
+    errors = findings[:3]
+    if len(findings) > 3:
+        errors.append(f"（共发现 {len(findings)} 处半角标点，仅展示前 3 处）")
     return errors
 
 
+def _check_halfwidth_punctuation(texts: list[str]) -> list[str]:
+    """检测正文中的半角标点。"""
+    return _format_halfwidth_findings(_halfwidth_findings(texts))
+
+
 def _check_plus_connector(texts: list[str]) -> list[str]:
     """检测 A + B 非正式连接残留。"""
     errors: list[str] = []
@@ -136,12 +173,19 @@ def _check_plus_connector(texts: list[str]) -> list[str]:
     return errors
 
 
+def _body_text_findings(segment) -> list[list[str]]:
+    """单个正文分段的文本规则结果：[[kind, message], ...]（可 JSON 序列化）。"""
+    texts = _main_body_texts(segment.elements)
+    return ([["halfwidth", m] for m in _halfwidth_findings(texts)]
+            + [["plus", m] for m in _check_plus_connector(texts)])
+
+
 def _check_three_line_tables(doc_xml: str) -> list[str]:
     """检查三线表边框（从 main.sh step 5 提取核心逻辑）。"""
     errors: list[str] = []
     ns = {"w": "http://schemas.openxmlformats.org/wordprocessingml/2006/main"}
     w_val = f"{{{ns['w']}}}val"
-    root = ET.fromstring(doc_xml)
+    root = _snapshot_root(doc_xml)
 
     need = {
         "top": "single",
@@ -178,17 +222,30 @@ def _check_three_line_tables(doc_xml: str) -> list[str]:
     return errors
 
 
-def run(docx_path: str) -> list[str]:
-    """运行 Phase 5 检查，返回错误列表。"""
+def run(
+    docx_path: str,
+    snapshot: DocxSnapshot | None = None,
+    segment_cache: SegmentCache | None = None,
+) -> list[str]:
+    """运行 Phase 5 检查，返回错误列表。
+
+    传入 snapshot 时复用已解析的 DOCX；传入 segment_cache 时正文文本规则按
+    章节分段缓存，只重新检查内容变化的分段（见 verification.incremental）。
+    """
     try:
-        with zipfile.ZipFile(docx_path, "r") as zf:
-            doc = zf.read("word/document.xml").decode("utf-8", errors="ignore")
+        if snapshot is not None:
+            doc = snapshot.doc_xml
+        else:
+            with zipfile.ZipFile(docx_path, "r") as zf:
+                doc = zf.read("word/document.xml").decode("utf-8", errors="ignore")
 
         errors: list[str] = []
-        texts = _iter_main_body_text(doc)
+        cache = segment_cache if segment_cache is not None else SegmentCache()
+        findings = cache.map(_BODY_TEXT_RULE, _main_body_segments(doc), _body_text_findings)
 
-        errors.extend(_check_halfwidth_punctuation(texts))
-        errors.extend(_check_plus_connector(texts))
+        errors.extend(_format_halfwidth_findings(
+            [m for kind, m in findings if kind == "halfwidth"]))
+        errors.extend(m for kind, m in findings if kind == "plus")
         errors.extend(_check_three_line_tables(doc))
         return errors
     except FileNotFoundError:
@@ -197,7 +254,7 @@ def run(docx_path: str) -> list[str]:
         return [f"invalid DOCX archive: {docx_path}"]
     except KeyError as exc:
         return [f"DOCX missing required OOXML part: {exc}"]
-    except ET.ParseError as exc:
+    except _XML_PARSE_ERRORS as exc:
         return [f"failed to parse document.xml: {exc}"]
     except Exception as exc:
         return [f"phase5 runtime error: {exc}"]
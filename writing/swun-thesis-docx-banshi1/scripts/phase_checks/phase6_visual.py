@@ -11,13 +11,16 @@ from __future__ import annotations
 import json
 import os
 import re
-import shutil
-import subprocess
 import sys
 from pathlib import Path
 
 import pdfplumber
 
+try:
+    from modules.render_cache import pdf_artifact as _pdf_artifact, render_pdf as _render_pdf
+except ModuleNotFoundError:
+    from scripts.modules.render_cache import pdf_artifact as _pdf_artifact, render_pdf as _render_pdf
+
 
 REVIEW_PAGES = [
     {"name": "封面", "page": 1, "check": "封面布局、校名、论文标题位置"},
@@ -40,35 +43,8 @@ CHAPTER_MIN_TOP = 65.0
 
 
 def convert_docx_to_pdf(docx_path: str, output_dir: str) -> str | None:
-    """用 soffice/libreoffice 将 DOCX 转为 PDF。"""
-    office_bin = shutil.which("soffice") or shutil.which("libreoffice")
-    if not office_bin:
-        return None
-    try:
-        result = subprocess.run(
-            [
-                office_bin,
-                "--headless",
-                "--convert-to",
-                "pdf",
-                "--outdir",
-                output_dir,
-                docx_path,
-            ],
-            capture_output=True,
-            text=True,
-            timeout=120,
-            check=False,
-        )
-        if result.returncode != 0:
-            return None
-        pdf_name = Path(docx_path).stem + ".pdf"
-        pdf_path = os.path.join(output_dir, pdf_name)
-        if os.path.exists(pdf_path):
-            return pdf_path
-        return None
-    except (subprocess.TimeoutExpired, FileNotFoundError):
-        return None
+    """将 DOCX 转为 output_dir 下的 PDF（经 render_cache，内容未变时复用已渲染结果）。"""
+    return _render_pdf(docx_path, output_dir)
 
 
 def _merge_line_text(words: list[dict]) -> str:
@@ -198,8 +174,10 @@ def _compare_pdfs(docx_pdf: str, latex_pdf: str |
     if not latex_pdf or not os.path.exists(latex_pdf):
         return ["缺少 LaTeX PDF 基线，无法执行 Phase 6 视觉门禁"], {}
 
-    latex_pages = _extract_lines(latex_pdf)
-    docx_pages = _extract_lines(docx_pdf)
+    # 逐页行/词按 PDF 内容缓存在 DOCX 所在论文目录，gate loop 重试时不再重新提取
+    anchor = os.path.dirname(os.path.abspath(docx_pdf))
+    latex_pages = _pdf_artifact(latex_pdf, "lines", _extract_lines, anchor)
+    docx_pages = _pdf_artifact(docx_pdf, "lines", _extract_lines, anchor)
 
     latex_chapters = _find_chapter_lines(latex_pages)
     docx_chapters = _find_chapter_lines(docx_pages)
@@ -0,0 +1,467 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+合成论文生成器：按参数生成 SWUN 论文目录及预制的 pandoc 中间 DOCX。
+
+使用方法：
+  python3 synthetic_thesis.py OUT_DIR [--chapters 6] [--figures 24] [--tables 12]
+                             [--equations 40] [--refs 60] [--mixed 0.3] [--seed 1]
+
+生成内容（OUT_DIR 下）：
+- main.tex / chapters/chapN.tex / backmatter/references.bib / figures/*.png
+- .main.flat.tex            latexpand 之后的扁平源码（无需安装 latexpand）
+- .main.pandoc.docx         与 pandoc --reference-doc 输出同构的中间 DOCX（无需安装 pandoc）
+- template.docx             含封面截止行的最小模板（SWUN_TEMPLATE_DOCX）
+- 网络与信息安全_高春琴.docx  图/表标题格式参考文档（SWUN_CAPTION_PROFILE_DOCX）
+
+图表与公式总数按章轮转分配；mixed 为正文段落中夹带英文术语的比例。
+同一组参数与 seed 生成的文件逐字节一致，便于基准对比。
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import struct
+import zipfile
+import zlib
+from dataclasses import dataclass
+from pathlib import Path
+from xml.sax.saxutils import escape
+
+W_NS = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+R_NS = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+M_NS = "http://schemas.openxmlformats.org/officeDocument/2006/math"
+WP_NS = "http://schemas.openxmlformats.org/drawingml/2006/wordprocessingDrawing"
+A_NS = "http://schemas.openxmlformats.org/drawingml/2006/main"
+PIC_NS = "http://schemas.openxmlformats.org/drawingml/2006/picture"
+PKG_REL_NS = "http://schemas.openxmlformats.org/package/2006/relationships"
+CT_NS = "http://schemas.openxmlformats.org/package/2006/content-types"
+DOC_REL = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+
+INTERMEDIATE_NAME = ".main.pandoc.docx"
+FLAT_TEX_NAME = ".main.flat.tex"
+TEMPLATE_NAME = "template.docx"
+CAPTION_PROFILE_NAME = "网络与信息安全_高春琴.docx"
+
+_CN_SENTENCES = (
+    "本节讨论车联网环境下节点信誉的动态评估方法",
+    "实验结果表明所提方案在吞吐量与时延方面均有明显提升",
+    "为降低通信开销，本文对共识消息进行了聚合处理",
+    "路侧单元负责收集车辆上报的交通事件并进行验证",
+    "在拜占庭节点比例较高时，系统仍能保持安全性与活性",
+    "该机制通过激励函数引导节点诚实参与区块生产",
+)
+_EN_TERMS = ("PBFT", "Raft", "RSU", "V2X", "Merkle tree", "smart contract", "TPS", "DAG")
+_DOC_ID = 0
+
+
+@dataclass(frozen=True)
+class ThesisSpec:
+    chapters: int = 6
+    figures: int = 24
+    tables: int = 12
+    equations: int = 40
+    references: int = 60
+    mixed_ratio: float = 0.3
+    paragraphs_per_section: int = 4
+    sections_per_chapter: int = 3
+    seed: int = 1
+
+    def per_chapter(self, total: int) -> list[int]:
+        """total 按章轮转分配后的各章数量。"""
+        counts = [0] * self.chapters
+        for i in range(total):
+            counts[i % self.chapters] += 1
+        return counts
+
+
+# ---------------------------------------------------------------------------
+# 文本与 LaTeX
+# ---------------------------------------------------------------------------
+
+def _sentence(rng: random.Random, spec: ThesisSpec) -> str:
+    text = rng.choice(_CN_SENTENCES)
+    if rng.random() < spec.mixed_ratio:
+        text += f"，其中 {rng.choice(_EN_TERMS)} 作为对比基线"
+    return text + "。"
+
+
+def _paragraph(rng: random.Random, spec: ThesisSpec, refs: int) -> str:
+    body = "".join(_sentence(rng, spec) for _ in range(3))
+    if refs:
+        body += f"\\cite{{ref{rng.randrange(refs) + 1}}}"
+    return body
+
+
+def _chapter_tex(rng: random.Random, spec: ThesisSpec, ch: int, figs: int, tabs: int, eqs: int) -> str:
+    out = [f"\\chapter{{第{ch}部分研究内容}}\n\\label{{chap:{ch}}}\n"]
+    floats = [("figure", i + 1) for i in range(figs)] + [("table", i + 1) for i in range(tabs)]
+    eq_left = eqs
+    for sec in range(1, spec.sections_per_chapter + 1):
+        out.append(f"\\section{{研究问题 {ch}.{sec}}}\n")
+        for _ in range(spec.paragraphs_per_section):
+            out.append(_paragraph(rng, spec, spec.references) + "\n\n")
+        share = -(-len(floats) // max(1, spec.sections_per_chapter - sec + 1))
+        for kind, n in floats[:share]:
+            if kind == "figure":
+                out.append(
+                    "\\begin{figure}[htbp]\n\\centering\n"
+                    f"\\includegraphics[width=0.8\\linewidth]{{figures/fig_{ch}_{n}.png}}\n"
+                    f"\\bilingualcaption{{系统结构示意 {ch}-{n}}}{{System overview {ch}-{n}}}\n"
+                    f"\\label{{fig:c{ch}f{n}}}\n\\end{{figure}}\n"
+                    f"如图\\ref{{fig:c{ch}f{n}}}所示，各模块之间通过消息总线交互。\n\n"
+                )
+            else:
+                out.append(
+                    "\\begin{table}[htbp]\n\\centering\n"
+                    f"\\bilingualcaption{{实验参数 {ch}-{n}}}{{Parameters {ch}-{n}}}\n"
+                    f"\\label{{tab:c{ch}t{n}}}\n"
+                    "\\begin{tabular}{p{3cm}p{5cm}c}\n\\toprule\n参数 & 含义 & 取值 \\\\\n\\midrule\n"
+                    "$N$ & 节点数 & 64 \\\\\n$f$ & 故障节点 & 21 \\\\\n\\bottomrule\n"
+                    "\\end{tabular}\n\\end{table}\n\n"
+                )
+        floats = floats[share:]
+        take = -(-eq_left // max(1, spec.sections_per_chapter - sec + 1))
+        for k in range(take):
+            if k % 4 == 3:
+                out.append("\\[\n\\forall i \\in \\mathcal{N}\n\\]\n\n")
+            else:
+                out.append(
+                    f"\\begin{{equation}}\nR_{{{k}}} = \\alpha S_{{{k}}} + (1-\\alpha) H_{{{k}}}\n"
+                    f"\\label{{eq:c{ch}e{k}}}\n\\end{{equation}}\n\n")
+        eq_left -= take
+    return "".join(out)
+
+
+def _abstract_tex() -> str:
+    return (
+        "\\chapter*{摘要}\n车联网（V2X）环境下，车辆与路侧单元之间需要可信的数据共享机制。"
+        "本文围绕区块链共识与信誉机制展开研究。\n\n"
+        "\\cnkeywords{车联网；区块链；共识算法；信誉机制；激励机制}\n\n"
+        "\\chapter*{Abstract}\nIn the Vehicle-to-Everything (V2X) environment, vehicles and road side "
+        "units need a trustworthy data sharing mechanism.\n\n"
+        "\\enkeywords{V2X; blockchain; consensus; reputation; incentive}\n\n"
+    )
+
+
+def _bib(spec: ThesisSpec) -> str:
+    entries = []
+    for i in range(1, spec.references + 1):
+        entries.append(
+            f"@article{{ref{i},\n  author = {{作者{i} and Author{i}}},\n"
+            f"  title = {{Synthetic reference {i} on consensus}},\n  journal = {{期刊{i % 7}}},\n"
+            f"  year = {{{2000 + i % 24}}},\n  doi = {{10.1000/synthetic.{i}}}\n}}\n"
+        )
+    return "\n".join(entries)
+
+
+# ---------------------------------------------------------------------------
+# OOXML
+# ---------------------------------------------------------------------------
+
+def _r(text: str, rpr: str = "") -> str:
+    rpr_xml = f"<w:rPr>{rpr}</w:rPr>" if rpr else ""
+    return f'<w:r>{rpr_xml}<w:t xml:space="preserve">{escape(text)}</w:t></w:r>'
+
+
+def _p(runs: str = "", style: str | None = None, ppr: str = "") -> str:
+    style_xml = f'<w:pStyle w:val="{style}"/>' if style else ""
+    ppr_xml = f"<w:pPr>{style_xml}{ppr}</w:pPr>" if style_xml or ppr else ""
+    return f"<w:p>{ppr_xml}{runs}</w:p>"
+
+
+def _bookmark(name: str, inner: str) -> str:
+    global _DOC_ID  # noqa: PLW0603
+    _DOC_ID += 1
+    return (f'<w:bookmarkStart w:id="{_DOC_ID}" w:name="{name}"/>{inner}'
+            f'<w:bookmarkEnd w:id="{_DOC_ID}"/>')
+
+
+def _drawing(rid: str, n: int) -> str:
+    return (
+        f"<w:r><w:drawing><wp:inline><wp:extent cx=\"4572000\" cy=\"2743200\"/>"
+        f"<wp:docPr id=\"{n}\" name=\"Picture {n}\"/>"
+        f"<a:graphic><a:graphicData uri=\"{PIC_NS}\"><pic:pic><pic:nvPicPr>"
+        f"<pic:cNvPr id=\"{n}\" name=\"fig{n}.png\"/><pic:cNvPicPr/></pic:nvPicPr>"
+        f"<pic:blipFill><a:blip r:embed=\"{rid}\"/></pic:blipFill>"
+        f"<pic:spPr><a:xfrm><a:off x=\"0\" y=\"0\"/><a:ext cx=\"4572000\" cy=\"2743200\"/></a:xfrm>"
+        f"</pic:spPr></pic:pic></a:graphicData></a:graphic></wp:inline></w:drawing></w:r>"
+    )
+
+
+def _math(k: int, quantifier: bool) -> str:
+    if quantifier:
+        inner = "<m:r><m:t>∀</m:t></m:r><m:r><m:t>i∈N</m:t></m:r>"
+    else:
+        inner = (f"<m:sSub><m:e><m:r><m:t>R</m:t></m:r></m:e><m:sub><m:r><m:t>{k}</m:t></m:r></m:sub></m:sSub>"
+                 "<m:r><m:t>=αS+(1−α)H</m:t></m:r>")
+    return f"<w:p><m:oMathPara><m:oMath>{inner}</m:oMath></m:oMathPara></w:p>"
+
+
+def _table(ch: int, n: int) -> str:
+    rows = [("参数", "含义", "取值"), ("N", "节点数", "64"), ("f", "故障节点", "21")]
+    cells = "".join(
+        "<w:tr>" + "".join(f"<w:tc><w:tcPr><w:tcW w:w=\"0\" w:type=\"auto\"/></w:tcPr>{_p(_r(c), 'Compact')}</w:tc>"
+                           for c in row) + "</w:tr>"
+        for row in rows)
+    return (
+        _p(_bookmark(f"tab:c{ch}t{n}", _r(f"表 {ch}.{n}: 实验参数 {ch}-{n}")), "TableCaption")
+        + "<w:tbl><w:tblPr><w:tblStyle w:val=\"Table\"/><w:tblW w:w=\"0\" w:type=\"auto\"/>"
+        "<w:tblLook w:firstRow=\"1\"/></w:tblPr><w:tblGrid><w:gridCol/><w:gridCol/><w:gridCol/></w:tblGrid>"
+        + cells + "</w:tbl>"
+    )
+
+
+def _body_xml(rng: random.Random, spec: ThesisSpec, media: list[str]) -> str:
+    out = [
+        _p(_r("车联网（V2X）环境下，车辆与路侧单元之间需要可信的数据共享机制。本文围绕区块链共识与信誉机制展开研究。")),
+        _p(_r("In the Vehicle-to-Everything (V2X) environment, vehicles and road side units need a "
+              "trustworthy data sharing mechanism.")),
+    ]
+    figs = spec.per_chapter(spec.figures)
+    tabs = spec.per_chapter(spec.tables)
+    eqs = spec.per_chapter(spec.equations)
+    for ch in range(1, spec.chapters + 1):
+        out.append(_p(_bookmark(f"chap:{ch}", _r(f"第{ch}部分研究内容")), "1"))
+        floats = [("figure", i + 1) for i in range(figs[ch - 1])] + [("table", i + 1) for i in range(tabs[ch - 1])]
+        eq_left = eqs[ch - 1]
+        for sec in range(1, spec.sections_per_chapter + 1):
+            out.append(_p(_r(f"研究问题 {ch}.{sec}"), "2"))
+            for _ in range(spec.paragraphs_per_section):
+                text = "".join(_sentence(rng, spec) for _ in range(3))
+                cite = _r(f"[{rng.randrange(spec.references) + 1}]", '<w:vertAlign w:val="superscript"/>')
+                out.append(_p(_r(text) + cite, "BodyText"))
+            share = -(-len(floats) // max(1, spec.sections_per_chapter - sec + 1))
+            for kind, n in floats[:share]:
+                if kind == "figure":
+                    media.append(f"fig_{ch}_{n}.png")
+                    rid = f"rIdImg{len(media)}"
+                    out.append(_p(_bookmark(f"fig:c{ch}f{n}", _drawing(rid, len(media))), "CaptionedFigure"))
+                    out.append(_p(_r(f"图 {ch}.{n}: 系统结构示意 {ch}-{n}"), "ImageCaption"))
+                    out.append(_p(
+                        _r("如图")
+                        + f'<w:hyperlink w:anchor="fig:c{ch}f{n}">{_r(f"{ch}.{n}", "<w:rStyle w:val=\"Hyperlink\"/>")}'
+                        "</w:hyperlink>" + _r("所示，各模块之间通过消息总线交互。"), "BodyText"))
+                else:
+                    out.append(_table(ch, n))
+            floats = floats[share:]
+            take = -(-eq_left // max(1, spec.sections_per_chapter - sec + 1))
+            for k in range(take):
+                out.append(_math(k, quantifier=k % 4 == 3))
+            eq_left -= take
+    out.append(_p(_r("参考文献"), "1"))
+    for i in range(1, spec.references + 1):
+        link = (f'<w:hyperlink r:id="rIdDoi{i}">{_r(f"https://doi.org/10.1000/synthetic.{i}")}</w:hyperlink>')
+        out.append(_p(_bookmark(f"ref-ref{i}", _r(f"[{i}] 作者{i}, Author{i}. Synthetic reference {i} "
+                                                  f"on consensus[J]. 期刊{i % 7}, {2000 + i % 24}. ")) + link,
+                      "Bibliography"))
+    out.append(_p(_r("致谢"), "1"))
+    out.append(_p(_r("感谢导师与课题组同学的帮助。"), "BodyText"))
+    out.append(
+        '<w:sectPr><w:footerReference w:type="default" r:id="rIdFooter1"/>'
+        '<w:pgSz w:w="11906" w:h="16838"/>'
+        '<w:pgMar w:top="1440" w:right="1800" w:bottom="1440" w:left="1800" w:header="851" w:footer="992" w:gutter="0"/>'
+        '<w:docGrid w:type="lines" w:linePitch="312"/></w:sectPr>')
+    return "".join(out)
+
+
+def _document(body: str) -> str:
+    return (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+        f'<w:document xmlns:w="{W_NS}" xmlns:r="{R_NS}" xmlns:m="{M_NS}" xmlns:wp="{WP_NS}" '
+        f'xmlns:a="{A_NS}" xmlns:pic="{PIC_NS}"><w:body>{body}</w:body></w:document>'
+    )
+
+
+_STYLES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    f'<w:styles xmlns:w="{W_NS}">'
+    '<w:style w:type="paragraph" w:default="1" w:styleId="a"><w:name w:val="Normal"/></w:style>'
+    '<w:style w:type="paragraph" w:styleId="1"><w:name w:val="heading 1"/><w:basedOn w:val="a"/>'
+    '<w:pPr><w:outlineLvl w:val="0"/></w:pPr></w:style>'
+    '<w:style w:type="paragraph" w:styleId="2"><w:name w:val="heading 2"/><w:basedOn w:val="a"/>'
+    '<w:pPr><w:outlineLvl w:val="1"/></w:pPr></w:style>'
+    '<w:style w:type="paragraph" w:styleId="3"><w:name w:val="heading 3"/><w:basedOn w:val="a"/></w:style>'
+    '<w:style w:type="paragraph" w:styleId="BodyText"><w:name w:val="Body Text"/><w:basedOn w:val="a"/></w:style>'
+    '<w:style w:type="paragraph" w:styleId="Compact"><w:name w:val="Compact"/><w:basedOn w:val="BodyText"/></w:style>'
+    '<w:style w:type="paragraph" w:styleId="Bibliography"><w:name w:val="Bibliography"/></w:style>'
+    '<w:style w:type="paragraph" w:styleId="CaptionedFigure"><w:name w:val="Captioned Figure"/></w:style>'
+    '<w:style w:type="paragraph" w:styleId="ImageCaption"><w:name w:val="Image Caption"/></w:style>'
+    '<w:style w:type="paragraph" w:styleId="TableCaption"><w:name w:val="Table Caption"/></w:style>'
+    '<w:style w:type="character" w:styleId="Hyperlink"><w:name w:val="Hyperlink"/>'
+    '<w:rPr><w:color w:val="0563C1"/><w:u w:val="single"/></w:rPr></w:style>'
+    '<w:style w:type="table" w:styleId="Table"><w:name w:val="Table"/></w:style>'
+    '</w:styles>'
+)
+
+_NUMBERING = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    f'<w:numbering xmlns:w="{W_NS}"><w:abstractNum w:abstractNumId="0">'
+    + "".join(f'<w:lvl w:ilvl="{i}"><w:start w:val="1"/><w:numFmt w:val="decimal"/>'
+              f'<w:lvlText w:val="%{i + 1}."/></w:lvl>' for i in range(3))
+    + '</w:abstractNum><w:num w:numId="1"><w:abstractNumId w:val="0"/></w:num></w:numbering>'
+)
+
+_SETTINGS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    f'<w:settings xmlns:w="{W_NS}"><w:defaultTabStop w:val="420"/></w:settings>'
+)
+
+_FOOTER = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    f'<w:ftr xmlns:w="{W_NS}"><w:p><w:r><w:t>X</w:t></w:r></w:p></w:ftr>'
+)
+
+
+def _png(width: int = 8, height: int = 6, seed: int = 0) -> bytes:
+    """最小合法 PNG（灰度），内容随 seed 变化以免被当作重复媒体。"""
+    raw = b"".join(b"\x00" + bytes(((x + y + seed) * 17) % 256 for x in range(width)) for y in range(height))
+
+    def chunk(tag: bytes, data: bytes) -> bytes:
+        return struct.pack(">I", len(data)) + tag + data + struct.pack(">I", zlib.crc32(tag + data) & 0xFFFFFFFF)
+
+    return (b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 0, 0, 0, 0))
+            + chunk(b"IDAT", zlib.compress(raw)) + chunk(b"IEND", b""))
+
+
+def _write_package(path: Path, document: str, media: list[str], references: int = 0) -> None:
+    rels = [
+        f'<Relationship Id="rIdStyles" Type="{DOC_REL}/styles" Target="styles.xml"/>',
+        f'<Relationship Id="rIdNumbering" Type="{DOC_REL}/numbering" Target="numbering.xml"/>',
+        f'<Relationship Id="rIdSettings" Type="{DOC_REL}/settings" Target="settings.xml"/>',
+        f'<Relationship Id="rIdFooter1" Type="{DOC_REL}/footer" Target="footer1.xml"/>',
+    ]
+    rels += [f'<Relationship Id="rIdImg{i}" Type="{DOC_REL}/image" Target="media/{name}"/>'
+             for i, name in enumerate(media, start=1)]
+    rels += [f'<Relationship Id="rIdDoi{i}" Type="{DOC_REL}/hyperlink" '
+             f'Target="https://doi.org/10.1000/synthetic.{i}" TargetMode="External"/>'
+             for i in range(1, references + 1)]
+    content_types = (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+        f'<Types xmlns="{CT_NS}">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Default Extension="png" ContentType="image/png"/>'
+        '<Override PartName="/word/document.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.document.main+xml"/>'
+        '<Override PartName="/word/footer1.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.footer+xml"/>'
+        '</Types>'
+    )
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr("[Content_Types].xml", content_types)
+        zf.writestr("_rels/.rels",
+                    f'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n<Relationships xmlns="{PKG_REL_NS}">'
+                    f'<Relationship Id="rId1" Type="{DOC_REL}/officeDocument" Target="word/document.xml"/>'
+                    '</Relationships>')
+        zf.writestr("word/document.xml", document)
+        zf.writestr("word/_rels/document.xml.rels",
+                    f'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+                    f'<Relationships xmlns="{PKG_REL_NS}">{"".join(rels)}</Relationships>')
+        zf.writestr("word/styles.xml", _STYLES)
+        zf.writestr("word/numbering.xml", _NUMBERING)
+        zf.writestr("word/settings.xml", _SETTINGS)
+        zf.writestr("word/footer1.xml", _FOOTER)
+        for i, name in enumerate(media):
+            zf.writestr(f"word/media/{name}", _png(seed=i))
+
+
+def _write_template(path: Path) -> None:
+    body = (
+        _p(_r("研究生学位论文排版格式（版式1）"), ppr='<w:jc w:val="center"/>')
+        + _p(_r("学位论文题目：合成论文"), ppr='<w:jc w:val="center"/>')
+        + _p(_r("日期：　　年　　月　　日"))
+        + _p(_r("学位论文版权使用授权书"))
+        + '<w:sectPr><w:pgSz w:w="11906" w:h="16838"/></w:sectPr>'
+    )
+    _write_package(path, _document(body), [])
+
+
+def _write_caption_profile(path: Path) -> None:
+    body = (
+        _p(_r("图3-1 系统架构", '<w:b/><w:sz w:val="21"/>'), "ImageCaption",
+           '<w:spacing w:before="6" w:after="6"/><w:jc w:val="center"/>')
+        + _p(_r("表3-1 实验参数", '<w:sz w:val="21"/>'), "TableCaption",
+             '<w:spacing w:before="6" w:after="6"/><w:jc w:val="center"/>')
+    )
+    _write_package(path, _document(body), [])
+
+
+def generate(out_dir: Path, spec: ThesisSpec = ThesisSpec()) -> dict[str, Path]:
+    """生成合成论文，返回各产物路径（键：main_tex/flat_tex/intermediate/template/caption_profile/bib）。"""
+    global _DOC_ID  # noqa: PLW0603
+    _DOC_ID = 0
+    out_dir = Path(out_dir)
+    (out_dir / "chapters").mkdir(parents=True, exist_ok=True)
+    (out_dir / "backmatter").mkdir(parents=True, exist_ok=True)
+    (out_dir / "figures").mkdir(parents=True, exist_ok=True)
+
+    rng = random.Random(spec.seed)
+    figs, tabs, eqs = spec.per_chapter(spec.figures), spec.per_chapter(spec.tables), spec.per_chapter(spec.equations)
+    chapters = []
+    for ch in range(1, spec.chapters + 1):
+        tex = _chapter_tex(rng, spec, ch, figs[ch - 1], tabs[ch - 1], eqs[ch - 1])
+        (out_dir / "chapters" / f"chap{ch}.tex").write_text(tex, encoding="utf-8")
+        for n in range(1, figs[ch - 1] + 1):
+            (out_dir / "figures" / f"fig_{ch}_{n}.png").write_bytes(_png(seed=ch * 100 + n))
+        chapters.append(tex)
+
+    preamble = "\\documentclass{swunthesis}\n\\begin{document}\n"
+    inputs = "".join(f"\\input{{chapters/chap{ch}}}\n" for ch in range(1, spec.chapters + 1))
+    main_tex = out_dir / "main.tex"
+    main_tex.write_text(preamble + _abstract_tex() + inputs
+                        + "\\bibliography{backmatter/references}\n\\end{document}\n", encoding="utf-8")
+    flat_tex = out_dir / FLAT_TEX_NAME
+    flat_tex.write_text(preamble + _abstract_tex() + "".join(chapters)
+                        + "\\bibliography{backmatter/references}\n\\end{document}\n", encoding="utf-8")
+    bib = out_dir / "backmatter" / "references.bib"
+    bib.write_text(_bib(spec), encoding="utf-8")
+
+    media: list[str] = []
+    body = _body_xml(random.Random(spec.seed), spec, media)
+    intermediate = out_dir / INTERMEDIATE_NAME
+    _write_package(intermediate, _document(body), media, spec.references)
+    template = out_dir / TEMPLATE_NAME
+    _write_template(template)
+    caption_profile = out_dir / CAPTION_PROFILE_NAME
+    _write_caption_profile(caption_profile)
+    return {
+        "main_tex": main_tex,
+        "flat_tex": flat_tex,
+        "bib": bib,
+        "intermediate": intermediate,
+        "template": template,
+        "caption_profile": caption_profile,
+    }
+
+
+def _parse_args(argv: list[str] | None) -> tuple[Path, ThesisSpec]:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("out_dir", type=Path)
+    defaults = ThesisSpec()
+    parser.add_argument("--chapters", type=int, default=defaults.chapters)
+    parser.add_argument("--figures", type=int, default=defaults.figures)
+    parser.add_argument("--tables", type=int, default=defaults.tables)
+    parser.add_argument("--equations", type=int, default=defaults.equations)
+    parser.add_argument("--refs", type=int, default=defaults.references)
+    parser.add_argument("--mixed", type=float, default=defaults.mixed_ratio,
+                        help="正文段落夹带英文术语的比例（0-1）")
+    parser.add_argument("--seed", type=int, default=defaults.seed)
+    args = parser.parse_args(argv)
+    return args.out_dir, ThesisSpec(
+        chapters=args.chapters, figures=args.figures, tables=args.tables,
+        equations=args.equations, references=args.refs, mixed_ratio=args.mixed, seed=args.seed,
+    )
+
+
+def main(argv: list[str] | None = None) -> int:
+    out_dir, spec = _parse_args(argv)
+    paths = generate(out_dir, spec)
+    for key, path in paths.items():
+        print(f"  [synthetic] {key}: {path}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -14,6 +14,7 @@ import io
 import subprocess
 import xml.etree.ElementTree as ET
 from pathlib import Path
+from typing import BinaryIO
 
 
 # ---------------------------------------------------------------------------
@@ -31,6 +32,18 @@ def collect_ns(xml_bytes: bytes) -> dict[str, str]:
     return ns
 
 
+def parse_with_ns(source: BinaryIO) -> tuple[ET.Element, dict[str, str]]:
+    """从文件对象一次解析出 (根元素, 命名空间映射)，不先读出整份字节。
+
+    结果与 ``collect_ns(data)`` + ``ET.fromstring(data)`` 相同。
+    """
+    ns: dict[str, str] = {}
+    events = ET.iterparse(source, events=("start-ns",))
+    for _event, (prefix, uri) in events:
+        ns[prefix or ""] = uri
+    return events.root, ns
+
+
 def register_ns(ns: dict[str, str]) -> None:
     """将命名空间前缀注册到 ElementTree，使序列化时保留原前缀。"""
     for prefix, uri in ns.items():
@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+构建阶段计时。
+
+post_processor.main 每次开始时 reset BUILD_TIMINGS，并用 stage() 包住各阶段；
+监视模式（modules/watch_mode.py）每轮结束后读取并打印。
+"""
+
+from __future__ import annotations
+
+import time
+from contextlib import contextmanager
+from typing import Iterator
+
+
+class StageTimings:
+    """记录一次构建中各阶段的墙钟耗时（秒，按首次进入的顺序）。"""
+
+    def __init__(self) -> None:
+        self.seconds: dict[str, float] = {}
+
+    def reset(self) -> None:
+        self.seconds = {}
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.seconds[name] = self.seconds.get(name, 0.0) + time.perf_counter() - t0
+
+
+# post_processor.main 记录阶段耗时的进程内实例
+BUILD_TIMINGS = StageTimings()
+
+
+__all__ = [
+    "BUILD_TIMINGS",
+    "StageTimings",
+]
@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Shared, read-only snapshot of a produced DOCX for the gate-loop phase checks.
+
+Every phase module used to re-open the ZIP and re-decode ``word/document.xml``;
+the ``report_generator`` helpers then re-split it with regexes or re-parse it
+with ``parse_xml``.  A ``DocxSnapshot`` does that work once: raw XML parts, the
+parsed tree, the regex paragraph/table split and the paragraph texts.
+
+Loaded snapshots are registered by the identity of their ``doc_xml`` string, so
+helpers that only receive the XML text (``snapshot_root``, ``snapshot_for``)
+reuse the shared tree when handed that exact string and fall back to parsing
+otherwise.  Consumers must treat the tree as read-only: the same snapshot is
+handed to concurrently running phase checks.
+"""
+
+from __future__ import annotations
+
+import re
+import threading
+import zipfile
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+try:
+    from utils.xml_backend import XML_PARSE_ERRORS as _XML_PARSE_ERRORS, parse_xml as _parse_xml
+except ModuleNotFoundError:
+    from scripts.utils.xml_backend import XML_PARSE_ERRORS as _XML_PARSE_ERRORS, parse_xml as _parse_xml
+
+
+_PARAGRAPH_RE = re.compile(r"(<w:p[\s\S]*?</w:p>)")
+_TABLE_RE = re.compile(r"(<w:tbl[\s\S]*?</w:tbl>)")
+_TEXT_RUN_RE = re.compile(r"<w:t[^>]*>([\s\S]*?)</w:t>")
+
+# Keep only the most recent snapshots alive (one per gate-loop attempt is typical).
+_MAX_REGISTERED = 4
+_REGISTRY: OrderedDict[int, "DocxSnapshot"] = OrderedDict()
+_REGISTRY_LOCK = threading.Lock()
+
+
+def split_paragraphs(doc_xml: str) -> list[str]:
+    """Regex paragraph split (Word XML is regular; paragraphs aren't nested)."""
+    return _PARAGRAPH_RE.findall(doc_xml)
+
+
+def split_tables(doc_xml: str) -> list[str]:
+    """Regex table split (tables aren't nested in our use-case)."""
+    return _TABLE_RE.findall(doc_xml)
+
+
+def paragraph_text(p_xml: str) -> str:
+    """Join all ``w:t`` runs of a paragraph (punctuation may be split across runs)."""
+    return "".join(_TEXT_RUN_RE.findall(p_xml))
+
+
+@dataclass(frozen=True)
+class DocxSnapshot:
+    docx_path: str
+    doc_xml: str
+    numbering_xml: str | None
+    root: Any | None
+    parse_error: BaseException | None
+    paragraphs: tuple[str, ...]
+    paragraph_texts: tuple[str, ...]
+    tables: tuple[str, ...]
+
+    @classmethod
+    def load(cls, docx_path: str | Path) -> "DocxSnapshot":
+        """Read and parse the DOCX once.
+
+        ZIP errors (FileNotFoundError, BadZipFile, missing document.xml) propagate.
+        A malformed document.xml is recorded in ``parse_error`` with ``root=None``
+        so that each phase can still report it in its own words.
+        """
+        with zipfile.ZipFile(docx_path, "r") as zf:
+            doc_xml = zf.read("word/document.xml").decode("utf-8", errors="ignore")
+            try:
+                numbering_xml = zf.read("word/numbering.xml").decode("utf-8", errors="ignore")
+            except KeyError:
+                numbering_xml = None
+        return cls.from_xml(doc_xml, numbering_xml, docx_path=str(docx_path))
+
+    @classmethod
+    def from_xml(
+        cls,
+        doc_xml: str,
+        numbering_xml: str | None = None,
+        *,
+        docx_path: str = "",
+    ) -> "DocxSnapshot":
+        """Build (and register) a snapshot from already-decoded XML parts."""
+        root = None
+        parse_error = None
+        try:
+            root = _parse_xml(doc_xml)
+        except _XML_PARSE_ERRORS as exc:
+            parse_error = exc
+        paragraphs = tuple(split_paragraphs(doc_xml))
+        snapshot = cls(
+            docx_path=docx_path,
+            doc_xml=doc_xml,
+            numbering_xml=numbering_xml,
+            root=root,
+            parse_error=parse_error,
+            paragraphs=paragraphs,
+            paragraph_texts=tuple(paragraph_text(p) for p in paragraphs),
+            tables=tuple(split_tables(doc_xml)),
+        )
+        _register(snapshot)
+        return snapshot
+
+
+def _register(snapshot: DocxSnapshot) -> None:
+    with _REGISTRY_LOCK:
+        _REGISTRY[id(snapshot.doc_xml)] = snapshot
+        _REGISTRY.move_to_end(id(snapshot.doc_xml))
+        while len(_REGISTRY) > _MAX_REGISTERED:
+            _REGISTRY.popitem(last=False)
+
+
+def snapshot_for(doc_xml: str) -> DocxSnapshot | None:
+    """Return the registered snapshot whose ``doc_xml`` is this exact string."""
+    snapshot = _REGISTRY.get(id(doc_xml))
+    if snapshot is not None and snapshot.doc_xml is doc_xml:
+        return snapshot
+    return None
+
+
+def snapshot_root(doc_xml: str) -> Any:
+    """Parsed root for ``doc_xml``: the shared snapshot tree when available, else a fresh parse."""
+    snapshot = snapshot_for(doc_xml)
+    if snapshot is not None and snapshot.root is not None:
+        return snapshot.root
+    return _parse_xml(doc_xml)
+
+
+def clear_registry() -> None:
+    """Drop all registered snapshots (tests)."""
+    with _REGISTRY_LOCK:
+        _REGISTRY.clear()
+
+
+__all__ = [
+    "DocxSnapshot",
+    "split_paragraphs",
+    "split_tables",
+    "paragraph_text",
+    "snapshot_for",
+    "snapshot_root",
+    "clear_registry",
+]
@@ -0,0 +1,285 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Incremental re-verification state for the gate loop.
+
+After a Codex fix and rebuild, most of a long thesis is unchanged.  Two levels
+of reuse avoid re-validating it:
+
+- Phase level: each phase declares the OOXML parts it reads (plus extra input
+  files such as the caption-profile reference DOCX).  When the digest of those
+  inputs and of the verifier source equals the digest recorded at the phase's
+  last PASS, the PASS is reused without running the check.
+- Chapter level: chapter-local rules (currently the phase 5 body-text rules)
+  run per main-body segment -- the body blocks from one Heading-1 paragraph up
+  to the next -- and their raw findings are cached by segment digest, so only
+  chapters whose XML changed are re-checked.  Document-global checks (TOC,
+  numbering, cross-chapter sequences) still run whenever their parts change.
+
+State lives next to the build cache (``gate-incremental.json`` in the
+BuildCache directory) and is disabled together with it (SWUN_BUILD_CACHE=0).
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import threading
+import zipfile
+from pathlib import Path
+from typing import Any, Callable, Iterable, NamedTuple
+
+try:
+    from modules.build_cache import BuildCache, builder_source_digest, digest_files, digest_parts
+except ModuleNotFoundError:
+    from scripts.modules.build_cache import BuildCache, builder_source_digest, digest_files, digest_parts
+
+try:
+    from utils.xml_backend import tostring as _tostring
+except ModuleNotFoundError:
+    from scripts.utils.xml_backend import tostring as _tostring
+
+
+# Bump when the state layout or a segment rule's output format changes.
+INCREMENTAL_VERSION = "1"
+STATE_NAME = "gate-incremental.json"
+
+W_NS = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+_DOCUMENT = "word/document.xml"
+
+# OOXML parts each phase reads; None means the whole package (rendered phase 6).
+PHASE_PARTS: dict[int, tuple[str, ...] | None] = {
+    1: (_DOCUMENT, "word/numbering.xml"),
+    2: (_DOCUMENT,),
+    3: (_DOCUMENT,),
+    4: (_DOCUMENT,),
+    5: (_DOCUMENT,),
+    6: None,
+}
+
+_SCRIPT_DIR = Path(__file__).resolve().parents[1]
+_VERIFIER_DIRS = (_SCRIPT_DIR / "verification", _SCRIPT_DIR / "phase_checks")
+_VERIFIER_DIGEST: str | None = None
+
+
+def verifier_source_digest() -> str:
+    """Digest of the verification / phase-check sources and the builder modules they import."""
+    global _VERIFIER_DIGEST  # noqa: PLW0603
+    if _VERIFIER_DIGEST is None:
+        files = [p for d in _VERIFIER_DIRS for p in sorted(d.glob("*.py"))]
+        _VERIFIER_DIGEST = digest_parts(
+            digest_files(files, root=_SCRIPT_DIR), builder_source_digest())
+    return _VERIFIER_DIGEST
+
+
+def part_digests(docx_path: str | Path) -> dict[str, str]:
+    """sha256 of every part in the DOCX package."""
+    digests: dict[str, str] = {}
+    with zipfile.ZipFile(docx_path, "r") as zf:
+        for name in sorted(zf.namelist()):
+            digests[name] = hashlib.sha256(zf.read(name)).hexdigest()
+    return digests
+
+
+# ---------------------------------------------------------------------------
+# Chapter segments
+# ---------------------------------------------------------------------------
+
+class Segment(NamedTuple):
+    digest: str
+    elements: list[Any]
+
+
+def _is_heading1(el: Any) -> bool:
+    if el.tag != f"{{{W_NS}}}p":
+        return False
+    style = el.find(f"{{{W_NS}}}pPr/{{{W_NS}}}pStyle")
+    return style is not None and style.get(f"{{{W_NS}}}val") == "1"
+
+
+def body_segments(root: Any, starts: Callable[[Any], bool] = _is_heading1) -> list[Segment]:
+    """Split the body into segments that each start at an element matching ``starts``.
+
+    ``starts`` defaults to Heading-1 paragraphs; a rule whose state carries over
+    some headings passes a narrower predicate so that every segment can be
+    checked on its own.  The first segment holds whatever precedes the first
+    boundary (cover pages).
+    """
+    body = root.find(f"{{{W_NS}}}body")
+    if body is None:
+        return []
+    groups: list[list[Any]] = [[]]
+    for el in body:
+        if groups[-1] and starts(el):
+            groups.append([])
+        groups[-1].append(el)
+    segments = []
+    for elements in groups:
+        if not elements:
+            continue
+        h = hashlib.sha256()
+        for el in elements:
+            h.update(_tostring(el))
+        segments.append(Segment(h.hexdigest(), elements))
+    return segments
+
+
+class SegmentCache:
+    """Per-check view over cached per-segment rule findings.
+
+    ``entries`` maps rule name -> {segment digest: findings}; findings must be
+    JSON-serializable.  Counters record how many segments were reused / checked.
+    A view is owned by one check (one thread); IncrementalState.segment_cache()
+    hands out private copies and IncrementalState.save() merges them back.
+    """
+
+    def __init__(self, entries: dict[str, dict[str, list]] | None = None) -> None:
+        self.entries = entries if entries is not None else {}
+        self.reused = 0
+        self.checked = 0
+        self.used: dict[str, set[str]] = {}
+
+    def map(self, rule: str, segments: Iterable[Segment], fn: Callable[[Segment], list]) -> list:
+        """Concatenate fn(segment) over segments, reusing cached findings by digest."""
+        bucket = self.entries.setdefault(rule, {})
+        used = self.used.setdefault(rule, set())
+        out: list = []
+        for seg in segments:
+            used.add(seg.digest)
+            found = bucket.get(seg.digest)
+            if found is None:
+                found = fn(seg)
+                bucket[seg.digest] = found
+                self.checked += 1
+            else:
+                self.reused += 1
+            out.extend(found)
+        return out
+
+    def summary(self) -> str | None:
+        total = self.reused + self.checked
+        if not total:
+            return None
+        return f"chapter blocks reused {self.reused}/{total}"
+
+
+# ---------------------------------------------------------------------------
+# Persistent state
+# ---------------------------------------------------------------------------
+
+class IncrementalState:
+    """Last-PASS input digests per phase plus cached segment findings.
+
+    Shared by the parallel phase checks: every read or write of ``passed``,
+    ``segments`` and ``notes`` goes through ``_lock``.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self.passed: dict[str, str] = {}
+        self.segments: dict[str, dict[str, list]] = {}
+        self.notes: dict[int, str] = {}
+        self._parts_memo: dict[tuple[str, int, int], dict[str, str]] = {}
+        self._lock = threading.Lock()
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            data = {}
+        if isinstance(data, dict) and data.get("version") == INCREMENTAL_VERSION:
+            self.passed = dict(data.get("passed") or {})
+            self.segments = dict(data.get("segments") or {})
+
+    @classmethod
+    def for_thesis(cls, thesis_dir: str | Path) -> "IncrementalState | None":
+        """State in the thesis build-cache directory; None when the build cache is disabled."""
+        cache = BuildCache.for_thesis(Path(thesis_dir))
+        if not cache.enabled:
+            return None
+        return cls(cache.cache_dir / STATE_NAME)
+
+    def _parts(self, docx_path: str | Path) -> dict[str, str]:
+        st = Path(docx_path).stat()
+        memo_key = (str(Path(docx_path).resolve()), st.st_size, st.st_mtime_ns)
+        with self._lock:
+            parts = self._parts_memo.get(memo_key)
+        if parts is None:
+            parts = part_digests(docx_path)
+            with self._lock:
+                self._parts_memo = {memo_key: parts}
+        return parts
+
+    def phase_key(
+        self, phase_id: int, docx_path: str | Path, extra: Iterable[str | Path] = ()
+    ) -> str | None:
+        """Digest of everything the phase reads; None when the DOCX cannot be read."""
+        try:
+            parts = self._parts(docx_path)
+        except (OSError, zipfile.BadZipFile):
+            return None
+        names = PHASE_PARTS.get(phase_id)
+        selected = sorted(parts) if names is None else list(names)
+        extra = [Path(p) for p in extra]
+        return digest_parts(
+            INCREMENTAL_VERSION,
+            str(phase_id),
+            verifier_source_digest(),
+            *(f"{n}={parts.get(n, '<missing>')}" for n in selected),
+            digest_files(extra),
+        )
+
+    def reusable(self, phase_id: int, key: str | None) -> bool:
+        with self._lock:
+            return key is not None and self.passed.get(str(phase_id)) == key
+
+    def record(self, phase_id: int, key: str | None, errors: list[str]) -> None:
+        """Remember the input digest of a PASS; forget it on FAIL."""
+        with self._lock:
+            if key is not None and not errors:
+                self.passed[str(phase_id)] = key
+            else:
+                self.passed.pop(str(phase_id), None)
+
+    def set_note(self, phase_id: int, note: str | None) -> None:
+        """Record (or clear) the reuse note shown in the phase's gate record."""
+        with self._lock:
+            if note:
+                self.notes[phase_id] = note
+            else:
+                self.notes.pop(phase_id, None)
+
+    def note(self, phase_id: int) -> str | None:
+        with self._lock:
+            return self.notes.get(phase_id)
+
+    def segment_cache(self) -> SegmentCache:
+        """A private view for one check; merge it back with save([view])."""
+        with self._lock:
+            return SegmentCache({rule: dict(bucket) for rule, bucket in self.segments.items()})
+
+    def save(self, used: Iterable[SegmentCache] = ()) -> None:
+        """Merge the views' findings and persist, keeping only segments seen in those checks."""
+        with self._lock:
+            for view in used:
+                for rule, digests in view.used.items():
+                    bucket = view.entries.get(rule, {})
+                    self.segments[rule] = {d: bucket[d] for d in digests if d in bucket}
+            data = {"version": INCREMENTAL_VERSION, "passed": self.passed,
+                    "segments": self.segments}
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.with_name(self.path.name + ".tmp")
+            tmp.write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
+            tmp.replace(self.path)
+
+
+__all__ = [
+    "INCREMENTAL_VERSION",
+    "STATE_NAME",
+    "PHASE_PARTS",
+    "Segment",
+    "SegmentCache",
+    "IncrementalState",
+    "body_segments",
+    "part_digests",
+    "verifier_source_digest",
+]
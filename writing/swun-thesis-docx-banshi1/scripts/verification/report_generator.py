@@ -16,6 +16,7 @@ import sys
 import tempfile
 import zipfile
 import xml.etree.ElementTree as ET
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 from modules.caption_profile import (
@@ -24,6 +25,39 @@ from modules.caption_profile import (
     profile_signature,
 )
 
+try:
+    from utils.xml_backend import (
+        XML_PARSE_ERRORS as _XML_PARSE_ERRORS,
+        bookmarks_by_prefix as _bookmarks_by_prefix,
+    )
+except ModuleNotFoundError:
+    from scripts.utils.xml_backend import (
+        XML_PARSE_ERRORS as _XML_PARSE_ERRORS,
+        bookmarks_by_prefix as _bookmarks_by_prefix,
+    )
+
+try:
+    from verification.docx_snapshot import (
+        paragraph_text as _paragraph_text,
+        snapshot_for as _snapshot_for,
+        snapshot_root as _snapshot_root,
+        split_paragraphs as _split_paragraphs,
+        split_tables as _split_tables,
+    )
+except ModuleNotFoundError:
+    from scripts.verification.docx_snapshot import (
+        paragraph_text as _paragraph_text,
+        snapshot_for as _snapshot_for,
+        snapshot_root as _snapshot_root,
+        split_paragraphs as _split_paragraphs,
+        split_tables as _split_tables,
+    )
+
+try:
+    from modules.render_cache import pdf_artifact as _pdf_artifact, render_pdf as _render_pdf
+except ModuleNotFoundError:
+    from scripts.modules.render_cache import pdf_artifact as _pdf_artifact, render_pdf as _render_pdf
+
 try:
     from utils.text_utils import normalize_chinese_spaces as _normalize_chinese_spaces
 except ModuleNotFoundError:
@@ -35,20 +69,26 @@ except ModuleNotFoundError:
 
 def _iter_paragraphs(doc_xml: str) -> list[str]:
     # Good enough for checks (Word XML is regular; paragraphs aren't nested).
-    return re.findall(r"(<w:p[\s\S]*?</w:p>)", doc_xml)
+    # A registered DocxSnapshot of this exact string already holds the split.
+    snapshot = _snapshot_for(doc_xml)
+    if snapshot is not None:
+        return list(snapshot.paragraphs)
+    return _split_paragraphs(doc_xml)
 
 
 def _iter_tables(doc_xml: str) -> list[str]:
     # Tables aren't nested in our use-case; regex is sufficient for
     # lightweight validation.
-    return re.findall(r"(<w:tbl[\s\S]*?</w:tbl>)", doc_xml)
+    snapshot = _snapshot_for(doc_xml)
+    if snapshot is not None:
+        return list(snapshot.tables)
+    return _split_tables(doc_xml)
 
 
 def _p_text(p_xml: str) -> str:
     # Join all text runs within a paragraph. This avoids false negatives when punctuation
     # is split across <w:t> nodes.
-    parts = re.findall(r"<w:t[^>]*>([\s\S]*?)</w:t>", p_xml)
-    return "".join(parts)
+    return _paragraph_text(p_xml)
 
 
 def _check_no_forced_break_after_heading(
@@ -90,144 +130,173 @@ def _check_no_forced_break_after_heading(
     return None
 
 
-def _check_blank_pages(docx_path: str) -> list[str]:
-    """Render DOCX to PDF and fail if a page is visually blank except footer page number."""
-    office_bin = shutil.which("soffice") or shutil.which("libreoffice")
-    pdftotext_bin = shutil.which("pdftotext")
-    pdfinfo_bin = shutil.which("pdfinfo")
-    pdftoppm_bin = shutil.which("pdftoppm")
-    if not office_bin or not pdftotext_bin or not pdfinfo_bin:
-        return []
+# Blank-page detection renders at low DPI: a page only needs to be told apart
+# from "white except for the footer", not read.
+_BLANK_PAGE_DPI = 72
+_PAGE_NUMBER_LINE_RE = re.compile(r"[0-9]+|[ivxlcdmIVXLCDM]+")
+_PGM_HEADER_RE = re.compile(br"^P5\s+(?:#.*\s+)*(\d+)\s+(\d+)\s+(\d+)\s", flags=re.MULTILINE)
+
+
+def _normalize_page_text(text: str) -> str:
+    """Join non-empty lines of a page, dropping trailing page-number lines."""
+    lines = [(line or "").strip() for line in text.splitlines()]
+    lines = [line for line in lines if line]
+    while lines and _PAGE_NUMBER_LINE_RE.fullmatch(lines[-1]):
+        lines.pop()
+    return "".join(lines).strip()
+
+
+def _split_pdf_text_pages(text: str) -> list[str]:
+    """Split whole-document pdftotext output into pages (form feed after each page)."""
+    pages = text.split("\f")
+    if pages and not pages[-1].strip():
+        pages.pop()
+    return pages
+
 
-    def _normalize_page_text(text: str) -> str:
-        lines = [(line or "").strip() for line in text.splitlines()]
-        lines = [line for line in lines if line]
-        while lines and re.fullmatch(r"[0-9]+|[ivxlcdmIVXLCDM]+", lines[-1]):
-            lines.pop()
-        return "".join(lines).strip()
-
-    def _page_has_visual_content(pdf_path: str, page_no: int) -> bool | None:
-        if not pdftoppm_bin:
-            return None
-        prefix = os.path.join(tmpdir, f"page-{page_no}")
+def _contiguous_runs(pages: list[int]) -> list[tuple[int, int]]:
+    """Group sorted page numbers into inclusive (first, last) runs."""
+    runs: list[tuple[int, int]] = []
+    for page_no in pages:
+        if runs and page_no == runs[-1][1] + 1:
+            runs[-1] = (runs[-1][0], page_no)
+        else:
+            runs.append((page_no, page_no))
+    return runs
+
+
+def _pgm_has_visual_content(raw: bytes, dpi: int = _BLANK_PAGE_DPI) -> bool | None:
+    """Return whether an 8-bit PGM page has dark pixels outside margins/footer.
+
+    Dark pixels are counted with bytes.translate (C speed) instead of a
+    per-pixel Python loop. The minimum dark-pixel count (200 at 150 DPI)
+    scales with the rendered area.
+    """
+    header = _PGM_HEADER_RE.match(raw)
+    if header is None:
+        return None
+    width = int(header.group(1))
+    height = int(header.group(2))
+    maxval = int(header.group(3))
+    if width <= 0 or height <= 0 or maxval <= 0 or maxval > 255:
+        return None
+    data = raw[header.end():]
+    if len(data) < width * height:
+        return None
+
+    left = int(width * 0.05)
+    right = int(width * 0.95)
+    top = int(height * 0.05)
+    bottom = int(height * 0.90)  # ignore footer page number region
+    light = bytes(range(int(maxval * 0.96), 256))
+    dark_pixels = 0
+    for y in range(top, bottom):
+        row = data[y * width + left:y * width + right]
+        dark_pixels += len(row.translate(None, light))
+    sampled = (bottom - top) * (right - left)
+    min_dark = max(1, int(200 * (dpi / 150) ** 2))
+    return dark_pixels > max(min_dark, int(sampled * 0.0005))
+
+
+def _render_pages_visual_state(
+    pdftoppm_bin: str, pdf_path: str, pages: list[int], outdir: str
+) -> dict[int, bool | None]:
+    """Rasterize the given pages (one pdftoppm call per contiguous run, runs in
+    parallel) and classify each page in a worker pool."""
+    if not pages:
+        return {}
+
+    def _render(run: tuple[int, int]) -> None:
+        first, last = run
         try:
-            rendered = subprocess.run(
+            subprocess.run(
                 [
                     pdftoppm_bin,
-                    "-f",
-                    str(page_no),
-                    "-l",
-                    str(page_no),
+                    "-f", str(first),
+                    "-l", str(last),
+                    "-r", str(_BLANK_PAGE_DPI),
                     "-gray",
-                    "-singlefile",
                     pdf_path,
-                    prefix,
+                    os.path.join(outdir, "page"),
                 ],
                 capture_output=True,
-                timeout=30,
+                timeout=30 + 5 * (last - first + 1),
                 check=False,
             )
         except subprocess.TimeoutExpired:
-            return None
-        if rendered.returncode != 0:
-            return None
-
-        pgm_path = f"{prefix}.pgm"
-        if not os.path.exists(pgm_path):
-            return None
-
-        raw = open(pgm_path, "rb").read()
-        header = re.match(
-    br"^P5\s+(?:#.*\s+)*(\d+)\s+(\d+)\s+(\d+)\s",
-    raw,
-     flags=re.MULTILINE)
-        if header is None:
-            return None
-        width = int(header.group(1))
-        height = int(header.group(2))
-        maxval = int(header.group(3))
-        if width <= 0 or height <= 0 or maxval <= 0:
-            return None
-        data = raw[header.end():]
-        if len(data) < width * height:
-            return None
-        data = data[: width * height]
-
-        left = int(width * 0.05)
-        right = int(width * 0.95)
-        top = int(height * 0.05)
-        bottom = int(height * 0.90)  # ignore footer page number region
-        dark_pixels = 0
-        sampled = 0
-        threshold = int(maxval * 0.96)
-        for y in range(top, bottom):
-            row = data[y * width:(y + 1) * width]
-            crop = row[left:right]
-            sampled += len(crop)
-            dark_pixels += sum(1 for px in crop if px < threshold)
-
-        return dark_pixels > max(200, int(sampled * 0.0005))
-
-    with tempfile.TemporaryDirectory(prefix="swun-blank-page-") as tmpdir:
-        try:
-            result = subprocess.run(
-                [
-                    office_bin,
-                    "--headless",
-                    "--convert-to",
-                    "pdf",
-                    "--outdir",
-                    tmpdir,
-                    docx_path,
-                ],
-                capture_output=True,
-                text=True,
-                timeout=120,
-                check=False,
-            )
-        except (FileNotFoundError, subprocess.TimeoutExpired):
-            return []
-        if result.returncode != 0:
-            return []
-
-        pdf_path = f"{tmpdir}/{re.sub(r'\.docx$',
-    '',
-    os.path.basename(docx_path),
-     flags=re.IGNORECASE)}.pdf"
-        if not os.path.exists(pdf_path):
-            return []
-
-        info = subprocess.run(
-            [pdfinfo_bin, pdf_path],
+            pass
+
+    def _classify(path: str) -> bool | None:
+        with open(path, "rb") as fh:
+            return _pgm_has_visual_content(fh.read())
+
+    workers = min(len(pages), os.cpu_count() or 1)
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        list(pool.map(_render, _contiguous_runs(pages)))
+        # pdftoppm zero-pads page numbers to the width of the last page number.
+        rendered: dict[int, str] = {}
+        for name in os.listdir(outdir):
+            stem, ext = os.path.splitext(name)
+            if ext == ".pgm" and stem.startswith("page-") and stem[5:].isdigit():
+                rendered[int(stem[5:])] = os.path.join(outdir, name)
+        wanted = [p for p in pages if p in rendered]
+        states = dict(zip(wanted, pool.map(_classify, [rendered[p] for p in wanted])))
+    return {page_no: states.get(page_no) for page_no in pages}
+
+
+def _blank_pages_in_pdf(pdf_path: str) -> list[int] | None:
+    """Return PDF page numbers that carry no text and no visual content.
+
+    Text for all pages comes from a single pdftotext call. Only pages without
+    text are rasterized, and they are rendered once at low DPI. Returns None
+    when the poppler tools fail, so the result is not cached.
+    """
+    pdftotext_bin = shutil.which("pdftotext")
+    pdftoppm_bin = shutil.which("pdftoppm")
+    if not pdftotext_bin or not pdftoppm_bin:
+        return None
+    try:
+        page_text = subprocess.run(
+            [pdftotext_bin, pdf_path, "-"],
             capture_output=True,
             text=True,
-            timeout=30,
+            timeout=120,
             check=False,
         )
-        if info.returncode != 0:
-            return []
-        m = re.search(r"^Pages:\s+(\d+)\s*$", info.stdout, flags=re.MULTILINE)
-        if not m:
-            return []
+    except subprocess.TimeoutExpired:
+        return None
+    if page_text.returncode != 0:
+        return None
+
+    textless = [
+        page_no
+        for page_no, text in enumerate(_split_pdf_text_pages(page_text.stdout), start=1)
+        if not _normalize_page_text(text)
+    ]
+    with tempfile.TemporaryDirectory(prefix="swun-blank-page-") as raster_dir:
+        visual = _render_pages_visual_state(pdftoppm_bin, pdf_path, textless, raster_dir)
+    return [page_no for page_no in textless if visual.get(page_no) is False]
 
-        errors: list[str] = []
-        total_pages = int(m.group(1))
-        for page_no in range(1, total_pages + 1):
-            page_text = subprocess.run(
-                [pdftotext_bin, "-f", str(page_no), "-l", str(page_no), pdf_path, "-"],
-                capture_output=True,
-                text=True,
-                timeout=30,
-                check=False,
-            )
-            if page_text.returncode != 0:
-                continue
-            normalized = _normalize_page_text(page_text.stdout)
-            visual_state = _page_has_visual_content(pdf_path, page_no)
-            if not normalized and visual_state is False:
-                errors.append(
-    f"rendered blank page detected at PDF page {page_no}")
-        return errors
+
+def _check_blank_pages(docx_path: str) -> list[str]:
+    """Render DOCX to PDF and fail if a page is visually blank except footer page number.
+
+    The PDF and the blank-page result are cached by content hash
+    (modules/render_cache), so gate-loop retries on an unchanged DOCX skip
+    both the LibreOffice conversion and the page scan.
+    """
+    if not (shutil.which("soffice") or shutil.which("libreoffice") or shutil.which("unoconvert")):
+        return []
+    if not shutil.which("pdftotext") or not shutil.which("pdftoppm"):
+        return []
+
+    thesis_dir = os.path.dirname(os.path.abspath(docx_path))
+    with tempfile.TemporaryDirectory(prefix="swun-blank-page-") as tmpdir:
+        pdf_path = _render_pdf(docx_path, tmpdir)
+        if pdf_path is None:
+            return []
+        blank = _pdf_artifact(pdf_path, "blank-pages", _blank_pages_in_pdf, thesis_dir)
+    return [f"rendered blank page detected at PDF page {page_no}" for page_no in blank or []]
 
 
 def _collect_dotted_fig_table_hyperlinks(
@@ -285,7 +354,7 @@ def _collect_main_body_anchor_hyperlinks(
     doc_xml: str) -> list[tuple[str, str]]:
     """Collect remaining internal anchor hyperlinks in thesis main body."""
     ns = {"w": "http://schemas.openxmlformats.org/wordprocessingml/2006/main"}
-    root = ET.fromstring(doc_xml)
+    root = _snapshot_root(doc_xml)
     out: list[tuple[str, str]] = []
     for el in _iter_main_body_blocks(root, ns):
         for hl in el.findall(".//w:hyperlink", ns):
@@ -322,7 +391,7 @@ def _run_has_hyperlink_style(r: ET.Element, ns: dict[str, str]) -> bool:
 def _collect_main_body_hyperlink_style_runs(doc_xml: str) -> list[str]:
     """Collect runs in main body that still look like hyperlink style."""
     ns = {"w": "http://schemas.openxmlformats.org/wordprocessingml/2006/main"}
-    root = ET.fromstring(doc_xml)
+    root = _snapshot_root(doc_xml)
     out: list[str] = []
 
     for block in _iter_main_body_blocks(root, ns):
@@ -341,7 +410,7 @@ def _collect_main_body_hyperlink_style_runs(doc_xml: str) -> list[str]:
 def _collect_unnumbered_heading5_in_main_body(doc_xml: str) -> list[str]:
     """Collect Heading5 lines in main body that do not start with '(n) '."""
     ns = {"w": "http://schemas.openxmlformats.org/wordprocessingml/2006/main"}
-    root = ET.fromstring(doc_xml)
+    root = _snapshot_root(doc_xml)
     body = root.find("w:body", ns)
     if body is None:
         return []
@@ -423,7 +492,7 @@ def _check_reference_external_hyperlinks(doc_xml: str) -> str | None:
     doi_re = re.compile(
     r"(10\.\d{4,9}/\S+|https?://doi\.org/\S*)",
      re.IGNORECASE)
-    root = ET.fromstring(doc_xml)
+    root = _snapshot_root(doc_xml)
     ref_blocks = _iter_reference_blocks(root, ns)
     if not ref_blocks:
         return None
@@ -471,8 +540,8 @@ def _check_heading5_and_following_body_indent(doc_xml: str) -> list[str]:
     errors: list[str] = []
 
     try:
-        root = ET.fromstring(doc_xml)
-    except ET.ParseError as exc:
+        root = _snapshot_root(doc_xml)
+    except _XML_PARSE_ERRORS as exc:
         return [
     f"failed to parse document.xml when checking Heading5/body indent: {exc}"]
 
@@ -555,11 +624,9 @@ def _iter_anchor_names(el: ET.Element, ns: dict[str, str]) -> list[str]:
     out: list[str] = []
     seen: set[str] = set()
     w_name = f"{{{ns['w']}}}name"
-    for bm in el.findall(".//w:bookmarkStart", ns):
+    for bm in _bookmarks_by_prefix(el, ns, ("fig:", "tab:", "tbl:")):
         name = (bm.get(w_name) or bm.get("name") or "").strip()
-        if not name or name in seen:
-            continue
-        if not name.startswith(("fig:", "tab:", "tbl:")):
+        if not name.startswith(("fig:", "tab:", "tbl:")) or name in seen:
             continue
         seen.add(name)
         out.append(name)
@@ -795,8 +862,8 @@ def _check_caption_profile_alignment(
         return [f"caption profile source invalid: {profile_docx} ({exc})"]
 
     try:
-        root = ET.fromstring(doc_xml)
-    except ET.ParseError as exc:
+        root = _snapshot_root(doc_xml)
+    except _XML_PARSE_ERRORS as exc:
         return [
     f"failed to parse document.xml for caption profile alignment: {exc}"]
 
@@ -824,8 +891,8 @@ def _check_caption_profile_alignment(
 def _check_anchor_caption_rules(doc_xml: str) -> list[str]:
     ns = {"w": "http://schemas.openxmlformats.org/wordprocessingml/2006/main"}
     try:
-        root = ET.fromstring(doc_xml)
-    except ET.ParseError as exc:
+        root = _snapshot_root(doc_xml)
+    except _XML_PARSE_ERRORS as exc:
         return [
     f"failed to parse document.xml for anchor-caption checks: {exc}"]
 
@@ -979,8 +1046,12 @@ def check_phase1_structure(doc: str, num: str) -> list[str]:
         errors.append(
             'missing Arabic page numbering restart (w:pgNumType w:fmt="decimal" w:start="1") for main body')
 
-    paras = _iter_paragraphs(doc)
-    texts = [_p_text(p) for p in paras]
+    snapshot = _snapshot_for(doc)
+    if snapshot is not None:
+        paras, texts = list(snapshot.paragraphs), list(snapshot.paragraph_texts)
+    else:
+        paras = _iter_paragraphs(doc)
+        texts = [_p_text(p) for p in paras]
 
     for h in ("摘要", "Abstract"):
         err = _check_no_forced_break_after_heading(paras, texts, h)
@@ -1168,16 +1239,26 @@ def main() -> int:
         return 2
 
     docx_path = sys.argv[1]
-    with zipfile.ZipFile(docx_path, "r") as zf:
-        doc = zf.read("word/document.xml").decode("utf-8", errors="ignore")
-        num = zf.read("word/numbering.xml").decode("utf-8", errors="ignore")
+    try:
+        from verification.stream_core import STREAM_PHASES, stream_enabled, verify_stream
+    except ModuleNotFoundError:
+        from scripts.verification.stream_core import STREAM_PHASES, stream_enabled, verify_stream
 
     errors: list[str] = []
     errors.extend(_check_blank_pages(docx_path))
-    errors.extend(check_phase1_structure(doc, num))
-    errors.extend(check_phase2_style(doc))
-    errors.extend(check_phase3_caption(doc, docx_path))
-    errors.extend(check_phase4_crossref(doc))
+    if stream_enabled():
+        # Phases 1-4 share one iterparse pass over document.xml.
+        results = verify_stream(docx_path, STREAM_PHASES)
+        for phase_id in STREAM_PHASES:
+            errors.extend(results[phase_id])
+    else:
+        with zipfile.ZipFile(docx_path, "r") as zf:
+            doc = zf.read("word/document.xml").decode("utf-8", errors="ignore")
+            num = zf.read("word/numbering.xml").decode("utf-8", errors="ignore")
+        errors.extend(check_phase1_structure(doc, num))
+        errors.extend(check_phase2_style(doc))
+        errors.extend(check_phase3_caption(doc, docx_path))
+        errors.extend(check_phase4_crossref(doc))
 
     if errors:
         print("EXTRA VERIFY: FAIL")
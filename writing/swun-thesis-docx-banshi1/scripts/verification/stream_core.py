@@ -0,0 +1,1029 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Streaming verification core for phases 1-4.
+
+The ``check_phase*`` functions in ``report_generator`` split the decoded
+``document.xml`` string with regexes (copying every paragraph substring), rerun
+their own regexes over those copies and build full element trees in several
+helpers.  This core makes a single ``ET.iterparse`` pass over the
+``word/document.xml`` stream instead.  Each top-level body block (paragraph,
+table, bookmark, section properties) is built, handed to every registered rule,
+then cleared and detached from the body.  Memory is therefore bounded by the
+largest block plus the compact per-block facts that some rules keep.
+
+Rules are registered per phase with ``@register(phase_id)``.  Within a phase they
+report findings in the same order and wording as the matching ``check_phase*``
+function.  Paragraph texts are joined from the decoded ``w:t`` nodes instead of
+regex captures, so entities are unescaped and ``<w:tab/>`` no longer leaks
+markup into a paragraph's text.
+
+SWUN_VERIFY_STREAM=0 switches the phase scripts back to the string-based checks.
+"""
+
+from __future__ import annotations
+
+import os
+import re
+import zipfile
+import xml.etree.ElementTree as ET
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, IO, Iterable, Iterator
+
+from modules.caption_profile import (
+    extract_caption_profiles,
+    paragraph_signature,
+    profile_signature,
+)
+
+try:
+    from verification.report_generator import (
+        _iter_anchor_names,
+        _normalize_chinese_spaces,
+        _paragraph_has_first_line_indent,
+        _parse_caption_index,
+        _resolve_caption_profile_docx,
+        _run_has_hyperlink_style,
+    )
+except ModuleNotFoundError:
+    from scripts.verification.report_generator import (
+        _iter_anchor_names,
+        _normalize_chinese_spaces,
+        _paragraph_has_first_line_indent,
+        _parse_caption_index,
+        _resolve_caption_profile_docx,
+        _run_has_hyperlink_style,
+    )
+
+
+STREAM_ENV = "SWUN_VERIFY_STREAM"
+
+W_NS = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+M_NS = "http://schemas.openxmlformats.org/officeDocument/2006/math"
+R_NS = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+NS = {"w": W_NS, "r": R_NS}
+
+
+def _w(local: str) -> str:
+    return f"{{{W_NS}}}{local}"
+
+
+W_BODY = _w("body")
+W_P = _w("p")
+W_TBL = _w("tbl")
+W_TC = _w("tc")
+W_R = _w("r")
+W_T = _w("t")
+W_VAL = _w("val")
+W_HYPERLINK = _w("hyperlink")
+W_BOOKMARK_START = _w("bookmarkStart")
+W_BOOKMARK_END = _w("bookmarkEnd")
+
+_EXCLUDED_H1 = {"目录", "摘要", "Abstract", "致谢", "参考文献", "攻读硕士学位期间所取得的相关科研成果"}
+_STOP_H1 = {"参考文献", "致谢", "攻读硕士学位期间所取得的相关科研成果"}
+_REF_STOP_H1 = {"致谢", "攻读硕士学位期间所取得的相关科研成果", "攻读硕士学位期间发表的学术成果"}
+
+
+def stream_enabled() -> bool:
+    """Whether phase scripts should use the streaming core (default: yes)."""
+    return os.environ.get(STREAM_ENV, "1").strip().lower() not in {"0", "false", "no", "off"}
+
+
+def _joined_text(el: Any) -> str:
+    return "".join(t.text or "" for t in el.iter(W_T))
+
+
+# ---------------------------------------------------------------------------
+# Body stream
+# ---------------------------------------------------------------------------
+
+@dataclass
+class StreamContext:
+    docx_path: str
+    numbering_xml: str | None = None
+    body_seen: bool = False
+
+
+def iter_body_blocks(source: IO[bytes], ctx: StreamContext | None = None) -> Iterator[Any]:
+    """Yield each top-level ``w:body`` child once it is fully parsed.
+
+    A yielded element is only valid until the generator resumes: it is then
+    cleared and removed from the body so the tree never holds more than one block.
+    """
+    body = None
+    depth = 0
+    for event, el in ET.iterparse(source, events=("start", "end")):
+        if event == "start":
+            depth += 1
+            if depth == 2 and el.tag == W_BODY:
+                body = el
+                if ctx is not None:
+                    ctx.body_seen = True
+            continue
+        depth -= 1
+        if el is body:
+            body = None
+        elif depth == 2 and body is not None:
+            yield el
+            el.clear()
+            body.remove(el)
+
+
+class Block:
+    """One body block plus the facts every rule needs (computed once)."""
+
+    __slots__ = ("index", "el", "tag", "style", "text", "in_main", "chapter", "in_refs",
+                 "_paragraphs")
+
+    def __init__(self, index: int, el: Any) -> None:
+        self.index = index
+        self.el = el
+        self.tag = el.tag
+        self.style: str | None = None
+        self.text = ""
+        if self.tag == W_P:
+            p_style = el.find("w:pPr/w:pStyle", NS)
+            self.style = p_style.get(W_VAL) if p_style is not None else None
+            self.text = _joined_text(el)
+        self.in_main = False
+        self.chapter: int | None = None
+        self.in_refs = False
+        self._paragraphs: list[tuple[Any, str]] | None = None
+
+    def paragraphs(self) -> list[tuple[Any, str]]:
+        """Every ``w:p`` in the block (table-cell paragraphs included) with its text."""
+        if self._paragraphs is None:
+            self._paragraphs = [(p, _joined_text(p)) for p in self.el.iter(W_P)]
+        return self._paragraphs
+
+
+class _SectionTracker:
+    """Main-body / references state, updated by Heading-1 paragraphs."""
+
+    def __init__(self) -> None:
+        self.in_main = False
+        self.chapter = 0
+        self.in_refs = False
+
+    def update(self, block: Block) -> None:
+        is_refs_heading = False
+        if block.tag == W_P and block.style == "1":
+            text = block.text.strip()
+            if text in _STOP_H1:
+                self.in_main = False
+            elif text and text not in _EXCLUDED_H1:
+                self.in_main = True
+                self.chapter += 1
+            if text == "参考文献":
+                self.in_refs = True
+                is_refs_heading = True
+            elif self.in_refs and text in _REF_STOP_H1:
+                self.in_refs = False
+        block.in_main = self.in_main
+        block.chapter = self.chapter if self.in_main else None
+        block.in_refs = self.in_refs and not is_refs_heading
+
+
+# ---------------------------------------------------------------------------
+# Rule registry
+# ---------------------------------------------------------------------------
+
+class Rule:
+    """One check fed with every body block of a single streaming pass."""
+
+    def __init__(self, ctx: StreamContext) -> None:
+        self.ctx = ctx
+
+    def feed(self, block: Block) -> None:
+        pass
+
+    def finish(self) -> list[str]:
+        return []
+
+
+_RULES: dict[int, list[type[Rule]]] = {}
+
+
+def register(phase_id: int) -> Callable[[type[Rule]], type[Rule]]:
+    """Register a rule for a phase; rules report in registration order."""
+    def deco(cls: type[Rule]) -> type[Rule]:
+        _RULES.setdefault(phase_id, []).append(cls)
+        return cls
+    return deco
+
+
+def registered_rules(phase_id: int) -> list[type[Rule]]:
+    return list(_RULES.get(phase_id, ()))
+
+
+class _Markers:
+    """Presence flags for the legacy whole-document substring checks.
+
+    ``needles`` are searched in text nodes and attribute values, ``names`` are
+    matched against element tags and attribute names, ``values`` are exact
+    (attribute, value) pairs, ``patterns`` are regexes over texts and values.
+    """
+
+    def __init__(
+        self,
+        *,
+        needles: Iterable[str] = (),
+        names: Iterable[str] = (),
+        values: Iterable[tuple[str, str]] = (),
+        patterns: Iterable[re.Pattern[str]] = (),
+    ) -> None:
+        self.needles = set(needles)
+        self.names = set(names)
+        self.values = set(values)
+        self.patterns = list(patterns)
+        self.found: set[Any] = set()
+        self._total = len(self.needles) + len(self.names) + len(self.values) + len(self.patterns)
+
+    def _text(self, s: str) -> None:
+        for needle in self.needles:
+            if needle in s:
+                self.found.add(needle)
+        for pattern in self.patterns:
+            if pattern.search(s):
+                self.found.add(pattern)
+
+    def scan(self, el: Any) -> None:
+        if len(self.found) >= self._total:
+            return
+        for node in el.iter():
+            if node.tag in self.names:
+                self.found.add(node.tag)
+            for key, value in node.attrib.items():
+                if key in self.names:
+                    self.found.add(key)
+                if (key, value) in self.values:
+                    self.found.add((key, value))
+                self._text(value)
+            if node.text:
+                self._text(node.text)
+            if node.tail:
+                self._text(node.tail)
+
+
+# ---------------------------------------------------------------------------
+# Phase 1: structure / pagination
+# ---------------------------------------------------------------------------
+
+@register(1)
+class _StructureMarkers(Rule):
+    def __init__(self, ctx: StreamContext) -> None:
+        super().__init__(ctx)
+        self.markers = _Markers(
+            needles=(" TOC ", "目录"),
+            values=((_w("type"), "page"), (_w("fmt"), "lowerRoman"),
+                    (_w("fmt"), "decimal"), (_w("start"), "1")),
+        )
+
+    def feed(self, block: Block) -> None:
+        self.markers.scan(block.el)
+
+    def finish(self) -> list[str]:
+        found = self.markers.found
+        num = self.ctx.numbering_xml or ""
+        errors: list[str] = []
+        if " TOC " not in found:
+            errors.append("missing Word TOC field (instrText contains ' TOC ')")
+        if "目录" not in found:
+            errors.append("missing TOC title text '目录'")
+        if (_w("type"), "page") not in found:
+            errors.append("missing page breaks (w:br w:type=page)")
+        if "w:abstractNumId=\"0\"" in num and "w:isLgl" not in num:
+            errors.append("missing w:isLgl in numbering.xml (abstractNumId=0)")
+        if (_w("fmt"), "lowerRoman") not in found:
+            errors.append(
+                'missing Roman page numbering (w:pgNumType w:fmt="lowerRoman") for abstracts section')
+        if (_w("fmt"), "decimal") not in found or (_w("start"), "1") not in found:
+            errors.append(
+                'missing Arabic page numbering restart (w:pgNumType w:fmt="decimal" w:start="1") for main body')
+        return errors
+
+
+def _has_page_break(p: Any) -> bool:
+    return any(node.get(_w("type")) == "page" for node in p.iter())
+
+
+class _ForcedBreakAfterHeading(Rule):
+    heading_text = ""
+
+    def __init__(self, ctx: StreamContext) -> None:
+        super().__init__(ctx)
+        self.seen_heading = False
+        self.done = False
+        self.error: str | None = None
+
+    def feed(self, block: Block) -> None:
+        if self.done:
+            return
+        for p, text in block.paragraphs():
+            if not self.seen_heading:
+                self.seen_heading = text.strip() == self.heading_text
+                continue
+            if _has_page_break(p):
+                self.error = f"found explicit page break paragraph right after heading '{self.heading_text}'"
+            elif p.find(".//w:pageBreakBefore", NS) is not None:
+                self.error = f"found pageBreakBefore on paragraph right after heading '{self.heading_text}'"
+            elif not text.strip():
+                continue
+            self.done = True
+            return
+
+    def finish(self) -> list[str]:
+        return [self.error] if self.error else []
+
+
+@register(1)
+class _NoBreakAfterCnAbstract(_ForcedBreakAfterHeading):
+    heading_text = "摘要"
+
+
+@register(1)
+class _NoBreakAfterEnAbstract(_ForcedBreakAfterHeading):
+    heading_text = "Abstract"
+
+
+@register(1)
+class _KeywordLines(Rule):
+    _MARKERS = (("关键词：", "；"), ("Keywords:", ";"))
+
+    def __init__(self, ctx: StreamContext) -> None:
+        super().__init__(ctx)
+        self.index = 0
+        self.prev_text = ""
+        self.present = {m: False for m, _ in self._MARKERS}
+        self.blank_done = {m: False for m, _ in self._MARKERS}
+        self.blank_errors: dict[str, list[str]] = {m: [] for m, _ in self._MARKERS}
+        self.group_errors: dict[str, list[str]] = {}
+
+    def feed(self, block: Block) -> None:
+        for _p, text in block.paragraphs():
+            for marker, sep in self._MARKERS:
+                if marker not in text:
+                    continue
+                self.present[marker] = True
+                if marker not in self.group_errors:
+                    tail = text.split(marker, 1)[1]
+                    self.group_errors[marker] = (
+                        [f"too many keyword separators near '{marker}' (expected 3-4 groups)"]
+                        if tail.count(sep) > 3 else [])
+                if self.blank_done[marker]:
+                    continue
+                if self.index == 0:
+                    self.blank_errors[marker].append(
+                        f"keywords line '{marker}' is the first paragraph; expected a blank line before it")
+                    continue
+                if self.prev_text.strip():
+                    self.blank_errors[marker].append(
+                        f"missing blank line before keywords line '{marker}' (previous paragraph contains text)")
+                self.blank_done[marker] = True
+            self.prev_text = text
+            self.index += 1
+
+    def finish(self) -> list[str]:
+        errors: list[str] = []
+        if not self.present["关键词："]:
+            errors.append("missing Chinese abstract keywords line (expected '关键词：...')")
+        if not self.present["Keywords:"]:
+            errors.append("missing English abstract keywords line (expected 'Keywords: ...')")
+        for marker, _sep in self._MARKERS:
+            errors.extend(self.blank_errors[marker])
+        for marker, _sep in self._MARKERS:
+            errors.extend(self.group_errors.get(marker, []))
+        return errors
+
+
+# ---------------------------------------------------------------------------
+# Phase 2: styles / indentation
+# ---------------------------------------------------------------------------
+
+_H5_PREFIX_RE = re.compile(r"^\(\d+\)\s+")
+_HEADING_STYLES = {"1", "2", "3", "4", "5", "Heading1", "Heading2", "Heading3", "Heading4", "Heading5"}
+_SKIP_SPACE_STYLE_RE = re.compile(r"Heading\d|[1-5]|TOC\d|Title|Subtitle")
+_CITATION_RE = re.compile(r"\[[0-9]{1,3}\]")
+
+
+@register(2)
+class _UnnumberedHeading5(Rule):
+    def __init__(self, ctx: StreamContext) -> None:
+        super().__init__(ctx)
+        self.found: list[str] = []
+
+    def feed(self, block: Block) -> None:
+        if block.tag != W_P or not block.in_main or block.style not in {"Heading5", "5"}:
+            return
+        text = block.text.strip()
+        if text and not _H5_PREFIX_RE.match(text):
+            self.found.append(text)
+
+    def finish(self) -> list[str]:
+        if not self.found:
+            return []
+        sample = ", ".join(repr(t) for t in self.found[:3])
+        return ["found unnumbered Heading5 in main body (expected '(n) ' prefix): " + sample]
+
+
+@register(2)
+class _Heading5Indent(Rule):
+    def __init__(self, ctx: StreamContext) -> None:
+        super().__init__(ctx)
+        self.per_heading: list[list[str]] = []
+        self.pending: list[tuple[int, str]] = []
+
+    def feed(self, block: Block) -> None:
+        if block.tag != W_P:
+            return
+        text = block.text.strip()
+        if self.pending and text:
+            follows_heading = block.style in _HEADING_STYLES
+            indented = _paragraph_has_first_line_indent(block.el, NS)
+            for slot, heading_text in self.pending:
+                if follows_heading:
+                    self.per_heading[slot].append(
+                        f"Heading5 paragraph '{heading_text}' is not followed by a body paragraph")
+                elif not indented:
+                    self.per_heading[slot].append(
+                        f"first content paragraph after Heading5 '{heading_text}' missing first-line indent: '{text}'")
+            self.pending = []
+        if block.style != "Heading5":
+            return
+        heading_text = text or "<EMPTY>"
+        errors: list[str] = []
+        if not _paragraph_has_first_line_indent(block.el, NS):
+            errors.append(f"Heading5 paragraph '{heading_text}' must have first-line indent")
+        self.pending.append((len(self.per_heading), heading_text))
+        self.per_heading.append(errors)
+
+    def finish(self) -> list[str]:
+        if not self.ctx.body_seen:
+            return ["missing w:body when checking Heading5/body indent"]
+        return [e for errors in self.per_heading for e in errors]
+
+
+@register(2)
+class _StyleMarkers(Rule):
+    def __init__(self, ctx: StreamContext) -> None:
+        super().__init__(ctx)
+        self.markers = _Markers(
+            needles=("参考文献", "hangingChars", "vertAlign"),
+            names=(_w("keepNext"), _w("hangingChars"), _w("vertAlign")),
+            patterns=(_CITATION_RE,),
+        )
+
+    def feed(self, block: Block) -> None:
+        self.markers.scan(block.el)
+
+    def finish(self) -> list[str]:
+        found = self.markers.found
+        errors: list[str] = []
+        if _w("keepNext") not in found:
+            errors.append("missing keepNext in document.xml (expected for figure paragraphs)")
+        has_hanging = "hangingChars" in found or _w("hangingChars") in found
+        if "参考文献" in found and not has_hanging:
+            errors.append("missing hanging indent for bibliography entries (w:hangingChars)")
+        has_vert_align = "vertAlign" in found or _w("vertAlign") in found
+        if not has_vert_align and _CITATION_RE not in found:
+            errors.append("no obvious citation markers found (expected [n] possibly superscript)")
+        return errors
+
+
+@register(2)
+class _ChineseSpaces(Rule):
+    def __init__(self, ctx: StreamContext) -> None:
+        super().__init__(ctx)
+        self.issue_count = 0
+        self.samples: list[str] = []
+
+    def feed(self, block: Block) -> None:
+        if _normalize_chinese_spaces is None:
+            return
+        for p, full_text in block.paragraphs():
+            p_style = p.find("w:pPr/w:pStyle", NS)
+            if p_style is not None and _SKIP_SPACE_STYLE_RE.fullmatch(p_style.get(W_VAL) or ""):
+                continue
+            if not full_text or " " not in full_text:
+                continue
+            normalized = _normalize_chinese_spaces(full_text)
+            if normalized == full_text:
+                continue
+            self.issue_count += 1
+            if len(self.samples) < 3:
+                for i, (a, b) in enumerate(zip(full_text, normalized)):
+                    if a != b:
+                        start = max(0, i - 10)
+                        end = min(len(full_text), i + 15)
+                        self.samples.append(repr(full_text[start:end]))
+                        break
+
+    def finish(self) -> list[str]:
+        if not self.issue_count:
+            return []
+        sample_str = ", ".join(self.samples)
+        return [
+            f"found {self.issue_count} paragraphs with Chinese typographic space issues "
+            f"(extra spaces after punctuation or between CJK/Latin): {sample_str}"
+        ]
+
+
+# ---------------------------------------------------------------------------
+# Phase 3: figure / table captions
+# ---------------------------------------------------------------------------
+
+def _has_drawing(el: Any) -> bool:
+    return el.find(".//w:drawing", NS) is not None or el.find(".//w:pict", NS) is not None
+
+
+def _wrapper_figure_caption_lines(block: Any) -> list[str]:
+    lines: list[str] = []
+    for cell in block.iter(W_TC):
+        seen_figure = False
+        for child in list(cell):
+            if child.tag == W_TBL and _has_drawing(child):
+                seen_figure = True
+                continue
+            if child.tag != W_P or not seen_figure:
+                continue
+            text = _joined_text(child).strip()
+            if text.startswith(("图", "Figure")):
+                lines.append(text)
+        if lines:
+            return lines
+    return lines
+
+
+@dataclass(frozen=True)
+class _BlockFacts:
+    tag: str
+    drawing: bool = False
+    anchors: tuple[str, ...] = ()
+    bookmark: str = ""
+    text: str = ""
+    wrapper_lines: tuple[str, ...] = ()
+    chapter: int | None = None
+
+
+@register(3)
+class _AnchorCaptions(Rule):
+    """Anchor placement / caption numbering, replayed over per-block facts."""
+
+    def __init__(self, ctx: StreamContext) -> None:
+        super().__init__(ctx)
+        self.facts: list[_BlockFacts] = []
+        self.start: int | None = None
+        self.end: int | None = None
+        self.was_main = False
+
+    def feed(self, block: Block) -> None:
+        el = block.el
+        i = len(self.facts)
+        if block.tag == W_P and block.style == "1":
+            text = block.text.strip()
+            if text in _STOP_H1 and self.was_main and self.end is None:
+                self.end = i
+            elif text and text not in _EXCLUDED_H1 and self.start is None:
+                self.start = i
+        self.was_main = block.in_main
+        if block.tag in {W_P, W_TBL}:
+            self.facts.append(_BlockFacts(
+                tag=block.tag,
+                drawing=_has_drawing(el),
+                anchors=tuple(_iter_anchor_names(el, NS)),
+                text=block.text.strip(),
+                wrapper_lines=tuple(_wrapper_figure_caption_lines(el)) if block.tag == W_TBL else (),
+                chapter=block.chapter,
+            ))
+        elif block.tag == W_BOOKMARK_START:
+            name = (el.get(_w("name")) or el.get("name") or "").strip()
+            self.facts.append(_BlockFacts(tag=block.tag, bookmark=name, chapter=block.chapter))
+        else:
+            self.facts.append(_BlockFacts(tag=block.tag, chapter=block.chapter))
+
+    def _next_target(self, start: int, end: int, kind: str) -> int | None:
+        fallback: int | None = None
+        for i in range(start, end):
+            fact = self.facts[i]
+            if fact.tag == W_TBL:
+                if kind == "figure" or not fact.drawing:
+                    return i
+                if fallback is None:
+                    fallback = i
+                continue
+            if fact.tag == W_P and kind == "figure" and fact.drawing:
+                return i
+        return fallback
+
+    @staticmethod
+    def _score(kind: str, fact: _BlockFacts, inline: bool) -> int:
+        s = 2 if inline else 1
+        if kind == "figure":
+            if fact.drawing:
+                s += 4
+            if fact.tag == W_TBL:
+                s += 1
+        else:
+            if fact.tag == W_TBL:
+                s += 4
+            if fact.drawing:
+                s -= 2
+        return s
+
+    def _neighbors(self, idx: int, *, before: bool, limit: int = 2) -> list[str]:
+        out: list[str] = []
+        rng = range(idx - 1, -1, -1) if before else range(idx + 1, len(self.facts))
+        for i in rng:
+            fact = self.facts[i]
+            if fact.tag in {W_BOOKMARK_START, W_BOOKMARK_END}:
+                continue
+            if fact.tag != W_P:
+                break
+            if not fact.text:
+                continue
+            out.append(fact.text)
+            if len(out) >= limit:
+                break
+        return out
+
+    def _placements(self) -> tuple[list[tuple[str, str, int]], list[str]]:
+        if self.start is None:
+            return [], []
+        start = self.start
+        end = self.end if self.end is not None else len(self.facts)
+        if end <= start:
+            return [], []
+
+        best: dict[str, tuple[int, int]] = {}
+        errors: list[str] = []
+
+        def kind_of(label: str) -> str:
+            return "figure" if label.startswith("fig:") else "table"
+
+        def offer(label: str, cand: tuple[int, int]) -> None:
+            prev = best.get(label)
+            if prev is None or cand[0] > prev[0]:
+                best[label] = cand
+
+        for i in range(start, end):
+            fact = self.facts[i]
+            if fact.tag not in {W_P, W_TBL}:
+                continue
+            for label in fact.anchors:
+                k = kind_of(label)
+                if k == "table" and fact.tag != W_TBL:
+                    j = self._next_target(i + 1, end, k)
+                    if j is not None:
+                        offer(label, (self._score(k, self.facts[j], False), j))
+                    continue
+                if k == "figure" and not fact.drawing and fact.tag != W_TBL:
+                    continue
+                offer(label, (self._score(k, fact, True), i))
+
+        for i in range(start, end):
+            fact = self.facts[i]
+            if fact.tag != W_BOOKMARK_START or not fact.bookmark.startswith(("fig:", "tab:", "tbl:")):
+                continue
+            k = kind_of(fact.bookmark)
+            j = self._next_target(i + 1, end, k)
+            if j is None:
+                errors.append(f"anchor '{fact.bookmark}' has no following block in main body")
+                continue
+            offer(fact.bookmark, (self._score(k, self.facts[j], False), j))
+
+        placements = [(kind_of(label), label, idx) for label, (_sc, idx) in best.items()]
+        placements.sort(key=lambda x: (x[2], x[1]))
+        return placements, errors
+
+    def finish(self) -> list[str]:
+        placements, errors = self._placements()
+        counters: dict[tuple[int, str], int] = {}
+        for kind, label, block_idx in placements:
+            chapter_no = self.facts[block_idx].chapter
+            if chapter_no is None:
+                continue
+            seq = counters.get((chapter_no, kind), 0) + 1
+            counters[(chapter_no, kind)] = seq
+            before = self._neighbors(block_idx, before=True)
+            after = self._neighbors(block_idx, before=False)
+            if kind == "figure":
+                errors.extend(self._figure_errors(label, block_idx, chapter_no, seq, before, after))
+            else:
+                errors.extend(self._table_errors(label, chapter_no, seq, before, after))
+        return errors
+
+    def _figure_errors(
+        self, label: str, block_idx: int, chapter_no: int, seq: int,
+        before: list[str], after: list[str],
+    ) -> list[str]:
+        kind = "figure"
+        figure_lines = list(self.facts[block_idx].wrapper_lines) or after
+        cn = _parse_caption_index(kind, "cn", figure_lines[0]) if figure_lines else None
+        if cn is None:
+            if any(_parse_caption_index(kind, "cn", t) is not None for t in before):
+                return [f"anchor '{label}' figure caption is above the block (expected below)"]
+            return [f"anchor '{label}' missing figure caption below block"]
+        errors: list[str] = []
+        if cn != (chapter_no, seq):
+            errors.append(
+                f"anchor '{label}' figure caption numbering mismatch: "
+                f"got 图{cn[0]}-{cn[1]}, expected 图{chapter_no}-{seq}")
+        if len(figure_lines) >= 2:
+            en = _parse_caption_index(kind, "en", figure_lines[1])
+            if en is None and re.match(r"^\s*Figure\b", figure_lines[1], flags=re.IGNORECASE):
+                errors.append(
+                    f"anchor '{label}' figure English caption line format invalid: {figure_lines[1]!r}")
+            elif en is not None and en != (chapter_no, seq):
+                errors.append(
+                    f"anchor '{label}' figure English caption numbering mismatch: "
+                    f"got Figure {en[0]}-{en[1]}, expected Figure {chapter_no}-{seq}")
+        return errors
+
+    @staticmethod
+    def _table_errors(
+        label: str, chapter_no: int, seq: int, before: list[str], after: list[str],
+    ) -> list[str]:
+        kind = "table"
+        cn = _parse_caption_index(kind, "cn", before[0]) if before else None
+        if cn is None and len(before) >= 2:
+            cn = _parse_caption_index(kind, "cn", before[1])
+        if cn is None:
+            if any(_parse_caption_index(kind, "cn", t) is not None for t in after):
+                return [f"anchor '{label}' table caption is below the block (expected above)"]
+            return [f"anchor '{label}' missing table caption above block"]
+        errors: list[str] = []
+        if cn != (chapter_no, seq):
+            errors.append(
+                f"anchor '{label}' table caption numbering mismatch: "
+                f"got 表{cn[0]}-{cn[1]}, expected 表{chapter_no}-{seq}")
+        en_candidates = before[:2]
+        en = next((p for p in (_parse_caption_index(kind, "en", t) for t in en_candidates)
+                   if p is not None), None)
+        if en is None:
+            english_like = next(
+                (t for t in en_candidates if re.match(r"^\s*Table\b", t, flags=re.IGNORECASE)), None)
+            if english_like is not None:
+                errors.append(
+                    f"anchor '{label}' table English caption line format invalid: {english_like!r}")
+        elif en != (chapter_no, seq):
+            errors.append(
+                f"anchor '{label}' table English caption numbering mismatch: "
+                f"got Table {en[0]}-{en[1]}, expected Table {chapter_no}-{seq}")
+        return errors
+
+
+@register(3)
+class _CaptionProfileAlignment(Rule):
+    def __init__(self, ctx: StreamContext) -> None:
+        super().__init__(ctx)
+        self.error: str | None = None
+        self.profiles = None
+        self.actual: dict[str, dict[str, object]] = {}
+        profile_docx = _resolve_caption_profile_docx(ctx.docx_path or None)
+        try:
+            self.profiles = extract_caption_profiles(profile_docx)
+        except Exception as exc:
+            self.error = f"caption profile source invalid: {profile_docx} ({exc})"
+
+    def feed(self, block: Block) -> None:
+        if self.profiles is None or len(self.actual) == 2:
+            return
+        for p, text in block.paragraphs():
+            text = text.strip()
+            for kind, prefix in (("figure", "图"), ("table", "表")):
+                if kind not in self.actual and text.startswith(prefix):
+                    self.actual[kind] = paragraph_signature(p, NS)
+
+    def finish(self) -> list[str]:
+        if self.error is not None:
+            return [self.error]
+        errors: list[str] = []
+        for kind in ("figure", "table"):
+            actual = self.actual.get(kind)
+            if actual is None:
+                errors.append(f"missing {kind} caption paragraph for profile comparison")
+                continue
+            expected = profile_signature(self.profiles[kind])
+            if actual != expected:
+                mismatches = [
+                    f"{field}: got {actual[field]!r}, expected {expected[field]!r}"
+                    for field in expected
+                    if actual.get(field) != expected.get(field)
+                ]
+                errors.append(
+                    f"{kind} caption formatting mismatch vs reference profile: " + "; ".join(mismatches))
+        return errors
+
+
+_FIGURE_CAPTION_RE = re.compile(r"图\d+-\d+\s+")
+
+
+def _any_node_text(el: Any, pattern: re.Pattern[str]) -> bool:
+    return any(node.text and pattern.search(node.text) for node in el.iter())
+
+
+@register(3)
+class _FigureCaptionsCentered(Rule):
+    def __init__(self, ctx: StreamContext) -> None:
+        super().__init__(ctx)
+        self.captions = 0
+        self.not_centered = 0
+
+    def feed(self, block: Block) -> None:
+        for p, _text in block.paragraphs():
+            if not _any_node_text(p, _FIGURE_CAPTION_RE):
+                continue
+            self.captions += 1
+            if not any(jc.get(W_VAL) == "center" for jc in p.iter(_w("jc"))):
+                self.not_centered += 1
+
+    def finish(self) -> list[str]:
+        if not self.captions:
+            return ["no numbered figure captions found (expected '图{章}-{序号} ...')"]
+        if self.not_centered:
+            return ["some figure captions are not centered (missing w:jc center)"]
+        return []
+
+
+# ---------------------------------------------------------------------------
+# Phase 4: cross references
+# ---------------------------------------------------------------------------
+
+_DOTTED_RE = re.compile(r"(?<!\d)\d+\.\d+(?!\d)")
+_DOI_RE = re.compile(r"(10\.\d{4,9}/\S+|https?://doi\.org/\S*)", re.IGNORECASE)
+_EQ_NUMBER_RE = re.compile(r"\(\d+-\d+\)")
+
+
+@register(4)
+class _DottedFigTableHyperlinks(Rule):
+    def __init__(self, ctx: StreamContext) -> None:
+        super().__init__(ctx)
+        self.found: list[tuple[str, str]] = []
+
+    def feed(self, block: Block) -> None:
+        for hl in block.el.iter(W_HYPERLINK):
+            anchor = hl.get(_w("anchor")) or ""
+            if not anchor.startswith(("fig:", "tab:", "tbl:")):
+                continue
+            txt = _joined_text(hl).strip()
+            if txt and _DOTTED_RE.search(txt):
+                self.found.append((anchor, txt))
+
+    def finish(self) -> list[str]:
+        if not self.found:
+            return []
+        sample = ", ".join(f"{a}='{t}'" for a, t in self.found[:3])
+        return ["found dotted figure/table hyperlink refs (must use hyphen numbering): " + sample]
+
+
+@register(4)
+class _MainBodyAnchorHyperlinks(Rule):
+    def __init__(self, ctx: StreamContext) -> None:
+        super().__init__(ctx)
+        self.found: list[tuple[str, str]] = []
+
+    def feed(self, block: Block) -> None:
+        if not block.in_main or block.tag not in {W_P, W_TBL}:
+            return
+        for hl in block.el.iter(W_HYPERLINK):
+            anchor = hl.get(_w("anchor"), "") or ""
+            if anchor:
+                self.found.append((anchor, _joined_text(hl).strip() or "<EMPTY>"))
+
+    def finish(self) -> list[str]:
+        if not self.found:
+            return []
+        sample = ", ".join(f"{a}={t!r}" for a, t in self.found[:3])
+        return ["found internal anchor hyperlinks in main body (must be plain text refs): " + sample]
+
+
+@register(4)
+class _MainBodyHyperlinkStyleRuns(Rule):
+    _LIMIT = 20
+
+    def __init__(self, ctx: StreamContext) -> None:
+        super().__init__(ctx)
+        self.found: list[str] = []
+
+    def feed(self, block: Block) -> None:
+        if not block.in_main or block.tag not in {W_P, W_TBL} or len(self.found) >= self._LIMIT:
+            return
+        for r in block.el.iter(W_R):
+            if not _run_has_hyperlink_style(r, NS):
+                continue
+            self.found.append(_joined_text(r).strip() or "<EMPTY>")
+            if len(self.found) >= self._LIMIT:
+                return
+
+    def finish(self) -> list[str]:
+        if not self.found:
+            return []
+        return ["found hyperlink-like style runs in main body: " + ", ".join(repr(t) for t in self.found[:3])]
+
+
+@register(4)
+class _ReferenceDoiHyperlinks(Rule):
+    def __init__(self, ctx: StreamContext) -> None:
+        super().__init__(ctx)
+        self.ref_blocks = 0
+        self.doi_links = 0
+
+    def feed(self, block: Block) -> None:
+        if not block.in_refs or block.tag not in {W_P, W_TBL}:
+            return
+        self.ref_blocks += 1
+        for hl in block.el.iter(W_HYPERLINK):
+            if hl.get(f"{{{R_NS}}}id") and _DOI_RE.search(_joined_text(hl).strip()):
+                self.doi_links += 1
+
+    def finish(self) -> list[str]:
+        if self.ref_blocks and self.doi_links:
+            return [f"references still contain {self.doi_links} DOI external hyperlink(s) (should have been stripped)"]
+        return []
+
+
+@register(4)
+class _EquationNumbers(Rule):
+    def __init__(self, ctx: StreamContext) -> None:
+        super().__init__(ctx)
+        self.math_paras = 0
+        self.numbered = 0
+        self.numbered_quantifier = False
+
+    def feed(self, block: Block) -> None:
+        for p, _text in block.paragraphs():
+            if p.find(f".//{{{M_NS}}}oMathPara") is None:
+                continue
+            self.math_paras += 1
+            if not _any_node_text(p, _EQ_NUMBER_RE):
+                continue
+            self.numbered += 1
+            if any(t.text == "∀" and not t.attrib for t in p.iter(f"{{{M_NS}}}t")):
+                self.numbered_quantifier = True
+
+    def finish(self) -> list[str]:
+        errors: list[str] = []
+        if self.math_paras and not self.numbered:
+            errors.append("no equation numbers found on display-math paragraphs (expected '(章-序号)')")
+        if self.numbered_quantifier:
+            errors.append(
+                "found an equation number on a quantifier-only display math paragraph (should be unnumbered)")
+        return errors
+
+
+# ---------------------------------------------------------------------------
+# Entry point
+# ---------------------------------------------------------------------------
+
+STREAM_PHASES = (1, 2, 3, 4)
+
+
+def verify_stream(
+    docx_path: str | Path, phase_ids: Iterable[int] = STREAM_PHASES
+) -> dict[int, list[str]]:
+    """Run every registered rule of ``phase_ids`` in one pass over document.xml.
+
+    ZIP errors and a missing ``word/numbering.xml`` (phase 1) propagate like the
+    string-based checks; malformed XML is reported as a finding of each phase.
+    """
+    phase_ids = list(phase_ids)
+    unknown = [pid for pid in phase_ids if pid not in STREAM_PHASES]
+    if unknown:
+        raise ValueError(f"phases without streaming rules: {unknown}")
+
+    with zipfile.ZipFile(docx_path, "r") as zf:
+        numbering = None
+        if 1 in phase_ids:
+            numbering = zf.read("word/numbering.xml").decode("utf-8", errors="ignore")
+        ctx = StreamContext(docx_path=str(docx_path), numbering_xml=numbering)
+        rules = {pid: [cls(ctx) for cls in _RULES.get(pid, ())] for pid in phase_ids}
+        active = [rule for pid in phase_ids for rule in rules[pid]]
+        tracker = _SectionTracker()
+        try:
+            with zf.open("word/document.xml") as fh:
+                for index, el in enumerate(iter_body_blocks(fh, ctx)):
+                    block = Block(index, el)
+                    tracker.update(block)
+                    for rule in active:
+                        rule.feed(block)
+        except ET.ParseError as exc:
+            message = f"failed to parse document.xml: {exc}"
+            return {pid: [message] for pid in phase_ids}
+
+    return {pid: [e for rule in rules[pid] for e in rule.finish()] for pid in phase_ids}
+
+
+__all__ = [
+    "STREAM_ENV",
+    "STREAM_PHASES",
+    "Block",
+    "Rule",
+    "StreamContext",
+    "iter_body_blocks",
+    "register",
+    "registered_rules",
+    "stream_enabled",
+    "verify_stream",
+]
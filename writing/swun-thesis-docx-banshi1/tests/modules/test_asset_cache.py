@@ -0,0 +1,129 @@
+"""Tests for asset_cache."""
+
+from __future__ import annotations
+
+import os
+import xml.etree.ElementTree as ET
+import zipfile
+from pathlib import Path
+
+import modules.asset_cache as runtime_asset_cache
+import scripts.modules.asset_cache as asset_cache
+from scripts.modules.build_cache import BuildCache
+from scripts.modules.caption_profile import profile_signature
+from scripts.modules.latex_parser import load_caption_profiles
+from scripts.modules.template_loader import prepend_template_cover_pages
+
+
+W_NS = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+
+
+def _para(text: str, ppr: str = "", rpr: str = "") -> str:
+    return f"<w:p><w:pPr>{ppr}</w:pPr><w:r><w:rPr>{rpr}</w:rPr><w:t>{text}</w:t></w:r></w:p>"
+
+
+def _write_docx(path: Path, paras: list[str]) -> None:
+    doc = f'<w:document xmlns:w="{W_NS}"><w:body>{"".join(paras)}</w:body></w:document>'
+    with zipfile.ZipFile(path, "w") as zf:
+        zf.writestr("word/document.xml", doc)
+
+
+def test_cached_asset_reuses_digest_until_source_changes(tmp_path, monkeypatch) -> None:
+    asset_cache.clear_memo()
+    cache = BuildCache(tmp_path / "cache")
+    src = tmp_path / "template.docx"
+    src.write_bytes(b"v1")
+    builds: list[bytes] = []
+
+    def build():
+        builds.append(src.read_bytes())
+        return {"size": len(builds[-1])}
+
+    def get():
+        return asset_cache.cached_asset(
+            "demo", [src], build, dump=lambda v: v, load=lambda d: d, cache=cache)
+
+    assert get() == {"size": 2}
+    asset_cache.clear_memo()  # 模拟下一次构建：只剩磁盘缓存与清单
+
+    # (size, mtime) 未变时不再读取源文件
+    hashed: list[Path] = []
+    real_sha = asset_cache._sha256_file
+    monkeypatch.setattr(asset_cache, "_sha256_file", lambda p: hashed.append(p) or real_sha(p))
+    assert get() == {"size": 2}
+    assert builds == [b"v1"] and hashed == []
+
+    src.write_bytes(b"v22")
+    os.utime(src, ns=(1, 1))
+    asset_cache.clear_memo()
+    assert get() == {"size": 3}
+    assert builds == [b"v1", b"v22"] and hashed == [src.resolve()]
+
+
+def _clear_memos() -> None:
+    # 业务模块以 modules.* 路径导入 asset_cache，两份模块各有一张进程内缓存表
+    asset_cache.clear_memo()
+    runtime_asset_cache.clear_memo()
+
+
+def test_cover_slice_and_caption_profiles_round_trip(tmp_path) -> None:
+    _clear_memos()
+    cache = BuildCache(tmp_path / "cache")
+    template = tmp_path / "template.docx"
+    _write_docx(template, [
+        _para("研究生学位论文排版格式（版式1）"),
+        _para("封面第二段", '<w:jc w:val="center"/>'),
+        _para("日期：　　年　　月　　日"),
+        _para("模板正文"),
+    ])
+    reference = tmp_path / "reference.docx"
+    _write_docx(reference, [
+        _para("图3-1 架构", '<w:jc w:val="center"/><w:spacing w:before="6"/>',
+              '<w:b/><w:sz w:val="21"/>'),
+        _para("表3-1 参数", '<w:jc w:val="left"/>', '<w:sz w:val="18"/>'),
+    ])
+
+    def prepend() -> list[str]:
+        body = ET.fromstring(f'<w:body xmlns:w="{W_NS}">{_para("摘要")}</w:body>')
+        prepend_template_cover_pages({"w": W_NS}, body, template, cache=cache)
+        return [ET.tostring(el, encoding="unicode") for el in body]
+
+    first = prepend()
+    first_profiles = load_caption_profiles(reference, cache=cache)
+    _clear_memos()
+    assert prepend() == first
+    cached_profiles = load_caption_profiles(reference, cache=cache)
+
+    hits = [(stage, hit) for stage, hit, _ in cache.results]
+    assert hits == [
+        ("asset-cover", False), ("asset-caption-profiles", False),
+        ("asset-cover", True), ("asset-caption-profiles", True),
+    ]
+    assert len(first) == 3 and "日期" not in "".join(first)
+    assert "pageBreakBefore" in first[-1]
+    for kind in ("figure", "table"):
+        assert profile_signature(cached_profiles[kind]) == profile_signature(first_profiles[kind])
+    assert profile_signature(cached_profiles["figure"])["run_sz"] == "21"
+
+
+def test_cached_file_leaves_up_to_date_output_untouched(tmp_path) -> None:
+    asset_cache.clear_memo()
+    cache = BuildCache(tmp_path / "cache")
+    src = tmp_path / "in.docx"
+    src.write_bytes(b"raw")
+    dest = tmp_path / ".normalized.docx"
+    builds: list[Path] = []
+
+    def build(out: Path) -> None:
+        builds.append(out)
+        out.write_bytes(src.read_bytes().upper())
+
+    assert asset_cache.cached_file("norm", [src], dest, build, cache=cache) is False
+    stamp = dest.stat().st_mtime_ns
+    assert asset_cache.cached_file("norm", [src], dest, build, cache=cache) is True
+    assert dest.stat().st_mtime_ns == stamp
+
+    # 输出被删除时从缓存条目恢复，不重新构建
+    dest.unlink()
+    assert asset_cache.cached_file("norm", [src], dest, build, cache=cache) is True
+    assert dest.read_bytes() == b"RAW" and len(builds) == 1
@@ -0,0 +1,61 @@
+"""Tests for batch_builder."""
+
+from __future__ import annotations
+
+import json
+import os
+import subprocess
+from pathlib import Path
+
+from scripts.modules.batch_builder import (
+    plan_workers,
+    read_batch_file,
+    run_batch,
+    write_summary,
+)
+
+
+def fake_build(thesis: Path) -> None:
+    """模块级（可 pickle）的替身构建：写出输出文件，'bad' 目录构建失败。"""
+    print(f"building {thesis.name}")
+    subprocess.run(["echo", "from-subprocess"], check=True)
+    if thesis.name == "bad":
+        raise SystemExit("missing required file: main.tex")
+    (thesis / "main_版式1.docx").write_bytes(str(os.getpid()).encode())
+
+
+def test_batch_file_and_worker_budget(tmp_path) -> None:
+    (tmp_path / "a").mkdir()
+    listing = tmp_path / "dirs.txt"
+    listing.write_text(f"# deadline batch\na\n\n{tmp_path / 'b'}  # absolute\n./a\n", encoding="utf-8")
+    assert read_batch_file(listing) == [tmp_path / "a", tmp_path / "b"]
+
+    assert plan_workers(10, jobs=4, memory_mib=100_000) == 4
+    assert plan_workers(2, jobs=8, memory_mib=100_000) == 2
+    assert plan_workers(10, jobs=8, memory_mib=3000, per_build_mib=1024) == 2
+    assert plan_workers(10, jobs=8, memory_mib=100, per_build_mib=1024) == 1
+
+
+def test_warm_workers_build_every_thesis_and_report_status(tmp_path) -> None:
+    theses = []
+    for name in ("t1", "bad", "t2", "t3"):
+        (tmp_path / name).mkdir()
+        theses.append(tmp_path / name)
+    theses.append(tmp_path / "missing")
+
+    results = run_batch(theses, workers=2, build=fake_build)
+
+    assert [Path(r.thesis).name for r in results] == ["t1", "bad", "t2", "t3", "missing"]
+    assert [r.status for r in results] == ["ok", "failed", "ok", "ok", "failed"]
+    assert results[1].error == "missing required file: main.tex"
+    assert "not found" in results[4].error
+    # 进程复用：4 篇有效论文最多占用 2 个工作进程
+    assert len({r.worker for r in results}) <= 2
+    log = Path(results[0].log).read_text(encoding="utf-8")
+    assert "building t1" in log and "from-subprocess" in log
+    assert results[0].output.endswith("main_版式1.docx")
+
+    summary = tmp_path / "batch-summary.json"
+    write_summary(results, summary, wall_seconds=1.0)
+    data = json.loads(summary.read_text(encoding="utf-8"))
+    assert (data["total"], data["ok"], data["failed"]) == (5, 3, 2)
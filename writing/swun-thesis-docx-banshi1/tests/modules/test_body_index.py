@@ -0,0 +1,87 @@
+"""Tests for body_index."""
+
+from __future__ import annotations
+
+import xml.etree.ElementTree as ET
+
+from scripts.modules.body_index import BodyIndex
+from scripts.modules.pass_engine import Barrier, run_pass_pipeline
+from scripts.modules.post_processor import _reorder_backmatter
+
+
+W_NS = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+NS = {"w": W_NS}
+
+
+def _p(style: str | None, text: str = "", extra: str = "") -> str:
+    ppr = f'<w:pPr><w:pStyle w:val="{style}"/></w:pPr>' if style else ""
+    return f"<w:p>{ppr}<w:r><w:t>{text}</w:t></w:r>{extra}</w:p>"
+
+
+def _body() -> ET.Element:
+    blocks = [
+        _p("1", "摘要"),
+        _p("a", "摘要正文"),
+        _p("1", "绪论"),
+        _p("a", "图片", '<w:bookmarkStart w:id="1" w:name="fig:a"/><w:r><w:drawing/></w:r>'),
+        '<w:bookmarkStart w:id="2" w:name="tab:b"/>',
+        "<w:tbl><w:tr><w:tc>" + _p(None, "单元格") + "</w:tc></w:tr></w:tbl>",
+        _p("1", "方法"),
+        _p("1", "致谢"),
+        _p("a", "感谢"),
+        _p("Heading1", "参考文献"),
+        _p("a", "[1] 文献"),
+    ]
+    return ET.fromstring(f'<w:body xmlns:w="{W_NS}">{"".join(blocks)}</w:body>')
+
+
+def test_block_info_and_main_body_boundaries() -> None:
+    idx = BodyIndex(NS, _body())
+
+    assert idx.main_body_range() == (2, 7)
+    assert idx.chapter_by_index() == {2: 1, 3: 1, 4: 1, 5: 1, 6: 2}
+    assert idx.info(3).has_drawing and idx.info(3).anchors == ("fig:a",)
+    assert idx.info(4).anchors == ("tab:b",)
+    assert idx.info(9).heading_level == 1
+    assert idx.find_h1("致谢") == 7
+    assert idx.first_h1_not_in({"摘要"}) == 2
+
+
+def test_insert_updates_positions_without_recomputing_blocks() -> None:
+    body = _body()
+    idx = BodyIndex(NS, body)
+    cached = idx.info(2)
+
+    new_h1 = ET.fromstring(f'<w:p xmlns:w="{W_NS}"><w:pPr><w:pStyle w:val="1"/></w:pPr>'
+                           "<w:r><w:t>目录</w:t></w:r></w:p>")
+    idx.insert(0, new_h1)
+
+    assert list(body)[0] is new_h1
+    assert idx.info(3) is cached
+    assert idx.index_of(new_h1) == 0
+    assert idx.main_body_range() == (3, 8)
+
+
+def test_pipeline_invalidates_index_after_unsafe_barrier() -> None:
+    body = _body()
+    idx = BodyIndex(NS, body)
+    assert idx.find_h1("方法") == 6
+
+    def rename() -> None:
+        body[6].find(".//w:t", NS).text = "实验"
+
+    run_pass_pipeline(NS, body, [Barrier("rename", rename)], index=idx)
+
+    assert idx.find_h1("方法") is None
+    assert idx.find_h1("实验") == 6
+
+
+def test_reorder_backmatter_through_shared_index() -> None:
+    body = _body()
+    idx = BodyIndex(NS, body)
+
+    _reorder_backmatter(NS, body, index=idx)
+
+    texts = ["".join(t.text or "" for t in el.iter(f"{{{W_NS}}}t")) for el in body]
+    assert texts[7:] == ["参考文献", "[1] 文献", "致谢", "感谢"]
+    assert [idx.text(i) for i in range(7, len(idx))] == texts[7:]
@@ -0,0 +1,100 @@
+"""Tests for build_cache."""
+
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+
+from scripts.modules.build_cache import (
+    MAX_ENTRIES_PER_STAGE,
+    BuildCache,
+    digest_parts,
+    graphics_digest,
+    tex_sources_digest,
+)
+
+
+def test_fetch_misses_then_hits_after_store(tmp_path: Path) -> None:
+    cache = BuildCache(tmp_path / "cache")
+    src = tmp_path / "out.docx"
+    src.write_bytes(b"docx-bytes")
+    dest = tmp_path / "restored.docx"
+
+    assert cache.fetch("pandoc", "k1", dest, suffix=".docx") is False
+    cache.store("pandoc", "k1", src, suffix=".docx")
+    assert cache.fetch("pandoc", "k1", dest, suffix=".docx") is True
+
+    assert dest.read_bytes() == b"docx-bytes"
+    assert cache.report() == "pandoc=miss pandoc=hit"
+
+
+def test_disabled_cache_never_hits(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv("SWUN_BUILD_CACHE", "0")
+    cache = BuildCache.for_thesis(tmp_path)
+    cache.store_text("flat", "k", "\\chapter{绪论}", suffix=".tex")
+
+    assert cache.fetch_text("flat", "k", suffix=".tex") is None
+    assert not (tmp_path / ".swun_build_cache").exists()
+    assert cache.report() == "disabled"
+
+
+def test_store_prunes_old_entries(tmp_path: Path) -> None:
+    cache = BuildCache(tmp_path)
+    for i in range(MAX_ENTRIES_PER_STAGE + 2):
+        cache.store_text("flat", f"k{i}", str(i))
+
+    assert len(list((tmp_path / "flat").iterdir())) == MAX_ENTRIES_PER_STAGE
+
+
+def test_tex_digest_tracks_chapter_edits_and_ignores_hidden_files(tmp_path: Path) -> None:
+    (tmp_path / "chapters").mkdir()
+    chapter = tmp_path / "chapters" / "ch1.tex"
+    chapter.write_text("\\chapter{绪论}", encoding="utf-8")
+    before = tex_sources_digest(tmp_path)
+
+    (tmp_path / ".main.flat.tex").write_text("generated", encoding="utf-8")
+    assert tex_sources_digest(tmp_path) == before
+
+    chapter.write_text("\\chapter{引言}", encoding="utf-8")
+    assert tex_sources_digest(tmp_path) != before
+
+
+def test_digest_parts_is_boundary_sensitive() -> None:
+    assert digest_parts("ab", "c") != digest_parts("a", "bc")
+
+
+def test_per_stage_limits_and_prune_keeps_referenced_keys(tmp_path: Path) -> None:
+    cache = BuildCache(tmp_path)
+    for i in range(10):
+        cache.store_text("pandoc-shard", f"k{i}", str(i), max_entries=None)
+    assert len(list((tmp_path / "pandoc-shard").iterdir())) == 10
+
+    cache.prune("pandoc-shard", keep={f"k{i}" for i in range(7)}, max_entries=1)
+    left = sorted(p.stem for p in (tmp_path / "pandoc-shard").iterdir())
+    assert left[:7] == [f"k{i}" for i in range(7)]
+    assert len(left) == 8
+
+
+def test_graphics_digest_tracks_referenced_images_outside_media(tmp_path: Path) -> None:
+    figures = tmp_path / "experiments" / "ch4_v2" / "results" / "figures"
+    figures.mkdir(parents=True)
+    png = figures / "acc.png"
+    png.write_bytes(b"v1")
+    flat = "\\includegraphics[width=0.8\\textwidth]{experiments/ch4_v2/results/figures/acc.png}"
+    before = graphics_digest(flat, tmp_path)
+
+    (tmp_path / "media").mkdir()
+    (tmp_path / "media" / "unrelated.png").write_bytes(b"x")
+    assert graphics_digest(flat, tmp_path) == before
+
+    png.write_bytes(b"v2")
+    assert graphics_digest(flat, tmp_path) != before
+
+
+def test_graphics_digest_sees_new_file_for_extensionless_target(tmp_path: Path) -> None:
+    flat = "\\includegraphics{arch}"
+    before = graphics_digest(flat, tmp_path)
+    (tmp_path / "figures").mkdir()
+    (tmp_path / "figures" / "arch.png").write_bytes(b"png")
+    assert graphics_digest(flat, tmp_path) != before
@@ -0,0 +1,113 @@
+"""Tests for figure_raster."""
+
+from __future__ import annotations
+
+import os
+from pathlib import Path
+
+from scripts.modules import figure_raster
+from scripts.modules.build_cache import MAX_ENTRIES_PER_STAGE, BuildCache
+from scripts.modules.figure_raster import png_resolution_digest, rasterize_pdf_graphics
+
+
+def fake_rasterize(pdf: Path, target: Path, dpi: int) -> None:
+    """模块级（可 pickle）的替身栅格化：PNG 内容由 PDF 内容与 DPI 决定。"""
+    target.write_bytes(pdf.read_bytes() + f"|{dpi}|{os.getpid()}".encode())
+
+
+FLAT = "\n".join([
+    r"\includegraphics[width=0.8\linewidth]{figures/a.pdf}",
+    r"\includegraphics{figures/b.pdf}",
+    r"\includegraphics{figures/a.pdf}",
+    r"\includegraphics{figures/c.pdf}",
+    r"\includegraphics{figures/ch4/d.pdf}",
+    r"\includegraphics{figures/e.pdf}",
+    r"\includegraphics{figures/photo.jpg}",
+])
+
+
+def _thesis(root: Path) -> None:
+    fig = root / "figures"
+    (fig / "ch4").mkdir(parents=True)
+    for name in ("a", "b", "c"):
+        (fig / f"{name}.pdf").write_bytes(f"%PDF {name}".encode())
+    (fig / "ch4" / "d.pdf").write_bytes(b"%PDF d")
+    alt = root / "experiments" / "ch4_v2" / "results" / "figures"
+    alt.mkdir(parents=True)
+    (alt / "d.png").write_bytes(b"exported d")
+    hand = fig / "c.png"
+    hand.write_bytes(b"hand-exported c")
+    pdf_mtime = (fig / "c.pdf").stat().st_mtime_ns
+    os.utime(hand, ns=(pdf_mtime + 10**9, pdf_mtime + 10**9))
+
+
+def test_missing_and_stale_pngs_are_rasterized_and_cached(tmp_path) -> None:
+    root = tmp_path / "thesis"
+    _thesis(root)
+    cache = BuildCache(tmp_path / "cache")
+    tool = ("fake", fake_rasterize)
+    before = png_resolution_digest(FLAT, root)
+
+    first = rasterize_pdf_graphics(FLAT, root, dpi=150, cache=cache, workers=2, rasterizer=tool)
+    assert first.graphics == ["figures/a.pdf", "figures/b.pdf", "figures/c.pdf",
+                              "figures/ch4/d.pdf", "figures/e.pdf"]
+    assert first.rasterized == ["figures/a.pdf", "figures/b.pdf"]
+    assert first.up_to_date == ["figures/c.pdf", "figures/ch4/d.pdf"]
+    assert first.missing_source == ["figures/e.pdf"]
+    assert (root / "figures/a.png").read_bytes().startswith(b"%PDF a|150|")
+    assert (root / "figures/c.png").read_bytes() == b"hand-exported c"
+    assert png_resolution_digest(FLAT, root) != before
+
+    second = rasterize_pdf_graphics(FLAT, root, dpi=150, cache=cache, rasterizer=tool)
+    assert second.regenerated == []
+
+    # PDF 内容变化 → 重新栅格化；PNG 被删 → 从缓存恢复
+    (root / "figures/a.pdf").write_bytes(b"%PDF a v2")
+    os.utime(root / "figures/a.pdf", ns=(1, 1))
+    (root / "figures/b.png").unlink()
+    third = rasterize_pdf_graphics(FLAT, root, dpi=150, cache=cache, rasterizer=tool)
+    assert third.rasterized == ["figures/a.pdf"]
+    assert third.restored == ["figures/b.pdf"]
+    assert (root / "figures/a.png").read_bytes().startswith(b"%PDF a v2|150|")
+
+    # DPI 变化只影响本阶段生成的 PNG，手工导出的 c.png 保持不变
+    fourth = rasterize_pdf_graphics(FLAT, root, dpi=300, cache=cache, rasterizer=tool)
+    assert fourth.rasterized == ["figures/a.pdf", "figures/b.pdf"]
+    assert (root / "figures/c.png").read_bytes() == b"hand-exported c"
+
+
+def test_without_rasterizer_missing_pngs_are_reported(tmp_path, monkeypatch, capsys) -> None:
+    root = tmp_path / "thesis"
+    _thesis(root)
+    monkeypatch.setattr(figure_raster, "find_rasterizer", lambda: None)
+
+    report = rasterize_pdf_graphics(FLAT, root, dpi=150, cache=None)
+
+    assert set(report.failed) == {"figures/a.pdf", "figures/b.pdf"}
+    assert not (root / "figures/a.png").exists()
+    assert "FAILED figures/a.pdf: no rasterizer available" in capsys.readouterr().out
+
+
+def test_cache_keeps_every_referenced_figure(tmp_path, capsys) -> None:
+    root = tmp_path / "thesis"
+    (root / "figures").mkdir(parents=True)
+    names = [f"f{i}" for i in range(MAX_ENTRIES_PER_STAGE + 3)]
+    for name in names:
+        (root / "figures" / f"{name}.pdf").write_bytes(f"%PDF {name}".encode())
+    flat = "\n".join(rf"\includegraphics{{figures/{name}.pdf}}" for name in names)
+    cache = BuildCache(tmp_path / "cache")
+    tool = ("fake", fake_rasterize)
+
+    first = rasterize_pdf_graphics(flat, root, dpi=150, cache=cache, workers=1, rasterizer=tool)
+    assert len(first.rasterized) == len(names)
+    assert len(list((tmp_path / "cache" / "raster").iterdir())) == len(names)
+
+    # 全部 PNG 被清理后应整体从缓存恢复，不再重新栅格化
+    for name in names:
+        (root / "figures" / f"{name}.png").unlink()
+    capsys.readouterr()
+    second = rasterize_pdf_graphics(flat, root, dpi=150, cache=cache, workers=1, rasterizer=tool)
+    assert second.rasterized == []
+    assert len(second.restored) == len(names)
+    cache_lines = [ln for ln in capsys.readouterr().out.splitlines() if "[cache]" in ln]
+    assert cache_lines == [f"  [cache] raster: {len(names)}/{len(names)} hit"]
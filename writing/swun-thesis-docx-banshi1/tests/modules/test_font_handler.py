@@ -0,0 +1,78 @@
+"""Tests for font_handler."""
+
+from __future__ import annotations
+
+import xml.etree.ElementTree as ET
+
+from scripts.modules.font_handler import (
+    contains_cjk,
+    normalize_ascii_run_fonts,
+    split_and_normalize_run_fonts_pass,
+    split_mixed_script_runs,
+    split_script_segments,
+)
+from scripts.modules.pass_engine import run_visitor_passes
+
+
+W_NS = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+NS = {"w": W_NS}
+
+
+def _body() -> ET.Element:
+    xml = (
+        f'<w:body xmlns:w="{W_NS}">'
+        '<w:p><w:r w:rsidR="00A1"><w:rPr><w:rFonts w:eastAsia="宋体" w:hint="eastAsia"/>'
+        "<w:sz w:val=\"24\"/></w:rPr><w:t>基于GPU的ResNet50模型, 共 3 层。</w:t></w:r>"
+        "<w:r><w:t>纯中文</w:t></w:r>"
+        '<w:hyperlink w:anchor="x"><w:r><w:t>图3.2</w:t></w:r></w:hyperlink>'
+        "<w:r><w:tab/><w:t>Table 1</w:t></w:r></w:p>"
+        "<w:tbl><w:tr><w:tc><w:p><w:r><w:t>数据集CIFAR</w:t></w:r></w:p></w:tc></w:tr></w:tbl>"
+        "</w:body>"
+    )
+    return ET.fromstring(xml)
+
+
+def _texts(p: ET.Element) -> list[str]:
+    return [t.text or "" for t in p.findall("w:r/w:t", NS)]
+
+
+def test_split_script_segments_alternates_kinds() -> None:
+    assert split_script_segments("基于GPU的ResNet50模型") == [
+        ("cjk", "基于"),
+        ("ascii", "GPU"),
+        ("cjk", "的"),
+        ("ascii", "ResNet50"),
+        ("cjk", "模型"),
+    ]
+    assert split_script_segments("") == []
+    assert contains_cjk("abc한") and not contains_cjk("abc，")
+
+
+def test_fused_pass_matches_split_then_normalize() -> None:
+    expected = _body()
+    split_mixed_script_runs(NS, expected)
+    normalize_ascii_run_fonts(NS, expected)
+
+    actual = _body()
+    run_visitor_passes(NS, actual, [split_and_normalize_run_fonts_pass(NS)])
+
+    assert ET.tostring(actual) == ET.tostring(expected)
+    first = actual.find("w:p", NS)
+    assert _texts(first)[:6] == ["基于", "GPU", "的", "ResNet50", "模型", ", "]
+
+
+def test_fused_pass_sets_latin_fonts_only_on_ascii_segments() -> None:
+    body = _body()
+    run_visitor_passes(NS, body, [split_and_normalize_run_fonts_pass(NS)])
+    runs = body.find("w:p", NS).findall("w:r", NS)
+
+    cjk_fonts = runs[0].find("w:rPr/w:rFonts", NS)
+    latin_fonts = runs[1].find("w:rPr/w:rFonts", NS)
+    assert cjk_fonts.get(f"{{{W_NS}}}ascii") is None
+    assert cjk_fonts.get(f"{{{W_NS}}}eastAsia") == "宋体"
+    assert latin_fonts.get(f"{{{W_NS}}}ascii") == "Times New Roman"
+    assert latin_fonts.get(f"{{{W_NS}}}eastAsia") is None
+    # 每个片段拥有独立的 rPr，且保留原 run 属性与字号
+    assert runs[1].find("w:rPr", NS) is not runs[3].find("w:rPr", NS)
+    assert runs[1].get(f"{{{W_NS}}}rsidR") == "00A1"
+    assert runs[1].find("w:rPr/w:sz", NS) is not None
@@ -1,4 +1,210 @@
 """Tests for latex_parser."""
+
+from __future__ import annotations
+
+import re
+
 import pytest
 
-# Tests will be added in subsequent phases
+import scripts.modules.latex_parser as latex_parser
+from scripts.modules.latex_parser import CaptionMeta
+from scripts.utils.text_utils import normalize_chinese_double_quotes
+
+
+AUX = r"""
+\newlabel{fig:arch}{{3-1}{12}}
+\newlabel{eq:loss}{{4.2}{20}}
+\newlabel{sec:intro}{{1.1}{2}}
+\newlabel{alg:main}{{1}{8}}
+"""
+
+FLAT = r"""\documentclass{swunthesis}
+\newcolumntype{Y}{>{\centering\arraybackslash}X}
+\begin{document}
+\begin{titlepage}
+姓名：\ul\{张三\}
+\end{titlepage}
+\cnkeywords{区块链；共识算法，车联网}
+\enkeywords{Blockchain; Consensus,
+  Vehicular Network}
+如图~\ref{fig:arch}所示，见式~\eqref{eq:loss}与\ref{eq:loss}，以及第\ref{sec:intro}节和\ref{fig:missing}。
+其中 $a \bmod p
+$ 成立，\<tag> 与 50\% 在文本中。
+这里是"中文引号"的例子。
+\begin{equation}
+  y = f(x) \label{eq:loss}
+\end{equation}
+\begin{equation*}
+  z = 1
+\end{equation*}
+\[ w = 2 \]
+\begin{align}
+  a &= b \\[2pt]
+  c &= d
+\end{align}
+\begin{algorithm}[H]
+\caption{共识流程 \ref{fig:arch}}\label{alg:main}
+\begin{algorithmic}[1]
+\REQUIRE 区块 $B$
+\STATE 初始化 \ref{eq:loss}
+\IF{$x > 0$}
+\STATE $y \gets x$
+\ENDIF
+\RETURN $y$
+\end{algorithmic}
+\end{algorithm}
+\begin{figure}[htbp]
+\IfFileExists{figures/a.pdf}{\includegraphics[width=0.5\linewidth]{figures/a.pdf}}%
+  {\fbox{missing}}
+\IfFileExists{figures/none.pdf}{\includegraphics{figures/none.pdf}}{\fbox{no figure}}
+\bilingualcaption{系统架构}{System architecture}
+\label{fig:sys}
+\end{figure}
+\begin{figure}[htbp]
+\begin{subfigure}[b]{0.45\linewidth}
+\includegraphics{figures/b.pdf}
+\caption{子图一}\label{fig:sub1}
+\end{subfigure}
+\begin{subfigure}[b]{0.45\linewidth}
+\includegraphics{figures/c.pdf}
+\caption{子图二}
+\label{fig:sub2}
+\end{subfigure}
+\caption{父图}\label{fig:parent}
+\end{figure}
+如图\ref{fig:sub1}和图\ref{fig:sub2}所示，另见图\ref{fig:sub2}。
+\begin{table}[htbp]
+\caption{实验参数}\label{tab:params}
+\begin{tabularx}{\linewidth}{lYY}
+a & b & c \\
+\end{tabularx}
+\end{table}
+\begin{table*}
+\bilingualcaption{对比}{Comparison}
+\label{tab:cmp}
+\begin{tabular}{p{3cm}|p{0.3\linewidth}c}
+x & y & z \\
+\end{tabular}
+\end{table*}
+\begin{table}
+\caption{无宽度}\label{tab:auto}
+\begin{tabular}{lcr}
+1 & 2 & 3 \\
+\end{tabular}
+\end{table}
+\printbibliography[heading=bibintoc]
+\end{document}
+"""
+
+
+@pytest.fixture
+def thesis_root(tmp_path, monkeypatch):
+    (tmp_path / "main.aux").write_text(AUX, encoding="utf-8")
+    (tmp_path / "figures").mkdir()
+    (tmp_path / "figures" / "a.png").write_bytes(b"")
+    (tmp_path / "figures" / "b.png").write_bytes(b"")
+    monkeypatch.setattr(latex_parser, "ROOT", tmp_path)
+    return tmp_path
+
+
+def _preprocess_sequentially(s: str) -> str:
+    """逐个整串改写的参考实现（单遍改写之前 preprocess_latex 的调用链）。"""
+    s = s.replace("\\<", "<")
+    s = re.sub(r"\\printbibliography\s*(\[[^\]]*\])?", "", s, flags=re.MULTILINE)
+    s = s.replace("\\begin{titlepage}", "").replace("\\end{titlepage}", "")
+    s = re.sub(r"\\ul\\{[^}]*\\}", "__________", s)
+    s = re.sub(r"(\\[bp]?mod)\s+([A-Za-z])\s*\n", r"\1{\2}\n", s)
+    s = latex_parser.resolve_latex_refs(
+        s, latex_parser.parse_aux_labels(latex_parser.ROOT / "main.aux"))
+    s = latex_parser.convert_algorithms_to_plain_text(s)
+    s = latex_parser.expand_custom_column_types(s)
+    s = latex_parser.expand_if_file_exists(s)
+    s = latex_parser.flatten_subfigures(s)
+    s = latex_parser.prefer_png_for_docx_images(s)
+    return normalize_chinese_double_quotes(s)
+
+
+def test_single_pass_preprocess_matches_sequential_rewrites(thesis_root) -> None:
+    out = latex_parser.preprocess_latex(FLAT)
+    assert out == _preprocess_sequentially(FLAT)
+
+    # 抽查各规则确实生效
+    assert "titlepage" not in out and "printbibliography" not in out
+    assert "姓名：__________" in out
+    assert "如图3-1所示，见式(4-2)与(4-2)，以及第1.1节和\\ref{fig:missing}" in out
+    assert "$a \\bmod{p}\n$" in out
+    assert "\\textbf{算法 1} 共识流程 3-1\\label{alg:main}" in out
+    assert "\\textrm{1:} 初始化 (4-2)" in out
+    assert "\\includegraphics[width=0.5\\linewidth]{figures/a.png}" in out
+    assert "\\fbox{no figure}" in out and "\\fbox{missing}" not in out
+    assert "subfigure" not in out and "子图一" not in out
+    assert "如图\\ref{fig:parent}所示，另见图\\ref{fig:parent}" in out
+    assert "\\begin{tabularx}{\\linewidth}{lXX}" in out
+    assert "newcolumntype" not in out
+    assert "“中文引号”" in out
+
+
+def test_unresolved_experiment_pdf_blocks_build(thesis_root) -> None:
+    flat = "\\includegraphics{figures/ch4/fig_4_1.pdf}\n"
+    with pytest.raises(RuntimeError, match="figures/ch4/fig_4_1.pdf"):
+        latex_parser.preprocess_latex(flat)
+
+
+def test_scan_latex_metadata_collects_all_extractors(thesis_root) -> None:
+    flat = latex_parser.preprocess_latex(FLAT)
+    meta = latex_parser.scan_latex_metadata(flat)
+
+    assert meta.caption_meta == {
+        "fig:sys": CaptionMeta("figure", "fig:sys", "系统架构", "System architecture", "bilingualcaption"),
+        "fig:parent": CaptionMeta("figure", "fig:parent", "父图", None, "caption"),
+        "tab:params": CaptionMeta("table", "tab:params", "实验参数", None, "caption"),
+        "tab:cmp": CaptionMeta("table", "tab:cmp", "对比", "Comparison", "bilingualcaption"),
+        "tab:auto": CaptionMeta("table", "tab:auto", "无宽度", None, "caption"),
+    }
+    # \\[2pt] 是换行参数，不是 \[ 显示公式
+    assert meta.display_math_flags == [True, False, False, True]
+    assert meta.keywords == ("区块链；共识算法，车联网", "Blockchain; Consensus, Vehicular Network")
+    assert meta.table_col_specs == {
+        "tab:params": [0.0, -1.0, -1.0],
+        "tab:cmp": [0.2, 0.3, 0.0],
+    }
+
+    # 子图已在预处理中展平；未预处理的源码上同一扫描给出子图 → 父图映射
+    assert meta.subfigure_parents == {}
+    assert latex_parser.scan_latex_metadata(FLAT).subfigure_parents == {
+        "fig:sub1": "fig:parent", "fig:sub2": "fig:parent"}
+
+    assert latex_parser.extract_caption_meta(flat) == meta.caption_meta
+    assert latex_parser.extract_display_math_number_flags(flat) == meta.display_math_flags
+    assert latex_parser.extract_keywords(flat) == meta.keywords
+    assert latex_parser.parse_latex_table_col_specs(flat) == meta.table_col_specs
+
+
+def test_caption_errors_report_block_lines() -> None:
+    flat = (
+        "\n\\begin{figure}\n\\caption{a}\n\\end{figure}\n"
+        "\\begin{table}\n\\bilingualcaption{中}{ }\\label{tab:x}\n\\end{table}\n"
+        "\\begin{table}\\caption{b}\\label{tab:x}\\end{table}\n"
+    )
+    with pytest.raises(RuntimeError) as exc:
+        latex_parser.extract_caption_meta(flat)
+    assert str(exc.value).splitlines()[1:] == [
+        "  - figure block at line 2: missing \\label{...}",
+        "  - table block at line 5: bilingualcaption English title is empty for label 'tab:x'",
+        "  - duplicate label in figure/table environments: tab:x",
+    ]
+    # 非严格模式下其余元数据照常返回
+    meta = latex_parser.scan_latex_metadata(flat, strict=False)
+    assert len(meta.caption_errors) == 3
+
+
+def test_metadata_scan_ignores_commented_commands() -> None:
+    flat = (
+        "\\cnkeywords{甲；乙}\n% \\cnkeywords{示例}\n"
+        "\\begin{figure}\n\\caption{长标题%\n 续}\\label{fig:a}\n\\end{figure}\n"
+        "% \\begin{equation} x \\end{equation}\n"
+    )
+    meta = latex_parser.scan_latex_metadata(flat)
+    assert meta.keywords == ("甲；乙", None)
+    assert meta.caption_meta["fig:a"].cn_title == "长标题 续"
+    assert meta.display_math_flags == []
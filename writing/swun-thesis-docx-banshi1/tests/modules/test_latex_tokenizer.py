@@ -0,0 +1,42 @@
+"""Tests for latex_tokenizer."""
+
+from __future__ import annotations
+
+from scripts.modules.latex_tokenizer import LatexScanner, LineIndex, tokenize
+
+
+def test_tokens_respect_escapes_comments_and_env_stack() -> None:
+    src = "\\begin{figure}\\label{a} 50\\% % \\label{hidden}\n\\\\[2pt]\\[x\\]\\end{figure}\\ref{b}"
+    toks = [(t.kind, t.name, t.envs) for t in tokenize(src)]
+    assert toks == [
+        ("begin", "figure", ()),
+        ("cmd", "label", ("figure",)),
+        ("sym", "%", ("figure",)),
+        ("comment", "%", ("figure",)),
+        ("sym", "\\", ("figure",)),
+        ("sym", "[", ("figure",)),
+        ("sym", "]", ("figure",)),
+        ("end", "figure", ()),
+        ("cmd", "ref", ()),
+    ]
+
+
+def test_command_filter_and_skip_regions() -> None:
+    src = "\\textbf{x}\\ref{a}\\IfFileExists{p}{\\ref{b}}{\\ref{c}}\\ref{d}\n\\label{e}"
+    scanner = LatexScanner(src, ("ref", "label", "IfFileExists"))
+    seen = []
+    for tok in scanner:
+        seen.append(src[tok.end:tok.end + 3])
+        if tok.name == "IfFileExists":
+            false_branch = src.index("{\\ref{c}}")
+            scanner.skip(false_branch, false_branch + len("{\\ref{c}}"))
+    assert seen == ["{a}", "{p}", "{b}", "{d}", "{e}"]
+    assert scanner.line_at(src.index("\\label")) == 2
+
+
+def test_line_index_bisect_lookup() -> None:
+    src = "a\nbc\n\nd"
+    index = LineIndex(src)
+    assert [index.line_at(i) for i in range(len(src))] == [1, 1, 2, 2, 2, 3, 4]
+    # 乱序查询同样正确（不依赖单调递增）
+    assert index.line_at(len(src) - 1) == 4 and index.line_at(0) == 1
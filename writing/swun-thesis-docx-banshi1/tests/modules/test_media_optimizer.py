@@ -0,0 +1,111 @@
+"""Tests for media_optimizer."""
+
+from __future__ import annotations
+
+import io
+import struct
+import zipfile
+import zlib
+
+import pytest
+
+from scripts.modules.media_optimizer import optimize_docx_media, recompress_png
+
+
+W_NS = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+WP_NS = "http://schemas.openxmlformats.org/drawingml/2006/wordprocessingDrawing"
+A_NS = "http://schemas.openxmlformats.org/drawingml/2006/main"
+R_NS = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+PKG_NS = "http://schemas.openxmlformats.org/package/2006/relationships"
+CT_NS = "http://schemas.openxmlformats.org/package/2006/content-types"
+
+
+def _png(width: int, height: int, seed: int, level: int = 1) -> bytes:
+    rows = b"".join(
+        b"\x00" + bytes((x * seed + y) % 256 for x in range(width)) for y in range(height))
+
+    def chunk(kind: bytes, body: bytes) -> bytes:
+        return struct.pack(">I", len(body)) + kind + body + struct.pack(">I", zlib.crc32(kind + body))
+
+    ihdr = struct.pack(">IIBBBBB", width, height, 8, 0, 0, 0, 0)
+    return (b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", ihdr)
+            + chunk(b"IDAT", zlib.compress(rows, level)) + chunk(b"IEND", b""))
+
+
+def _drawing(rid: str, cx: int, cy: int) -> str:
+    return (f'<w:p><w:r><w:drawing><wp:inline><wp:extent cx="{cx}" cy="{cy}"/>'
+            f'<a:graphic><a:graphicData><a:blip r:embed="{rid}"/></a:graphicData></a:graphic>'
+            "</wp:inline></w:drawing></w:r></w:p>")
+
+
+def _docx(path, png_a: bytes, png_b: bytes) -> None:
+    ns = f'xmlns:w="{W_NS}" xmlns:wp="{WP_NS}" xmlns:a="{A_NS}" xmlns:r="{R_NS}"'
+    doc = (f"<w:document {ns}><w:body>"
+           + _drawing("rId1", 914400, 914400) + _drawing("rId2", 457200, 457200)
+           + _drawing("rId3", 914400, 914400) + "</w:body></w:document>")
+    rels = (f'<Relationships xmlns="{PKG_NS}">'
+            f'<Relationship Id="rId1" Type="{R_NS}/image" Target="media/image1.png"/>'
+            f'<Relationship Id="rId2" Type="{R_NS}/image" Target="media/image2.png"/>'
+            f'<Relationship Id="rId3" Type="{R_NS}/image" Target="media/image3.png"/>'
+            f'<Relationship Id="rId9" Type="{R_NS}/header" Target="header1.xml"/>'
+            "</Relationships>")
+    hdr = f"<w:hdr {ns}>" + _drawing("rId1", 100, 100) + "</w:hdr>"
+    hdr_rels = (f'<Relationships xmlns="{PKG_NS}">'
+                f'<Relationship Id="rId1" Type="{R_NS}/image" Target="/word/media/image2.png"/>'
+                "</Relationships>")
+    ct = (f'<Types xmlns="{CT_NS}"><Default Extension="png" ContentType="image/png"/>'
+          '<Override PartName="/word/media/image2.png" ContentType="image/png"/></Types>')
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr("[Content_Types].xml", ct)
+        zf.writestr("word/document.xml", doc)
+        zf.writestr("word/_rels/document.xml.rels", rels)
+        zf.writestr("word/header1.xml", hdr)
+        zf.writestr("word/_rels/header1.xml.rels", hdr_rels)
+        zf.writestr("word/media/image1.png", png_a, compress_type=zipfile.ZIP_STORED)
+        zf.writestr("word/media/image2.png", png_a, compress_type=zipfile.ZIP_STORED)
+        zf.writestr("word/media/image3.png", png_b, compress_type=zipfile.ZIP_STORED)
+
+
+def test_recompress_png_is_lossless() -> None:
+    png = _png(200, 120, seed=3)
+    packed = recompress_png(png)
+    assert packed is not None and len(packed) < len(png)
+    idat = lambda data: zlib.decompress(data[data.index(b"IDAT") + 4:data.index(b"IEND") - 8])  # noqa: E731
+    assert idat(packed) == idat(png)
+    assert recompress_png(packed) is None
+    assert recompress_png(b"GIF89a") is None
+
+
+def test_duplicates_are_merged_and_relationships_rewritten(tmp_path) -> None:
+    src, out = tmp_path / "in.docx", tmp_path / "out.docx"
+    png_a, png_b = _png(200, 120, seed=3), _png(150, 90, seed=7)
+    _docx(src, png_a, png_b)
+
+    report = optimize_docx_media(src, out, dpi=96, workers=2)
+
+    assert report.deduplicated == {"word/media/image2.png": "word/media/image1.png"}
+    assert (report.media_before, report.media_after) == (3, 2)
+    assert 0 < report.bytes_after < report.bytes_before
+    with zipfile.ZipFile(out) as zf:
+        assert zf.testzip() is None
+        assert "word/media/image2.png" not in zf.namelist()
+        rels = zf.read("word/_rels/document.xml.rels").decode()
+        assert rels.count('Target="media/image1.png"') == 2
+        assert 'Target="media/image3.png"' in rels
+        assert 'Target="media/image1.png"' in zf.read("word/_rels/header1.xml.rels").decode()
+        assert "image2.png" not in zf.read("[Content_Types].xml").decode()
+        assert zf.read("word/document.xml") == zipfile.ZipFile(src).read("word/document.xml")
+
+
+def test_images_are_resampled_to_display_size(tmp_path) -> None:
+    Image = pytest.importorskip("PIL.Image")
+    src, out = tmp_path / "in.docx", tmp_path / "out.docx"
+    _docx(src, _png(400, 400, seed=3), _png(50, 50, seed=7))
+
+    report = optimize_docx_media(src, out, dpi=96, workers=1)
+
+    assert report.resampled == ["word/media/image1.png"]
+    with zipfile.ZipFile(out) as zf:
+        # 1 英寸 @ 96 dpi，两处引用取较大的显示尺寸
+        assert Image.open(io.BytesIO(zf.read("word/media/image1.png"))).size == (96, 96)
+        assert Image.open(io.BytesIO(zf.read("word/media/image3.png"))).size == (50, 50)
@@ -0,0 +1,168 @@
+"""Tests for pandoc_shards."""
+
+from __future__ import annotations
+
+import json
+
+import pytest
+
+from scripts.modules import pandoc_shards
+from scripts.modules.build_cache import MAX_ENTRIES_PER_STAGE, BuildCache
+from scripts.modules.pandoc_shards import (
+    SHARD_BEGIN_MARK,
+    SHARD_END_MARK,
+    build_shard_sources,
+    chapter_skeleton,
+    macro_definitions,
+    merge_shard_asts,
+    select_shard_blocks,
+    shard_workers_from_env,
+    split_flat_tex,
+)
+
+
+FLAT = r"""\documentclass{ctexbook}
+\begin{document}
+\begin{abstract}摘要内容\end{abstract}
+\chapter{绪论}\label{chap:intro}
+研究背景，见图\ref{fig:arch}。
+\section{研究现状}
+正文段落。
+% \chapter{被注释的章}
+\chapter{方法}
+\begin{figure}
+\includegraphics{figures/arch.png}
+\caption{系统架构}\label{fig:arch}
+\end{figure}
+方法正文。
+\end{document}
+"""
+
+
+def _para(text: str) -> dict:
+    return {"t": "Para", "c": [{"t": "Str", "c": text}]}
+
+
+def test_split_flat_tex_cuts_at_uncommented_chapters() -> None:
+    parts = split_flat_tex(FLAT)
+    assert parts is not None
+    head, front, chapters, tail = parts
+
+    assert head.endswith("\\begin{document}")
+    assert "摘要内容" in front
+    assert len(chapters) == 2
+    assert chapters[0].lstrip().startswith("\\chapter{绪论}")
+    assert "被注释的章" in chapters[0]
+    assert tail.startswith("\\end{document}")
+
+
+def test_split_flat_tex_without_chapters_returns_none() -> None:
+    assert split_flat_tex("\\begin{document}正文\\end{document}") is None
+
+
+def test_chapter_skeleton_keeps_numbering_context_only() -> None:
+    chapters = split_flat_tex(FLAT)[2]
+
+    first = chapter_skeleton(chapters[0])
+    assert "\\chapter{绪论}\\label{chap:intro}" in first
+    assert "\\section{研究现状}" in first
+    assert "正文段落" not in first
+
+    second = chapter_skeleton(chapters[1])
+    assert "\\caption{系统架构}\\label{fig:arch}" in second
+    assert "方法正文" not in second
+
+
+def test_each_shard_has_marked_own_content_and_other_skeletons() -> None:
+    sources = build_shard_sources(FLAT)
+    assert sources is not None
+    assert len(sources) == 3
+
+    ch1 = sources[1]
+    own = ch1.split(SHARD_BEGIN_MARK)[1].split(SHARD_END_MARK)[0]
+    assert "研究背景" in own
+    assert "方法正文" not in ch1
+    # 后续章节的骨架保留，保证前向引用可解析
+    assert "\\label{fig:arch}" in ch1.split(SHARD_END_MARK)[1]
+    assert ch1.rstrip().endswith("\\end{document}")
+
+
+def test_macro_definitions_reach_later_shards() -> None:
+    flat = r"""\documentclass{ctexbook}
+\begin{document}
+\newcommand{\sys}{SWUN-Sys}
+\chapter{绪论}
+\DeclareMathOperator*{\argmax}{arg\,max}
+\def\vect#1{\mathbf{#1}}
+% \newcommand{\ignored}{x}
+\newcommand\loss[2][x]{L(#1, #2)}
+本章正文 \sys{}。
+\chapter{方法}
+$\argmax_{\theta} \loss{\vect{w}}$，\sys{}。
+\end{document}
+"""
+    sources = build_shard_sources(flat)
+    assert sources is not None
+    before = sources[2].split(SHARD_BEGIN_MARK)[0]
+    assert "\\newcommand{\\sys}{SWUN-Sys}" in before
+    assert "\\DeclareMathOperator*{\\argmax}{arg\\,max}" in before
+    assert "\\def\\vect#1{\\mathbf{#1}}" in before
+    assert "\\newcommand\\loss[2][x]{L(#1, #2)}" in before
+    assert "ignored" not in before
+    assert "本章正文" not in before
+
+    # 无法解析的宏定义：不分片，由调用方回退整篇转换
+    assert macro_definitions("\\newcommand{\\broken}{x") is None
+    assert build_shard_sources(flat.replace("{L(#1, #2)}", "{L(#1, #2)")) is None
+
+
+def test_merge_keeps_only_blocks_between_markers_in_order() -> None:
+    front = {
+        "pandoc-api-version": [1, 23],
+        "meta": {"title": {"t": "MetaInlines", "c": []}},
+        "blocks": [_para(SHARD_BEGIN_MARK), _para("摘要"), _para(SHARD_END_MARK), _para("骨架")],
+    }
+    chapter = {
+        "pandoc-api-version": [1, 23],
+        "meta": {},
+        "blocks": [_para("骨架"), _para(SHARD_BEGIN_MARK), _para("绪论"), _para(SHARD_END_MARK)],
+    }
+
+    merged = merge_shard_asts([front, chapter])
+
+    assert merged["meta"] == front["meta"]
+    assert [b["c"][0]["c"] for b in merged["blocks"]] == ["摘要", "绪论"]
+
+
+def test_select_shard_blocks_requires_markers() -> None:
+    with pytest.raises(RuntimeError):
+        select_shard_blocks({"blocks": [_para("正文")]})
+
+
+def test_shard_workers_from_env(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.delenv("SWUN_PANDOC_SHARDS", raising=False)
+    assert shard_workers_from_env() == 0
+    monkeypatch.setenv("SWUN_PANDOC_SHARDS", "3")
+    assert shard_workers_from_env() == 3
+    monkeypatch.setenv("SWUN_PANDOC_SHARDS", "auto")
+    assert shard_workers_from_env() >= 1
+
+
+def test_shard_cache_keeps_every_chapter(tmp_path, monkeypatch) -> None:
+    n = MAX_ENTRIES_PER_STAGE + 2
+    chapters = "".join(f"\\chapter{{第{i}章}}\n正文{i}。\n" for i in range(n))
+    flat = f"\\begin{{document}}\n{chapters}\\end{{document}}\n"
+    converted: list[str] = []
+
+    def fake_latex_to_json(source: str, _cwd) -> str:
+        converted.append(source)
+        return json.dumps({"blocks": [_para(SHARD_BEGIN_MARK), _para(SHARD_END_MARK)]})
+
+    monkeypatch.setattr(pandoc_shards, "_latex_to_json", fake_latex_to_json)
+    monkeypatch.setattr(pandoc_shards.subprocess, "run", lambda *a, **k: None)
+    cache = BuildCache(tmp_path / "cache")
+
+    for _ in range(2):
+        assert pandoc_shards.convert_sharded(flat, tmp_path / "out.docx", [], tmp_path, 2, cache)
+    # 前置部分 + n 章，第二次全部命中
+    assert len(converted) == n + 1
@@ -0,0 +1,82 @@
+"""Tests for part_store."""
+
+from __future__ import annotations
+
+import xml.etree.ElementTree as ET
+
+from scripts.modules.footer_handler import replace_wps_footers
+from scripts.modules.header_handler import add_thesis_headers
+from scripts.modules.part_store import PartStore
+
+
+W_NS = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+R_NS = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+PKG_NS = "http://schemas.openxmlformats.org/package/2006/relationships"
+CT_NS = "http://schemas.openxmlformats.org/package/2006/content-types"
+NS = {"w": W_NS, "r": R_NS}
+
+
+def _package() -> dict[str, bytes]:
+    # 两个 section 共用 footer1（封面需空页脚 → 触发拆分），且都没有 headerReference
+    sect = '<w:sectPr><w:footerReference w:type="default" r:id="rId1"/></w:sectPr>'
+    doc = (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        f'<w:document xmlns:w="{W_NS}" xmlns:r="{R_NS}"><w:body>'
+        f"<w:p><w:pPr>{sect}</w:pPr></w:p>"
+        f"<w:p><w:r><w:t>正文</w:t></w:r></w:p>{sect}"
+        "</w:body></w:document>"
+    )
+    rels = (
+        f'<Relationships xmlns="{PKG_NS}">'
+        f'<Relationship Id="rId1" Type="{R_NS}/footer" Target="footer1.xml"/>'
+        f'<Relationship Id="rId2" Type="{R_NS}/footer" Target="footer2.xml"/>'
+        "</Relationships>"
+    )
+    ct = f'<Types xmlns="{CT_NS}"><Default Extension="xml" ContentType="application/xml"/></Types>'
+    ftr = f'<w:ftr xmlns:w="{W_NS}"><w:p/></w:ftr>'
+    return {
+        "[Content_Types].xml": ct.encode(),
+        "word/document.xml": doc.encode(),
+        "word/_rels/document.xml.rels": rels.encode(),
+        "word/footer1.xml": ftr.encode(),
+        "word/footer2.xml": ftr.encode(),
+        "word/fontTable.xml": b"<fonts/>",
+    }
+
+
+def test_footer_and_header_stages_share_live_trees() -> None:
+    store = PartStore(_package())
+    doc_root = store.tree("word/document.xml")
+
+    replace_wps_footers(store)
+    add_thesis_headers(store)
+
+    # document / rels / Content_Types 各只解析一次，且仍是同一棵活动树
+    assert store.parses == 3
+    assert store.tree("word/document.xml") is doc_root
+
+    out = store.serialize_dirty()
+    assert store.serializations == 3
+    assert "word/fontTable.xml" not in out
+
+    doc = ET.fromstring(out["word/document.xml"])
+    sects = doc.findall(".//w:sectPr", NS)
+    footers = [s.find("w:footerReference", NS).get(f"{{{R_NS}}}id") for s in sects]
+    headers = [s.find("w:headerReference", NS).get(f"{{{R_NS}}}id") for s in sects]
+    assert footers == ["rId2", "rId1"]  # 封面改指空闲 footer2
+    assert headers == ["rId3", "rId4"]  # 新建页眉注册在同一份 rels 上
+
+    rels = ET.fromstring(out["word/_rels/document.xml.rels"])
+    assert {r.get("Target") for r in rels} == {
+        "footer1.xml", "footer2.xml", "header1.xml", "header2.xml"}
+    ct = ET.fromstring(out["[Content_Types].xml"])
+    assert {o.get("PartName") for o in ct.iter(f"{{{CT_NS}}}Override")} == {
+        "/word/header1.xml", "/word/header2.xml"}
+    assert {"word/header1.xml", "word/header2.xml"} <= set(out)
+
+
+def test_legacy_file_data_dict_is_updated_in_place() -> None:
+    file_data = _package()
+    replace_wps_footers(file_data, file_data["word/document.xml"])
+    assert b"PAGE" in file_data["word/footer1.xml"]
+    assert b'r:id="rId2"' in file_data["word/document.xml"]
@@ -0,0 +1,186 @@
+"""Tests for pass_engine."""
+
+from __future__ import annotations
+
+import copy
+import xml.etree.ElementTree as ET
+
+from scripts.modules.font_handler import (
+    normalize_ascii_run_fonts,
+    normalize_bibliography_run_style,
+    normalize_bibliography_run_style_pass,
+    split_and_normalize_run_fonts_pass,
+    split_mixed_script_runs,
+)
+from scripts.modules.pass_engine import (
+    REGION_BACK,
+    REGION_BIBLIOGRAPHY,
+    REGION_FRONT,
+    REGION_MAIN,
+    Barrier,
+    RegionTracker,
+    VisitorPass,
+    run_pass_pipeline,
+)
+from scripts.modules.reference_handler import (
+    fix_ref_dot_to_hyphen,
+    fix_ref_dot_to_hyphen_pass,
+    strip_anchor_hyperlinks_in_main_body,
+    strip_anchor_hyperlinks_in_main_body_pass,
+)
+from scripts.modules.style_processor import (
+    ensure_hanging_indent_for_bibliography,
+    ensure_hanging_indent_for_bibliography_pass,
+    ensure_indent_for_body_paragraphs,
+    ensure_indent_for_body_paragraphs_pass,
+    normalize_unknown_pstyles,
+    normalize_unknown_pstyles_pass,
+    number_paragraph_headings_in_main_body,
+    number_paragraph_headings_in_main_body_pass,
+    remove_docgrid_lines_type,
+    remove_docgrid_lines_type_pass,
+    strip_numbering_from_backmatter_headings,
+    strip_numbering_from_backmatter_headings_pass,
+)
+from scripts.modules.template_loader import (
+    add_page_breaks_before_h1,
+    add_page_breaks_before_h1_pass,
+)
+
+
+W_NS = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+NS = {"w": W_NS}
+
+
+def _p(style: str | None, *runs: str, sect: bool = False) -> str:
+    ppr = ""
+    if style or sect:
+        ppr = "<w:pPr>"
+        if style:
+            ppr += f'<w:pStyle w:val="{style}"/>'
+        if sect:
+            ppr += '<w:sectPr><w:docGrid w:type="lines" w:linePitch="312"/></w:sectPr>'
+        ppr += "</w:pPr>"
+    body = "".join(f"<w:r><w:t xml:space=\"preserve\">{r}</w:t></w:r>" for r in runs)
+    return f"<w:p>{ppr}{body}</w:p>"
+
+
+def _document() -> ET.Element:
+    blocks = [
+        _p(None, "西南民族大学硕士学位论文"),
+        _p("1", "摘要"),
+        _p("a", "本文研究GPU加速的方法。"),
+        _p(None, sect=True),
+        _p("1", "目录"),
+        _p("1", "绪论"),
+        _p("a", "如图3.1所示，ResNet50模型在ImageNet上表现良好。"),
+        _p("Heading5", "研究背景"),
+        _p("Heading5", "（9）研究意义"),
+        _p("2", "相关工作"),
+        _p("Heading5", "国内研究"),
+        _p("BodyText", "结果见表", "4.2", "。"),
+        '<w:p><w:pPr><w:pStyle w:val="a"/></w:pPr>'
+        '<w:hyperlink w:anchor="fig:demo"><w:r><w:rPr><w:rStyle w:val="Hyperlink"/></w:rPr>'
+        "<w:t>图3.2</w:t></w:r></w:hyperlink></w:p>",
+        '<w:tbl><w:tblPr><w:tblStyle w:val="FigureTable"/></w:tblPr>'
+        '<w:tblGrid><w:gridCol w:w="1000"/></w:tblGrid>'
+        "<w:tr><w:tc>" + _p("Compact", "表4.2 数据集") + "</w:tc></w:tr></w:tbl>",
+        _p("1", "实验"),
+        _p("Caption", "表 3-1 结果对比"),
+        _p("1", "参考文献"),
+        _p("Bibliography", "[1] Smith J. Deep learning 深度学习[J]. 2020."),
+        _p("Bibliography", "［2］ 张三. 图像识别研究[D]. 2021."),
+        _p("1", "致谢"),
+        _p("a", "感谢导师。"),
+        '<w:sectPr><w:docGrid w:type="lines" w:linePitch="312"/></w:sectPr>',
+    ]
+    xml = f'<w:document xmlns:w="{W_NS}"><w:body>{"".join(blocks)}</w:body></w:document>'
+    root = ET.fromstring(xml)
+    body = root.find("w:body", NS)
+    assert body is not None
+    return body
+
+
+def test_region_tracker_classifies_front_main_back_and_bibliography() -> None:
+    body = _document()
+    tracker = RegionTracker(NS)
+    regions = {}
+    for el in body:
+        text = "".join(t.text or "" for t in el.iter(f"{{{W_NS}}}t"))
+        regions[text] = tracker.feed(el)
+
+    assert regions["摘要"] == {REGION_FRONT}
+    assert regions["绪论"] == {REGION_MAIN}
+    assert regions["感谢导师。"] == {REGION_BACK}
+    assert regions["参考文献"] == {REGION_BACK}
+    assert REGION_BIBLIOGRAPHY in regions["[1] Smith J. Deep learning 深度学习[J]. 2020."]
+    assert REGION_BIBLIOGRAPHY not in regions["致谢"]
+
+
+def test_fused_pipeline_matches_sequential_calls() -> None:
+    known = {"a", "1", "2", "Heading5"}
+    hl_ids = {"Hyperlink"}
+
+    expected = _document()
+    add_page_breaks_before_h1(NS, expected)
+    touched = number_paragraph_headings_in_main_body(NS, expected)
+    ensure_indent_for_body_paragraphs(NS, expected)
+    ensure_hanging_indent_for_bibliography(NS, expected)
+    split_mixed_script_runs(NS, expected)
+    normalize_ascii_run_fonts(NS, expected)
+    normalize_bibliography_run_style(NS, expected)
+    fix_ref_dot_to_hyphen(NS, expected)
+    removed = strip_anchor_hyperlinks_in_main_body(NS, expected, hl_ids)
+    normalize_unknown_pstyles(NS, expected, known)
+    strip_numbering_from_backmatter_headings(NS, expected)
+    remove_docgrid_lines_type(NS, expected)
+
+    actual = _document()
+    results = run_pass_pipeline(
+        NS,
+        actual,
+        [
+            add_page_breaks_before_h1_pass(NS),
+            number_paragraph_headings_in_main_body_pass(NS),
+            ensure_indent_for_body_paragraphs_pass(NS),
+            ensure_hanging_indent_for_bibliography_pass(NS),
+            split_and_normalize_run_fonts_pass(NS),
+            normalize_bibliography_run_style_pass(NS),
+            fix_ref_dot_to_hyphen_pass(NS),
+            strip_anchor_hyperlinks_in_main_body_pass(NS, hl_ids),
+            normalize_unknown_pstyles_pass(NS, known),
+            strip_numbering_from_backmatter_headings_pass(NS),
+            remove_docgrid_lines_type_pass(NS),
+        ],
+    )
+
+    assert touched == 3
+    assert results["number_paragraph_headings_in_main_body"] == touched
+    assert results["strip_anchor_hyperlinks_in_main_body"] == removed
+    assert ET.tostring(actual) == ET.tostring(expected)
+
+
+def test_barrier_splits_visitor_groups_in_order() -> None:
+    body = _document()
+    seen: list[str] = []
+    counts = {"first": 0, "second": 0}
+
+    def make(name: str) -> VisitorPass:
+        def visit(_el: ET.Element) -> None:
+            counts[name] += 1
+
+        return VisitorPass(name, "block", visit, finish=lambda: counts[name])
+
+    def barrier() -> int:
+        seen.append(f"barrier after {counts['first']}")
+        body.append(copy.deepcopy(body[0]))
+        return len(body)
+
+    results = run_pass_pipeline(
+        NS, body, [make("first"), Barrier("grow", barrier), make("second")]
+    )
+
+    assert seen == [f"barrier after {len(body) - 1}"]
+    assert results["first"] == len(body) - 1
+    assert results["second"] == len(body)
+    assert results["grow"] == len(body)
@@ -0,0 +1,110 @@
+"""Tests for pass_profiler."""
+
+from __future__ import annotations
+
+import json
+import xml.etree.ElementTree as ET
+from pathlib import Path
+
+import pytest
+
+from scripts.modules.pass_engine import Barrier, VisitorPass, run_pass_pipeline
+from scripts.modules.pass_profiler import (
+    PassProfiler,
+    docx_sha256,
+    load_profile_summary,
+    profile_report_paths,
+    profiling_requested,
+)
+
+
+W_NS = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+NS = {"w": W_NS}
+
+
+def _body(texts: list[str]) -> ET.Element:
+    paras = "".join(f"<w:p><w:r><w:t>{t}</w:t></w:r></w:p>" for t in texts)
+    return ET.fromstring(f'<w:body xmlns:w="{W_NS}">{paras}</w:body>')
+
+
+def _upper_visit(p: ET.Element) -> None:
+    for t in p.iter(f"{{{W_NS}}}t"):
+        if t.text == "b":
+            t.text = "B"
+
+
+def test_profiled_pipeline_records_visited_and_mutated() -> None:
+    body = _body(["a", "b", "c"])
+    profiler = PassProfiler(enabled=True)
+    profiler.start()
+    try:
+        run_pass_pipeline(
+            NS,
+            body,
+            [
+                VisitorPass("upper_b", "p", _upper_visit),
+                Barrier("drop_last", lambda: body.remove(body[-1])),
+            ],
+            profiler=profiler,
+        )
+    finally:
+        profiler.stop()
+
+    by_name = {r["name"]: r for r in profiler.records}
+    assert by_name["upper_b"]["visited"] == 3
+    assert by_name["upper_b"]["mutated"] == 1
+    assert by_name["upper_b"]["group"] == "visitor-group-1"
+    assert by_name["drop_last"]["mutated"] == 1
+    assert by_name["upper_b"]["peak_kib"] is not None
+
+
+def test_disabled_profiler_records_nothing(tmp_path: Path) -> None:
+    profiler = PassProfiler(enabled=False)
+    with profiler.stage("parse"):
+        pass
+    assert profiler.records == []
+    assert profiler.write_report(tmp_path / "main_版式1.docx") is None
+
+
+def test_write_report_and_summary(tmp_path: Path) -> None:
+    profiler = PassProfiler(enabled=True)
+    profiler.record("fix_ref", "visitor", 12.5, visited=40, mutated=3, group="visitor-group-2")
+    profiler.record("write_package", "stage", 30.0)
+    out = tmp_path / "main_版式1.docx"
+
+    json_path = profiler.write_report(out)
+
+    assert json_path == profile_report_paths(out)[0]
+    payload = json.loads(json_path.read_text(encoding="utf-8"))
+    assert payload["total_ms"] == pytest.approx(42.5)
+    folded = profile_report_paths(out)[1].read_text(encoding="utf-8").splitlines()
+    assert folded == [
+        "postprocess;visitor;visitor-group-2;fix_ref 12500",
+        "postprocess;stage;write_package 30000",
+    ]
+    assert load_profile_summary(json_path, top=1) == "total 42.5ms; top: write_package 30.0ms"
+    assert load_profile_summary(tmp_path / "missing.json") is None
+
+
+def test_summary_ignores_report_from_an_earlier_docx(tmp_path: Path) -> None:
+    out = tmp_path / "main_版式1.docx"
+    out.write_bytes(b"profiled build")
+    profiler = PassProfiler(enabled=True)
+    profiler.record("write_package", "stage", 30.0)
+    json_path = profiler.write_report(out)
+
+    payload = json.loads(json_path.read_text(encoding="utf-8"))
+    assert payload["docx_sha256"] == docx_sha256(out)
+    assert load_profile_summary(json_path, docx=out) == "total 30.0ms; top: write_package 30.0ms"
+
+    out.write_bytes(b"later unprofiled build")
+    assert load_profile_summary(json_path, docx=out) is None
+    assert load_profile_summary(json_path) is not None
+
+
+def test_profiling_requested(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.delenv("SWUN_PROFILE_PASSES", raising=False)
+    assert profiling_requested(["thesis"]) is False
+    assert profiling_requested(["thesis", "--profile-passes"]) is True
+    monkeypatch.setenv("SWUN_PROFILE_PASSES", "1")
+    assert profiling_requested([]) is True
@@ -1,4 +1,57 @@
 """Tests for post_processor."""
-import pytest
 
-# Tests will be added in subsequent phases
+from __future__ import annotations
+
+import modules.latex_parser as runtime_latex_parser
+import modules.post_processor as runtime_post_processor
+from scripts.modules.build_cache import BuildCache
+from scripts.modules.caption_profile import extract_caption_profiles
+from scripts.modules.latex_parser import scan_latex_metadata
+from scripts.synthetic_thesis import ThesisSpec, generate
+
+
+def test_low_memory_mode_output_is_byte_identical(tmp_path, monkeypatch, capsys) -> None:
+    paths = generate(tmp_path, ThesisSpec(chapters=2, figures=3, tables=2, equations=4,
+                                          references=3, sections_per_chapter=2))
+    monkeypatch.setattr(runtime_latex_parser, "ROOT", tmp_path)
+    monkeypatch.setattr(runtime_post_processor, "TEMPLATE_DOCX", paths["template"])
+    meta = scan_latex_metadata(paths["flat_tex"].read_text(encoding="utf-8"))
+    profiles = extract_caption_profiles(paths["caption_profile"])
+
+    outputs = {}
+    for low_memory in (False, True):
+        out = tmp_path / f"out_{low_memory}.docx"
+        runtime_post_processor._postprocess_docx(
+            paths["intermediate"], out, meta.display_math_flags,
+            meta.keywords[0], meta.keywords[1], meta.caption_meta, profiles,
+            meta.table_col_specs, low_memory=low_memory,
+        )
+        outputs[low_memory] = out.read_bytes()
+
+    assert outputs[True] == outputs[False]
+    assert "[memory] postprocess peak RSS" in capsys.readouterr().out
+
+
+def test_flat_cache_key_tracks_aux_numbers_and_file_probes(tmp_path, monkeypatch) -> None:
+    monkeypatch.setattr(runtime_post_processor, "ROOT", tmp_path)
+    monkeypatch.setattr(runtime_latex_parser, "ROOT", tmp_path)
+    aux = tmp_path / "main.aux"
+    aux.write_text("\\newlabel{fig:x}{{2-1}{5}}\n", encoding="utf-8")
+    expanded = "See \\ref{fig:x}.\n\\IfFileExists{figures/a.pdf}{A}{B}\n"
+    cache = BuildCache(tmp_path / "cache")
+
+    key = runtime_post_processor._flat_cache_key("expand", expanded)
+    cache.store_text("flat", key, runtime_latex_parser.preprocess_latex(expanded), suffix=".tex")
+    assert "See 2-1." in cache.fetch_text("flat", key, suffix=".tex")
+
+    # 只改 main.aux（LaTeX 重新编译改变编号）：必须未命中
+    aux.write_text("\\newlabel{fig:x}{{3-4}{5}}\n", encoding="utf-8")
+    renumbered = runtime_post_processor._flat_cache_key("expand", expanded)
+    assert renumbered != key
+    assert cache.fetch_text("flat", renumbered, suffix=".tex") is None
+    assert "See 3-4." in runtime_latex_parser.preprocess_latex(expanded)
+
+    # \IfFileExists 的判定变化同样改变键
+    (tmp_path / "figures").mkdir()
+    (tmp_path / "figures" / "a.png").write_bytes(b"png")
+    assert runtime_post_processor._flat_cache_key("expand", expanded) != renumbered
@@ -0,0 +1,115 @@
+"""Tests for render_cache."""
+
+from __future__ import annotations
+
+import threading
+from pathlib import Path
+from xmlrpc.server import SimpleXMLRPCServer
+
+import scripts.modules.render_cache as render_cache
+from scripts.modules.build_cache import BuildCache
+
+
+def test_render_pdf_converts_once_per_docx_content(tmp_path, monkeypatch) -> None:
+    calls: list[Path] = []
+
+    def fake_convert(docx_path, pdf_path) -> bool:
+        calls.append(Path(docx_path))
+        Path(pdf_path).write_bytes(b"%PDF-" + Path(docx_path).read_bytes())
+        return True
+
+    monkeypatch.setattr(render_cache, "convert_docx", fake_convert)
+    render_cache.clear_memo()
+    cache = BuildCache(tmp_path / "cache")
+    docx = tmp_path / "main_版式1.docx"
+    docx.write_bytes(b"v1")
+
+    first = render_cache.render_pdf(docx, tmp_path / "a", cache=cache)
+    render_cache.clear_memo()  # 模拟下一次 gate 重试：只剩磁盘缓存
+    second = render_cache.render_pdf(docx, tmp_path / "b", cache=cache)
+    assert len(calls) == 1
+    assert Path(first).read_bytes() == Path(second).read_bytes() == b"%PDF-v1"
+    assert Path(second).name == "main_版式1.pdf"
+
+    docx.write_bytes(b"v2")
+    render_cache.render_pdf(docx, tmp_path / "a", cache=cache)
+    assert len(calls) == 2
+
+
+def test_pdf_artifact_caches_json_but_not_failures(tmp_path) -> None:
+    render_cache.clear_memo()
+    cache = BuildCache(tmp_path / "cache")
+    pdf = tmp_path / "doc.pdf"
+    pdf.write_bytes(b"%PDF-1")
+    computed: list[str] = []
+
+    def lines(path: str):
+        computed.append(path)
+        return [{"page_num": 1, "lines": [{"text": "第1章 绪论", "x0": 1.5}]}]
+
+    first = render_cache.pdf_artifact(pdf, "lines", lines, tmp_path, cache=cache)
+    render_cache.clear_memo()
+    second = render_cache.pdf_artifact(pdf, "lines", lines, tmp_path, cache=cache)
+    assert first == second
+    assert len(computed) == 1
+
+    assert render_cache.pdf_artifact(pdf, "blank-pages", lambda _: None, tmp_path, cache=cache) is None
+    assert render_cache.pdf_artifact(pdf, "blank-pages", lambda _: [3], tmp_path, cache=cache) == [3]
+
+
+def test_listener_is_probed_reused_and_stopped(monkeypatch, capsys) -> None:
+    monkeypatch.setattr(render_cache.shutil, "which", lambda name: f"/usr/bin/{name}")
+    monkeypatch.setattr(render_cache, "_FOREIGN_PORTS", set())
+    monkeypatch.setattr(render_cache, "_LISTENER", None)
+
+    # 端口被其他服务占用：不当作 unoserver 使用，只提示一次
+    monkeypatch.setenv(render_cache.LISTENER_PORT_ENV, "2999")
+    monkeypatch.setattr(render_cache, "_port_open", lambda port: True)
+    monkeypatch.setattr(render_cache, "_is_unoserver", lambda port: False)
+    assert render_cache.ensure_listener() is None
+    assert render_cache.ensure_listener() is None
+    assert capsys.readouterr().out.count("is used by another service") == 1
+
+    class FakeProc:
+        returncode = None
+
+        def poll(self):
+            return self.returncode
+
+        def terminate(self) -> None:
+            self.returncode = -15
+
+        def wait(self, timeout=None) -> int:
+            return self.returncode
+
+    open_ports: set[int] = set()
+    launched: list[FakeProc] = []
+
+    def fake_popen(cmd, **_kwargs):
+        open_ports.add(int(cmd[-1]))
+        launched.append(FakeProc())
+        return launched[-1]
+
+    monkeypatch.setenv(render_cache.LISTENER_PORT_ENV, "3001")
+    monkeypatch.setattr(render_cache, "_port_open", lambda port: port in open_ports)
+    monkeypatch.setattr(render_cache.subprocess, "Popen", fake_popen)
+    assert render_cache.ensure_listener() == 3001
+    assert render_cache.ensure_listener() == 3001
+    assert len(launched) == 1
+
+    render_cache.stop_listener()
+    assert launched[0].poll() is not None
+
+
+def test_unoserver_probe_requires_xmlrpc() -> None:
+    server = SimpleXMLRPCServer(("127.0.0.1", 0), logRequests=False)
+    port = server.server_address[1]
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        # 未注册 info 时返回 Fault：仍是 XML-RPC 服务
+        assert render_cache._is_unoserver(port)
+    finally:
+        server.shutdown()
+        server.server_close()
+    assert not render_cache._is_unoserver(port)
@@ -0,0 +1,97 @@
+"""Tests for watch_mode."""
+
+from __future__ import annotations
+
+import json
+import os
+from pathlib import Path
+
+from scripts.modules.post_processor import NO_BACKUP_FLAG
+from scripts.modules.watch_mode import take_snapshot, wait_for_changes, watch
+from scripts.utils.stage_timer import StageTimings
+
+
+def _touch(path: Path, text: str, mtime_ns: int) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text, encoding="utf-8")
+    os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+def _thesis(tmp_path: Path) -> Path:
+    _touch(tmp_path / "main.tex", "\\input{chapters/ch1}", 1_000)
+    _touch(tmp_path / "chapters" / "ch1.tex", "one", 1_000)
+    _touch(tmp_path / "backmatter" / "references.bib", "@misc{a}", 1_000)
+    _touch(tmp_path / "figures" / "f.png", "png", 1_000)
+    _touch(tmp_path / "figures" / "plot.pdf", "%PDF", 1_000)
+    _touch(tmp_path / ".swun_build_cache" / "pandoc" / "x.tex", "cached", 1_000)
+    return tmp_path
+
+
+def test_snapshot_covers_inputs_and_debounces_bursts(tmp_path) -> None:
+    thesis = _thesis(tmp_path)
+    snapshot = take_snapshot(thesis)
+    assert {p.relative_to(thesis).as_posix() for p in snapshot} == {
+        "main.tex", "chapters/ch1.tex", "backmatter/references.bib", "figures/f.png",
+        "figures/plot.pdf",
+    }
+
+    # 编辑器连续保存两个文件：第 1、2 次轮询各有变化，之后安静
+    edits = [
+        lambda: _touch(thesis / "chapters" / "ch1.tex", "one!", 2_000),
+        lambda: _touch(thesis / "backmatter" / "references.bib", "@misc{b}", 2_000),
+    ]
+
+    def fake_sleep(_seconds: float) -> None:
+        if edits:
+            edits.pop(0)()
+
+    new, changed = wait_for_changes(thesis, snapshot, interval=0.1, debounce=0.2, sleep=fake_sleep)
+    assert [p.relative_to(thesis).as_posix() for p in changed] == [
+        "backmatter/references.bib", "chapters/ch1.tex",
+    ]
+    assert new == take_snapshot(thesis)
+
+
+def test_watch_rebuilds_without_backup_and_reports_stage_timings(
+    tmp_path, monkeypatch, capsys,
+) -> None:
+    monkeypatch.delenv("SWUN_BUILD_CACHE", raising=False)
+    monkeypatch.delenv("SWUN_BUILD_CACHE_DIR", raising=False)
+    thesis = _thesis(tmp_path)
+    calls: list[list[str]] = []
+
+    def fake_build(path: Path, args: list[str]) -> dict[str, float]:
+        calls.append(list(args))
+        # 栅格化阶段写出的 PNG（记录在清单中）不触发下一轮
+        png = path / "figures" / "plot.png"
+        _touch(png, f"generated {len(calls)}", 5_000 + len(calls))
+        manifest = path / ".swun_build_cache" / "raster-manifest.json"
+        manifest.write_text(json.dumps({str(png.resolve()): "key"}), encoding="utf-8")
+        if len(calls) == 2:
+            # 构建期间保存的源文件：下一次轮询即触发新一轮
+            _touch(path / "main.tex", "\\input{chapters/ch1}%", 4_000)
+        if len(calls) == 3:
+            raise RuntimeError("pandoc failed")
+        timings = StageTimings()
+        with timings.stage("pandoc"):
+            pass
+        return timings.seconds
+
+    edits = [lambda: _touch(thesis / "chapters" / "ch1.tex", "two", 3_000)]
+
+    def fake_sleep(_seconds: float) -> None:
+        edit = edits.pop(0) if edits else None
+        if edit is not None:
+            edit()
+
+    succeeded = watch(thesis, args=["--low-memory"], interval=0.1, debounce=0.1,
+                      build=fake_build, max_cycles=2, sleep=fake_sleep)
+
+    assert calls == [["--low-memory"], ["--low-memory", NO_BACKUP_FLAG],
+                     ["--low-memory", NO_BACKUP_FLAG]]
+    assert succeeded == 2
+    out = capsys.readouterr().out
+    assert "[watch] changed chapters/ch1.tex" in out
+    assert "[watch] changed main.tex" in out
+    assert "[watch] cycle 2: pandoc 0.00s  total" in out
+    assert "[watch] cycle 3 FAILED: pandoc failed" in out
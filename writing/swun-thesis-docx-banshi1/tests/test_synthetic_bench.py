@@ -0,0 +1,55 @@
+"""Tests for the synthetic thesis generator and the pipeline benchmark."""
+
+from __future__ import annotations
+
+import zipfile
+
+import modules.latex_parser as runtime_latex_parser
+import modules.post_processor as runtime_post_processor
+from scripts.bench_pipeline import bench_size, find_regressions
+from scripts.modules.latex_parser import scan_latex_metadata
+from scripts.synthetic_thesis import ThesisSpec, generate
+
+
+SPEC = ThesisSpec(chapters=2, figures=3, tables=2, equations=5, references=4,
+                  paragraphs_per_section=1, sections_per_chapter=2)
+
+
+def test_generator_is_deterministic_and_matches_spec(tmp_path) -> None:
+    first = generate(tmp_path / "a", SPEC)
+    second = generate(tmp_path / "b", SPEC)
+    assert first["intermediate"].read_bytes() == second["intermediate"].read_bytes()
+    assert first["flat_tex"].read_text(encoding="utf-8") == second["flat_tex"].read_text(encoding="utf-8")
+
+    meta = scan_latex_metadata(first["flat_tex"].read_text(encoding="utf-8"))
+    assert len(meta.caption_meta) == SPEC.figures + SPEC.tables
+    assert len(meta.display_math_flags) == SPEC.equations
+    assert all(meta.keywords)
+
+    with zipfile.ZipFile(first["intermediate"]) as zf:
+        doc = zf.read("word/document.xml").decode("utf-8")
+        media = [n for n in zf.namelist() if n.startswith("word/media/")]
+    assert len(media) == SPEC.figures
+    assert doc.count("<w:tbl>") == SPEC.tables
+    assert doc.count("<m:oMathPara>") == SPEC.equations
+    assert doc.count('w:pStyle w:val="Bibliography"') == SPEC.references
+
+
+def test_bench_times_every_stage_and_flags_regressions(tmp_path, monkeypatch) -> None:
+    # bench_size 重新绑定模块级路径；登记原值以便测试后恢复
+    monkeypatch.setattr(runtime_latex_parser, "ROOT", runtime_latex_parser.ROOT)
+    monkeypatch.setattr(runtime_post_processor, "TEMPLATE_DOCX", runtime_post_processor.TEMPLATE_DOCX)
+
+    results = bench_size(SPEC, tmp_path / "thesis", repeat=1)
+
+    assert {"latex.preprocess_latex", "latex.scan_latex_metadata", "postprocess.total",
+            "pass.parse_document_xml", "pass.write_package"} <= set(results)
+    assert [k for k in results if k.startswith("verify.")] == [
+        "verify.phase1", "verify.phase2", "verify.phase3", "verify.phase4", "verify.phase5"]
+    assert all(ms >= 0 for ms in results.values())
+    assert (tmp_path / "thesis" / "main_版式1.docx").exists()
+
+    baseline = {"small": {"pass.a": 10.0, "pass.b": 10.0, "pass.c": 1.0}}
+    current = {"small": {"pass.a": 20.0, "pass.b": 11.0, "pass.c": 3.0, "pass.new": 50.0}}
+    assert find_regressions(current, baseline, threshold=0.25, min_delta_ms=5.0) == [
+        "small pass.a: 10.00 ms -> 20.00 ms (+100%)"]
@@ -0,0 +1,130 @@
+"""Tests for cn_ref_rules."""
+
+from __future__ import annotations
+
+import random
+import re
+import xml.etree.ElementTree as ET
+from pathlib import Path
+
+import pytest
+
+from scripts.modules.font_handler import normalize_bibliography_run_style
+from scripts.utils import cn_ref_rules
+from scripts.utils.cn_ref_rules import (
+    bibliography_paragraphs,
+    fix_bibliography,
+    fix_chinese_ref,
+)
+
+W_NS = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+NS = {"w": W_NS}
+
+
+def _sequential_fix(text: str) -> str:
+    """fix_cn_refs 原先的七次 re.sub 实现，作为合并规则的参照。"""
+    text = re.sub(r",\s*et al\.", ",等.", text)
+    text = re.sub(r"([一-鿿]),\s+([一-鿿])", r"\1,\2", text)
+    text = re.sub(r"(等)\.\s+", r"\1.", text)
+    text = re.sub(r"\s+(\[[A-Z]+\])", r"\1", text)
+    text = re.sub(r"(\[[A-Z]+\])\.\s+", r"\1.", text)
+    text = re.sub(r"(\d)\s+\((\d)", r"\1(\2", text)
+    if text.endswith("．"):
+        text = text[:-1] + "."
+    return text
+
+
+def _body(*paragraphs: str) -> ET.Element:
+    xml = f'<w:document xmlns:w="{W_NS}"><w:body>{"".join(paragraphs)}</w:body></w:document>'
+    return ET.fromstring(xml).find("w:body", NS)
+
+
+def _p(runs: list[str], style: str | None = None, bold_last: bool = False) -> str:
+    ppr = f'<w:pPr><w:pStyle w:val="{style}"/></w:pPr>' if style else ""
+    out = []
+    for i, text in enumerate(runs):
+        rpr = "<w:rPr><w:b/></w:rPr>" if bold_last and i == len(runs) - 1 else ""
+        out.append(f'<w:r>{rpr}<w:t xml:space="preserve">{text}</w:t></w:r>')
+    return f"<w:p>{ppr}{''.join(out)}</w:p>"
+
+
+def _runs(p: ET.Element) -> list[str]:
+    return ["".join(t.text or "" for t in r.iter(f"{{{W_NS}}}t")) for r in p.findall("w:r", NS)]
+
+
+def test_combined_rules_match_sequential_substitutions() -> None:
+    assert fix_chinese_ref("[1] 肖恒辉, 李炯城, et al. 研究 [J]. 电信科学, 2013, 29 (01): 1-5．") == (
+        "[1] 肖恒辉,李炯城,等.研究[J].电信科学, 2013, 29(01): 1-5.")
+    tokens = ["张三", ", ", "李四", ",", "et al.", " ", "等. ", "[J]", ". ", "29", " (",
+              "01", ")", "．", "标题", "  ", "a"]
+    rng = random.Random(7)
+    for _ in range(3000):
+        text = "[1] " + "".join(rng.choice(tokens) for _ in range(rng.randint(1, 12)))
+        assert fix_chinese_ref(text) == _sequential_fix(text), text
+
+
+def test_fix_keeps_run_formatting_across_boundaries() -> None:
+    runs = ["[1] 肖恒辉, ", "李炯城, et", " al. 研究 ", "[J]. 电信科学, 2013, 29 ", "(01)．"]
+    body = _body(
+        _p(["参考文献"]),
+        _p(runs, style="Bibliography", bold_last=True),
+        _p(["[2] KUMAR S., LI G. security [J]. IEEE, 2020, 35 (4)．"], style="Bibliography"),
+    )
+    assert fix_bibliography(body) == 1
+    first, second = list(bibliography_paragraphs(body))
+    assert _runs(first) == ["[1] 肖恒辉,", "李炯城,等.", "研究[J].", "电信科学, 2013, 29(", "01)."]
+    assert first.findall("w:r", NS)[-1].find("w:rPr/w:b", NS) is not None
+    assert _runs(second) == ["[2] KUMAR S., LI G. security [J]. IEEE, 2020, 35 (4)．"]
+
+
+def test_region_fallback_and_builder_pass() -> None:
+    body = _body(
+        _p(["参考文献"]),
+        _p(["[1] 张三, 李四 [J]. 科学, 1 (2)．"]),
+        _p([""]),
+        _p(["[2] 王五, et al. 标题 [M]. 2020．"]),
+        _p(["附录"]),
+        _p(["[3] 赵六, 钱七 [J]．"]),
+    )
+    # 无 Bibliography 样式：从首个 [N] 段落开始，允许空段落，遇到非条目段落即结束
+    assert fix_bibliography(body) == 2
+    texts = [_runs(p)[0] for p in body.findall("w:p", NS)]
+    assert texts[1:4] == ["[1] 张三,李四[J].科学, 1(2).", "", "[2] 王五,等.标题[M].2020."]
+    assert texts[5] == "[3] 赵六, 钱七 [J]．"
+
+    body = _body(
+        _p(["参考文献"], style="1"),
+        _p(["[1] 张三, 李四 [J]. 科学, 1 (2)．"], style="Bibliography"),
+        _p(["致谢"], style="1"),
+    )
+    normalize_bibliography_run_style(NS, body, fix_cn_refs=True)
+    entry = body.findall("w:p", NS)[1]
+    assert _runs(entry) == ["[1] 张三,李四[J].科学, 1(2)."]
+    assert entry.find("w:r/w:rPr/w:sz", NS).get(f"{{{W_NS}}}val") == "21"
+
+
+def test_consecutive_matches_are_all_fixed() -> None:
+    # 有意偏离原先逐条 re.sub（其消耗相邻字符，只修正第一处）
+    assert fix_chinese_ref("[1] 甲, 乙, 丙. 标题 [J]．") == "[1] 甲,乙,丙. 标题[J]."
+    assert _sequential_fix("[1] 甲, 乙, 丙. 标题 [J]．") == "[1] 甲,乙, 丙. 标题[J]."
+    assert fix_chinese_ref("[1] 张三. 标题 [J]. 刊, 1 (2 (3)．") == "[1] 张三. 标题[J].刊, 1(2(3)."
+    assert _sequential_fix("[1] 张三. 标题 [J]. 刊, 1 (2 (3)．") == "[1] 张三. 标题[J].刊, 1(2 (3)."
+
+
+def test_hyperlink_text_is_left_alone() -> None:
+    link = '<w:hyperlink><w:r><w:t xml:space="preserve">李四, 王五 [J]</w:t></w:r></w:hyperlink>'
+    body = _body(f'<w:p><w:r><w:t xml:space="preserve">[1] 张三, 李四 [J]. </w:t></w:r>{link}'
+                 f'<w:r><w:t>2020．</w:t></w:r></w:p>')
+    assert fix_bibliography(body) == 1
+    p = body.find("w:p", NS)
+    assert _runs(p) == ["[1] 张三,李四[J].", "2020."]
+    assert p.find("w:hyperlink/w:r/w:t", NS).text == "李四, 王五 [J]"
+
+
+def test_pandoc_citeproc_export_copy_is_identical() -> None:
+    other = (Path(__file__).resolve().parents[4]
+             / "uncategorized" / "pandoc-citeproc-export" / "scripts" / "cn_ref_rules.py")
+    if not other.is_file():
+        pytest.skip("pandoc-citeproc-export skill not checked out alongside")
+    assert Path(cn_ref_rules.__file__).read_bytes() == other.read_bytes(), (
+        f"cn_ref_rules.py copies differ; sync {other}")
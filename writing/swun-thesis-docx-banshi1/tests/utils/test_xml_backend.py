@@ -0,0 +1,57 @@
+"""Tests for xml_backend."""
+
+from __future__ import annotations
+
+import importlib
+
+import pytest
+
+import scripts.utils.xml_backend as xml_backend
+
+
+W_NS = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+NS = {"w": W_NS}
+
+DOC = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    f'<w:document xmlns:w="{W_NS}"><w:body>'
+    '<w:p><w:pPr><w:pStyle w:val="1"/></w:pPr><w:r><w:t>绪论</w:t></w:r></w:p>'
+    '<w:p><w:pPr><w:pStyle w:val="a"/></w:pPr>'
+    '<w:bookmarkStart w:id="1" w:name=" fig:arch"/><w:bookmarkStart w:id="2" w:name="_Toc1"/></w:p>'
+    "<w:tbl><w:tr><w:tc><w:p><w:pPr><w:pStyle w:val=\"2\"/></w:pPr>"
+    '<w:bookmarkStart w:id="3" w:name="tab:data"/></w:p></w:tc></w:tr></w:tbl>'
+    "</w:body></w:document>"
+)
+
+
+def _queries(mod) -> tuple[list[str], list[str]]:
+    root = mod.parse_xml(DOC)
+    styles = [
+        p.find("w:pPr/w:pStyle", NS).get(f"{{{W_NS}}}val")
+        for p in mod.paragraphs_by_style(root, NS, {"1", "2"})
+    ]
+    names = [bm.get(f"{{{W_NS}}}name") for bm in mod.bookmarks_by_prefix(root, NS, ("fig:", "tab:"))]
+    return styles, names
+
+
+def test_default_backend_is_etree_and_queries_in_document_order(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.delenv("SWUN_XML_BACKEND", raising=False)
+    mod = importlib.reload(xml_backend)
+
+    assert mod.BACKEND == "etree"
+    assert _queries(mod) == (["1", "2"], [" fig:arch", "tab:data"])
+    assert mod.tostring(mod.parse_xml(DOC)).startswith(b"<?xml")
+
+
+def test_lxml_backend_matches_etree(monkeypatch: pytest.MonkeyPatch) -> None:
+    pytest.importorskip("lxml")
+    monkeypatch.setenv("SWUN_XML_BACKEND", "lxml")
+    mod = importlib.reload(xml_backend)
+    try:
+        assert mod.BACKEND == "lxml"
+        assert _queries(mod) == (["1", "2"], [" fig:arch", "tab:data"])
+        with pytest.raises(mod.XML_PARSE_ERRORS):
+            mod.parse_xml(b"<w:document")
+    finally:
+        monkeypatch.delenv("SWUN_XML_BACKEND")
+        importlib.reload(xml_backend)
@@ -0,0 +1,122 @@
+"""Tests for zip_writer."""
+
+from __future__ import annotations
+
+import importlib.util
+import os
+import zipfile
+from pathlib import Path
+
+import pytest
+
+from scripts.utils import zip_writer
+from scripts.utils.zip_writer import write_docx_package
+
+PANDOC_EXPORT_SCRIPTS = (Path(__file__).resolve().parents[4]
+                         / "uncategorized" / "pandoc-citeproc-export" / "scripts")
+
+
+def _raw_bytes(path, name: str) -> bytes:
+    with zipfile.ZipFile(path) as zf, open(path, "rb") as fp:
+        info = zf.getinfo(name)
+        fp.seek(info.header_offset + 26)
+        name_len = int.from_bytes(fp.read(2), "little")
+        extra_len = int.from_bytes(fp.read(2), "little")
+        fp.seek(name_len + extra_len, 1)
+        return fp.read(info.compress_size)
+
+
+def test_untouched_members_copied_raw(tmp_path) -> None:
+    src = tmp_path / "in.docx"
+    png = os.urandom(4096)
+    with zipfile.ZipFile(src, "w") as zf:
+        zf.writestr("[Content_Types].xml", b"<Types/>", compress_type=zipfile.ZIP_DEFLATED)
+        zf.writestr("word/document.xml", b"<old/>" * 50, compress_type=zipfile.ZIP_DEFLATED)
+        zf.writestr("word/media/image1.png", png, compress_type=zipfile.ZIP_STORED)
+        zf.writestr("word/fontTable.xml", b"<fonts/>" * 50, compress_type=zipfile.ZIP_DEFLATED,
+                    compresslevel=1)
+
+    dst = tmp_path / "out.docx"
+    stats = write_docx_package(
+        src, dst,
+        {"word/document.xml": b"<new/>", "word/header1.xml": b"<hdr/>"},
+        compresslevel=9,
+    )
+
+    assert (stats.raw_copied, stats.recompressed) == (3, 2)
+    with zipfile.ZipFile(dst) as zf, zipfile.ZipFile(src) as zs:
+        assert zf.testzip() is None
+        assert zf.namelist() == [
+            "[Content_Types].xml", "word/document.xml", "word/media/image1.png",
+            "word/fontTable.xml", "word/header1.xml",
+        ]
+        assert zf.read("word/document.xml") == b"<new/>"
+        assert zf.read("word/media/image1.png") == png
+        for name in ("word/media/image1.png", "word/fontTable.xml"):
+            assert zf.getinfo(name).compress_type == zs.getinfo(name).compress_type
+            assert zf.getinfo(name).CRC == zs.getinfo(name).CRC
+            assert _raw_bytes(dst, name) == _raw_bytes(src, name)
+
+
+def test_streamed_and_fallback_members_are_reproducible(tmp_path) -> None:
+    src = tmp_path / "in.docx"
+    big = os.urandom(3 << 20)  # 超过一个拷贝块
+    with zipfile.ZipFile(src, "w") as zf:
+        zf.writestr("word/document.xml", b"<old/>", compress_type=zipfile.ZIP_DEFLATED)
+        zf.writestr("word/media/video.bin", big, compress_type=zipfile.ZIP_STORED)
+        zf.writestr("word/embeddings/a.bin", b"x" * 5000, compress_type=zipfile.ZIP_BZIP2)
+
+    doc = b"<w:document>" + b"<w:p/>" * 20000 + b"</w:document>"
+    a, b = tmp_path / "a.docx", tmp_path / "b.docx"
+    write_docx_package(src, a, {"word/document.xml": doc, "word/new.xml": b"<n/>"})
+    stats = write_docx_package(src, b, {
+        "word/document.xml": lambda fh: [fh.write(doc[i:i + 4096]) for i in range(0, len(doc), 4096)],
+        "word/new.xml": b"<n/>",
+    })
+
+    assert a.read_bytes() == b.read_bytes()
+    assert (stats.raw_copied, stats.recompressed) == (1, 3)
+    assert stats.recompressed_bytes == len(doc) + 5000 + 4
+    with zipfile.ZipFile(b) as zf:
+        assert zf.testzip() is None
+        assert zf.read("word/media/video.bin") == big
+        assert zf.read("word/document.xml") == doc
+        assert zf.getinfo("word/embeddings/a.bin").compress_type == zipfile.ZIP_DEFLATED
+
+
+def test_pandoc_citeproc_export_copy_is_identical() -> None:
+    other = PANDOC_EXPORT_SCRIPTS / "zip_writer.py"
+    if not other.is_file():
+        pytest.skip("pandoc-citeproc-export skill not checked out alongside")
+    assert Path(zip_writer.__file__).read_bytes() == other.read_bytes(), (
+        f"zip_writer.py copies differ; sync {other}")
+
+
+def test_pandoc_citeproc_export_postprocess_keeps_untouched_members_raw(tmp_path) -> None:
+    script = PANDOC_EXPORT_SCRIPTS / "postprocess_docx.py"
+    if not script.is_file():
+        pytest.skip("pandoc-citeproc-export skill not checked out alongside")
+    pytest.importorskip("lxml")
+    spec = importlib.util.spec_from_file_location("pandoc_export_postprocess_docx", script)
+    postprocess_docx = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(postprocess_docx)
+
+    w = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+    document = (f'<w:document xmlns:w="{w}"><w:body><w:p><w:pPr><w:pStyle w:val="Heading1"/>'
+                '</w:pPr><w:r><w:t>绪论</w:t></w:r></w:p></w:body></w:document>').encode("utf-8")
+    src = tmp_path / "in.docx"
+    with zipfile.ZipFile(src, "w") as zf:
+        zf.writestr("word/document.xml", document, compress_type=zipfile.ZIP_DEFLATED)
+        zf.writestr("word/media/image1.png", os.urandom(4096), compress_type=zipfile.ZIP_STORED)
+        zf.writestr("word/styles.xml", b"<styles/>" * 50, compress_type=zipfile.ZIP_DEFLATED,
+                    compresslevel=1)
+    dst = tmp_path / "out.docx"
+
+    stats = postprocess_docx.postprocess(str(src), str(dst))
+
+    assert stats["styles"] == 1
+    with zipfile.ZipFile(src) as zin, zipfile.ZipFile(dst) as zout:
+        assert b'w:val="af9"' in zout.read("word/document.xml")
+        for name in ("word/media/image1.png", "word/styles.xml"):
+            assert zout.getinfo(name).CRC == zin.getinfo(name).CRC
+            assert _raw_bytes(dst, name) == _raw_bytes(src, name)
@@ -0,0 +1,64 @@
+"""Tests for docx_snapshot and the parallel gate-loop phase checks."""
+
+from __future__ import annotations
+
+import zipfile
+
+import scripts.gate_loop_runner as gate_loop_runner
+from scripts.verification import report_generator
+from verification.docx_snapshot import DocxSnapshot, clear_registry, snapshot_for
+
+
+W_NS = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+
+DOC_XML = (
+    f'<w:document xmlns:w="{W_NS}"><w:body>'
+    '<w:p><w:pPr><w:pStyle w:val="1"/></w:pPr><w:r><w:t>第1章 绪论</w:t></w:r></w:p>'
+    "<w:p><w:r><w:t>正文, 含半角</w:t></w:r><w:r><w:t>标点.</w:t></w:r></w:p>"
+    "<w:tbl><w:tblPr><w:tblCaption w:val=\"t\"/></w:tblPr></w:tbl>"
+    "</w:body></w:document>"
+)
+NUM_XML = f'<w:numbering xmlns:w="{W_NS}"/>'
+
+
+def _write_docx(path, doc_xml: str = DOC_XML) -> str:
+    with zipfile.ZipFile(path, "w") as zf:
+        zf.writestr("word/document.xml", doc_xml)
+        zf.writestr("word/numbering.xml", NUM_XML)
+    return str(path)
+
+
+def test_snapshot_shares_split_and_tree_with_report_helpers(tmp_path) -> None:
+    clear_registry()
+    snapshot = DocxSnapshot.load(_write_docx(tmp_path / "a.docx"))
+
+    assert snapshot.paragraph_texts == ("第1章 绪论", "正文, 含半角标点.")
+    assert len(snapshot.tables) == 1 and snapshot.parse_error is None
+    assert snapshot_for(snapshot.doc_xml) is snapshot
+    # 同内容但不同对象的字符串不命中快照
+    assert snapshot_for("".join(list(snapshot.doc_xml))) is None
+
+    assert report_generator._iter_paragraphs(snapshot.doc_xml) == list(snapshot.paragraphs)
+    assert report_generator._snapshot_root(snapshot.doc_xml) is snapshot.root
+
+
+def test_parallel_phase_checks_match_sequential_in_phase_order(tmp_path) -> None:
+    clear_registry()
+    docx = _write_docx(tmp_path / "main_版式1.docx")
+    phase_ids = [1, 2, 4, 5]
+
+    sequential = {pid: gate_loop_runner.run_phase_check(pid, docx) for pid in phase_ids}
+    parallel = gate_loop_runner.run_phase_checks_parallel(phase_ids, docx)
+
+    assert list(parallel) == phase_ids
+    assert parallel == sequential
+    assert "数据表 #1 缺少 w:tblBorders（应为三线表）" in parallel[5]
+
+
+def test_parallel_phase_checks_report_archive_errors_per_phase(tmp_path) -> None:
+    missing = str(tmp_path / "missing.docx")
+    results = gate_loop_runner.run_phase_checks_parallel([1, 5], missing)
+    assert results == {
+        1: [f"DOCX file not found: {missing}"],
+        5: [f"DOCX file not found: {missing}"],
+    }
@@ -0,0 +1,106 @@
+"""Tests for incremental gate-loop re-verification."""
+
+from __future__ import annotations
+
+import zipfile
+
+import scripts.gate_loop_runner as gate_loop_runner
+from verification.incremental import IncrementalState
+
+
+W_NS = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+
+
+def _h1(text: str) -> str:
+    return f'<w:p><w:pPr><w:pStyle w:val="1"/></w:pPr><w:r><w:t>{text}</w:t></w:r></w:p>'
+
+
+def _p(text: str) -> str:
+    return f"<w:p><w:r><w:t>{text}</w:t></w:r></w:p>"
+
+
+def _write_docx(path, chapters: dict[str, str]) -> str:
+    body = _h1("摘要") + _p("摘要正文(1)")
+    for title, text in chapters.items():
+        body += _h1(title) + _p(text)
+    body += _h1("参考文献") + _p("[1] 文献 + 条目")
+    doc = f'<w:document xmlns:w="{W_NS}"><w:body>{body}</w:body></w:document>'
+    with zipfile.ZipFile(path, "w") as zf:
+        zf.writestr("word/document.xml", doc)
+        zf.writestr("word/numbering.xml", f'<w:numbering xmlns:w="{W_NS}"/>')
+    return str(path)
+
+
+CHAPTERS = {
+    "第1章 绪论": "区块链 + 车联网的研究背景",
+    "第2章 相关技术": "共识算法；信誉机制",
+    "第3章 方案设计": "本章提出方案（见下文）",
+}
+
+
+def test_phase5_rechecks_only_changed_chapters(tmp_path) -> None:
+    state = IncrementalState(tmp_path / "state.json")
+    docx = _write_docx(tmp_path / "main_版式1.docx", CHAPTERS)
+    full = gate_loop_runner.run_phase_check(5, docx)
+    assert full == ["非正式 '+' 连接: ...区块链 + 车联网的研究背景..."]
+
+    assert gate_loop_runner.run_phase_check_incremental(5, docx, state) == full
+    assert state.notes[5] == "chapter blocks reused 0/5"
+
+    edited = dict(CHAPTERS, **{"第2章 相关技术": "共识算法 + 信誉机制"})
+    docx = _write_docx(tmp_path / "main_版式1.docx", edited)
+    fresh = IncrementalState(tmp_path / "state.json")  # 下一次重试：状态来自磁盘
+    errors = gate_loop_runner.run_phase_check_incremental(5, docx, fresh)
+    assert errors == gate_loop_runner.run_phase_check(5, docx)
+    assert len(errors) == 2
+    assert fresh.notes[5] == "chapter blocks reused 4/5"
+
+
+def test_passing_phase_is_reused_until_its_parts_change(tmp_path, monkeypatch) -> None:
+    state = IncrementalState(tmp_path / "state.json")
+    calls: list[int] = []
+    real = gate_loop_runner.run_phase_check
+
+    def counting(phase_id, docx_path, snapshot=None, segment_cache=None):
+        calls.append(phase_id)
+        return real(phase_id, docx_path, snapshot, segment_cache)
+
+    monkeypatch.setattr(gate_loop_runner, "run_phase_check", counting)
+    clean = dict(CHAPTERS, **{"第1章 绪论": "区块链与车联网的研究背景"})
+    docx = _write_docx(tmp_path / "main_版式1.docx", clean)
+
+    assert gate_loop_runner.run_phase_check_incremental(5, docx, state) == []
+    assert gate_loop_runner.run_phase_check_incremental(5, docx, state) == []
+    assert calls == [5]
+    assert state.notes[5] == "reused last PASS (phase inputs unchanged)"
+
+    # 重新构建后 document.xml 变化：不再复用 PASS
+    _write_docx(tmp_path / "main_版式1.docx", CHAPTERS)
+    assert gate_loop_runner.run_phase_check_incremental(5, docx, state) != []
+    assert calls == [5, 5]
+    assert not state.reusable(5, state.phase_key(5, docx))
+
+
+def test_parallel_checks_use_private_views_and_save_once(tmp_path, monkeypatch) -> None:
+    state = IncrementalState(tmp_path / "state.json")
+    docx = _write_docx(tmp_path / "main_版式1.docx", CHAPTERS)
+    saves: list[int] = []
+    real_save = state.save
+
+    def counting_save(used=()):
+        used = list(used)
+        saves.append(len(used))
+        real_save(used)
+
+    monkeypatch.setattr(state, "save", counting_save)
+    results = gate_loop_runner.run_phase_checks_parallel([2, 5], docx, state)
+
+    assert results[5] == gate_loop_runner.run_phase_check(5, docx)
+    assert saves == [2]  # 一次 save 合并两个 Phase 的视图
+    assert state.note(5) == "chapter blocks reused 0/5"
+    # 视图是私有副本：修改它不影响共享状态
+    view = state.segment_cache()
+    rule = next(iter(view.entries))
+    view.entries[rule].clear()
+    assert state.segments[rule]
+    assert IncrementalState(tmp_path / "state.json").segments == state.segments
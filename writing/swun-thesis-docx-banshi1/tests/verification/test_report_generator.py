@@ -1,4 +1,38 @@
 """Tests for report_generator."""
-import pytest
 
-# Tests will be added in subsequent phases
+from scripts.verification.report_generator import (
+    _contiguous_runs,
+    _normalize_page_text,
+    _pgm_has_visual_content,
+    _split_pdf_text_pages,
+)
+
+
+def _pgm(width: int, height: int, dark: list[tuple[int, int]]) -> bytes:
+    pixels = bytearray(b"\xff" * (width * height))
+    for x, y in dark:
+        pixels[y * width + x] = 0
+    return f"P5\n{width} {height}\n255\n".encode() + bytes(pixels)
+
+
+def test_pdftotext_pages_split_on_form_feed() -> None:
+    text = "第1章 绪论\n正文\n1\n\f\n\n ii \n\f参考文献\n\f"
+    pages = _split_pdf_text_pages(text)
+    assert len(pages) == 3
+    assert [_normalize_page_text(t) for t in pages] == ["第1章 绪论正文", "", "参考文献"]
+
+
+def test_contiguous_runs() -> None:
+    assert _contiguous_runs([2, 3, 4, 7, 9, 10]) == [(2, 4), (7, 7), (9, 10)]
+    assert _contiguous_runs([]) == []
+
+
+def test_pgm_visual_content_ignores_margins_and_footer() -> None:
+    w, h = 595, 842  # A4 at 72 DPI
+    footer_only = [(x, int(h * 0.95)) for x in range(250, 350)]
+    assert _pgm_has_visual_content(_pgm(w, h, footer_only)) is False
+
+    body_block = [(x, y) for x in range(100, 200) for y in range(300, 310)]
+    assert _pgm_has_visual_content(_pgm(w, h, body_block)) is True
+
+    assert _pgm_has_visual_content(b"P6\n1 1\n255\n\x00") is None
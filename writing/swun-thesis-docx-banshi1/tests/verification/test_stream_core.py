@@ -0,0 +1,133 @@
+"""Tests for the streaming verification core."""
+
+from __future__ import annotations
+
+import io
+import zipfile
+
+from scripts.verification import report_generator
+from verification.stream_core import iter_body_blocks, verify_stream
+
+
+W_NS = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+M_NS = "http://schemas.openxmlformats.org/officeDocument/2006/math"
+R_NS = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+
+
+def _p(text: str = "", ppr: str = "", extra: str = "") -> str:
+    run = f"<w:r><w:t xml:space=\"preserve\">{text}</w:t></w:r>" if text else ""
+    return f"<w:p><w:pPr>{ppr}</w:pPr>{extra}{run}</w:p>"
+
+
+def _h(level: str, text: str) -> str:
+    return _p(text, f'<w:pStyle w:val="{level}"/>')
+
+
+INDENT = '<w:ind w:firstLineChars="200"/>'
+CENTER = '<w:jc w:val="center"/>'
+DRAWING = "<w:r><w:drawing/></w:r>"
+
+BODY = "".join([
+    _p("封面"),
+    _h("1", "目录"),
+    _p(extra='<w:r><w:instrText xml:space="preserve"> TOC \\o "1-3" </w:instrText></w:r>'),
+    _p(extra='<w:r><w:br w:type="page"/></w:r>'),
+    _h("1", "摘要"),
+    _p("摘要正文第一段", "<w:pageBreakBefore/>"),
+    _p("中文 ，文本出现多余空格"),
+    _p(),
+    _p("关键词：区块链；车联网；信誉；共识；激励"),
+    _h("1", "Abstract"),
+    _p("English abstract body."),
+    _p("Keywords: blockchain; IoV"),
+    _p(ppr='<w:sectPr><w:pgNumType w:fmt="lowerRoman"/></w:sectPr>'),
+    _h("1", "第1章 绪论"),
+    _h("Heading5", "研究内容"),
+    _p("没有首行缩进的正文"),
+    _h("Heading5", "(1) 已编号"),
+    _p(),
+    _h("2", "1.1 背景"),
+    _p(extra='<w:bookmarkStart w:id="1" w:name="fig:arch"/>' + DRAWING + '<w:bookmarkEnd w:id="1"/>'),
+    _p("图1-2 系统架构", CENTER),
+    _p("Figure 1-2 Architecture", CENTER),
+    _p("如图1.2所示", INDENT,
+       '<w:hyperlink w:anchor="fig:arch"><w:r><w:t>图1.2</w:t></w:r></w:hyperlink>'
+       '<w:r><w:rPr><w:color w:val="0563C1"/></w:rPr><w:t>蓝色</w:t></w:r>'),
+    _p("表1-1 参数设置", CENTER),
+    _p("Table 1-3 Parameters", CENTER),
+    '<w:tbl><w:tblPr/><w:tr><w:tc>'
+    + _p("参数", extra='<w:bookmarkStart w:id="2" w:name="tab:params"/><w:bookmarkEnd w:id="2"/>')
+    + "</w:tc></w:tr></w:tbl>",
+    '<w:bookmarkStart w:id="3" w:name="tab:orphan"/>',
+    _p(extra=f'<m:oMathPara xmlns:m="{M_NS}"><m:oMath><m:r><m:t>∀</m:t></m:r></m:oMath></m:oMathPara>'
+       "<w:r><w:t>(1-1)</w:t></w:r>"),
+    _h("1", "第2章 方案"),
+    _p(extra=DRAWING),
+    _p("图2-1 流程", CENTER),
+    _h("1", "参考文献"),
+    _p("[1] 作者. 题名[J]. 期刊, 2020.", extra=(
+        f'<w:hyperlink xmlns:r="{R_NS}" r:id="rId9">'
+        "<w:r><w:t>https://doi.org/10.1000/xyz</w:t></w:r></w:hyperlink>")),
+    _h("1", "致谢"),
+    _p("感谢"),
+    '<w:sectPr><w:pgNumType w:fmt="decimal" w:start="1"/></w:sectPr>',
+])
+
+
+def _write_docx(path, body: str = BODY) -> str:
+    doc = f'<w:document xmlns:w="{W_NS}"><w:body>{body}</w:body></w:document>'
+    num = f'<w:numbering xmlns:w="{W_NS}"><w:abstractNum w:abstractNumId="0"/></w:numbering>'
+    with zipfile.ZipFile(path, "w") as zf:
+        zf.writestr("word/document.xml", doc)
+        zf.writestr("word/numbering.xml", num)
+    return str(path)
+
+
+def _write_profile_docx(path) -> None:
+    paras = (
+        _p("图3-1 架构", '<w:jc w:val="center"/><w:spacing w:before="6"/>')
+        + _p("表3-1 参数", '<w:jc w:val="left"/>')
+    )
+    with zipfile.ZipFile(path, "w") as zf:
+        zf.writestr("word/document.xml",
+                    f'<w:document xmlns:w="{W_NS}"><w:body>{paras}</w:body></w:document>')
+
+
+def test_stream_findings_match_string_checks(tmp_path, monkeypatch) -> None:
+    profile = tmp_path / "profile.docx"
+    _write_profile_docx(profile)
+    monkeypatch.setenv("SWUN_CAPTION_PROFILE_DOCX", str(profile))
+    docx = _write_docx(tmp_path / "main_版式1.docx")
+    with zipfile.ZipFile(docx) as zf:
+        doc = zf.read("word/document.xml").decode("utf-8")
+        num = zf.read("word/numbering.xml").decode("utf-8")
+
+    legacy = {
+        1: report_generator.check_phase1_structure(doc, num),
+        2: report_generator.check_phase2_style(doc),
+        3: report_generator.check_phase3_caption(doc, docx),
+        4: report_generator.check_phase4_crossref(doc),
+    }
+    streamed = verify_stream(docx)
+
+    assert streamed == legacy
+    # 样例覆盖各 Phase 的主要规则，避免“两边都为空”式的假等价
+    assert all(len(errors) >= 3 for errors in streamed.values()), streamed
+    assert verify_stream(docx, (4, 2)) == {4: legacy[4], 2: legacy[2]}
+
+
+def test_body_blocks_are_released_after_each_step() -> None:
+    doc = f'<w:document xmlns:w="{W_NS}"><w:body>{_p("a")}{_p("b")}{_p("c")}</w:body></w:document>'
+    seen = []
+    for el in iter_body_blocks(io.BytesIO(doc.encode("utf-8"))):
+        assert all(len(prev) == 0 for prev in seen)
+        assert len(el) == 2
+        seen.append(el)
+    assert len(seen) == 3
+
+
+def test_malformed_document_is_reported_per_phase(tmp_path) -> None:
+    docx = _write_docx(tmp_path / "bad.docx", "<w:p><w:r></w:p>")
+    results = verify_stream(docx, (2, 4))
+    assert set(results) == {2, 4}
+    assert all(len(v) == 1 and v[0].startswith("failed to parse document.xml") for v in results.values())